@@ -3,20 +3,20 @@ from __future__ import annotations
 from types import SimpleNamespace
 
 from worker_chart_export import core
+from worker_chart_export.config import WorkerConfig
 from worker_chart_export.core import CoreResult
 from worker_chart_export.orchestration import StepError
 from worker_chart_export.templates import RequestFailure
 from worker_chart_export.chart_img import ChartApiResult, ChartApiError
 
 
-class DummyConfig:
-    charts_bucket = "gs://dummy"
-    charts_api_mode = "mock"
-    charts_default_timezone = "Etc/UTC"
-    chart_img_accounts = []
-    firestore_database = "tda-db"
-    service = "worker-chart-export"
-    env = "test"
+CONFIG = WorkerConfig(
+    charts_bucket="gs://dummy",
+    charts_api_mode="mock",
+    charts_default_timezone="Etc/UTC",
+    chart_img_accounts=(),
+    firestore_database="tda-db",
+)
 
 
 def test_no_ready_step_returns_validation_failed(monkeypatch):
@@ -25,7 +25,7 @@ def test_no_ready_step_returns_validation_failed(monkeypatch):
     monkeypatch.setattr(core, "_firestore_client", lambda *_args, **_kwargs: object())
     monkeypatch.setattr(core, "_storage_client", lambda: object())
 
-    result = core.run_chart_export_step(flow_run=flow_run, step_id=None, config=DummyConfig())
+    result = core.run_chart_export_step(flow_run=flow_run, step_id=None, config=CONFIG)
 
     assert isinstance(result, CoreResult)
     assert result.status == "FAILED"
@@ -49,7 +49,7 @@ def test_build_requests_failure_propagates(monkeypatch):
     monkeypatch.setattr(
         core,
         "claim_step_transaction",
-        lambda client, run_id, step_id: SimpleNamespace(claimed=True, status="READY"),
+        lambda client, run_id, step_id, **kwargs: SimpleNamespace(claimed=True, status="READY"),
     )
     monkeypatch.setattr(
         core,
@@ -87,7 +87,7 @@ def test_build_requests_failure_propagates(monkeypatch):
     monkeypatch.setattr(core, "_firestore_client", lambda *_args, **_kwargs: object())
     monkeypatch.setattr(core, "_storage_client", lambda: object())
 
-    result = core.run_chart_export_step(flow_run=flow_run, step_id=None, config=DummyConfig())
+    result = core.run_chart_export_step(flow_run=flow_run, step_id=None, config=CONFIG)
 
     assert result.status == "FAILED"
     assert result.error_code == "VALIDATION_FAILED"
@@ -111,7 +111,7 @@ def test_no_accounts_limit_exceeded(monkeypatch):
     monkeypatch.setattr(
         core,
         "claim_step_transaction",
-        lambda client, run_id, step_id: SimpleNamespace(claimed=True, status="READY"),
+        lambda client, run_id, step_id, **kwargs: SimpleNamespace(claimed=True, status="READY"),
     )
     monkeypatch.setattr(
         core,
@@ -131,14 +131,13 @@ def test_no_accounts_limit_exceeded(monkeypatch):
         ),
     )
     # return limit exceeded
-    monkeypatch.setattr(
-        core,
-        "_execute_chart_request",
-        lambda **kwargs: ChartApiResult(
+    async def fake_execute(**kwargs):
+        return ChartApiResult(
             ok=False,
             error=ChartApiError(code="CHART_API_LIMIT_EXCEEDED", message="limit"),
-        ),
-    )
+        )
+
+    monkeypatch.setattr(core, "_execute_chart_request", fake_execute)
     monkeypatch.setattr(
         core,
         "upload_pngs",
@@ -154,6 +153,6 @@ def test_no_accounts_limit_exceeded(monkeypatch):
     monkeypatch.setattr(core, "_firestore_client", lambda *_args, **_kwargs: object())
     monkeypatch.setattr(core, "_storage_client", lambda: object())
 
-    result = core.run_chart_export_step(flow_run=flow_run, step_id=None, config=DummyConfig())
+    result = core.run_chart_export_step(flow_run=flow_run, step_id=None, config=CONFIG)
     assert result.status == "FAILED"
     assert result.error_code == "CHART_API_LIMIT_EXCEEDED"
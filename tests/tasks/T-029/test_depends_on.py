@@ -1,18 +1,17 @@
 import unittest
 from unittest.mock import patch
 
+from worker_chart_export.config import WorkerConfig
 from worker_chart_export.ingest import pick_ready_chart_export_step
 from worker_chart_export import core
 
 
-class DummyConfig:
-    charts_bucket = "gs://dummy"
-    charts_api_mode = "mock"
-    charts_default_timezone = "Etc/UTC"
-    chart_img_accounts = []
-    firestore_database = "(default)"
-    service = "worker-chart-export"
-    env = "test"
+CONFIG = WorkerConfig(
+    charts_bucket="gs://dummy",
+    charts_api_mode="mock",
+    charts_default_timezone="Etc/UTC",
+    chart_img_accounts=(),
+)
 
 
 def _flow_run(steps):
@@ -98,7 +97,7 @@ class TestDependsOnCore(unittest.TestCase):
             core, "claim_step_transaction"
         ) as claim:
             result = core.run_chart_export_step(
-                flow_run=flow_run, step_id="stepA", config=DummyConfig()
+                flow_run=flow_run, step_id="stepA", config=CONFIG
             )
             self.assertEqual(result.status, "FAILED")
             self.assertEqual(result.error_code, "VALIDATION_FAILED")
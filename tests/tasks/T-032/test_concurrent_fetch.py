@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+import unittest
+from dataclasses import replace
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from worker_chart_export import core
+from worker_chart_export.chart_img import ChartApiResult
+from worker_chart_export.config import ChartImgAccount, WorkerConfig
+from worker_chart_export.errors import ConfigError
+from worker_chart_export.single_flight import SingleFlight
+
+
+PNG_BYTES = b"\x89PNG\r\n\x1a\nTEST"
+
+
+CONFIG = WorkerConfig(
+    charts_bucket="gs://dummy",
+    charts_api_mode="mock",
+    charts_default_timezone="Etc/UTC",
+    chart_img_accounts=(),
+    chart_img_breaker_failures=0,
+)
+
+
+def _items(count: int) -> list[SimpleNamespace]:
+    return [
+        SimpleNamespace(
+            chart_template_id=f"ctpl_{i}",
+            kind="price",
+            chart_img_symbol="BINANCE:BTCUSDT",
+            interval="1h",
+            request={},
+        )
+        for i in range(count)
+    ]
+
+
+def _flow_run(count: int) -> dict:
+    return {
+        "runId": "20251221-120000_BTCUSDT_demo",
+        "scope": {"symbol": "BTCUSDT"},
+        "steps": {
+            "s1": {
+                "stepType": "CHART_EXPORT",
+                "status": "READY",
+                "timeframe": "1h",
+                "inputs": {
+                    "minImages": 1,
+                    "requests": [{"chartTemplateId": f"ctpl_{i}"} for i in range(count)],
+                },
+            }
+        },
+    }
+
+
+class TestConcurrentFetch(unittest.TestCase):
+    def _run(self, *, items, execute, config=None):
+        uploaded: dict = {}
+
+        def fake_upload_pngs(**kwargs):
+            uploaded["inputs"] = list(kwargs["inputs"])
+            return SimpleNamespace(
+                items=[
+                    {
+                        "chartTemplateId": entry.chart_template_id,
+                        "kind": entry.kind,
+                        "generatedAt": entry.generated_at.rfc3339,
+                        "png_gcs_uri": f"gs://dummy/{entry.chart_template_id}.png",
+                    }
+                    for entry in kwargs["inputs"]
+                ],
+                failures=[],
+            )
+
+        with patch.object(core, "_firestore_client", return_value=object()), patch.object(
+            core, "_storage_client", return_value=object()
+        ), patch.object(core, "_build_chart_img_client", return_value=None), patch.object(
+            core,
+            "claim_step_transaction",
+            return_value=SimpleNamespace(claimed=True, status="READY"),
+        ), patch.object(
+            core,
+            "build_chart_requests",
+            return_value=SimpleNamespace(items=items, failures=[], validation_error=None),
+        ), patch.object(
+            core, "_execute_chart_request", new=execute
+        ), patch.object(
+            core, "upload_pngs", side_effect=fake_upload_pngs
+        ), patch.object(
+            core, "validate_manifest", return_value=None
+        ), patch.object(
+            core, "write_manifest", return_value=("gs://dummy/manifest.json", None)
+        ), patch.object(
+            core, "finalize_step", return_value=None
+        ):
+            result = core.run_chart_export_step(
+                flow_run=_flow_run(len(items)), step_id="s1", config=config or CONFIG
+            )
+        return result, uploaded
+
+    def test_items_are_fetched_in_parallel_and_keep_request_order(self) -> None:
+        items = _items(4)
+        delays = {"ctpl_0": 0.3, "ctpl_1": 0.1, "ctpl_2": 0.2, "ctpl_3": 0.05}
+        in_flight = {"current": 0, "max": 0}
+
+        async def execute(**kwargs):
+            in_flight["current"] += 1
+            in_flight["max"] = max(in_flight["max"], in_flight["current"])
+            await asyncio.sleep(delays[kwargs["request"].chart_template_id])
+            in_flight["current"] -= 1
+            return ChartApiResult(ok=True, png_bytes=PNG_BYTES)
+
+        started = time.monotonic()
+        result, uploaded = self._run(items=items, execute=execute)
+        elapsed = time.monotonic() - started
+
+        self.assertEqual(result.status, "SUCCEEDED")
+        self.assertEqual(result.items_count, 4)
+        self.assertGreater(in_flight["max"], 1)
+        self.assertLess(elapsed, sum(delays.values()))
+        self.assertEqual(
+            [entry.chart_template_id for entry in uploaded["inputs"]],
+            ["ctpl_0", "ctpl_1", "ctpl_2", "ctpl_3"],
+        )
+
+    def test_concurrency_of_one_runs_sequentially(self) -> None:
+        config = replace(CONFIG, chart_fetch_concurrency=1)
+        in_flight = {"current": 0, "max": 0}
+
+        async def execute(**kwargs):
+            in_flight["current"] += 1
+            in_flight["max"] = max(in_flight["max"], in_flight["current"])
+            await asyncio.sleep(0.01)
+            in_flight["current"] -= 1
+            return ChartApiResult(ok=True, png_bytes=PNG_BYTES)
+
+        result, _ = self._run(items=_items(3), execute=execute, config=config)
+        self.assertEqual(result.status, "SUCCEEDED")
+        self.assertEqual(in_flight["max"], 1)
+
+    def test_account_claims_are_serialized(self) -> None:
+        active = {"current": 0, "max": 0}
+        lock = threading.Lock()
+        account = ChartImgAccount(id="acc1", api_key="secret")
+
+        def fake_select(**kwargs):
+            with lock:
+                active["current"] += 1
+                active["max"] = max(active["max"], active["current"])
+            time.sleep(0.02)
+            with lock:
+                active["current"] -= 1
+            return SimpleNamespace(account=account)
+
+        class FakeClient:
+            single_flight = SingleFlight()
+
+            def flight_key(self, request):
+                return request.chart_template_id
+
+            async def cached_result_async(self, request):
+                return None
+
+            async def remember_async(self, request, result):
+                pass
+
+            async def fetch_async(self, **kwargs):
+                return ChartApiResult(ok=True, png_bytes=PNG_BYTES)
+
+        results: list[ChartApiResult] = []
+
+        async def collect(index, item, api_result):
+            results.append(api_result)
+
+        with patch.object(core, "select_account_for_request", side_effect=fake_select):
+            asyncio.run(
+                core._fetch_chart_items(
+                    items=_items(6),
+                    chart_img_client=FakeClient(),
+                    config=CONFIG,
+                    firestore_client=object(),
+                    logger=core.logging.getLogger("test"),
+                    run_id="run1",
+                    step_id="s1",
+                    on_result=collect,
+                )
+            )
+        self.assertEqual(len(results), 6)
+        self.assertTrue(all(r.ok for r in results))
+        self.assertEqual(active["max"], 1)
+
+
+class TestFetchConcurrencyConfig(unittest.TestCase):
+    def _env(self, **extra: str) -> dict[str, str]:
+        env = {
+            "CHARTS_BUCKET": "gs://bucket",
+            "CHART_IMG_ACCOUNTS_JSON": '[{"id":"acc1","apiKey":"k"}]',
+        }
+        env.update(extra)
+        return env
+
+    def test_default_concurrency(self) -> None:
+        with patch.dict(os.environ, self._env(), clear=True):
+            self.assertEqual(WorkerConfig.from_env().chart_fetch_concurrency, 4)
+
+    def test_invalid_concurrency_rejected(self) -> None:
+        with patch.dict(os.environ, self._env(CHARTS_FETCH_CONCURRENCY="0"), clear=True):
+            with self.assertRaises(ConfigError):
+                WorkerConfig.from_env()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import asyncio
+import unittest
+from types import SimpleNamespace
+from typing import Any, Mapping
+from unittest.mock import patch
+
+import httpx
+
+from worker_chart_export import core
+from worker_chart_export.chart_img import (
+    AsyncHttpxRequester,
+    ChartApiResult,
+    ChartImgClient,
+    ChartImgRequest,
+    HttpRequestError,
+    HttpResponse,
+    fetch_with_retries_async,
+)
+from worker_chart_export.config import ChartImgAccount
+
+
+PNG_BYTES = b"\x89PNG\r\n\x1a\nTEST"
+
+
+class FakeAsyncRequester:
+    def __init__(self, responses: list[HttpResponse | Exception]) -> None:
+        self._responses = list(responses)
+        self.calls: list[dict[str, Any]] = []
+
+    async def post(
+        self,
+        url: str,
+        *,
+        headers: Mapping[str, str],
+        json_body: Mapping[str, Any],
+        timeout: float,
+    ) -> HttpResponse:
+        self.calls.append({"url": url, "headers": dict(headers), "timeout": timeout})
+        response = self._responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+class FakeSyncRequester:
+    def __init__(self, response: HttpResponse) -> None:
+        self._response = response
+        self.calls = 0
+
+    def post(self, url: str, **kwargs: Any) -> HttpResponse:
+        self.calls += 1
+        return self._response
+
+
+class TestAsyncChartImgClient(unittest.TestCase):
+    def setUp(self) -> None:
+        self.account = ChartImgAccount(id="acc1", api_key="secret")
+        self.request = ChartImgRequest(
+            chart_template_id="ctpl",
+            chart_img_symbol="BINANCE:BTCUSDT",
+            timeframe="1h",
+            payload={"symbol": "BINANCE:BTCUSDT", "interval": "1h"},
+        )
+
+    def test_fetch_async_uses_async_requester(self) -> None:
+        requester = FakeAsyncRequester([HttpResponse(200, {}, PNG_BYTES)])
+        client = ChartImgClient(mode="real", async_http=requester)
+        result = asyncio.run(client.fetch_async(account=self.account, request=self.request))
+        self.assertTrue(result.ok)
+        self.assertEqual(result.png_bytes, PNG_BYTES)
+        self.assertEqual(requester.calls[0]["headers"]["x-api-key"], "secret")
+
+    def test_fetch_async_falls_back_to_sync_requester(self) -> None:
+        requester = FakeSyncRequester(HttpResponse(200, {}, PNG_BYTES))
+        client = ChartImgClient(mode="real", http=requester)
+        result = asyncio.run(client.fetch_async(account=self.account, request=self.request))
+        self.assertTrue(result.ok)
+        self.assertEqual(requester.calls, 1)
+
+    def test_httpx_async_requester_maps_timeouts(self) -> None:
+        def handler(request: httpx.Request) -> httpx.Response:
+            raise httpx.ReadTimeout("slow", request=request)
+
+        async def run() -> None:
+            requester = AsyncHttpxRequester(httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+            try:
+                with self.assertRaises(HttpRequestError) as ctx:
+                    await requester.post("https://x", headers={}, json_body={}, timeout=1.0)
+                self.assertTrue(ctx.exception.is_timeout)
+            finally:
+                await requester.aclose()
+
+        asyncio.run(run())
+
+    def test_retries_use_async_sleep(self) -> None:
+        requester = FakeAsyncRequester(
+            [
+                HttpResponse(500, {}, b'{"message":"boom"}'),
+                HttpResponse(200, {}, PNG_BYTES),
+            ]
+        )
+        client = ChartImgClient(mode="real", async_http=requester)
+        sleeps: list[float] = []
+
+        async def select_account():
+            return self.account
+
+        async def fake_sleep(seconds: float) -> None:
+            sleeps.append(seconds)
+
+        result = asyncio.run(
+            fetch_with_retries_async(
+                client=client,
+                request=self.request,
+                select_account=select_account,
+                sleep_fn=fake_sleep,
+            )
+        )
+        self.assertTrue(result.ok)
+        # Full-jitter backoff: a single sleep within [0, base].
+        self.assertEqual(len(sleeps), 1)
+        self.assertTrue(0 <= sleeps[0] <= 0.5)
+
+
+class TestAsyncCore(unittest.TestCase):
+    def test_async_entrypoint_runs_inside_existing_loop(self) -> None:
+        flow_run = {
+            "runId": "20251221-120000_BTCUSDT_demo",
+            "scope": {"symbol": "BTCUSDT"},
+            "steps": {
+                "s1": {
+                    "stepType": "CHART_EXPORT",
+                    "status": "READY",
+                    "timeframe": "1h",
+                    "inputs": {"requests": [{"chartTemplateId": "ctpl"}]},
+                }
+            },
+        }
+        config = SimpleNamespace(
+            charts_bucket="gs://dummy",
+            charts_api_mode="mock",
+            charts_default_timezone="Etc/UTC",
+            chart_img_accounts=[],
+            firestore_database="(default)",
+            chart_fetch_concurrency=4,
+            charts_upload_mode="batch",
+            charts_pipeline_depth=4,
+            step_deadline_sec=None,
+            finalize_reserve_sec=10.0,
+            png_memory_budget_bytes=64 * 1024 * 1024,
+            png_spill_dir=None,
+            png_optimize_level=0,
+            chart_img_usage_claim="request",
+            chart_img_usage_write="precondition",
+            chart_img_usage_shards=0,
+            chart_img_account_strategy="ordered",
+        )
+        item = SimpleNamespace(
+            chart_template_id="ctpl",
+            kind="price",
+            chart_img_symbol="BINANCE:BTCUSDT",
+            interval="1h",
+            request={},
+        )
+
+        async def fake_execute(**kwargs):
+            return ChartApiResult(ok=True, png_bytes=PNG_BYTES)
+
+        with patch.object(
+            core,
+            "claim_step_transaction",
+            return_value=SimpleNamespace(claimed=True, status="READY"),
+        ), patch.object(
+            core,
+            "build_chart_requests",
+            return_value=SimpleNamespace(items=[item], failures=[], validation_error=None),
+        ), patch.object(core, "_execute_chart_request", new=fake_execute), patch.object(
+            core,
+            "upload_pngs",
+            return_value=SimpleNamespace(
+                items=[
+                    {
+                        "chartTemplateId": "ctpl",
+                        "kind": "price",
+                        "generatedAt": "2025-12-21T12:00:00Z",
+                        "png_gcs_uri": "gs://dummy/x.png",
+                    }
+                ],
+                failures=[],
+            ),
+        ), patch.object(core, "write_manifest", return_value=("gs://dummy/m.json", None)), patch.object(
+            core, "finalize_step", return_value=None
+        ):
+
+            async def run():
+                return await core.run_chart_export_step_async(
+                    flow_run=flow_run,
+                    step_id="s1",
+                    config=config,
+                    firestore_client=object(),
+                    storage_client=object(),
+                    chart_img_client=ChartImgClient(mode="mock"),
+                )
+
+            result = asyncio.run(run())
+
+        self.assertEqual(result.status, "SUCCEEDED")
+        self.assertEqual(result.outputs_manifest_gcs_uri, "gs://dummy/m.json")
+
+
+if __name__ == "__main__":
+    unittest.main()
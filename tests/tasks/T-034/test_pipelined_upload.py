@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from worker_chart_export import core
+from worker_chart_export.chart_img import ChartApiError, ChartApiResult
+from worker_chart_export.config import WorkerConfig
+
+
+PNG_BYTES = b"\x89PNG\r\n\x1a\nTEST"
+RUN_ID = "20251221-120000_BTCUSDT_demo"
+
+
+CONFIG = WorkerConfig(
+    charts_bucket="gs://dummy",
+    charts_api_mode="mock",
+    charts_default_timezone="Etc/UTC",
+    chart_img_accounts=(),
+    chart_fetch_concurrency=2,
+    charts_upload_mode="pipelined",
+    charts_pipeline_depth=1,
+)
+
+
+class FakeBlob:
+    def __init__(self, storage: "FakeStorageClient", path: str) -> None:
+        self._storage = storage
+        self._path = path
+
+    def upload_from_string(self, data, content_type=None) -> None:
+        self._storage.upload(self._path, data)
+
+
+class FakeBucket:
+    def __init__(self, storage: "FakeStorageClient") -> None:
+        self._storage = storage
+
+    def blob(self, path: str) -> FakeBlob:
+        return FakeBlob(self._storage, path)
+
+
+class FakeStorageClient:
+    def __init__(self, *, delay: float = 0.0, fail_for: str | None = None) -> None:
+        self.delay = delay
+        self.fail_for = fail_for
+        self.objects: dict[str, bytes] = {}
+        self.upload_times: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, name: str) -> FakeBucket:
+        return FakeBucket(self)
+
+    def upload(self, path: str, data: bytes) -> None:
+        time.sleep(self.delay)
+        if self.fail_for and self.fail_for in path and path.endswith(".png"):
+            raise RuntimeError("boom")
+        with self._lock:
+            self.objects[path] = data
+            self.upload_times[path] = time.monotonic()
+
+
+def _items(count: int) -> list[SimpleNamespace]:
+    return [
+        SimpleNamespace(
+            chart_template_id=f"ctpl_{i}",
+            kind="price",
+            chart_img_symbol="BINANCE:BTCUSDT",
+            interval="1h",
+            request={},
+        )
+        for i in range(count)
+    ]
+
+
+def _flow_run(count: int, min_images: int = 1) -> dict:
+    return {
+        "runId": RUN_ID,
+        "scope": {"symbol": "BTCUSDT"},
+        "steps": {
+            "s1": {
+                "stepType": "CHART_EXPORT",
+                "status": "READY",
+                "timeframe": "1h",
+                "inputs": {
+                    "minImages": min_images,
+                    "requests": [{"chartTemplateId": f"ctpl_{i}"} for i in range(count)],
+                },
+            }
+        },
+    }
+
+
+class TestPipelinedUpload(unittest.TestCase):
+    def _run(self, *, items, execute, storage):
+        with patch.object(
+            core,
+            "claim_step_transaction",
+            return_value=SimpleNamespace(claimed=True, status="READY"),
+        ), patch.object(
+            core,
+            "build_chart_requests",
+            return_value=SimpleNamespace(items=items, failures=[], validation_error=None),
+        ), patch.object(core, "_execute_chart_request", new=execute), patch.object(
+            core, "finalize_step", return_value=None
+        ):
+            return core.run_chart_export_step(
+                flow_run=_flow_run(len(items)),
+                step_id="s1",
+                config=CONFIG,
+                firestore_client=object(),
+                storage_client=storage,
+                chart_img_client=SimpleNamespace(),
+            )
+
+    def test_uploads_overlap_renders_and_memory_is_bounded(self) -> None:
+        storage = FakeStorageClient(delay=0.05)
+        outstanding = {"current": 0, "max": 0}
+        fetch_done: dict[str, float] = {}
+        original_upload = storage.upload
+
+        def tracking_upload(path: str, data: bytes) -> None:
+            original_upload(path, data)
+            if path.endswith(".png"):
+                outstanding["current"] -= 1
+
+        storage.upload = tracking_upload  # type: ignore[method-assign]
+
+        async def execute(**kwargs):
+            await asyncio.sleep(0.03)
+            outstanding["current"] += 1
+            outstanding["max"] = max(outstanding["max"], outstanding["current"])
+            fetch_done[kwargs["request"].chart_template_id] = time.monotonic()
+            return ChartApiResult(ok=True, png_bytes=PNG_BYTES)
+
+        result = self._run(items=_items(8), execute=execute, storage=storage)
+
+        self.assertEqual(result.status, "SUCCEEDED")
+        self.assertEqual(result.items_count, 8)
+        first_upload = min(storage.upload_times.values())
+        self.assertLess(first_upload, max(fetch_done.values()))
+        # concurrency (2) + queue depth (1) + uploading workers (1)
+        self.assertLessEqual(outstanding["max"], 4)
+
+    def test_manifest_keeps_request_order_and_slots_failures(self) -> None:
+        storage = FakeStorageClient(fail_for="ctpl_2")
+        delays = {"ctpl_0": 0.05, "ctpl_1": 0.0, "ctpl_2": 0.01, "ctpl_3": 0.02}
+
+        async def execute(**kwargs):
+            chart_template_id = kwargs["request"].chart_template_id
+            await asyncio.sleep(delays[chart_template_id])
+            if chart_template_id == "ctpl_1":
+                return ChartApiResult(
+                    ok=False,
+                    error=ChartApiError(code="CHART_API_FAILED", message="bad", details={}),
+                )
+            return ChartApiResult(ok=True, png_bytes=PNG_BYTES)
+
+        captured = {}
+        original_validate = core.validate_manifest
+
+        def capture_validate(*, manifest):
+            captured["manifest"] = manifest
+            return original_validate(manifest=manifest)
+
+        with patch.object(core, "validate_manifest", side_effect=capture_validate):
+            result = self._run(items=_items(4), execute=execute, storage=storage)
+
+        self.assertEqual(result.status, "SUCCEEDED")
+        manifest = captured["manifest"]
+        self.assertEqual(
+            [item["chartTemplateId"] for item in manifest["items"]], ["ctpl_0", "ctpl_3"]
+        )
+        self.assertEqual(
+            [(f["request"]["chartTemplateId"], f["error"]["code"]) for f in manifest["failures"]],
+            [("ctpl_1", "CHART_API_FAILED"), ("ctpl_2", "GCS_WRITE_FAILED")],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+
+class TestUploadModeConfig(unittest.TestCase):
+    def _env(self, **extra: str) -> dict[str, str]:
+        return {
+            "CHARTS_BUCKET": "gs://bucket",
+            "CHART_IMG_ACCOUNTS_JSON": '[{"id":"acc1","apiKey":"k"}]',
+            **extra,
+        }
+
+    def test_batch_by_default_and_pipelined_is_opt_in(self) -> None:
+        with patch.dict(os.environ, self._env(), clear=True):
+            self.assertEqual(WorkerConfig.from_env().charts_upload_mode, "batch")
+        with patch.dict(os.environ, self._env(CHARTS_UPLOAD_MODE="pipelined"), clear=True):
+            self.assertEqual(WorkerConfig.from_env().charts_upload_mode, "pipelined")
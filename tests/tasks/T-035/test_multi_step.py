@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from worker_chart_export import core
+from worker_chart_export.chart_img import ChartApiResult
+from worker_chart_export.config import WorkerConfig
+from worker_chart_export.core import CoreResult
+from worker_chart_export.entrypoints import cloud_event
+from worker_chart_export.ingest import pick_ready_chart_export_step
+
+
+PNG_BYTES = b"\x89PNG\r\n\x1a\nTEST"
+RUN_ID = "20251221-120000_BTCUSDT_demo"
+
+
+CONFIG = WorkerConfig(
+    charts_bucket="gs://dummy",
+    charts_api_mode="mock",
+    charts_default_timezone="Etc/UTC",
+    chart_img_accounts=(),
+    ready_steps_mode="all",
+)
+
+
+def _step(status: str = "READY", depends_on: list[str] | None = None) -> dict:
+    return {
+        "stepType": "CHART_EXPORT",
+        "status": status,
+        "timeframe": "1h",
+        "dependsOn": depends_on or [],
+        "inputs": {"requests": [{"chartTemplateId": "ctpl"}]},
+    }
+
+
+def _flow_run() -> dict:
+    return {
+        "runId": RUN_ID,
+        "scope": {"symbol": "BTCUSDT"},
+        "steps": {
+            "charts:4h": _step(),
+            "charts:1h": _step(),
+            "charts:1d": _step(depends_on=["other"]),
+            "charts:done": _step(status="SUCCEEDED"),
+            "other": {"stepType": "OTHER", "status": "RUNNING"},
+        },
+    }
+
+
+class TestReadyStepIds(unittest.TestCase):
+    def test_all_unblocked_ready_steps_are_listed_in_order(self) -> None:
+        pick = pick_ready_chart_export_step(_flow_run())
+        self.assertEqual(pick.step_id, "charts:1h")
+        self.assertEqual(pick.ready_step_ids, ("charts:1h", "charts:4h"))
+        self.assertEqual([b.step_id for b in pick.blocked], ["charts:1d"])
+
+
+class TestRunSteps(unittest.TestCase):
+    def test_steps_run_concurrently_with_serialized_flow_run_writes(self) -> None:
+        writes = {"current": 0, "max": 0}
+        renders = {"current": 0, "max": 0}
+        lock = threading.Lock()
+
+        def tracked_write(result):
+            def inner(**kwargs):
+                with lock:
+                    writes["current"] += 1
+                    writes["max"] = max(writes["max"], writes["current"])
+                time.sleep(0.02)
+                with lock:
+                    writes["current"] -= 1
+                return result
+
+            return inner
+
+        async def execute(**kwargs):
+            renders["current"] += 1
+            renders["max"] = max(renders["max"], renders["current"])
+            await asyncio.sleep(0.05)
+            renders["current"] -= 1
+            return ChartApiResult(ok=True, png_bytes=PNG_BYTES)
+
+        item = SimpleNamespace(
+            chart_template_id="ctpl",
+            kind="price",
+            chart_img_symbol="BINANCE:BTCUSDT",
+            interval="1h",
+            request={},
+        )
+        with patch.object(
+            core,
+            "claim_step_transaction",
+            side_effect=tracked_write(SimpleNamespace(claimed=True, status="READY")),
+        ), patch.object(
+            core, "finalize_step", side_effect=tracked_write(None)
+        ), patch.object(
+            core,
+            "build_chart_requests",
+            return_value=SimpleNamespace(items=[item], failures=[], validation_error=None),
+        ), patch.object(core, "_execute_chart_request", new=execute), patch.object(
+            core,
+            "upload_pngs",
+            return_value=SimpleNamespace(
+                items=[
+                    {
+                        "chartTemplateId": "ctpl",
+                        "kind": "price",
+                        "generatedAt": "2025-12-21T12:00:00Z",
+                        "png_gcs_uri": "gs://dummy/x.png",
+                    }
+                ],
+                failures=[],
+            ),
+        ), patch.object(core, "write_manifest", return_value=("gs://dummy/m.json", None)):
+            results = core.run_chart_export_steps(
+                flow_run=_flow_run(),
+                step_ids=["charts:1h", "charts:4h"],
+                config=CONFIG,
+                firestore_client=object(),
+                storage_client=object(),
+                chart_img_client=SimpleNamespace(),
+            )
+
+        self.assertEqual([r.step_id for r in results], ["charts:1h", "charts:4h"])
+        self.assertTrue(all(r.status == "SUCCEEDED" for r in results))
+        self.assertEqual(renders["max"], 2)
+        self.assertEqual(writes["max"], 1)
+
+    def test_failing_step_does_not_cancel_siblings(self) -> None:
+        finished: list[str] = []
+
+        async def fake_run(**kwargs):
+            if kwargs["step_id"] == "charts:1h":
+                raise RuntimeError("boom")
+            await asyncio.sleep(0.01)
+            finished.append(kwargs["step_id"])
+            return CoreResult(status="SUCCEEDED", step_id=kwargs["step_id"])
+
+        with patch.object(core, "run_chart_export_step_async", new=fake_run):
+            with self.assertRaises(RuntimeError):
+                core.run_chart_export_steps(
+                    flow_run=_flow_run(),
+                    step_ids=["charts:1h", "charts:4h"],
+                    config=CONFIG,
+                    firestore_client=object(),
+                    storage_client=object(),
+                    chart_img_client=SimpleNamespace(),
+                )
+        self.assertEqual(finished, ["charts:4h"])
+
+
+class TestCloudEventAllMode(unittest.TestCase):
+    def test_entrypoint_runs_all_ready_steps(self) -> None:
+        captured = {}
+
+        def fake_run_steps(**kwargs):
+            captured["step_ids"] = kwargs["step_ids"]
+            return [CoreResult(status="SUCCEEDED", step_id=s) for s in kwargs["step_ids"]]
+
+        parsed = SimpleNamespace(run_id=RUN_ID, flow_run=_flow_run())
+        with patch.object(cloud_event, "get_config", return_value=CONFIG), patch.object(
+            cloud_event, "parse_flow_run_event", return_value=parsed
+        ), patch.object(cloud_event, "run_chart_export_steps", side_effect=fake_run_steps), patch.object(
+            cloud_event, "run_chart_export_step"
+        ) as single, self.assertLogs("worker-chart-export", level="INFO") as logs:
+            cloud_event._handle_cloud_event(
+                {"id": "evt", "type": "google.cloud.firestore.document.v1.updated"}
+            )
+
+        single.assert_not_called()
+        self.assertEqual(captured["step_ids"], ["charts:1h", "charts:4h"])
+        finished = [
+            r.msg["stepId"]
+            for r in logs.records
+            if isinstance(r.msg, dict) and r.msg.get("event") == "cloud_event_finished"
+        ]
+        self.assertEqual(finished, ["charts:1h", "charts:4h"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import io
+import json
+from pathlib import Path
+
+from worker_chart_export import cli, core
+from worker_chart_export.config import WorkerConfig
+from worker_chart_export.core import CoreResult
+
+
+CONFIG = WorkerConfig(
+    charts_bucket="gs://dummy",
+    charts_api_mode="mock",
+    charts_default_timezone="Etc/UTC",
+    chart_img_accounts=(),
+)
+
+
+def _flow_run(run_id: str, statuses: dict[str, str]) -> dict:
+    return {
+        "runId": run_id,
+        "steps": {
+            step_id: {"stepType": "CHART_EXPORT", "status": status}
+            for step_id, status in statuses.items()
+        },
+    }
+
+
+def _stub_steps(calls: list):
+    def stub(**kwargs):
+        calls.append((kwargs["flow_run"]["runId"], list(kwargs["step_ids"])))
+        return [
+            CoreResult(
+                status="FAILED" if step_id.endswith("bad") else "SUCCEEDED",
+                run_id=kwargs["flow_run"]["runId"],
+                step_id=step_id,
+                items_count=1,
+                failures_count=0,
+                min_images=1,
+            )
+            for step_id in kwargs["step_ids"]
+        ]
+
+    return stub
+
+
+def _summaries(out: str) -> list[dict]:
+    return [json.loads(line) for line in out.splitlines() if line.strip()]
+
+
+def test_run_batch_from_directory_emits_summary_per_step(monkeypatch, capsys, tmp_path: Path):
+    (tmp_path / "b.json").write_text(
+        json.dumps(_flow_run("run-b", {"s1": "READY"})), encoding="utf-8"
+    )
+    (tmp_path / "a.json").write_text(
+        json.dumps(_flow_run("run-a", {"s2": "READY", "s1": "READY", "s3": "SUCCEEDED"})),
+        encoding="utf-8",
+    )
+    calls: list = []
+    monkeypatch.setattr(cli, "run_chart_export_steps", _stub_steps(calls))
+    monkeypatch.setattr(cli, "get_config", lambda: CONFIG)
+    monkeypatch.delenv("CHARTS_API_MODE", raising=False)
+
+    rc = cli.main(["run-batch", "--flow-runs-dir", str(tmp_path), "--workers", "2"])
+
+    summaries = _summaries(capsys.readouterr().out)
+    assert rc == 0
+    assert sorted(calls) == [("run-a", ["s1", "s2"]), ("run-b", ["s1"])]
+    assert [(s["runId"], s["stepId"]) for s in summaries] == [
+        ("run-a", "s1"),
+        ("run-a", "s2"),
+        ("run-b", "s1"),
+    ]
+    assert set(summaries[0]) == {
+        "status",
+        "runId",
+        "stepId",
+        "outputsManifestGcsUri",
+        "itemsCount",
+        "failuresCount",
+        "minImages",
+        "errorCode",
+        "phaseTimingsMs",
+        "itemTimingsMs",
+    }
+
+
+def test_run_batch_from_stdin_reports_invalid_and_failed(monkeypatch, capsys):
+    lines = "\n".join(
+        [
+            json.dumps(_flow_run("run-1", {"s-bad": "READY"})),
+            "",
+            "{not json",
+            json.dumps(_flow_run("run-2", {"s1": "SUCCEEDED"})),
+        ]
+    )
+    calls: list = []
+    monkeypatch.setattr(cli, "run_chart_export_steps", _stub_steps(calls))
+    monkeypatch.setattr(cli, "get_config", lambda: CONFIG)
+    monkeypatch.setattr(cli.sys, "stdin", io.StringIO(lines))
+
+    rc = cli.main(["run-batch", "--stdin"])
+
+    summaries = _summaries(capsys.readouterr().out)
+    assert rc == 1
+    assert [(s["runId"], s["status"], s["errorCode"]) for s in summaries] == [
+        ("run-1", "FAILED", None),
+        (None, "FAILED", "VALIDATION_FAILED"),
+        ("run-2", "NOOP", None),
+    ]
+
+
+def test_run_batch_requires_a_source(monkeypatch, capsys):
+    monkeypatch.setattr(cli, "get_config", lambda: CONFIG)
+    try:
+        cli.main(["run-batch"])
+    except SystemExit as exc:
+        assert exc.code == 2
+    else:  # pragma: no cover
+        raise AssertionError("argparse should reject missing input source")
+
+
+def test_run_batch_reports_a_crashed_step_on_its_own(monkeypatch, capsys):
+    async def fake_run(**kwargs):
+        if kwargs["step_id"] == "s1":
+            raise RuntimeError("boom")
+        return CoreResult(status="SUCCEEDED", run_id="run-1", step_id=kwargs["step_id"])
+
+    monkeypatch.setattr(core, "run_chart_export_step_async", fake_run)
+    monkeypatch.setattr(core, "_firestore_client", lambda database: object())
+    monkeypatch.setattr(core, "_storage_client", lambda: object())
+    monkeypatch.setattr(cli, "get_config", lambda: CONFIG)
+    monkeypatch.setattr(
+        cli.sys, "stdin", io.StringIO(json.dumps(_flow_run("run-1", {"s1": "READY", "s2": "READY"})))
+    )
+
+    rc = cli.main(["run-batch", "--stdin"])
+
+    summaries = _summaries(capsys.readouterr().out)
+    assert rc == 1
+    assert [(s["stepId"], s["status"], s["errorCode"]) for s in summaries] == [
+        ("s1", "FAILED", "INTERNAL_ERROR"),
+        ("s2", "SUCCEEDED", None),
+    ]
+
+
+def test_run_batch_reads_input_lazily(monkeypatch, capsys):
+    read: list[int] = []
+    ahead: list[int] = []
+
+    def lines():
+        for index in range(10):
+            read.append(index)
+            yield json.dumps(_flow_run(f"run-{index}", {"s1": "READY"}))
+
+    def stub(**kwargs):
+        index = int(kwargs["flow_run"]["runId"].split("-")[1])
+        ahead.append(len(read) - 1 - index)
+        return [CoreResult(status="SUCCEEDED", run_id=kwargs["flow_run"]["runId"], step_id="s1")]
+
+    monkeypatch.setattr(cli, "run_chart_export_steps", stub)
+    monkeypatch.setattr(cli, "get_config", lambda: CONFIG)
+    monkeypatch.setattr(cli.sys, "stdin", lines())
+
+    rc = cli.main(["run-batch", "--stdin", "--workers", "1"])
+
+    summaries = _summaries(capsys.readouterr().out)
+    assert rc == 0
+    assert [s["runId"] for s in summaries] == [f"run-{index}" for index in range(10)]
+    assert max(ahead) < cli.BATCH_IN_FLIGHT_PER_WORKER
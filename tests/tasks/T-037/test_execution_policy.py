@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import asyncio
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from worker_chart_export import core
+from worker_chart_export.chart_img import ChartApiError, ChartApiResult
+from worker_chart_export.config import WorkerConfig
+
+
+PNG_BYTES = b"\x89PNG\r\n\x1a\nTEST"
+RUN_ID = "20251221-120000_BTCUSDT_demo"
+
+
+CONFIG = WorkerConfig(
+    charts_bucket="gs://dummy",
+    charts_api_mode="mock",
+    charts_default_timezone="Etc/UTC",
+    chart_img_accounts=(),
+    chart_fetch_concurrency=1,
+)
+
+
+def _items(count: int) -> list[SimpleNamespace]:
+    return [
+        SimpleNamespace(
+            chart_template_id=f"ctpl_{i}",
+            kind="price",
+            chart_img_symbol="BINANCE:BTCUSDT",
+            interval="1h",
+            request={},
+        )
+        for i in range(count)
+    ]
+
+
+def _flow_run(count: int, *, min_images: int, policy: str | None) -> dict:
+    inputs: dict = {
+        "minImages": min_images,
+        "requests": [{"chartTemplateId": f"ctpl_{i}"} for i in range(count)],
+    }
+    if policy is not None:
+        inputs["executionPolicy"] = policy
+    return {
+        "runId": RUN_ID,
+        "scope": {"symbol": "BTCUSDT"},
+        "steps": {
+            "s1": {
+                "stepType": "CHART_EXPORT",
+                "status": "READY",
+                "timeframe": "1h",
+                "inputs": inputs,
+            }
+        },
+    }
+
+
+def _fake_upload_pngs(**kwargs):
+    return SimpleNamespace(
+        items=[
+            {
+                "chartTemplateId": entry.chart_template_id,
+                "kind": entry.kind,
+                "generatedAt": entry.generated_at.rfc3339,
+                "png_gcs_uri": f"gs://dummy/{entry.chart_template_id}.png",
+            }
+            for entry in kwargs["inputs"]
+        ],
+        failures=[],
+    )
+
+
+class TestExecutionPolicy(unittest.TestCase):
+    def _run(self, *, count: int, min_images: int, policy: str | None, failing: set[str]):
+        called: list[str] = []
+        captured: dict = {}
+
+        async def execute(**kwargs):
+            chart_template_id = kwargs["request"].chart_template_id
+            called.append(chart_template_id)
+            await asyncio.sleep(0)
+            if chart_template_id in failing:
+                return ChartApiResult(
+                    ok=False,
+                    error=ChartApiError(code="CHART_API_FAILED", message="bad", details={}),
+                )
+            return ChartApiResult(ok=True, png_bytes=PNG_BYTES)
+
+        def capture_validate(*, manifest):
+            captured["manifest"] = manifest
+            return None
+
+        finalized: dict = {}
+
+        def fake_finalize(**kwargs):
+            finalized.update(kwargs)
+
+        with patch.object(
+            core,
+            "claim_step_transaction",
+            return_value=SimpleNamespace(claimed=True, status="READY"),
+        ), patch.object(
+            core,
+            "build_chart_requests",
+            return_value=SimpleNamespace(items=_items(count), failures=[], validation_error=None),
+        ), patch.object(core, "_execute_chart_request", new=execute), patch.object(
+            core, "upload_pngs", side_effect=_fake_upload_pngs
+        ), patch.object(core, "validate_manifest", side_effect=capture_validate), patch.object(
+            core, "write_manifest", return_value=("gs://dummy/m.json", None)
+        ), patch.object(core, "finalize_step", side_effect=fake_finalize):
+            result = core.run_chart_export_step(
+                flow_run=_flow_run(count, min_images=min_images, policy=policy),
+                step_id="s1",
+                config=CONFIG,
+                firestore_client=object(),
+                storage_client=object(),
+                chart_img_client=SimpleNamespace(),
+            )
+        return result, called, captured.get("manifest"), finalized
+
+    def test_default_policy_attempts_everything(self) -> None:
+        result, called, manifest, _ = self._run(count=4, min_images=1, policy=None, failing=set())
+        self.assertEqual(result.status, "SUCCEEDED")
+        self.assertEqual(len(called), 4)
+        self.assertNotIn("failures", manifest)
+
+    def test_quorum_stops_after_min_images(self) -> None:
+        result, called, manifest, _ = self._run(
+            count=4, min_images=2, policy="quorum", failing={"ctpl_0"}
+        )
+        self.assertEqual(result.status, "SUCCEEDED")
+        self.assertEqual(called, ["ctpl_0", "ctpl_1", "ctpl_2"])
+        self.assertEqual(result.items_count, 2)
+        skipped = [f for f in manifest["failures"] if f["error"]["code"] == "CHART_REQUEST_SKIPPED"]
+        self.assertEqual([f["request"]["chartTemplateId"] for f in skipped], ["ctpl_3"])
+        self.assertEqual(skipped[0]["error"]["details"]["reason"], "min_images_reached")
+
+    def test_fail_fast_aborts_when_min_images_unreachable(self) -> None:
+        result, called, manifest, finalized = self._run(
+            count=4, min_images=3, policy="fail-fast", failing={"ctpl_0", "ctpl_1"}
+        )
+        self.assertEqual(result.status, "FAILED")
+        self.assertEqual(called, ["ctpl_0", "ctpl_1"])
+        codes = [f["error"]["code"] for f in manifest["failures"]]
+        self.assertEqual(
+            codes,
+            ["CHART_API_FAILED", "CHART_API_FAILED", "CHART_REQUEST_SKIPPED", "CHART_REQUEST_SKIPPED"],
+        )
+        self.assertEqual(finalized["error"].code, "CHART_API_FAILED")
+
+    def test_invalid_policy_fails_validation(self) -> None:
+        result, called, _, finalized = self._run(
+            count=2, min_images=1, policy="sometimes", failing=set()
+        )
+        self.assertEqual(result.status, "FAILED")
+        self.assertEqual(result.error_code, "VALIDATION_FAILED")
+        self.assertEqual(called, [])
+        self.assertEqual(finalized["status"], "FAILED")
+
+
+if __name__ == "__main__":
+    unittest.main()
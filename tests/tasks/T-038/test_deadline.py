@@ -0,0 +1,273 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import unittest
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Any, Mapping
+from unittest.mock import patch
+
+from worker_chart_export.chart_img import (
+    ChartImgClient,
+    ChartImgRequest,
+    HttpResponse,
+    fetch_with_retries_async,
+)
+from worker_chart_export.config import ChartImgAccount, WorkerConfig
+from worker_chart_export.deadline import (
+    MIN_CALL_TIMEOUT_SECONDS,
+    Deadline,
+    deadline_allows,
+    timeout_kwargs,
+)
+from worker_chart_export.gcs_artifacts import GeneratedAt, PngUploadInput, upload_png
+from worker_chart_export.orchestration import claim_step_transaction
+from worker_chart_export.usage import select_account_for_request
+
+
+PNG_BYTES = b"\x89PNG\r\n\x1a\nTEST"
+
+
+class FakeClock:
+    def __init__(self, now: float = 100.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeAsyncRequester:
+    def __init__(self, responses: list[HttpResponse], clock: FakeClock, cost: float) -> None:
+        self._responses = list(responses)
+        self._clock = clock
+        self._cost = cost
+        self.timeouts: list[float] = []
+
+    async def post(
+        self,
+        url: str,
+        *,
+        headers: Mapping[str, str],
+        json_body: Mapping[str, Any],
+        timeout: float,
+    ) -> HttpResponse:
+        self.timeouts.append(timeout)
+        self._clock.now += self._cost
+        return self._responses.pop(0)
+
+
+class RecordingUploader:
+    bucket_gs = "gs://bucket"
+
+    def __init__(self) -> None:
+        self.calls: list[dict[str, Any]] = []
+
+    def upload_bytes(self, **kwargs: Any) -> None:
+        self.calls.append(kwargs)
+
+
+class TestDeadline(unittest.TestCase):
+    def test_remaining_reserve_and_clamp(self) -> None:
+        clock = FakeClock()
+        deadline = Deadline.after(60, clock=clock)
+        clock.now += 15
+        self.assertEqual(deadline.remaining(), 45)
+        self.assertEqual(deadline.reserve(10).remaining(), 35)
+        self.assertEqual(deadline.clamp(100), 45)
+        self.assertEqual(deadline.clamp(5), 5)
+        clock.now += 50
+        self.assertTrue(deadline.expired())
+        self.assertEqual(deadline.remaining(), 0)
+
+    def test_deadline_allows(self) -> None:
+        clock = FakeClock()
+        self.assertTrue(deadline_allows(None, 1000))
+        self.assertTrue(deadline_allows(Deadline.after(5, clock=clock), 4))
+        self.assertFalse(deadline_allows(Deadline.after(5, clock=clock), 5))
+
+
+class TestFetchWithDeadline(unittest.TestCase):
+    def setUp(self) -> None:
+        self.account = ChartImgAccount(id="acc1", api_key="secret")
+        self.request = ChartImgRequest(
+            chart_template_id="ctpl",
+            chart_img_symbol="BINANCE:BTCUSDT",
+            timeframe="1h",
+            payload={"symbol": "BINANCE:BTCUSDT", "interval": "1h"},
+        )
+
+    def _run(self, client: ChartImgClient, deadline: Deadline, sleeps: list[float]):
+        async def select():
+            return self.account
+
+        async def sleep(delay: float) -> None:
+            sleeps.append(delay)
+
+        return asyncio.run(
+            fetch_with_retries_async(
+                client=client,
+                request=self.request,
+                select_account=select,
+                sleep_fn=sleep,
+                deadline=deadline,
+            )
+        )
+
+    def test_attempt_timeout_shrinks_to_remaining_budget(self) -> None:
+        clock = FakeClock()
+        requester = FakeAsyncRequester([HttpResponse(200, {}, PNG_BYTES)], clock, cost=0)
+        client = ChartImgClient(mode="real", async_http=requester, timeout_sec=30)
+        result = self._run(client, Deadline.after(12, clock=clock), [])
+        self.assertTrue(result.ok)
+        self.assertEqual(requester.timeouts, [12])
+
+    def test_no_retry_when_backoff_would_outlive_deadline(self) -> None:
+        clock = FakeClock()
+        requester = FakeAsyncRequester(
+            [HttpResponse(500, {}, b'{"message":"boom"}')] * 3, clock, cost=4
+        )
+        client = ChartImgClient(mode="real", async_http=requester)
+        sleeps: list[float] = []
+        result = self._run(client, Deadline.after(5, clock=clock), sleeps)
+        self.assertFalse(result.ok)
+        self.assertEqual(result.error.code, "CHART_API_FAILED")
+        self.assertEqual(len(requester.timeouts), 1)
+        self.assertEqual(sleeps, [])
+
+    def test_expired_deadline_skips_account_selection(self) -> None:
+        clock = FakeClock()
+        deadline = Deadline.after(5, clock=clock)
+        clock.now += 10
+        selected: list[str] = []
+
+        async def select():
+            selected.append("x")
+            return self.account
+
+        result = asyncio.run(
+            fetch_with_retries_async(
+                client=ChartImgClient(mode="real", async_http=FakeAsyncRequester([], clock, 0)),
+                request=self.request,
+                select_account=select,
+                deadline=deadline,
+            )
+        )
+        self.assertEqual(result.error.code, "DEADLINE_EXCEEDED")
+        self.assertEqual(selected, [])
+
+
+class TestUploadWithDeadline(unittest.TestCase):
+    def _entry(self) -> PngUploadInput:
+        return PngUploadInput(
+            chart_template_id="ctpl",
+            kind="price",
+            png_bytes=PNG_BYTES,
+            generated_at=GeneratedAt(rfc3339="2025-12-21T12:00:00Z", filename_stamp="20251221-120000"),
+            symbol_slug="BTCUSDT",
+            timeframe="1h",
+        )
+
+    def test_upload_timeout_follows_deadline(self) -> None:
+        clock = FakeClock()
+        uploader = RecordingUploader()
+        result = upload_png(
+            uploader=uploader,
+            run_id="run",
+            step_id="step",
+            entry=self._entry(),
+            deadline=Deadline.after(7, clock=clock),
+        )
+        self.assertEqual(len(result.items), 1)
+        self.assertEqual(uploader.calls[0]["timeout"], 7)
+
+    def test_expired_deadline_records_failure_without_upload(self) -> None:
+        clock = FakeClock()
+        deadline = Deadline.after(1, clock=clock)
+        clock.now += 2
+        uploader = RecordingUploader()
+        result = upload_png(
+            uploader=uploader, run_id="run", step_id="step", entry=self._entry(), deadline=deadline
+        )
+        self.assertEqual(uploader.calls, [])
+        self.assertEqual(result.failures[0]["error"]["code"], "DEADLINE_EXCEEDED")
+
+    def test_no_deadline_keeps_plain_upload_signature(self) -> None:
+        uploader = RecordingUploader()
+        upload_png(uploader=uploader, run_id="run", step_id="step", entry=self._entry())
+        self.assertNotIn("timeout", uploader.calls[0])
+
+
+class RecordingDoc:
+    """One Firestore document that records the keyword arguments of each call."""
+
+    def __init__(self, data: dict[str, Any]) -> None:
+        self.data = data
+        self.calls: list[tuple[str, dict[str, Any]]] = []
+
+    def collection(self, name: str) -> "RecordingDoc":
+        return self
+
+    def document(self, doc_id: str) -> "RecordingDoc":
+        return self
+
+    def get(self, **kwargs: Any) -> Any:
+        self.calls.append(("get", kwargs))
+        return SimpleNamespace(to_dict=lambda: dict(self.data))
+
+    def update(self, update: dict[str, Any], **kwargs: Any) -> None:
+        self.calls.append(("update", kwargs))
+
+
+class TestFirestoreWithDeadline(unittest.TestCase):
+    def test_timeout_follows_deadline_with_a_floor(self) -> None:
+        clock = FakeClock()
+        deadline = Deadline.after(30, clock=clock)
+        self.assertEqual(timeout_kwargs(None), {})
+        self.assertEqual(timeout_kwargs(deadline), {"timeout": 30})
+        clock.now += 40
+        self.assertEqual(timeout_kwargs(deadline), {"timeout": MIN_CALL_TIMEOUT_SECONDS})
+
+    def test_claim_calls_carry_the_timeout(self) -> None:
+        doc = RecordingDoc({"steps": {"s1": {"status": "READY"}}})
+        claim_step_transaction(
+            client=doc, run_id="run", step_id="s1", deadline=Deadline.after(20, clock=FakeClock())
+        )
+        self.assertEqual(doc.calls, [("get", {"timeout": 20}), ("update", {"timeout": 20})])
+
+    def test_usage_calls_carry_the_timeout(self) -> None:
+        doc = RecordingDoc({"windowStart": "2025-12-18T00:00:00Z", "usageToday": 0})
+        select_account_for_request(
+            client=doc,
+            accounts=[ChartImgAccount(id="acc1", api_key="k1")],
+            now=datetime(2025, 12, 18, 12, 0, tzinfo=timezone.utc),
+            deadline=Deadline.after(20, clock=FakeClock()),
+        )
+        self.assertEqual(doc.calls, [("get", {"timeout": 20}), ("update", {"timeout": 20})])
+
+
+class TestDeadlineConfig(unittest.TestCase):
+    def _env(self, **extra: str) -> dict[str, str]:
+        env = {
+            "CHARTS_BUCKET": "gs://bucket",
+            "CHART_IMG_ACCOUNTS_JSON": '[{"id":"acc1","apiKey":"k"}]',
+        }
+        env.update(extra)
+        return env
+
+    def test_defaults(self) -> None:
+        with patch.dict(os.environ, self._env(), clear=True):
+            config = WorkerConfig.from_env()
+        self.assertIsNone(config.step_deadline_sec)
+        self.assertEqual(config.finalize_reserve_sec, 10.0)
+
+    def test_function_timeout_is_fallback(self) -> None:
+        with patch.dict(os.environ, self._env(FUNCTION_TIMEOUT_SEC="540"), clear=True):
+            self.assertEqual(WorkerConfig.from_env().step_deadline_sec, 540.0)
+        env = self._env(FUNCTION_TIMEOUT_SEC="540", CHARTS_STEP_DEADLINE_SEC="120")
+        with patch.dict(os.environ, env, clear=True):
+            self.assertEqual(WorkerConfig.from_env().step_deadline_sec, 120.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import unittest
+from dataclasses import replace
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from worker_chart_export import core
+from worker_chart_export.chart_img import ChartApiResult
+from worker_chart_export.cli import _build_json_summary
+from worker_chart_export.config import WorkerConfig
+from worker_chart_export.timings import StepTimings
+
+
+PNG_BYTES = b"\x89PNG\r\n\x1a\nTEST"
+RUN_ID = "20251221-120000_BTCUSDT_demo"
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+CONFIG = WorkerConfig(
+    charts_bucket="gs://dummy",
+    charts_api_mode="mock",
+    charts_default_timezone="Etc/UTC",
+    chart_img_accounts=(),
+    chart_fetch_concurrency=2,
+    charts_pipeline_depth=2,
+)
+
+
+def _items(count: int) -> list[SimpleNamespace]:
+    return [
+        SimpleNamespace(
+            chart_template_id=f"ctpl_{i}",
+            kind="price",
+            chart_img_symbol="BINANCE:BTCUSDT",
+            interval="1h",
+            request={},
+        )
+        for i in range(count)
+    ]
+
+
+def _flow_run(count: int) -> dict:
+    return {
+        "runId": RUN_ID,
+        "scope": {"symbol": "BTCUSDT"},
+        "steps": {
+            "s1": {
+                "stepType": "CHART_EXPORT",
+                "status": "READY",
+                "timeframe": "1h",
+                "inputs": {
+                    "minImages": 1,
+                    "requests": [{"chartTemplateId": f"ctpl_{i}"} for i in range(count)],
+                },
+            }
+        },
+    }
+
+
+def _fake_upload_pngs(**kwargs):
+    for position, _ in enumerate(kwargs["inputs"]):
+        kwargs["on_uploaded"](position, 0.002)
+    return SimpleNamespace(
+        items=[
+            {
+                "chartTemplateId": entry.chart_template_id,
+                "kind": entry.kind,
+                "generatedAt": entry.generated_at.rfc3339,
+                "png_gcs_uri": f"gs://dummy/{entry.chart_template_id}.png",
+            }
+            for entry in kwargs["inputs"]
+        ],
+        failures=[],
+    )
+
+
+class TestStepTimings(unittest.TestCase):
+    def test_phases_accumulate_and_items_keep_request_order(self) -> None:
+        clock = FakeClock()
+        timings = StepTimings(clock=clock)
+        with timings.phase("claim"):
+            clock.now += 0.25
+        with timings.phase("claim"):
+            clock.now += 0.25
+        with timings.item(1, "b", "fetchMs"):
+            clock.now += 0.1
+        timings.record_item(0, "a", "uploadMs", 0.004)
+
+        phases = timings.phases_ms()
+        self.assertEqual(phases["claim"], 500.0)
+        self.assertEqual(phases["total"], 600.0)
+        self.assertEqual(
+            timings.items_ms(),
+            [{"chartTemplateId": "a", "uploadMs": 4.0}, {"chartTemplateId": "b", "fetchMs": 100.0}],
+        )
+
+    def test_phase_is_recorded_when_body_raises(self) -> None:
+        timings = StepTimings()
+        with self.assertRaises(RuntimeError):
+            with timings.phase("finalize"):
+                raise RuntimeError("boom")
+        self.assertIn("finalize", timings.phases_ms())
+
+
+class TestCoreTimings(unittest.TestCase):
+    def _run(self, mode: str):
+        async def execute(**kwargs):
+            await asyncio.sleep(0)
+            return ChartApiResult(ok=True, png_bytes=PNG_BYTES)
+
+        def fake_upload_png(**kwargs):
+            entry = kwargs["entry"]
+            return SimpleNamespace(
+                items=[{"chartTemplateId": entry.chart_template_id}], failures=[]
+            )
+
+        config = replace(CONFIG, charts_upload_mode=mode)
+        with patch.object(
+            core,
+            "claim_step_transaction",
+            return_value=SimpleNamespace(claimed=True, status="READY"),
+        ), patch.object(
+            core,
+            "build_chart_requests",
+            return_value=SimpleNamespace(items=_items(3), failures=[], validation_error=None),
+        ), patch.object(core, "_execute_chart_request", new=execute), patch.object(
+            core, "upload_pngs", side_effect=_fake_upload_pngs
+        ), patch.object(core, "upload_png", side_effect=fake_upload_png), patch.object(
+            core, "validate_manifest", return_value=None
+        ), patch.object(
+            core, "write_manifest", return_value=("gs://dummy/m.json", None)
+        ), patch.object(core, "finalize_step", return_value=None), self.assertLogs(
+            "worker-chart-export", level=logging.INFO
+        ) as logs:
+            result = core.run_chart_export_step(
+                flow_run=_flow_run(3),
+                step_id="s1",
+                config=config,
+                firestore_client=object(),
+                storage_client=object(),
+                chart_img_client=SimpleNamespace(),
+            )
+        return result, logs.output
+
+    def test_result_carries_every_phase_and_item(self) -> None:
+        for mode in ("batch", "pipelined"):
+            with self.subTest(mode=mode):
+                result, log_lines = self._run(mode)
+                self.assertEqual(result.status, "SUCCEEDED")
+                for phase in (
+                    "claim",
+                    "templates",
+                    "chartImg",
+                    "gcsUpload",
+                    "schemaValidation",
+                    "manifestWrite",
+                    "finalize",
+                    "total",
+                ):
+                    self.assertIn(phase, result.phase_timings_ms)
+                self.assertEqual(
+                    [item["chartTemplateId"] for item in result.item_timings_ms],
+                    ["ctpl_0", "ctpl_1", "ctpl_2"],
+                )
+                for item in result.item_timings_ms:
+                    self.assertIn("fetchMs", item)
+                    self.assertIn("uploadMs", item)
+                completed = [line for line in log_lines if "step_completed" in line]
+                self.assertEqual(len(completed), 1)
+                self.assertIn("phaseTimingsMs", completed[0])
+                self.assertIn("itemTimingsMs", completed[0])
+
+    def test_cli_json_summary_includes_timings(self) -> None:
+        result = core.CoreResult(
+            status="SUCCEEDED",
+            run_id=RUN_ID,
+            step_id="s1",
+            phase_timings_ms={"claim": 1.5, "total": 3.0},
+            item_timings_ms=[{"chartTemplateId": "ctpl_0", "fetchMs": 1.0}],
+        )
+        summary = _build_json_summary(result)
+        self.assertEqual(summary["phaseTimingsMs"], {"claim": 1.5, "total": 3.0})
+        self.assertEqual(summary["itemTimingsMs"][0]["fetchMs"], 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
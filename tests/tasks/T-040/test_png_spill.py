@@ -0,0 +1,271 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import tempfile
+import threading
+import unittest
+from dataclasses import replace
+from types import SimpleNamespace
+from typing import IO, Any
+from unittest.mock import patch
+
+from worker_chart_export import core
+from worker_chart_export.buffers import MemoryBudget, PngBuffer
+from worker_chart_export.chart_img import ChartApiResult
+from worker_chart_export.config import WorkerConfig
+from worker_chart_export.errors import ConfigError
+from worker_chart_export.gcs_artifacts import GeneratedAt, PngUploadInput, upload_png
+
+
+PNG_BYTES = b"\x89PNG\r\n\x1a\n" + b"x" * 92  # 100 bytes
+RUN_ID = "20251221-120000_BTCUSDT_demo"
+
+
+class StreamingUploader:
+    bucket_gs = "gs://bucket"
+
+    def __init__(self) -> None:
+        self.bytes_calls: list[dict[str, Any]] = []
+        self.file_calls: list[dict[str, Any]] = []
+
+    def upload_bytes(self, **kwargs: Any) -> None:
+        self.bytes_calls.append(kwargs)
+
+    def upload_file(self, *, file_obj: IO[bytes], **kwargs: Any) -> None:
+        kwargs["data"] = file_obj.read()
+        self.file_calls.append(kwargs)
+
+
+CONFIG = WorkerConfig(
+    charts_bucket="gs://dummy",
+    charts_api_mode="mock",
+    charts_default_timezone="Etc/UTC",
+    chart_img_accounts=(),
+    charts_upload_mode="pipelined",
+    charts_pipeline_depth=2,
+    png_memory_budget_bytes=250,
+)
+
+
+def _entry(payload: bytes | PngBuffer) -> PngUploadInput:
+    return PngUploadInput(
+        chart_template_id="ctpl",
+        kind="price",
+        png_bytes=payload,
+        generated_at=GeneratedAt(rfc3339="2025-12-21T12:00:00Z", filename_stamp="20251221-120000"),
+        symbol_slug="BTCUSDT",
+        timeframe="1h",
+    )
+
+
+class TestPngBuffer(unittest.TestCase):
+    def test_held_in_memory_until_budget_then_spilled(self) -> None:
+        budget = MemoryBudget(250)
+        first = PngBuffer.hold(PNG_BYTES, budget=budget)
+        second = PngBuffer.hold(PNG_BYTES, budget=budget)
+        third = PngBuffer.hold(PNG_BYTES, budget=budget)
+        self.assertFalse(first.spilled)
+        self.assertFalse(second.spilled)
+        self.assertTrue(third.spilled)
+        self.assertEqual(budget.used_bytes, 200)
+        self.assertEqual(third.read_bytes(), PNG_BYTES)
+
+        first.close()
+        self.assertEqual(budget.used_bytes, 100)
+        third.close()
+        self.assertEqual(budget.used_bytes, 100)
+        second.close()
+        self.assertEqual(budget.used_bytes, 0)
+
+    def test_spill_dir_is_used(self) -> None:
+        with tempfile.TemporaryDirectory() as spill_dir:
+            buffer = PngBuffer.hold(PNG_BYTES, budget=MemoryBudget(1), spill_dir=spill_dir)
+            self.assertTrue(buffer.spilled)
+            self.assertEqual(buffer.size, len(PNG_BYTES))
+            buffer.close()
+
+
+class TestStreamingUpload(unittest.TestCase):
+    def test_spilled_buffer_is_streamed(self) -> None:
+        uploader = StreamingUploader()
+        buffer = PngBuffer.hold(PNG_BYTES, budget=MemoryBudget(1))
+        result = upload_png(uploader=uploader, run_id="run", step_id="step", entry=_entry(buffer))
+        self.assertEqual(len(result.items), 1)
+        self.assertEqual(uploader.bytes_calls, [])
+        self.assertEqual(uploader.file_calls[0]["data"], PNG_BYTES)
+        self.assertEqual(uploader.file_calls[0]["size"], len(PNG_BYTES))
+        buffer.close()
+
+    def test_in_memory_buffer_uses_upload_bytes(self) -> None:
+        uploader = StreamingUploader()
+        buffer = PngBuffer.hold(PNG_BYTES, budget=MemoryBudget(1000))
+        upload_png(uploader=uploader, run_id="run", step_id="step", entry=_entry(buffer))
+        self.assertEqual(uploader.bytes_calls[0]["data"], PNG_BYTES)
+        self.assertEqual(uploader.file_calls, [])
+        buffer.close()
+
+
+class TestCoreSpill(unittest.TestCase):
+    def _run(self, mode: str) -> tuple[Any, list[bool], MemoryBudget]:
+        spilled: list[bool] = []
+        budget = MemoryBudget(CONFIG.png_memory_budget_bytes)
+
+        async def execute(**kwargs):
+            await asyncio.sleep(0)
+            return ChartApiResult(ok=True, png_bytes=PNG_BYTES)
+
+        def record_payload(entry: PngUploadInput) -> dict[str, Any]:
+            spilled.append(entry.png_bytes.spilled)
+            self.assertEqual(entry.png_bytes.read_bytes(), PNG_BYTES)
+            return {"chartTemplateId": entry.chart_template_id}
+
+        def fake_upload_png(**kwargs):
+            return SimpleNamespace(items=[record_payload(kwargs["entry"])], failures=[])
+
+        def fake_upload_pngs(**kwargs):
+            return SimpleNamespace(
+                items=[record_payload(entry) for entry in kwargs["inputs"]], failures=[]
+            )
+
+        config = replace(CONFIG, charts_upload_mode=mode)
+        items = [
+            SimpleNamespace(
+                chart_template_id=f"ctpl_{i}",
+                kind="price",
+                chart_img_symbol="BINANCE:BTCUSDT",
+                interval="1h",
+                request={},
+            )
+            for i in range(5)
+        ]
+        flow_run = {
+            "runId": RUN_ID,
+            "scope": {"symbol": "BTCUSDT"},
+            "steps": {
+                "s1": {
+                    "stepType": "CHART_EXPORT",
+                    "status": "READY",
+                    "timeframe": "1h",
+                    "inputs": {"minImages": 1, "requests": [{"chartTemplateId": "x"}]},
+                }
+            },
+        }
+        with patch.object(
+            core,
+            "claim_step_transaction",
+            return_value=SimpleNamespace(claimed=True, status="READY"),
+        ), patch.object(
+            core,
+            "build_chart_requests",
+            return_value=SimpleNamespace(items=items, failures=[], validation_error=None),
+        ), patch.object(core, "_execute_chart_request", new=execute), patch.object(
+            core, "upload_png", side_effect=fake_upload_png
+        ), patch.object(core, "upload_pngs", side_effect=fake_upload_pngs), patch.object(
+            core, "validate_manifest", return_value=None
+        ), patch.object(
+            core, "write_manifest", return_value=("gs://dummy/m.json", None)
+        ), patch.object(core, "finalize_step", return_value=None):
+            result = asyncio.run(
+                core.run_chart_export_step_async(
+                    flow_run=flow_run,
+                    step_id="s1",
+                    config=config,
+                    firestore_client=object(),
+                    storage_client=object(),
+                    chart_img_client=SimpleNamespace(),
+                    memory_budget=budget,
+                )
+            )
+        return result, spilled, budget
+
+    def test_batch_spills_beyond_budget_and_releases_it(self) -> None:
+        result, spilled, budget = self._run("batch")
+        self.assertEqual(result.status, "SUCCEEDED")
+        self.assertEqual(sorted(spilled), [False, False, True, True, True])
+        self.assertEqual(budget.used_bytes, 0)
+
+    def test_pipelined_releases_budget_after_each_upload(self) -> None:
+        result, spilled, budget = self._run("pipelined")
+        self.assertEqual(result.status, "SUCCEEDED")
+        self.assertEqual(len(spilled), 5)
+        self.assertEqual(budget.used_bytes, 0)
+
+    def test_pipelined_failure_releases_queued_pngs(self) -> None:
+        budget = MemoryBudget(CONFIG.png_memory_budget_bytes)
+        release = threading.Event()
+        items = [
+            SimpleNamespace(chart_template_id=f"ctpl_{i}", kind="price", interval="1h")
+            for i in range(4)
+        ]
+
+        async def fetch(*, items, on_result, **kwargs):
+            # Both upload workers block, so the last two PNGs stay queued.
+            for index, item in enumerate(items):
+                await on_result(index, item, ChartApiResult(ok=True, png_bytes=PNG_BYTES))
+            raise RuntimeError("render failed")
+
+        def blocked_upload(**kwargs):
+            release.wait(timeout=5)
+            return SimpleNamespace(items=[], failures=[])
+
+        async def scenario(spill_dir: str) -> tuple[int, list[str]]:
+            config = replace(CONFIG, png_spill_dir=spill_dir)
+            try:
+                with self.assertRaises(RuntimeError):
+                    await core._render_pipelined(
+                        items=items,
+                        chart_img_client=SimpleNamespace(),
+                        config=config,
+                        firestore_client=object(),
+                        uploader=object(),
+                        logger=logging.getLogger("worker-chart-export"),
+                        run_id=RUN_ID,
+                        step_id="s1",
+                        generated_at=GeneratedAt(
+                            rfc3339="2025-12-21T12:00:00Z", filename_stamp="20251221-120000"
+                        ),
+                        symbol_slug="BTCUSDT",
+                        memory_budget=budget,
+                    )
+                return budget.used_bytes, os.listdir(spill_dir)
+            finally:
+                release.set()
+
+        with tempfile.TemporaryDirectory() as spill_dir, patch.object(
+            core, "_fetch_chart_items", new=fetch
+        ), patch.object(core, "upload_png", side_effect=blocked_upload):
+            used_bytes, spill_files = asyncio.run(scenario(spill_dir))
+        self.assertEqual(used_bytes, 0)
+        self.assertEqual(spill_files, [])
+
+
+class TestSpillConfig(unittest.TestCase):
+    def _env(self, **extra: str) -> dict[str, str]:
+        env = {
+            "CHARTS_BUCKET": "gs://bucket",
+            "CHART_IMG_ACCOUNTS_JSON": '[{"id":"acc1","apiKey":"k"}]',
+        }
+        env.update(extra)
+        return env
+
+    def test_defaults_and_overrides(self) -> None:
+        with patch.dict(os.environ, self._env(), clear=True):
+            config = WorkerConfig.from_env()
+        self.assertEqual(config.png_memory_budget_bytes, 64 * 1024 * 1024)
+        self.assertIsNone(config.png_spill_dir)
+        env = self._env(CHARTS_PNG_MEMORY_BUDGET_MB="8", CHARTS_PNG_SPILL_DIR="/tmp/spill")
+        with patch.dict(os.environ, env, clear=True):
+            config = WorkerConfig.from_env()
+        self.assertEqual(config.png_memory_budget_bytes, 8 * 1024 * 1024)
+        self.assertEqual(config.png_spill_dir, "/tmp/spill")
+
+    def test_zero_budget_rejected(self) -> None:
+        with patch.dict(os.environ, self._env(CHARTS_PNG_MEMORY_BUDGET_MB="0"), clear=True):
+            with self.assertRaises(ConfigError):
+                WorkerConfig.from_env()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import unittest
+from datetime import datetime, timezone
+from typing import Any, Mapping
+from unittest.mock import patch
+
+from worker_chart_export.chart_img import (
+    ChartImgClient,
+    ChartImgRequest,
+    HttpResponse,
+    fetch_with_retries,
+    fetch_with_retries_async,
+)
+from worker_chart_export.config import ChartImgAccount, WorkerConfig
+from worker_chart_export.errors import ConfigError
+from worker_chart_export.render_cache import (
+    MemoryRenderCache,
+    RenderCache,
+    candle_close,
+    render_cache_key,
+    shared_render_cache,
+)
+
+
+PNG_BYTES = b"\x89PNG\r\n\x1a\nTEST"
+NOW = datetime(2025, 12, 21, 12, 7, 30, tzinfo=timezone.utc)
+
+
+class FakeClock:
+    def __init__(self, now: float) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class CountingRequester:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def post(self, url: str, **kwargs: Any) -> HttpResponse:
+        self.calls += 1
+        return HttpResponse(200, {}, PNG_BYTES)
+
+
+class CountingAsyncRequester:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def post(
+        self, url: str, *, headers: Mapping[str, str], json_body: Mapping[str, Any], timeout: float
+    ) -> HttpResponse:
+        self.calls += 1
+        return HttpResponse(200, {}, PNG_BYTES)
+
+
+def _request(**payload_extra: Any) -> ChartImgRequest:
+    payload = {"symbol": "BINANCE:BTCUSDT", "interval": "1h", "timezone": "Etc/UTC"}
+    payload.update(payload_extra)
+    return ChartImgRequest(
+        chart_template_id="ctpl",
+        chart_img_symbol="BINANCE:BTCUSDT",
+        timeframe="1h",
+        payload=payload,
+    )
+
+
+class TestCacheKeyAndCandles(unittest.TestCase):
+    def test_key_ignores_dict_order_but_not_values(self) -> None:
+        a = ChartImgRequest("a", "BINANCE:BTCUSDT", "1h", {"x": 1, "studies": [{"n": "RSI"}]})
+        b = ChartImgRequest("b", "BINANCE:BTCUSDT", "1h", {"studies": [{"n": "RSI"}], "x": 1})
+        c = ChartImgRequest("a", "BINANCE:BTCUSDT", "4h", {"x": 1, "studies": [{"n": "RSI"}]})
+        self.assertEqual(render_cache_key(a), render_cache_key(b))
+        self.assertNotEqual(render_cache_key(a), render_cache_key(c))
+
+    def test_candle_close_alignment(self) -> None:
+        utc = timezone.utc
+        self.assertEqual(candle_close("15m", NOW), datetime(2025, 12, 21, 12, 15, tzinfo=utc))
+        self.assertEqual(candle_close("1h", NOW), datetime(2025, 12, 21, 13, 0, tzinfo=utc))
+        self.assertEqual(candle_close("4h", NOW), datetime(2025, 12, 21, 16, 0, tzinfo=utc))
+        self.assertEqual(candle_close("1D", NOW), datetime(2025, 12, 22, tzinfo=utc))
+        self.assertEqual(candle_close("1W", NOW), datetime(2025, 12, 22, tzinfo=utc))
+        self.assertEqual(candle_close("1M", NOW), datetime(2026, 1, 1, tzinfo=utc))
+        self.assertIsNone(candle_close("weird", NOW))
+        self.assertIsNone(candle_close("0h", NOW))
+
+
+class TestMemoryRenderCache(unittest.TestCase):
+    def test_lru_eviction_by_bytes(self) -> None:
+        cache = MemoryRenderCache(max_bytes=10, clock=FakeClock(0))
+        cache.put("a", b"aaaa", expires_at=100)
+        cache.put("b", b"bbbb", expires_at=100)
+        self.assertEqual(cache.get("a"), b"aaaa")  # "b" is now least recently used
+        cache.put("c", b"cccc", expires_at=100)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), b"cccc")
+        stats = cache.stats()
+        self.assertEqual(stats["bytes"], 8)
+        self.assertEqual(stats["evictions"], 1)
+        self.assertEqual((stats["hits"], stats["misses"]), (2, 1))
+
+    def test_entries_expire_and_oversized_payloads_are_skipped(self) -> None:
+        clock = FakeClock(0)
+        cache = MemoryRenderCache(max_bytes=10, clock=clock)
+        cache.put("a", b"aaaa", expires_at=50)
+        cache.put("big", b"x" * 11, expires_at=50)
+        clock.now = 50
+        self.assertIsNone(cache.get("a"))
+        self.assertIsNone(cache.get("big"))
+        self.assertEqual(cache.stats()["entries"], 0)
+
+    def test_shared_cache_is_reused_and_zero_disables(self) -> None:
+        self.assertIsNone(shared_render_cache(memory_max_bytes=0))
+        self.assertIs(
+            shared_render_cache(memory_max_bytes=1234), shared_render_cache(memory_max_bytes=1234)
+        )
+
+
+class TestClientCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.account = ChartImgAccount(id="acc1", api_key="secret")
+        self.selected = 0
+
+    def _select(self) -> ChartImgAccount:
+        self.selected += 1
+        return self.account
+
+    def test_second_fetch_is_served_without_account_or_network(self) -> None:
+        requester = CountingRequester()
+        clock = FakeClock(NOW.timestamp())
+        cache = RenderCache([MemoryRenderCache(max_bytes=1024, clock=clock)], clock=clock)
+        client = ChartImgClient(mode="real", http=requester, render_cache=cache)
+
+        first = fetch_with_retries(client=client, request=_request(), select_account=self._select)
+        second = fetch_with_retries(client=client, request=_request(), select_account=self._select)
+
+        self.assertIsNone(first.cache_hit)
+        self.assertEqual(second.cache_hit, "memory")
+        self.assertEqual(second.png_bytes, PNG_BYTES)
+        self.assertEqual(requester.calls, 1)
+        self.assertEqual(self.selected, 1)
+
+    def test_async_fetch_uses_cache_and_respects_candle_close(self) -> None:
+        requester = CountingAsyncRequester()
+        clock = FakeClock(NOW.timestamp())
+        cache = RenderCache([MemoryRenderCache(max_bytes=1024, clock=clock)], clock=clock)
+        client = ChartImgClient(mode="real", async_http=requester, render_cache=cache)
+
+        async def select() -> ChartImgAccount:
+            return self._select()
+
+        async def fetch():
+            return await fetch_with_retries_async(
+                client=client, request=_request(), select_account=select
+            )
+
+        asyncio.run(fetch())
+        self.assertEqual(asyncio.run(fetch()).cache_hit, "memory")
+        clock.now = datetime(2025, 12, 21, 13, 0, tzinfo=timezone.utc).timestamp()
+        self.assertIsNone(asyncio.run(fetch()).cache_hit)
+        self.assertEqual(requester.calls, 2)
+
+    def test_failures_are_not_cached(self) -> None:
+        clock = FakeClock(NOW.timestamp())
+        memory = MemoryRenderCache(max_bytes=1024, clock=clock)
+        cache = RenderCache([memory], clock=clock)
+
+        class FailingRequester:
+            def post(self, url: str, **kwargs: Any) -> HttpResponse:
+                return HttpResponse(400, {}, b'{"message":"bad"}')
+
+        client = ChartImgClient(mode="real", http=FailingRequester(), render_cache=cache)
+        fetch_with_retries(client=client, request=_request(), select_account=self._select)
+        self.assertEqual(memory.stats()["entries"], 0)
+
+
+class TestRenderCacheConfig(unittest.TestCase):
+    def _env(self, **extra: str) -> dict[str, str]:
+        env = {
+            "CHARTS_BUCKET": "gs://bucket",
+            "CHART_IMG_ACCOUNTS_JSON": '[{"id":"acc1","apiKey":"k"}]',
+        }
+        env.update(extra)
+        return env
+
+    def test_disabled_by_default(self) -> None:
+        with patch.dict(os.environ, self._env(), clear=True):
+            self.assertEqual(WorkerConfig.from_env().render_cache_max_bytes, 0)
+
+    def test_size_in_megabytes(self) -> None:
+        with patch.dict(os.environ, self._env(CHARTS_RENDER_CACHE_MB="16"), clear=True):
+            self.assertEqual(WorkerConfig.from_env().render_cache_max_bytes, 16 * 1024 * 1024)
+        with patch.dict(os.environ, self._env(CHARTS_RENDER_CACHE_MB="-1"), clear=True):
+            with self.assertRaises(ConfigError):
+                WorkerConfig.from_env()
+
+
+if __name__ == "__main__":
+    unittest.main()
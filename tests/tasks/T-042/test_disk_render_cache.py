@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import unittest
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+from worker_chart_export.chart_img import (
+    ChartImgClient,
+    ChartImgRequest,
+    HttpResponse,
+    fetch_with_retries,
+)
+from worker_chart_export.config import ChartImgAccount, WorkerConfig
+from worker_chart_export.render_cache import (
+    DiskRenderCache,
+    MemoryRenderCache,
+    RenderCache,
+    render_cache_key,
+)
+
+
+PNG_BYTES = b"\x89PNG\r\n\x1a\nTEST"
+NOW = datetime(2025, 12, 21, 12, 7, 30, tzinfo=timezone.utc).timestamp()
+KEY_A = "a" * 64
+KEY_B = "b" * 64
+KEY_C = "c" * 64
+
+
+class FakeClock:
+    def __init__(self, now: float) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class CountingRequester:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def post(self, url: str, **kwargs: Any) -> HttpResponse:
+        self.calls += 1
+        return HttpResponse(200, {}, PNG_BYTES)
+
+
+class TestDiskRenderCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.directory = Path(self._tmp.name) / "render-cache"
+        self.clock = FakeClock(1000.0)
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def _cache(self, max_bytes: int = 1024) -> DiskRenderCache:
+        return DiskRenderCache(directory=self.directory, max_bytes=max_bytes, clock=self.clock)
+
+    def test_entries_survive_a_new_instance(self) -> None:
+        self._cache().put(KEY_A, PNG_BYTES, expires_at=2000.0)
+        reopened = self._cache()
+        entry = reopened.lookup(KEY_A)
+        self.assertIsNotNone(entry)
+        self.assertEqual(entry.png_bytes, PNG_BYTES)
+        self.assertEqual(entry.expires_at, 2000.0)
+        index = json.loads((self.directory / "index.json").read_text())
+        self.assertEqual(index[KEY_A]["size"], len(PNG_BYTES))
+        self.assertEqual([p.name for p in self.directory.glob(".tmp-*")], [])
+
+    def test_eviction_by_total_bytes_is_lru(self) -> None:
+        cache = self._cache(max_bytes=2 * len(PNG_BYTES))
+        cache.put(KEY_A, PNG_BYTES, expires_at=2000.0)
+        self.clock.now += 1
+        cache.put(KEY_B, PNG_BYTES, expires_at=2000.0)
+        self.clock.now += 1
+        self.assertIsNotNone(cache.lookup(KEY_A))
+        cache.put(KEY_C, PNG_BYTES, expires_at=2000.0)
+        self.assertIsNone(cache.lookup(KEY_B))
+        self.assertFalse((self.directory / f"{KEY_B}.png").exists())
+        self.assertEqual(cache.stats()["bytes"], 2 * len(PNG_BYTES))
+
+    def test_expired_and_missing_entries_are_dropped_on_load(self) -> None:
+        cache = self._cache()
+        cache.put(KEY_A, PNG_BYTES, expires_at=1500.0)
+        cache.put(KEY_B, PNG_BYTES, expires_at=3000.0)
+        cache.put(KEY_C, PNG_BYTES, expires_at=3000.0)
+        (self.directory / f"{KEY_C}.png").unlink()
+        self.clock.now = 2000.0
+        reopened = self._cache()
+        self.assertEqual(reopened.stats()["entries"], 1)
+        self.assertFalse((self.directory / f"{KEY_A}.png").exists())
+        self.assertIsNotNone(reopened.lookup(KEY_B))
+
+    def test_corrupt_index_starts_empty(self) -> None:
+        self.directory.mkdir(parents=True)
+        (self.directory / "index.json").write_text("{not json")
+        self.assertEqual(self._cache().stats()["entries"], 0)
+
+
+class TestTieredClientCache(unittest.TestCase):
+    def test_disk_hit_is_promoted_to_memory(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            clock = FakeClock(NOW)
+            request = ChartImgRequest(
+                chart_template_id="ctpl",
+                chart_img_symbol="BINANCE:BTCUSDT",
+                timeframe="1h",
+                payload={"symbol": "BINANCE:BTCUSDT", "interval": "1h"},
+            )
+            account = ChartImgAccount(id="acc1", api_key="secret")
+
+            # A previous warm invocation left the render on disk.
+            DiskRenderCache(directory=directory, max_bytes=1024, clock=clock).put(
+                render_cache_key(request), PNG_BYTES, expires_at=NOW + 60
+            )
+
+            memory = MemoryRenderCache(max_bytes=1024, clock=clock)
+            disk = DiskRenderCache(directory=directory, max_bytes=1024, clock=clock)
+            requester = CountingRequester()
+            client = ChartImgClient(
+                mode="real", http=requester, render_cache=RenderCache([memory, disk], clock=clock)
+            )
+
+            first = fetch_with_retries(client=client, request=request, select_account=lambda: account)
+            second = fetch_with_retries(client=client, request=request, select_account=lambda: account)
+
+            self.assertEqual(first.cache_hit, "disk")
+            self.assertEqual(second.cache_hit, "memory")
+            self.assertEqual(requester.calls, 0)
+            self.assertEqual(memory.stats()["entries"], 1)
+
+
+class TestDiskCacheConfig(unittest.TestCase):
+    def test_disk_tier_env(self) -> None:
+        env = {
+            "CHARTS_BUCKET": "gs://bucket",
+            "CHART_IMG_ACCOUNTS_JSON": '[{"id":"acc1","apiKey":"k"}]',
+            "CHARTS_RENDER_DISK_CACHE_DIR": "/tmp/chart-cache",
+            "CHARTS_RENDER_DISK_CACHE_MB": "32",
+        }
+        with patch.dict(os.environ, env, clear=True):
+            config = WorkerConfig.from_env()
+        self.assertEqual(config.render_disk_cache_dir, "/tmp/chart-cache")
+        self.assertEqual(config.render_disk_cache_max_bytes, 32 * 1024 * 1024)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import os
+import unittest
+from datetime import datetime, timezone
+from typing import Any
+from unittest.mock import patch
+
+from worker_chart_export.chart_img import (
+    ChartImgClient,
+    ChartImgRequest,
+    HttpResponse,
+    fetch_with_retries,
+)
+from worker_chart_export.config import ChartImgAccount, WorkerConfig
+from worker_chart_export.gcs_artifacts import GeneratedAt, PngUploadInput, upload_png
+from worker_chart_export.render_cache import (
+    GcsRenderCache,
+    MemoryRenderCache,
+    RenderCache,
+    render_cache_key,
+)
+
+
+PNG_BYTES = b"\x89PNG\r\n\x1a\nTEST"
+NOW = datetime(2025, 12, 21, 12, 7, 30, tzinfo=timezone.utc).timestamp()
+CANDLE_CLOSE = datetime(2025, 12, 21, 13, 0, tzinfo=timezone.utc).timestamp()
+
+
+class FakeClock:
+    def __init__(self, now: float) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeBucket:
+    """In-memory stand-in for the charts bucket with create-only semantics."""
+
+    bucket_gs = "gs://bucket"
+
+    def __init__(self) -> None:
+        self.objects: dict[str, bytes] = {}
+        self.fail = False
+
+    def download_bytes(self, *, object_path: str) -> bytes | None:
+        if self.fail:
+            raise RuntimeError("gcs unavailable")
+        return self.objects.get(object_path)
+
+    def upload_bytes_if_absent(self, *, object_path: str, data: bytes, content_type: str) -> bool:
+        if self.fail:
+            raise RuntimeError("gcs unavailable")
+        if object_path in self.objects:
+            return False
+        self.objects[object_path] = data
+        return True
+
+    def upload_bytes(self, **kwargs: Any) -> None:
+        self.objects[kwargs["object_path"]] = kwargs["data"]
+
+
+class CountingRequester:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def post(self, url: str, **kwargs: Any) -> HttpResponse:
+        self.calls += 1
+        return HttpResponse(200, {}, PNG_BYTES)
+
+
+def _request() -> ChartImgRequest:
+    return ChartImgRequest(
+        chart_template_id="ctpl",
+        chart_img_symbol="BINANCE:BTCUSDT",
+        timeframe="1h",
+        payload={"symbol": "BINANCE:BTCUSDT", "interval": "1h"},
+    )
+
+
+class TestGcsRenderCache(unittest.TestCase):
+    def test_object_path_is_grouped_by_candle_close(self) -> None:
+        cache = GcsRenderCache(uploader=FakeBucket(), prefix="/render-cache/")
+        self.assertEqual(
+            cache.object_path("a" * 64, expires_at=CANDLE_CLOSE),
+            f"render-cache/20251221T130000Z/{'a' * 64}.png",
+        )
+
+    def test_first_writer_wins(self) -> None:
+        bucket = FakeBucket()
+        cache = GcsRenderCache(uploader=bucket)
+        cache.put("k" * 64, PNG_BYTES, expires_at=CANDLE_CLOSE)
+        cache.put("k" * 64, b"other", expires_at=CANDLE_CLOSE)
+        entry = cache.lookup("k" * 64, expires_at=CANDLE_CLOSE)
+        self.assertEqual(entry.png_bytes, PNG_BYTES)
+        self.assertEqual(cache.stats()["published"], 1)
+        self.assertIsNone(cache.lookup("k" * 64, expires_at=CANDLE_CLOSE + 3600))
+
+    def test_gcs_errors_are_misses(self) -> None:
+        bucket = FakeBucket()
+        bucket.fail = True
+        cache = GcsRenderCache(uploader=bucket)
+        cache.put("k" * 64, PNG_BYTES, expires_at=CANDLE_CLOSE)
+        self.assertIsNone(cache.lookup("k" * 64, expires_at=CANDLE_CLOSE))
+        stats = cache.stats()
+        self.assertEqual((stats["errors"], stats["misses"]), (2, 1))
+
+
+class TestCrossInstanceSharing(unittest.TestCase):
+    def _instance(self, bucket: FakeBucket, clock: FakeClock) -> tuple[ChartImgClient, CountingRequester]:
+        requester = CountingRequester()
+        cache = RenderCache(
+            [MemoryRenderCache(max_bytes=1024, clock=clock), GcsRenderCache(uploader=bucket)],
+            clock=clock,
+        )
+        return ChartImgClient(mode="real", http=requester, render_cache=cache), requester
+
+    def test_second_instance_reuses_first_render(self) -> None:
+        bucket = FakeBucket()
+        clock = FakeClock(NOW)
+        account = ChartImgAccount(id="acc1", api_key="secret")
+        first_client, first_requester = self._instance(bucket, clock)
+        second_client, second_requester = self._instance(bucket, clock)
+
+        first = fetch_with_retries(
+            client=first_client, request=_request(), select_account=lambda: account
+        )
+        second = fetch_with_retries(
+            client=second_client, request=_request(), select_account=lambda: account
+        )
+        third = fetch_with_retries(
+            client=second_client, request=_request(), select_account=lambda: account
+        )
+
+        self.assertIsNone(first.cache_hit)
+        self.assertEqual(second.cache_hit, "gcs")
+        self.assertEqual(third.cache_hit, "memory")
+        self.assertEqual((first_requester.calls, second_requester.calls), (1, 0))
+        self.assertEqual(
+            list(bucket.objects),
+            [f"render-cache/20251221T130000Z/{render_cache_key(_request())}.png"],
+        )
+
+
+class TestManifestCacheMeta(unittest.TestCase):
+    def test_cache_hit_is_recorded_in_item_meta(self) -> None:
+        entry = PngUploadInput(
+            chart_template_id="ctpl",
+            kind="price",
+            png_bytes=PNG_BYTES,
+            generated_at=GeneratedAt(
+                rfc3339="2025-12-21T12:00:00Z", filename_stamp="20251221-120000"
+            ),
+            symbol_slug="BTCUSDT",
+            timeframe="1h",
+            meta={"cacheHit": "gcs"},
+        )
+        result = upload_png(uploader=FakeBucket(), run_id="run", step_id="step", entry=entry)
+        self.assertEqual(result.items[0]["meta"], {"cacheHit": "gcs"})
+
+
+class TestGcsCacheConfig(unittest.TestCase):
+    def test_prefix_enables_tier(self) -> None:
+        env = {
+            "CHARTS_BUCKET": "gs://bucket",
+            "CHART_IMG_ACCOUNTS_JSON": '[{"id":"acc1","apiKey":"k"}]',
+        }
+        with patch.dict(os.environ, env, clear=True):
+            self.assertIsNone(WorkerConfig.from_env().render_gcs_cache_prefix)
+        env["CHARTS_RENDER_GCS_CACHE_PREFIX"] = "/render-cache/"
+        with patch.dict(os.environ, env, clear=True):
+            self.assertEqual(WorkerConfig.from_env().render_gcs_cache_prefix, "render-cache")
+
+
+if __name__ == "__main__":
+    unittest.main()
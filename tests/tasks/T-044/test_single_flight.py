@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+import asyncio
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from typing import Any, Mapping
+
+from worker_chart_export.chart_img import (
+    ChartImgClient,
+    ChartImgRequest,
+    HttpResponse,
+    fetch_with_retries,
+    fetch_with_retries_async,
+)
+from worker_chart_export.config import ChartImgAccount
+from worker_chart_export.deadline import Deadline
+from worker_chart_export.fixtures import FixtureIndex
+from worker_chart_export.single_flight import SingleFlight
+
+
+PNG_BYTES = b"\x89PNG\r\n\x1a\nTEST"
+
+
+class GatedAsyncRequester:
+    def __init__(self) -> None:
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def post(
+        self, url: str, *, headers: Mapping[str, str], json_body: Mapping[str, Any], timeout: float
+    ) -> HttpResponse:
+        self.calls += 1
+        await self.release.wait()
+        return HttpResponse(200, {}, PNG_BYTES)
+
+
+class GatedSyncRequester:
+    def __init__(self) -> None:
+        self.calls = 0
+        self.release = threading.Event()
+
+    def post(self, url: str, **kwargs: Any) -> HttpResponse:
+        self.calls += 1
+        self.release.wait(5)
+        return HttpResponse(200, {}, PNG_BYTES)
+
+
+def _request(symbol: str = "BINANCE:BTCUSDT") -> ChartImgRequest:
+    return ChartImgRequest(
+        chart_template_id="ctpl",
+        chart_img_symbol=symbol,
+        timeframe="1h",
+        payload={"symbol": symbol, "interval": "1h"},
+    )
+
+
+class TestSingleFlight(unittest.TestCase):
+    def test_leader_error_is_shared_and_key_is_released(self) -> None:
+        flight = SingleFlight()
+
+        async def run() -> None:
+            started = asyncio.Event()
+
+            async def boom() -> str:
+                started.set()
+                await asyncio.sleep(0.01)
+                raise RuntimeError("boom")
+
+            async def follow() -> str:
+                await started.wait()
+                return await flight.do_async("k", boom)
+
+            results = await asyncio.gather(
+                flight.do_async("k", boom), follow(), return_exceptions=True
+            )
+            self.assertTrue(all(isinstance(r, RuntimeError) for r in results))
+
+        asyncio.run(run())
+        self.assertEqual(flight.stats(), {"inFlight": 0, "leaders": 1, "coalesced": 1})
+
+    def test_follower_takes_over_when_leader_is_cancelled(self) -> None:
+        flight = SingleFlight()
+
+        async def run() -> str:
+            started = asyncio.Event()
+
+            async def slow() -> str:
+                started.set()
+                await asyncio.sleep(10)
+                return "leader"
+
+            async def fast() -> str:
+                return "follower"
+
+            leader = asyncio.create_task(flight.do_async("k", slow))
+            await started.wait()
+            follower = asyncio.create_task(flight.do_async("k", fast))
+            await asyncio.sleep(0)
+            leader.cancel()
+            return await follower
+
+        self.assertEqual(asyncio.run(run()), "follower")
+
+
+class TestCoalescedFetch(unittest.TestCase):
+    def setUp(self) -> None:
+        self.account = ChartImgAccount(id="acc1", api_key="secret")
+        self.selected = 0
+
+    def test_concurrent_identical_requests_use_one_account_unit(self) -> None:
+        requester = GatedAsyncRequester()
+        client = ChartImgClient(mode="real", async_http=requester, single_flight=SingleFlight())
+
+        async def select() -> ChartImgAccount:
+            self.selected += 1
+            return self.account
+
+        async def run():
+            tasks = [
+                asyncio.create_task(
+                    fetch_with_retries_async(
+                        client=client, request=_request(), select_account=select
+                    )
+                )
+                for _ in range(3)
+            ]
+            other = asyncio.create_task(
+                fetch_with_retries_async(
+                    client=client, request=_request("BINANCE:ETHUSDT"), select_account=select
+                )
+            )
+            await asyncio.sleep(0.01)
+            requester.release.set()
+            return await asyncio.gather(*tasks), await other
+
+        results, other = asyncio.run(run())
+        self.assertTrue(all(r.png_bytes == PNG_BYTES for r in results))
+        self.assertEqual([r.coalesced for r in results], [False, True, True])
+        self.assertFalse(other.coalesced)
+        self.assertEqual(requester.calls, 2)
+        self.assertEqual(self.selected, 2)
+
+    def test_mock_templates_with_the_same_payload_use_their_own_fixtures(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            fixtures_dir = Path(tmp)
+            for template_id in ("tplA", "tplB"):
+                (fixtures_dir / f"BINANCE_BTCUSDT__1h__{template_id}.png").write_bytes(
+                    PNG_BYTES + template_id.encode("ascii")
+                )
+            client = ChartImgClient(
+                mode="mock", fixtures=FixtureIndex(fixtures_dir), single_flight=SingleFlight()
+            )
+
+            async def select() -> ChartImgAccount:
+                # Keeps the first fetch in flight while the second one starts.
+                await asyncio.sleep(0.01)
+                return self.account
+
+            def request(template_id: str) -> ChartImgRequest:
+                return ChartImgRequest(
+                    chart_template_id=template_id,
+                    chart_img_symbol="BINANCE:BTCUSDT",
+                    timeframe="1h",
+                    payload={"symbol": "BINANCE:BTCUSDT", "interval": "1h"},
+                )
+
+            async def run():
+                return await asyncio.gather(
+                    *(
+                        fetch_with_retries_async(
+                            client=client, request=request(template_id), select_account=select
+                        )
+                        for template_id in ("tplA", "tplB")
+                    )
+                )
+
+            first, second = asyncio.run(run())
+        self.assertEqual(bytes(first.png_bytes), PNG_BYTES + b"tplA")
+        self.assertEqual(bytes(second.png_bytes), PNG_BYTES + b"tplB")
+        self.assertFalse(second.coalesced)
+
+    def test_threads_with_their_own_loops_share_one_fetch(self) -> None:
+        requester = GatedSyncRequester()
+        client = ChartImgClient(mode="real", http=requester, single_flight=SingleFlight())
+        results: list[Any] = []
+
+        def step() -> None:
+            async def select() -> ChartImgAccount:
+                return self.account
+
+            results.append(
+                asyncio.run(
+                    fetch_with_retries_async(
+                        client=client, request=_request(), select_account=select
+                    )
+                )
+            )
+
+        threads = [threading.Thread(target=step) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        while client.single_flight.stats()["coalesced"] < 2:
+            threading.Event().wait(0.005)
+        requester.release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(requester.calls, 1)
+        self.assertEqual(sorted(r.coalesced for r in results), [False, True, True])
+
+    def test_follower_gives_up_at_its_deadline(self) -> None:
+        requester = GatedSyncRequester()
+        flight = SingleFlight()
+        client = ChartImgClient(mode="real", http=requester, single_flight=flight)
+        leader = threading.Thread(
+            target=fetch_with_retries,
+            kwargs={"client": client, "request": _request(), "select_account": lambda: self.account},
+        )
+        leader.start()
+        while flight.stats()["inFlight"] == 0:
+            threading.Event().wait(0.005)
+
+        result = fetch_with_retries(
+            client=client,
+            request=_request(),
+            select_account=lambda: self.account,
+            deadline=Deadline.after(0.01),
+        )
+        requester.release.set()
+        leader.join(5)
+
+        self.assertEqual(result.error.code, "DEADLINE_EXCEEDED")
+        self.assertEqual(requester.calls, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
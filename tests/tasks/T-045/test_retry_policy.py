@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import os
+import unittest
+from datetime import datetime, timezone
+from typing import Any
+from unittest.mock import patch
+
+from worker_chart_export.chart_img import (
+    ChartImgClient,
+    ChartImgRequest,
+    HttpResponse,
+    fetch_with_retries,
+)
+from worker_chart_export.config import ChartImgAccount, WorkerConfig
+from worker_chart_export.errors import ConfigError
+from worker_chart_export.retry_policy import (
+    AccountCircuitBreaker,
+    RetryPolicy,
+    parse_retry_after,
+    parse_status_set,
+)
+
+
+PNG_BYTES = b"\x89PNG\r\n\x1a\nTEST"
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class ScriptedRequester:
+    def __init__(self, responses: list[HttpResponse]) -> None:
+        self._responses = list(responses)
+        self.keys: list[str] = []
+
+    def post(self, url: str, *, headers: dict[str, str], **kwargs: Any) -> HttpResponse:
+        self.keys.append(headers["x-api-key"])
+        return self._responses.pop(0)
+
+
+def _request() -> ChartImgRequest:
+    return ChartImgRequest(
+        chart_template_id="ctpl",
+        chart_img_symbol="BINANCE:BTCUSDT",
+        timeframe="1h",
+        payload={"symbol": "BINANCE:BTCUSDT", "interval": "1h"},
+    )
+
+
+class TestRetryPolicy(unittest.TestCase):
+    def test_full_jitter_is_bounded_by_cap(self) -> None:
+        policy = RetryPolicy(backoff_base_seconds=1, backoff_max_seconds=5, random_fn=lambda: 1.0)
+        self.assertEqual([policy.backoff(n) for n in (1, 2, 3, 4)], [1, 2, 4, 5])
+        zero = RetryPolicy(random_fn=lambda: 0.0)
+        self.assertEqual(zero.backoff(3), 0.0)
+
+    def test_retry_after_overrides_backoff_and_is_capped(self) -> None:
+        policy = RetryPolicy(max_retry_after_seconds=10)
+        self.assertEqual(policy.backoff(1, retry_after=3), 3)
+        self.assertEqual(policy.backoff(1, retry_after=120), 10)
+
+    def test_parse_retry_after(self) -> None:
+        now = datetime(2025, 12, 21, 12, 0, 0, tzinfo=timezone.utc)
+        self.assertEqual(parse_retry_after({"retry-after": "7"}), 7.0)
+        self.assertEqual(
+            parse_retry_after({"retry-after": "Sun, 21 Dec 2025 12:00:05 GMT"}, now=now), 5.0
+        )
+        self.assertIsNone(parse_retry_after({"retry-after": "soon"}))
+        self.assertIsNone(parse_retry_after({}))
+
+    def test_parse_status_set(self) -> None:
+        self.assertEqual(parse_status_set("500, 502-504"), frozenset({500, 502, 503, 504}))
+        for raw in ("abc", "504-502", "700"):
+            with self.assertRaises(ValueError):
+                parse_status_set(raw)
+
+
+class TestFetchWithPolicy(unittest.TestCase):
+    def setUp(self) -> None:
+        self.account = ChartImgAccount(id="acc1", api_key="k1")
+
+    def test_503_is_retried_after_server_requested_delay(self) -> None:
+        requester = ScriptedRequester(
+            [
+                HttpResponse(503, {"retry-after": "2"}, b'{"message":"busy"}'),
+                HttpResponse(200, {}, PNG_BYTES),
+            ]
+        )
+        sleeps: list[float] = []
+        result = fetch_with_retries(
+            client=ChartImgClient(mode="real", http=requester),
+            request=_request(),
+            select_account=lambda: self.account,
+            sleep_fn=sleeps.append,
+            retry_policy=RetryPolicy(random_fn=lambda: 0.5),
+        )
+        self.assertTrue(result.ok)
+        self.assertEqual(sleeps, [2.0])
+
+    def test_status_set_is_configurable(self) -> None:
+        requester = ScriptedRequester([HttpResponse(503, {}, b"{}")])
+        result = fetch_with_retries(
+            client=ChartImgClient(mode="real", http=requester),
+            request=_request(),
+            select_account=lambda: self.account,
+            sleep_fn=lambda _: None,
+            retry_policy=RetryPolicy(retriable_statuses=frozenset({500})),
+        )
+        self.assertFalse(result.ok)
+        self.assertEqual(len(requester.keys), 1)
+
+    def test_breaker_opens_after_consecutive_failures(self) -> None:
+        clock = FakeClock()
+        breaker = AccountCircuitBreaker(failure_threshold=2, cooldown_seconds=30, clock=clock)
+        policy = RetryPolicy(max_attempts=2, circuit_breaker=breaker, random_fn=lambda: 0.0)
+        requester = ScriptedRequester([HttpResponse(500, {}, b"{}")] * 2)
+        fetch_with_retries(
+            client=ChartImgClient(mode="real", http=requester),
+            request=_request(),
+            select_account=lambda: self.account,
+            sleep_fn=lambda _: None,
+            retry_policy=policy,
+        )
+        self.assertFalse(breaker.allow("acc1"))
+        self.assertEqual(breaker.open_accounts(), ["acc1"])
+
+        clock.now = 31
+        self.assertTrue(breaker.allow("acc1"))
+        # Half-open: the next failure re-opens it immediately, a success closes it.
+        self.assertTrue(breaker.record_failure("acc1"))
+        clock.now = 62
+        breaker.record_success("acc1")
+        self.assertFalse(breaker.record_failure("acc1"))
+        self.assertTrue(breaker.allow("acc1"))
+
+    def test_broken_key_counts_but_bad_request_does_not(self) -> None:
+        breaker = AccountCircuitBreaker(failure_threshold=1, cooldown_seconds=30)
+        policy = RetryPolicy(circuit_breaker=breaker)
+        policy.record_attempt("bad-request", ok=False, http_status=400, retriable=False)
+        policy.record_attempt("broken-key", ok=False, http_status=401, retriable=False)
+        self.assertTrue(breaker.allow("bad-request"))
+        self.assertFalse(breaker.allow("broken-key"))
+        self.assertEqual(
+            breaker.available([ChartImgAccount("broken-key", "k"), self.account], key=lambda a: a.id),
+            [self.account],
+        )
+
+
+class TestRetryConfig(unittest.TestCase):
+    def _env(self, **extra: str) -> dict[str, str]:
+        env = {
+            "CHARTS_BUCKET": "gs://bucket",
+            "CHART_IMG_ACCOUNTS_JSON": '[{"id":"acc1","apiKey":"k"}]',
+        }
+        env.update(extra)
+        return env
+
+    def test_defaults(self) -> None:
+        with patch.dict(os.environ, self._env(), clear=True):
+            config = WorkerConfig.from_env()
+        self.assertEqual(config.chart_img_retry_statuses, frozenset({500, 502, 503, 504}))
+        self.assertEqual(config.chart_img_retry_max_attempts, 3)
+        self.assertEqual(config.chart_img_breaker_failures, 5)
+
+    def test_overrides_and_validation(self) -> None:
+        env = self._env(
+            CHART_IMG_RETRY_STATUSES="500,503",
+            CHART_IMG_BREAKER_FAILURES="0",
+            CHART_IMG_RETRY_BASE_SEC="0.25",
+        )
+        with patch.dict(os.environ, env, clear=True):
+            config = WorkerConfig.from_env()
+        self.assertEqual(config.chart_img_retry_statuses, frozenset({500, 503}))
+        self.assertEqual(config.chart_img_breaker_failures, 0)
+        self.assertEqual(config.chart_img_retry_base_sec, 0.25)
+        with patch.dict(os.environ, self._env(CHART_IMG_RETRY_STATUSES="5xx"), clear=True):
+            with self.assertRaises(ConfigError):
+                WorkerConfig.from_env()
+
+
+if __name__ == "__main__":
+    unittest.main()
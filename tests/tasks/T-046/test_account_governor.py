@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import unittest
+from typing import Any, Mapping
+from unittest.mock import patch
+
+from worker_chart_export.chart_img import ChartImgClient, ChartImgRequest, HttpResponse
+from worker_chart_export.config import ChartImgAccount, WorkerConfig
+from worker_chart_export.errors import ConfigError
+from worker_chart_export.governor import AccountGovernor
+
+
+PNG_BYTES = b"\x89PNG\r\n\x1a\nTEST"
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+def _request() -> ChartImgRequest:
+    return ChartImgRequest(
+        chart_template_id="ctpl",
+        chart_img_symbol="BINANCE:BTCUSDT",
+        timeframe="1h",
+        payload={"symbol": "BINANCE:BTCUSDT", "interval": "1h"},
+    )
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_burst_then_paced_at_rate(self) -> None:
+        clock = FakeClock()
+        governor = AccountGovernor(clock=clock, sleep_fn=clock.sleep)
+        account = ChartImgAccount("acc1", "k", requests_per_second=2, burst=2)
+        waits = []
+        for _ in range(4):
+            waits.append(governor.acquire(account))
+            governor.release(account)
+        self.assertEqual(waits, [0.0, 0.0, 0.5, 0.5])
+        self.assertEqual(governor.stats()["acc1"]["waits"], 2)
+
+    def test_wait_longer_than_budget_fails_without_spending_a_token(self) -> None:
+        clock = FakeClock()
+        governor = AccountGovernor(clock=clock, sleep_fn=clock.sleep)
+        account = ChartImgAccount("acc1", "k", requests_per_second=1)
+        governor.acquire(account)
+        governor.release(account)
+        with self.assertRaises(TimeoutError):
+            governor.acquire(account, timeout=0.5)
+        self.assertEqual(governor.acquire(account, timeout=2), 1.0)
+
+    def test_cancelled_wait_refunds_the_token(self) -> None:
+        clock = FakeClock()
+        governor = AccountGovernor(clock=clock, sleep_fn=clock.sleep)
+        account = ChartImgAccount("acc1", "k", requests_per_second=1, max_in_flight=1)
+        governor.acquire(account)
+        governor.release(account)
+
+        async def cancelled_sleep(seconds: float) -> None:
+            raise asyncio.CancelledError
+
+        with self.assertRaises(asyncio.CancelledError):
+            asyncio.run(governor.acquire_async(account, sleep_fn=cancelled_sleep))
+        # The slot is free again and the next caller waits for one token, not two.
+        self.assertEqual(governor.stats()["acc1"]["inFlight"], 0)
+        self.assertEqual(governor.acquire(account), 1.0)
+
+    def test_accounts_without_limits_are_not_tracked(self) -> None:
+        governor = AccountGovernor()
+        self.assertEqual(governor.acquire(ChartImgAccount("acc1", "k")), 0.0)
+        self.assertEqual(governor.stats(), {})
+
+
+class TestInFlightCap(unittest.TestCase):
+    def test_requests_queue_until_a_slot_is_released(self) -> None:
+        governor = AccountGovernor()
+        account = ChartImgAccount("acc1", "k", max_in_flight=2)
+        active = {"now": 0, "max": 0}
+
+        async def call() -> None:
+            await governor.acquire_async(account)
+            try:
+                active["now"] += 1
+                active["max"] = max(active["max"], active["now"])
+                await asyncio.sleep(0.01)
+                active["now"] -= 1
+            finally:
+                governor.release(account)
+
+        async def run() -> None:
+            await asyncio.gather(*(call() for _ in range(6)))
+
+        asyncio.run(run())
+        self.assertEqual(active["max"], 2)
+        self.assertEqual(governor.stats()["acc1"]["inFlight"], 0)
+
+    def test_timed_out_waiter_does_not_leak_a_slot(self) -> None:
+        governor = AccountGovernor()
+        account = ChartImgAccount("acc1", "k", max_in_flight=1)
+
+        async def run() -> None:
+            await governor.acquire_async(account)
+            with self.assertRaises(TimeoutError):
+                await governor.acquire_async(account, timeout=0.01)
+            governor.release(account)
+            await asyncio.wait_for(governor.acquire_async(account), timeout=1)
+            governor.release(account)
+
+        asyncio.run(run())
+        stats = governor.stats()["acc1"]
+        self.assertEqual((stats["inFlight"], stats["queued"]), (0, 0))
+
+
+class TestClientUsesGovernor(unittest.TestCase):
+    def test_fetches_on_one_account_respect_max_in_flight(self) -> None:
+        active = {"now": 0, "max": 0}
+
+        class Requester:
+            async def post(
+                self,
+                url: str,
+                *,
+                headers: Mapping[str, str],
+                json_body: Mapping[str, Any],
+                timeout: float,
+            ) -> HttpResponse:
+                active["now"] += 1
+                active["max"] = max(active["max"], active["now"])
+                await asyncio.sleep(0.01)
+                active["now"] -= 1
+                return HttpResponse(200, {}, PNG_BYTES)
+
+        governor = AccountGovernor()
+        client = ChartImgClient(mode="real", async_http=Requester(), governor=governor)
+        account = ChartImgAccount("acc1", "k", max_in_flight=1)
+
+        async def run() -> list[Any]:
+            return await asyncio.gather(
+                *(client.fetch_async(account=account, request=_request()) for _ in range(3))
+            )
+
+        results = asyncio.run(run())
+        self.assertTrue(all(result.ok for result in results))
+        self.assertEqual(active["max"], 1)
+
+    def test_deadline_too_short_for_the_queue(self) -> None:
+        clock = FakeClock()
+        governor = AccountGovernor(clock=clock, sleep_fn=clock.sleep)
+        account = ChartImgAccount("acc1", "k", requests_per_second=0.1)
+        governor.acquire(account)
+        governor.release(account)
+
+        class Requester:
+            def post(self, url: str, **kwargs: Any) -> HttpResponse:
+                raise AssertionError("request must not be sent")
+
+        client = ChartImgClient(mode="real", http=Requester(), governor=governor)
+        result = client.fetch(account=account, request=_request(), timeout_sec=5)
+        self.assertEqual(result.error.code, "DEADLINE_EXCEEDED")
+
+
+class TestAccountLimitsConfig(unittest.TestCase):
+    def _load(self, accounts_json: str) -> WorkerConfig:
+        env = {"CHARTS_BUCKET": "gs://bucket", "CHART_IMG_ACCOUNTS_JSON": accounts_json}
+        with patch.dict(os.environ, env, clear=True):
+            return WorkerConfig.from_env()
+
+    def test_limits_are_parsed(self) -> None:
+        config = self._load(
+            '[{"id":"acc1","apiKey":"k","requestsPerSecond":2,"burst":3,"maxInFlight":1},'
+            '{"id":"acc2","apiKey":"k"}]'
+        )
+        first, second = config.chart_img_accounts
+        self.assertEqual((first.requests_per_second, first.burst, first.max_in_flight), (2.0, 3, 1))
+        self.assertEqual((second.requests_per_second, second.burst, second.max_in_flight), (None, None, None))
+
+    def test_invalid_limits_are_rejected(self) -> None:
+        for item in (
+            '{"id":"a","apiKey":"k","requestsPerSecond":0}',
+            '{"id":"a","apiKey":"k","requestsPerSecond":true}',
+            '{"id":"a","apiKey":"k","burst":0}',
+            '{"id":"a","apiKey":"k","burst":true}',
+            '{"id":"a","apiKey":"k","maxInFlight":"2"}',
+            '{"id":"a","apiKey":"k","maxInFlight":true}',
+        ):
+            with self.subTest(item=item):
+                with self.assertRaises(ConfigError):
+                    self._load(f"[{item}]")
+
+
+if __name__ == "__main__":
+    unittest.main()
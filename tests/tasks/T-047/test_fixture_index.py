@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+from worker_chart_export.chart_img import ChartImgClient, ChartImgRequest, HttpResponse
+from worker_chart_export.config import ChartImgAccount, WorkerConfig
+from worker_chart_export.fixtures import FixtureIndex, shared_fixture_index
+
+
+PNG_BYTES = b"\x89PNG\r\n\x1a\nTEST"
+STEM = "BINANCE_BTCUSDT__1h__ctpl"
+
+
+def _request() -> ChartImgRequest:
+    return ChartImgRequest(
+        chart_template_id="ctpl",
+        chart_img_symbol="BINANCE:BTCUSDT",
+        timeframe="1h",
+        payload={"symbol": "BINANCE:BTCUSDT", "interval": "1h"},
+    )
+
+
+class TestFixtureIndex(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.directory = Path(self._tmp.name)
+        self.account = ChartImgAccount(id="acc1", api_key="secret")
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def _write_error(self, name: str, status: int, message: str) -> None:
+        payload = {"status": status, "body": {"message": message}}
+        (self.directory / name).write_text(json.dumps(payload), "utf-8")
+
+    def test_directory_is_scanned_once(self) -> None:
+        (self.directory / f"{STEM}.png").write_bytes(PNG_BYTES)
+        index = FixtureIndex(self.directory)
+        client = ChartImgClient(mode="mock", fixtures=index)
+        with patch("worker_chart_export.fixtures.os.scandir", wraps=os.scandir) as scandir:
+            for _ in range(5):
+                self.assertTrue(client.fetch(account=self.account, request=_request()).ok)
+        self.assertEqual(scandir.call_count, 1)
+
+    def test_png_wins_and_first_error_fixture_is_used(self) -> None:
+        self._write_error(f"{STEM}__500_B.json", 500, "second")
+        self._write_error(f"{STEM}__429_A.json", 429, "Limit Exceeded")
+        index = FixtureIndex(self.directory)
+        result = ChartImgClient(mode="mock", fixtures=index).fetch(
+            account=self.account, request=_request()
+        )
+        self.assertEqual(result.error.code, "CHART_API_LIMIT_EXCEEDED")
+
+        (self.directory / f"{STEM}.png").write_bytes(PNG_BYTES)
+        index.refresh()
+        self.assertIsNotNone(index.lookup(STEM).png_path)
+
+    def test_new_files_need_refresh(self) -> None:
+        index = FixtureIndex(self.directory)
+        client = ChartImgClient(mode="mock", fixtures=index)
+        self.assertEqual(
+            client.fetch(account=self.account, request=_request()).error.code,
+            "CHART_API_MOCK_MISSING",
+        )
+        (self.directory / f"{STEM}.png").write_bytes(PNG_BYTES)
+        self.assertFalse(client.fetch(account=self.account, request=_request()).ok)
+        client.refresh_fixtures()
+        self.assertTrue(client.fetch(account=self.account, request=_request()).ok)
+
+    def test_small_fixtures_are_preloaded(self) -> None:
+        (self.directory / f"{STEM}.png").write_bytes(PNG_BYTES)
+        (self.directory / "BINANCE_ETHUSDT__1h__ctpl.png").write_bytes(PNG_BYTES + b"x" * 100)
+        index = FixtureIndex(self.directory, preload_max_bytes=64)
+        self.assertEqual(index.lookup(STEM).content, PNG_BYTES)
+        self.assertIsNone(index.lookup("BINANCE_ETHUSDT__1h__ctpl").content)
+        self.assertEqual(index.stats()["preloadedBytes"], len(PNG_BYTES))
+
+        (self.directory / f"{STEM}.png").unlink()
+        result = ChartImgClient(mode="mock", fixtures=index).fetch(
+            account=self.account, request=_request()
+        )
+        self.assertEqual(result.png_bytes, PNG_BYTES)
+
+    def test_deleted_file_is_reported_missing(self) -> None:
+        (self.directory / f"{STEM}.png").write_bytes(PNG_BYTES)
+        index = FixtureIndex(self.directory)
+        index.lookup(STEM)
+        (self.directory / f"{STEM}.png").unlink()
+        result = ChartImgClient(mode="mock", fixtures=index).fetch(
+            account=self.account, request=_request()
+        )
+        self.assertEqual(result.error.code, "CHART_API_MOCK_MISSING")
+
+    def test_record_mode_updates_the_index(self) -> None:
+        class Requester:
+            calls = 0
+
+            def post(self, url: str, **kwargs: Any) -> HttpResponse:
+                Requester.calls += 1
+                return HttpResponse(200, {}, PNG_BYTES)
+
+        index = FixtureIndex(self.directory)
+        client = ChartImgClient(mode="record", http=Requester(), fixtures=index)
+        client.fetch(account=self.account, request=_request())
+        second = client.fetch(account=self.account, request=_request())
+        self.assertTrue(second.from_fixture)
+        self.assertEqual(Requester.calls, 1)
+
+    def test_shared_index_is_reused(self) -> None:
+        self.assertIs(
+            shared_fixture_index(self.directory, preload_max_bytes=1),
+            shared_fixture_index(self.directory, preload_max_bytes=1),
+        )
+
+
+class TestFixturePreloadConfig(unittest.TestCase):
+    def test_preload_size_in_kilobytes(self) -> None:
+        env = {
+            "CHARTS_BUCKET": "gs://bucket",
+            "CHART_IMG_ACCOUNTS_JSON": '[{"id":"acc1","apiKey":"k"}]',
+            "CHARTS_FIXTURES_PRELOAD_KB": "512",
+        }
+        with patch.dict(os.environ, env, clear=True):
+            self.assertEqual(WorkerConfig.from_env().fixture_preload_max_bytes, 512 * 1024)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import json
+import os
+import struct
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from worker_chart_export import cli, core
+from worker_chart_export.chart_img import ChartImgClient, ChartImgRequest
+from worker_chart_export.config import ChartImgAccount, WorkerConfig
+from worker_chart_export.errors import ConfigError
+from worker_chart_export.fixture_pack import (
+    PACK_MAGIC,
+    PACK_VERSION,
+    FixturePackError,
+    PackedFixtures,
+    pack_fixture_directory,
+    unpack_fixture_archive,
+)
+from worker_chart_export.fixtures import FixtureIndex
+
+
+PNG_BYTES = b"\x89PNG\r\n\x1a\nTEST"
+STEM = "BINANCE_BTCUSDT__1h__ctpl"
+
+
+def _request(symbol: str = "BINANCE:BTCUSDT") -> ChartImgRequest:
+    return ChartImgRequest(
+        chart_template_id="ctpl",
+        chart_img_symbol=symbol,
+        timeframe="1h",
+        payload={"symbol": symbol, "interval": "1h"},
+    )
+
+
+class TestFixturePack(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.source = self.root / "fixtures"
+        self.source.mkdir()
+        (self.source / f"{STEM}.png").write_bytes(PNG_BYTES)
+        error = {"status": 429, "body": {"message": "Limit Exceeded"}}
+        (self.source / "BINANCE_ETHUSDT__1h__ctpl__429_limit.json").write_text(
+            json.dumps(error), "utf-8"
+        )
+        (self.source / "README.md").write_text("not a fixture", "utf-8")
+        self.pack = self.root / "fixtures.pack"
+        self.account = ChartImgAccount(id="acc1", api_key="secret")
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_round_trip_restores_the_directory(self) -> None:
+        self.assertEqual(pack_fixture_directory(self.source, self.pack), 2)
+        restored = self.root / "restored"
+        self.assertEqual(unpack_fixture_archive(self.pack, restored), 2)
+        for name in (f"{STEM}.png", "BINANCE_ETHUSDT__1h__ctpl__429_limit.json"):
+            self.assertEqual((restored / name).read_bytes(), (self.source / name).read_bytes())
+        self.assertFalse((restored / "README.md").exists())
+
+    def test_lookup_returns_zero_copy_slices(self) -> None:
+        pack_fixture_directory(self.source, self.pack)
+        fixtures = PackedFixtures(self.pack)
+        entry = fixtures.lookup(STEM)
+        self.assertIsInstance(entry.content, memoryview)
+        self.assertEqual(bytes(entry.content), PNG_BYTES)
+        self.assertEqual(fixtures.stats()["stems"], 2)
+
+    def test_client_serves_mock_results_from_the_pack(self) -> None:
+        pack_fixture_directory(self.source, self.pack)
+        client = ChartImgClient(mode="mock", fixtures=PackedFixtures(self.pack))
+
+        ok = client.fetch(account=self.account, request=_request())
+        self.assertTrue(ok.ok)
+        self.assertEqual(ok.png_bytes, PNG_BYTES)
+        self.assertIsInstance(ok.png_bytes, bytes)
+
+        limited = client.fetch(account=self.account, request=_request("BINANCE:ETHUSDT"))
+        self.assertEqual(limited.error.code, "CHART_API_LIMIT_EXCEEDED")
+
+        missing = client.fetch(account=self.account, request=_request("BINANCE:SOLUSDT"))
+        self.assertEqual(missing.error.code, "CHART_API_MOCK_MISSING")
+
+    def test_refresh_remaps_a_replaced_pack(self) -> None:
+        pack_fixture_directory(self.source, self.pack)
+        fixtures = PackedFixtures(self.pack)
+        old = fixtures.lookup(STEM).content
+        (self.source / f"{STEM}.png").write_bytes(PNG_BYTES + b"v2")
+        pack_fixture_directory(self.source, self.pack)
+        fixtures.refresh()
+        self.assertEqual(bytes(fixtures.lookup(STEM).content), PNG_BYTES + b"v2")
+        self.assertEqual(bytes(old), PNG_BYTES)
+
+    def test_invalid_pack_is_rejected(self) -> None:
+        for content in (b"", b"not a fixture pack at all"):
+            with self.subTest(content=content):
+                self.pack.write_bytes(content)
+                with self.assertRaises(FixturePackError):
+                    PackedFixtures(self.pack)
+
+    def test_malformed_index_entry_is_rejected(self) -> None:
+        index = json.dumps({"files": [{"name": f"{STEM}.png", "size": 4}]}).encode("utf-8")
+        header = struct.pack("<8sIQ", PACK_MAGIC, PACK_VERSION, len(index))
+        self.pack.write_bytes(header + index + PNG_BYTES)
+        with self.assertRaises(FixturePackError):
+            PackedFixtures(self.pack)
+
+    def test_pack_is_only_opened_in_mock_mode(self) -> None:
+        config = WorkerConfig(
+            charts_bucket="gs://dummy",
+            charts_api_mode="real",
+            charts_default_timezone="Etc/UTC",
+            chart_img_accounts=(self.account,),
+            fixtures_pack_path=str(self.root / "missing.pack"),
+        )
+        self.assertIsInstance(core.build_fixture_index(config), FixtureIndex)
+
+
+class TestFixturePackCli(unittest.TestCase):
+    def test_pack_and_unpack_commands(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            (root / "src").mkdir()
+            (root / "src" / f"{STEM}.png").write_bytes(PNG_BYTES)
+            pack = root / "fixtures.pack"
+
+            rc = cli.main(
+                ["fixtures-pack", "--fixtures-dir", str(root / "src"), "--output", str(pack)]
+            )
+            self.assertEqual(rc, 0)
+            rc = cli.main(
+                ["fixtures-unpack", "--pack", str(pack), "--output-dir", str(root / "out")]
+            )
+            self.assertEqual(rc, 0)
+            self.assertEqual((root / "out" / f"{STEM}.png").read_bytes(), PNG_BYTES)
+
+            not_a_pack = root / "src" / f"{STEM}.png"
+            rc = cli.main(
+                ["fixtures-unpack", "--pack", str(not_a_pack), "--output-dir", str(root / "bad")]
+            )
+            self.assertEqual(rc, 1)
+
+
+class TestFixturePackConfig(unittest.TestCase):
+    def _env(self, **extra: str) -> dict[str, str]:
+        return {
+            "CHARTS_BUCKET": "gs://bucket",
+            "CHART_IMG_ACCOUNTS_JSON": '[{"id":"acc1","apiKey":"k"}]',
+            **extra,
+        }
+
+    def test_pack_path_is_read(self) -> None:
+        env = self._env(CHARTS_API_MODE="mock", CHARTS_FIXTURES_PACK="/srv/fixtures.pack")
+        with patch.dict(os.environ, env, clear=True):
+            self.assertEqual(WorkerConfig.from_env().fixtures_pack_path, "/srv/fixtures.pack")
+
+    def test_pack_cannot_be_used_for_recording(self) -> None:
+        env = self._env(CHARTS_API_MODE="record", CHARTS_FIXTURES_PACK="/srv/fixtures.pack")
+        with patch.dict(os.environ, env, clear=True):
+            with self.assertRaises(ConfigError):
+                WorkerConfig.from_env()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import unittest
+from typing import AsyncIterator, Iterator
+from unittest.mock import patch
+
+import httpx
+
+from worker_chart_export.chart_img import (
+    PNG_SIGNATURE,
+    AsyncHttpxRequester,
+    ChartImgClient,
+    ChartImgRequest,
+    HttpxRequester,
+)
+from worker_chart_export.config import ChartImgAccount, WorkerConfig
+
+
+PNG_BYTES = PNG_SIGNATURE + b"x" * 100
+CHUNK = 16
+
+
+def _request() -> ChartImgRequest:
+    return ChartImgRequest(
+        chart_template_id="ctpl",
+        chart_img_symbol="BINANCE:BTCUSDT",
+        timeframe="1h",
+        payload={"symbol": "BINANCE:BTCUSDT", "interval": "1h"},
+    )
+
+
+class Body:
+    """Chunked response body that records how far the client read."""
+
+    def __init__(self, content: bytes) -> None:
+        self.content = content
+        self.chunks_read = 0
+
+    def chunks(self) -> Iterator[bytes]:
+        for start in range(0, len(self.content), CHUNK):
+            self.chunks_read += 1
+            yield self.content[start : start + CHUNK]
+
+    async def achunks(self) -> AsyncIterator[bytes]:
+        for chunk in self.chunks():
+            yield chunk
+
+
+def _requester(
+    body: Body, status: int = 200, *, max_body_bytes: int | None = 1024
+) -> HttpxRequester:
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(status, content=body.chunks())
+
+    client = httpx.Client(transport=httpx.MockTransport(handler))
+    return HttpxRequester(client, max_body_bytes=max_body_bytes)
+
+
+class TestStreamedRequester(unittest.TestCase):
+    def setUp(self) -> None:
+        self.account = ChartImgAccount(id="acc1", api_key="secret")
+
+    def _fetch(self, requester: HttpxRequester):
+        client = ChartImgClient(mode="real", http=requester)
+        return client.fetch(account=self.account, request=_request())
+
+    def test_png_within_the_cap_is_read_in_full(self) -> None:
+        body = Body(PNG_BYTES)
+        response = _requester(body).post("https://x", headers={}, json_body={}, timeout=1)
+        self.assertEqual(response.content, PNG_BYTES)
+        self.assertFalse(response.truncated)
+        self.assertTrue(self._fetch(_requester(Body(PNG_BYTES))).ok)
+
+    def test_non_png_200_is_aborted_after_the_first_chunk(self) -> None:
+        body = Body(b"<html>" + b"error page " * 500)
+        response = _requester(body).post("https://x", headers={}, json_body={}, timeout=1)
+        self.assertTrue(response.truncated)
+        self.assertEqual(body.chunks_read, 1)
+
+        result = self._fetch(_requester(Body(body.content)))
+        self.assertEqual(result.error.code, "CHART_API_FAILED")
+        self.assertFalse(result.error.retriable)
+        self.assertEqual(result.error.message, "Chart-IMG returned HTTP 200 with non-PNG body")
+
+    def test_oversized_png_is_rejected(self) -> None:
+        body = Body(PNG_SIGNATURE + b"x" * 4096)
+        response = _requester(body, max_body_bytes=64).post(
+            "https://x", headers={}, json_body={}, timeout=1
+        )
+        self.assertTrue(response.truncated)
+        self.assertEqual(len(response.content), 64)
+        self.assertLess(body.chunks_read, 10)
+
+        result = self._fetch(_requester(Body(body.content), max_body_bytes=64))
+        self.assertEqual(result.error.details["reason"], "body_too_large")
+
+    def test_error_bodies_are_still_parsed(self) -> None:
+        body = Body(b'{"message":"Limit Exceeded"}')
+        result = self._fetch(_requester(body, status=429))
+        self.assertEqual(result.error.code, "CHART_API_LIMIT_EXCEEDED")
+
+    def test_async_requester_streams_too(self) -> None:
+        body = Body(b"<html>" + b"error page " * 500)
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200, content=body.achunks())
+
+        async def run() -> None:
+            requester = AsyncHttpxRequester(
+                httpx.AsyncClient(transport=httpx.MockTransport(handler)), max_body_bytes=1024
+            )
+            try:
+                response = await requester.post("https://x", headers={}, json_body={}, timeout=1)
+            finally:
+                await requester.aclose()
+            self.assertTrue(response.truncated)
+
+        asyncio.run(run())
+        self.assertEqual(body.chunks_read, 1)
+
+
+class TestMaxResponseConfig(unittest.TestCase):
+    def _load(self, **extra: str) -> WorkerConfig:
+        env = {
+            "CHARTS_BUCKET": "gs://bucket",
+            "CHART_IMG_ACCOUNTS_JSON": '[{"id":"acc1","apiKey":"k"}]',
+            **extra,
+        }
+        with patch.dict(os.environ, env, clear=True):
+            return WorkerConfig.from_env()
+
+    def test_streaming_is_off_by_default(self) -> None:
+        self.assertIsNone(self._load().chart_img_max_response_bytes)
+
+    def test_cap_in_kilobytes(self) -> None:
+        config = self._load(CHART_IMG_MAX_RESPONSE_KB="2048")
+        self.assertEqual(config.chart_img_max_response_bytes, 2048 * 1024)
+
+
+if __name__ == "__main__":
+    unittest.main()
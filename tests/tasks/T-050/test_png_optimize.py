@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import struct
+import unittest
+import zlib
+from dataclasses import replace
+from types import SimpleNamespace
+from typing import Any
+from unittest.mock import patch
+
+from worker_chart_export import core
+from worker_chart_export.chart_img import ChartApiResult
+from worker_chart_export.config import WorkerConfig
+from worker_chart_export.errors import ConfigError
+from worker_chart_export.gcs_artifacts import PngUploadInput
+from worker_chart_export.png_optimize import optimize_png
+
+
+def _chunk(chunk_type: bytes, body: bytes) -> bytes:
+    crc = zlib.crc32(body, zlib.crc32(chunk_type))
+    return struct.pack(">I", len(body)) + chunk_type + body + struct.pack(">I", crc)
+
+
+def _png() -> bytes:
+    width, height = 32, 32
+    rows = b"".join(b"\x00" + bytes([x % 7, 0, 200]) * width for x in range(height))
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + _chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + _chunk(b"tEXt", b"Software\x00chart-img")
+        + _chunk(b"tRNS", b"\x00\x00\x00\x00\x00\x00")
+        + _chunk(b"IDAT", zlib.compress(rows, 0))
+        + _chunk(b"tIME", b"\x07\xe9\x01\x01\x00\x00\x00")
+        + _chunk(b"IEND", b"")
+    )
+
+
+def _chunks(data: bytes) -> list[tuple[bytes, bytes]]:
+    out, offset = [], 8
+    while offset < len(data):
+        length, chunk_type = struct.unpack_from(">I4s", data, offset)
+        out.append((chunk_type, data[offset + 8 : offset + 8 + length]))
+        offset += 12 + length
+    return out
+
+
+def _pixels(data: bytes) -> bytes:
+    return zlib.decompress(b"".join(body for kind, body in _chunks(data) if kind == b"IDAT"))
+
+
+class TestOptimizePng(unittest.TestCase):
+    def test_lossless_and_smaller(self) -> None:
+        original = _png()
+        result = optimize_png(original)
+        self.assertLess(result.optimized_bytes, result.original_bytes)
+        self.assertEqual(result.original_bytes, len(original))
+        self.assertEqual(result.optimized_bytes, len(result.png_bytes))
+        self.assertEqual(_pixels(result.png_bytes), _pixels(original))
+
+    def test_ancillary_chunks_are_stripped_except_rendering_ones(self) -> None:
+        kinds = [kind for kind, _ in _chunks(optimize_png(_png()).png_bytes)]
+        self.assertEqual(kinds, [b"IHDR", b"tRNS", b"IDAT", b"IEND"])
+
+    def test_already_optimal_png_is_returned_unchanged(self) -> None:
+        tight = _chunks(optimize_png(_png()).png_bytes)
+        data = b"\x89PNG\r\n\x1a\n" + b"".join(_chunk(kind, body) for kind, body in tight)
+        result = optimize_png(data)
+        self.assertIs(result.png_bytes, data)
+
+    def test_malformed_png_is_rejected(self) -> None:
+        broken = bytearray(_png())
+        broken[20] ^= 0xFF  # inside IHDR: CRC mismatch
+        for data in (b"not a png", bytes(broken), _png()[:-12]):
+            with self.subTest(size=len(data)):
+                with self.assertRaises(ValueError):
+                    optimize_png(data)
+
+
+CONFIG = WorkerConfig(
+    charts_bucket="gs://dummy",
+    charts_api_mode="mock",
+    charts_default_timezone="Etc/UTC",
+    chart_img_accounts=(),
+    chart_fetch_concurrency=2,
+    charts_upload_mode="pipelined",
+    charts_pipeline_depth=2,
+    png_memory_budget_bytes=1024 * 1024,
+    png_optimize_level=9,
+)
+
+
+class TestCoreOptimizesBeforeUpload(unittest.TestCase):
+    def _run(self, mode: str, png: bytes) -> list[tuple[PngUploadInput, bytes]]:
+        # Buffers are closed once uploaded, so the payload is read at upload time.
+        uploaded: list[tuple[PngUploadInput, bytes]] = []
+
+        async def execute(**kwargs: Any) -> ChartApiResult:
+            return ChartApiResult(ok=True, png_bytes=png)
+
+        def record(entry: PngUploadInput) -> dict[str, Any]:
+            uploaded.append((entry, entry.png_bytes.read_bytes()))
+            return {"chartTemplateId": entry.chart_template_id}
+
+        config = replace(CONFIG, charts_upload_mode=mode)
+        items = [
+            SimpleNamespace(
+                chart_template_id=f"ctpl_{i}",
+                kind="price",
+                chart_img_symbol="BINANCE:BTCUSDT",
+                interval="1h",
+                request={},
+            )
+            for i in range(2)
+        ]
+        flow_run = {
+            "runId": "20251221-120000_BTCUSDT_demo",
+            "scope": {"symbol": "BTCUSDT"},
+            "steps": {
+                "s1": {
+                    "stepType": "CHART_EXPORT",
+                    "status": "READY",
+                    "timeframe": "1h",
+                    "inputs": {"minImages": 1, "requests": [{"chartTemplateId": "x"}]},
+                }
+            },
+        }
+        with patch.object(
+            core,
+            "claim_step_transaction",
+            return_value=SimpleNamespace(claimed=True, status="READY"),
+        ), patch.object(
+            core,
+            "build_chart_requests",
+            return_value=SimpleNamespace(items=items, failures=[], validation_error=None),
+        ), patch.object(core, "_execute_chart_request", new=execute), patch.object(
+            core,
+            "upload_png",
+            side_effect=lambda **kw: SimpleNamespace(items=[record(kw["entry"])], failures=[]),
+        ), patch.object(
+            core,
+            "upload_pngs",
+            side_effect=lambda **kw: SimpleNamespace(
+                items=[record(entry) for entry in kw["inputs"]], failures=[]
+            ),
+        ), patch.object(core, "validate_manifest", return_value=None), patch.object(
+            core, "write_manifest", return_value=("gs://dummy/m.json", None)
+        ), patch.object(core, "finalize_step", return_value=None):
+            result = asyncio.run(
+                core.run_chart_export_step_async(
+                    flow_run=flow_run,
+                    step_id="s1",
+                    config=config,
+                    firestore_client=object(),
+                    storage_client=object(),
+                    chart_img_client=SimpleNamespace(),
+                )
+            )
+        self.assertEqual(result.status, "SUCCEEDED")
+        return uploaded
+
+    def test_sizes_are_recorded_per_item(self) -> None:
+        png = _png()
+        for mode in ("batch", "pipelined"):
+            with self.subTest(mode=mode):
+                uploaded = self._run(mode, png)
+                self.assertEqual(len(uploaded), 2)
+                for entry, body in uploaded:
+                    self.assertEqual(entry.meta["originalBytes"], len(png))
+                    self.assertEqual(entry.meta["optimizedBytes"], len(body))
+                    self.assertEqual(_pixels(body), _pixels(png))
+
+    def test_unparseable_png_is_uploaded_as_received(self) -> None:
+        png = b"\x89PNG\r\n\x1a\n" + b"x" * 40
+        entry, body = self._run("pipelined", png)[0]
+        self.assertEqual(body, png)
+        self.assertIsNone(entry.meta)
+
+
+class TestOptimizeConfig(unittest.TestCase):
+    def _env(self, **extra: str) -> dict[str, str]:
+        return {
+            "CHARTS_BUCKET": "gs://bucket",
+            "CHART_IMG_ACCOUNTS_JSON": '[{"id":"acc1","apiKey":"k"}]',
+            **extra,
+        }
+
+    def test_disabled_by_default(self) -> None:
+        with patch.dict(os.environ, self._env(), clear=True):
+            self.assertEqual(WorkerConfig.from_env().png_optimize_level, 0)
+
+    def test_level_out_of_range_is_rejected(self) -> None:
+        with patch.dict(os.environ, self._env(CHARTS_PNG_OPTIMIZE_LEVEL="10"), clear=True):
+            with self.assertRaises(ConfigError):
+                WorkerConfig.from_env()
+
+
+if __name__ == "__main__":
+    unittest.main()
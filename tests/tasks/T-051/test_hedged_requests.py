@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import unittest
+from typing import Any, Mapping
+from unittest.mock import patch
+
+from worker_chart_export.chart_img import (
+    ChartImgClient,
+    ChartImgRequest,
+    HttpResponse,
+    fetch_with_retries_async,
+)
+from worker_chart_export.config import ChartImgAccount, WorkerConfig
+from worker_chart_export.errors import ConfigError
+from worker_chart_export.hedging import HedgeBudget, HedgePolicy, LatencyTracker
+from worker_chart_export.single_flight import SingleFlight
+
+
+PNG_BYTES = b"\x89PNG\r\n\x1a\nTEST"
+SLOW = ChartImgAccount(id="slow", api_key="slow-key")
+FAST = ChartImgAccount(id="fast", api_key="fast-key")
+
+
+def _request() -> ChartImgRequest:
+    return ChartImgRequest(
+        chart_template_id="ctpl",
+        chart_img_symbol="BINANCE:BTCUSDT",
+        timeframe="1h",
+        payload={"symbol": "BINANCE:BTCUSDT", "interval": "1h"},
+    )
+
+
+class Requester:
+    """Answers per API key after a delay; records which calls were cancelled."""
+
+    def __init__(self, responses: Mapping[str, tuple[float, HttpResponse]]) -> None:
+        self.responses = responses
+        self.calls: list[str] = []
+        self.cancelled: list[str] = []
+
+    async def post(
+        self,
+        url: str,
+        *,
+        headers: Mapping[str, str],
+        json_body: Mapping[str, Any],
+        timeout: float,
+    ) -> HttpResponse:
+        key = headers["x-api-key"]
+        self.calls.append(key)
+        delay, response = self.responses[key]
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled.append(key)
+            raise
+        return response
+
+
+def _policy(*, samples: int = 20, ratio: float = 1.0) -> HedgePolicy:
+    budget = HedgeBudget(ratio=ratio)
+    for _ in range(3):
+        budget.earn()
+    policy = HedgePolicy(percentile=95, budget=budget, min_delay_seconds=0.01)
+    for _ in range(samples):
+        policy.record_latency(0.01)
+    return policy
+
+
+class TestHedgeState(unittest.TestCase):
+    def test_percentile_needs_enough_samples(self) -> None:
+        tracker = LatencyTracker()
+        for value in range(1, 11):
+            tracker.record(value / 10)
+        self.assertIsNone(tracker.percentile(90, min_samples=20))
+        self.assertEqual(tracker.percentile(90), 0.9)
+        self.assertEqual(tracker.percentile(50), 0.5)
+
+    def test_budget_bounds_hedges_to_a_fraction_of_requests(self) -> None:
+        budget = HedgeBudget(ratio=0.25)
+        spent = 0
+        for _ in range(100):
+            budget.earn()
+            spent += budget.try_spend()
+        self.assertEqual(spent, 25)
+        self.assertEqual((budget.requests, budget.hedges), (100, 25))
+
+
+class TestHedgedFetch(unittest.TestCase):
+    def _fetch(self, requester: Requester, policy: HedgePolicy):
+        client = ChartImgClient(mode="real", async_http=requester, single_flight=SingleFlight())
+        exhausted: list[str] = []
+
+        async def select_account() -> ChartImgAccount:
+            return SLOW
+
+        async def select_hedge_account(primary: ChartImgAccount) -> ChartImgAccount:
+            self.assertIs(primary, SLOW)
+            return FAST
+
+        async def mark_exhausted(account: ChartImgAccount) -> None:
+            exhausted.append(account.id)
+
+        async def run():
+            return await fetch_with_retries_async(
+                client=client,
+                request=_request(),
+                select_account=select_account,
+                mark_account_exhausted=mark_exhausted,
+                hedge_policy=policy,
+                select_hedge_account=select_hedge_account,
+            )
+
+        return asyncio.run(run()), exhausted
+
+    def test_first_success_wins_and_the_loser_is_cancelled(self) -> None:
+        requester = Requester(
+            {
+                "slow-key": (5.0, HttpResponse(200, {}, PNG_BYTES)),
+                "fast-key": (0.0, HttpResponse(200, {}, PNG_BYTES)),
+            }
+        )
+        policy = _policy()
+        result, _ = self._fetch(requester, policy)
+        self.assertTrue(result.ok)
+        self.assertTrue(result.hedged)
+        self.assertEqual(requester.calls, ["slow-key", "fast-key"])
+        self.assertEqual(requester.cancelled, ["slow-key"])
+        self.assertEqual(policy.budget.hedges, 1)
+
+    def test_no_hedge_without_budget(self) -> None:
+        requester = Requester({"slow-key": (0.05, HttpResponse(200, {}, PNG_BYTES))})
+        result, _ = self._fetch(requester, _policy(ratio=0.0))
+        self.assertTrue(result.ok)
+        self.assertFalse(result.hedged)
+        self.assertEqual(requester.calls, ["slow-key"])
+
+    def test_no_hedge_until_latencies_are_known(self) -> None:
+        requester = Requester({"slow-key": (0.05, HttpResponse(200, {}, PNG_BYTES))})
+        policy = _policy(samples=0)
+        result, _ = self._fetch(requester, policy)
+        self.assertFalse(result.hedged)
+        self.assertEqual(requester.calls, ["slow-key"])
+        self.assertEqual(len(policy.latencies), 1)
+
+    def test_losing_hedge_that_hits_the_limit_marks_its_account(self) -> None:
+        requester = Requester(
+            {
+                "slow-key": (0.1, HttpResponse(200, {}, PNG_BYTES)),
+                "fast-key": (0.0, HttpResponse(429, {}, b'{"message":"Limit Exceeded"}')),
+            }
+        )
+        result, exhausted = self._fetch(requester, _policy())
+        self.assertTrue(result.ok)
+        self.assertFalse(result.hedged)
+        self.assertEqual(exhausted, ["fast"])
+
+
+class TestHedgeClaimRace(unittest.TestCase):
+    def test_hedge_claimed_after_the_primary_finished_is_released(self) -> None:
+        requester = Requester({"slow-key": (0.03, HttpResponse(200, {}, PNG_BYTES))})
+        client = ChartImgClient(mode="real", async_http=requester, single_flight=SingleFlight())
+        policy = _policy()
+        released: list[str] = []
+
+        async def select_account() -> ChartImgAccount:
+            return SLOW
+
+        async def select_hedge_account(primary: ChartImgAccount) -> ChartImgAccount:
+            await asyncio.sleep(0.1)
+            return FAST
+
+        async def release_hedge_account(account: ChartImgAccount) -> None:
+            released.append(account.id)
+
+        async def mark_exhausted(account: ChartImgAccount) -> None:
+            pass
+
+        async def run():
+            return await fetch_with_retries_async(
+                client=client,
+                request=_request(),
+                select_account=select_account,
+                mark_account_exhausted=mark_exhausted,
+                hedge_policy=policy,
+                select_hedge_account=select_hedge_account,
+                release_hedge_account=release_hedge_account,
+            )
+
+        result = asyncio.run(run())
+        self.assertTrue(result.ok)
+        self.assertFalse(result.hedged)
+        self.assertEqual(requester.calls, ["slow-key"])
+        self.assertEqual(released, ["fast"])
+        self.assertEqual(policy.budget.hedges, 0)
+
+
+class TestHedgeConfig(unittest.TestCase):
+    def _env(self, **extra: str) -> dict[str, str]:
+        return {
+            "CHARTS_BUCKET": "gs://bucket",
+            "CHART_IMG_ACCOUNTS_JSON": '[{"id":"acc1","apiKey":"k"}]',
+            **extra,
+        }
+
+    def test_disabled_by_default(self) -> None:
+        with patch.dict(os.environ, self._env(), clear=True):
+            self.assertEqual(WorkerConfig.from_env().chart_img_hedge_percentile, 0)
+
+    def test_percentile_must_be_below_100(self) -> None:
+        with patch.dict(os.environ, self._env(CHART_IMG_HEDGE_PERCENTILE="100"), clear=True):
+            with self.assertRaises(ConfigError):
+                WorkerConfig.from_env()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import copy
+import os
+import unittest
+from datetime import datetime, timezone
+from typing import Any
+from unittest.mock import patch
+
+from worker_chart_export.config import ChartImgAccount, WorkerConfig
+from worker_chart_export.errors import ConfigError
+from worker_chart_export.usage import (
+    UsageLease,
+    UsageReservation,
+    refund_account_units,
+    reserve_account_units,
+)
+
+
+WINDOW = "2025-12-18T00:00:00Z"
+
+
+class CountingFirestore:
+    """Usage collection in memory; counts document reads and writes."""
+
+    def __init__(self, docs: dict[str, dict[str, Any]] | None = None) -> None:
+        self.docs = copy.deepcopy(docs or {})
+        self.reads = 0
+        self.writes = 0
+
+    def collection(self, name: str) -> "CountingFirestore":
+        assert name == "chart_img_accounts_usage"
+        return self
+
+    def document(self, doc_id: str) -> "Doc":
+        return Doc(self, doc_id)
+
+
+class Doc:
+    def __init__(self, store: CountingFirestore, doc_id: str) -> None:
+        self._store = store
+        self._id = doc_id
+
+    def get(self) -> "Snapshot":
+        self._store.reads += 1
+        return Snapshot(self._store.docs.get(self._id))
+
+    def update(self, data: dict[str, Any]) -> None:
+        self._store.writes += 1
+        self._store.docs.setdefault(self._id, {}).update(data)
+
+    def set(self, data: dict[str, Any], merge: bool = True) -> None:
+        self._store.writes += 1
+        self._store.docs[self._id] = dict(data)
+
+
+class Snapshot:
+    def __init__(self, data: dict[str, Any] | None) -> None:
+        self._data = copy.deepcopy(data)
+
+    def to_dict(self) -> dict[str, Any] | None:
+        return copy.deepcopy(self._data)
+
+
+def _usage(used: int) -> dict[str, Any]:
+    return {"windowStart": WINDOW, "usageToday": used}
+
+
+class TestReservation(unittest.TestCase):
+    def setUp(self) -> None:
+        self.now = datetime(2025, 12, 18, 12, 0, tzinfo=timezone.utc)
+        self.acc1 = ChartImgAccount(id="acc1", api_key="k1", daily_limit=3)
+        self.acc2 = ChartImgAccount(id="acc2", api_key="k2", daily_limit=10)
+
+    def test_units_are_split_across_accounts_in_order(self) -> None:
+        store = CountingFirestore({"acc1": _usage(1)})
+        reservations = reserve_account_units(
+            client=store, accounts=[self.acc1, self.acc2], units=5, now=self.now
+        )
+        units = [(item.account.id, item.units) for item in reservations]
+        self.assertEqual(units, [("acc1", 2), ("acc2", 3)])
+        self.assertEqual(store.docs["acc1"]["usageToday"], 3)
+        self.assertEqual(store.docs["acc2"]["usageToday"], 3)
+        self.assertEqual(store.writes, 2)
+
+    def test_refund_is_skipped_after_the_window_rolled_over(self) -> None:
+        store = CountingFirestore({"acc1": _usage(3)})
+        reservation = UsageReservation(account=self.acc1, units=2, window_start=WINDOW)
+        tomorrow = datetime(2025, 12, 19, 0, 5, tzinfo=timezone.utc)
+        self.assertFalse(
+            refund_account_units(client=store, reservation=reservation, units=2, now=tomorrow)
+        )
+        self.assertTrue(
+            refund_account_units(client=store, reservation=reservation, units=2, now=self.now)
+        )
+        self.assertEqual(store.docs["acc1"]["usageToday"], 1)
+
+
+class TestUsageLease(unittest.TestCase):
+    def setUp(self) -> None:
+        self.acc1 = ChartImgAccount(id="acc1", api_key="k1", daily_limit=100)
+        self.acc2 = ChartImgAccount(id="acc2", api_key="k2", daily_limit=100)
+
+    def test_attempts_consume_the_lease_locally(self) -> None:
+        store = CountingFirestore()
+        lease = UsageLease(client=store, units=10)
+        taken = [lease.take([self.acc1, self.acc2]) for _ in range(10)]
+        self.assertEqual({account.id for account in taken}, {"acc1"})
+        self.assertEqual((store.reads, store.writes), (1, 1))
+        self.assertEqual(store.docs["acc1"]["usageToday"], 10)
+
+    def test_unused_units_are_refunded_in_one_write(self) -> None:
+        store = CountingFirestore()
+        lease = UsageLease(client=store, units=10)
+        lease.take([self.acc1])
+        lease.take([self.acc1])
+        self.assertEqual(lease.release(), 8)
+        self.assertEqual(store.docs["acc1"]["usageToday"], 2)
+        self.assertEqual(store.writes, 2)
+        self.assertEqual(lease.release(), 0)
+
+    def test_exhausted_account_units_are_not_refunded(self) -> None:
+        store = CountingFirestore()
+        lease = UsageLease(client=store, units=5)
+        lease.take([self.acc1, self.acc2])
+        lease.drop(self.acc1)
+        self.assertEqual(lease.release(), 0)
+
+    def test_local_claims_report_the_reserved_usage(self) -> None:
+        store = CountingFirestore()
+        lease = UsageLease(client=store, units=4)
+        lease.take([self.acc1])
+        result = lease.claim([self.acc1])
+        self.assertEqual(result.account.id, "acc1")
+        self.assertEqual((result.usage.usage_today, result.usage.daily_limit), (4, 100))
+        self.assertEqual(store.writes, 1)
+
+    def test_put_back_unit_is_refunded_on_release(self) -> None:
+        store = CountingFirestore()
+        lease = UsageLease(client=store, units=1)
+        lease.take([self.acc1])
+        lease.take([self.acc1])
+        self.assertTrue(lease.put_back(self.acc1))
+        self.assertFalse(lease.put_back(self.acc2))
+        self.assertEqual(lease.release(), 1)
+        self.assertEqual(store.docs["acc1"]["usageToday"], 1)
+
+    def test_attempts_beyond_the_lease_are_claimed_per_request(self) -> None:
+        store = CountingFirestore()
+        lease = UsageLease(client=store, units=1)
+        self.assertEqual(lease.take([self.acc1]).id, "acc1")
+        self.assertEqual(lease.take([self.acc1]).id, "acc1")
+        self.assertEqual(store.docs["acc1"]["usageToday"], 2)
+        self.assertEqual(store.writes, 2)
+
+    def test_excluded_account_falls_back_to_per_request_claim(self) -> None:
+        store = CountingFirestore()
+        lease = UsageLease(client=store, units=3)
+        lease.take([self.acc1])
+        self.assertEqual(lease.take([self.acc2]).id, "acc2")
+        self.assertEqual(store.docs["acc2"]["usageToday"], 1)
+
+
+class TestUsageClaimConfig(unittest.TestCase):
+    def _env(self, **extra: str) -> dict[str, str]:
+        return {
+            "CHARTS_BUCKET": "gs://bucket",
+            "CHART_IMG_ACCOUNTS_JSON": '[{"id":"acc1","apiKey":"k"}]',
+            **extra,
+        }
+
+    def test_default_and_lease(self) -> None:
+        with patch.dict(os.environ, self._env(), clear=True):
+            self.assertEqual(WorkerConfig.from_env().chart_img_usage_claim, "request")
+        with patch.dict(os.environ, self._env(CHART_IMG_USAGE_CLAIM="lease"), clear=True):
+            self.assertEqual(WorkerConfig.from_env().chart_img_usage_claim, "lease")
+
+    def test_unknown_mode_is_rejected(self) -> None:
+        with patch.dict(os.environ, self._env(CHART_IMG_USAGE_CLAIM="bulk"), clear=True):
+            with self.assertRaises(ConfigError):
+                WorkerConfig.from_env()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import copy
+import os
+import unittest
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Any, Callable
+from unittest.mock import patch
+
+from worker_chart_export import usage
+from worker_chart_export.config import ChartImgAccount, WorkerConfig
+from worker_chart_export.errors import ConfigError
+from worker_chart_export.usage import (
+    UsageLease,
+    select_account_for_request,
+    usage_claim_stats,
+)
+
+
+NOW = datetime(2025, 12, 18, 12, 0, tzinfo=timezone.utc)
+WINDOW = "2025-12-18T00:00:00Z"
+
+
+class Aborted(Exception):
+    pass
+
+
+class IncrementFirestore:
+    """Usage collection in memory that applies ("inc", n) transforms like Firestore."""
+
+    def __init__(self, docs: dict[str, dict[str, Any]] | None = None) -> None:
+        self.docs = copy.deepcopy(docs or {})
+        self.writes: list[tuple[str, dict[str, Any]]] = []
+        self.before_update: Callable[[str], None] | None = None
+
+    def collection(self, name: str) -> "IncrementFirestore":
+        assert name == "chart_img_accounts_usage"
+        return self
+
+    def document(self, doc_id: str) -> "Doc":
+        return Doc(self, doc_id)
+
+
+class Doc:
+    def __init__(self, store: IncrementFirestore, doc_id: str) -> None:
+        self._store = store
+        self._id = doc_id
+
+    def get(self) -> SimpleNamespace:
+        data = copy.deepcopy(self._store.docs.get(self._id))
+        return SimpleNamespace(to_dict=lambda: data)
+
+    def update(self, data: dict[str, Any]) -> SimpleNamespace:
+        if self._store.before_update is not None:
+            self._store.before_update(self._id)
+        self._store.writes.append((self._id, data))
+        doc = self._store.docs.setdefault(self._id, {})
+        results = []
+        for key, value in data.items():
+            if isinstance(value, tuple) and value[0] == "inc":
+                doc[key] = doc.get(key, 0) + value[1]
+                results.append(SimpleNamespace(integer_value=doc[key]))
+            else:
+                doc[key] = value
+        return SimpleNamespace(transform_results=results)
+
+    def set(self, data: dict[str, Any], merge: bool = True) -> None:
+        self._store.writes.append((self._id, data))
+        self._store.docs[self._id] = dict(data)
+
+
+def _usage(used: int, window: str = WINDOW) -> dict[str, Any]:
+    return {"windowStart": window, "usageToday": used}
+
+
+@patch.object(usage, "_increment", new=lambda amount: ("inc", amount))
+class TestIncrementClaims(unittest.TestCase):
+    def setUp(self) -> None:
+        self.acc1 = ChartImgAccount(id="acc1", api_key="k1", daily_limit=5)
+        self.acc2 = ChartImgAccount(id="acc2", api_key="k2", daily_limit=5)
+
+    def _claim(self, store: IncrementFirestore):
+        return select_account_for_request(
+            client=store, accounts=[self.acc1, self.acc2], now=NOW, write="increment"
+        )
+
+    def test_claim_is_a_server_side_increment(self) -> None:
+        store = IncrementFirestore({"acc1": _usage(2)})
+        result = self._claim(store)
+        self.assertEqual(result.account.id, "acc1")
+        self.assertEqual(result.usage.usage_today, 3)
+        self.assertEqual(store.writes, [("acc1", {"usageToday": ("inc", 1)})])
+
+    def test_new_window_is_reset_with_a_conditional_write(self) -> None:
+        store = IncrementFirestore({"acc1": _usage(5, "2025-12-17T00:00:00Z")})
+        result = self._claim(store)
+        self.assertEqual(result.usage.usage_today, 1)
+        self.assertEqual(store.docs["acc1"], _usage(1))
+
+    def test_increment_past_the_limit_is_rolled_back(self) -> None:
+        store = IncrementFirestore({"acc1": _usage(4), "acc2": _usage(0)})
+
+        def concurrent_claim(doc_id: str) -> None:
+            # Another worker takes acc1's last unit between our read and our increment.
+            if doc_id == "acc1" and store.docs["acc1"]["usageToday"] == 4:
+                store.docs["acc1"]["usageToday"] = 5
+
+        store.before_update = concurrent_claim
+        before = usage_claim_stats().stats()["overshoots"]
+        result = self._claim(store)
+        self.assertEqual(result.account.id, "acc2")
+        self.assertEqual(result.exhausted_accounts, ["acc1"])
+        self.assertEqual(store.docs["acc1"]["usageToday"], 5)
+        self.assertEqual(usage_claim_stats().stats()["overshoots"], before + 1)
+
+    def test_aborted_increments_are_retried_a_bounded_number_of_times(self) -> None:
+        store = IncrementFirestore({"acc1": _usage(0), "acc2": _usage(0)})
+
+        def abort(doc_id: str) -> None:
+            if doc_id == "acc1":
+                raise Aborted("too much contention")
+
+        store.before_update = abort
+        before = usage_claim_stats().stats()
+        with patch.object(usage.time, "sleep") as sleep:
+            result = self._claim(store)
+        counted = usage_claim_stats().since(before)
+        self.assertEqual(result.account.id, "acc2")
+        self.assertEqual(sleep.call_count, 2)
+        self.assertEqual(counted, {"claims": 1, "conflicts": 3, "contended": 1, "overshoots": 0})
+
+    def test_lease_reserves_and_refunds_with_increments(self) -> None:
+        # Leases claim against the current UTC day.
+        today = datetime.now(timezone.utc).strftime("%Y-%m-%dT00:00:00Z")
+        store = IncrementFirestore({"acc1": _usage(1, today)})
+        lease = UsageLease(client=store, units=3, write="increment")
+        lease.take([self.acc1])
+        self.assertEqual(store.docs["acc1"]["usageToday"], 4)
+        self.assertEqual(lease.release(), 2)
+        self.assertEqual(store.docs["acc1"]["usageToday"], 2)
+        self.assertEqual(
+            [data for _, data in store.writes],
+            [{"usageToday": ("inc", 3)}, {"usageToday": ("inc", -2)}],
+        )
+
+
+class TestUsageWriteConfig(unittest.TestCase):
+    def _env(self, **extra: str) -> dict[str, str]:
+        return {
+            "CHARTS_BUCKET": "gs://bucket",
+            "CHART_IMG_ACCOUNTS_JSON": '[{"id":"acc1","apiKey":"k"}]',
+            **extra,
+        }
+
+    def test_default_and_increment(self) -> None:
+        with patch.dict(os.environ, self._env(), clear=True):
+            self.assertEqual(WorkerConfig.from_env().chart_img_usage_write, "precondition")
+        with patch.dict(os.environ, self._env(CHART_IMG_USAGE_WRITE="increment"), clear=True):
+            self.assertEqual(WorkerConfig.from_env().chart_img_usage_write, "increment")
+
+    def test_unknown_mode_is_rejected(self) -> None:
+        with patch.dict(os.environ, self._env(CHART_IMG_USAGE_WRITE="transaction"), clear=True):
+            with self.assertRaises(ConfigError):
+                WorkerConfig.from_env()
+
+
+if __name__ == "__main__":
+    unittest.main()
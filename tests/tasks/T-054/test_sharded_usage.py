@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import copy
+import os
+import random
+import unittest
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Any
+from unittest.mock import patch
+
+from worker_chart_export import usage
+from worker_chart_export.config import ChartImgAccount, WorkerConfig
+from worker_chart_export.usage import (
+    ShardedUsage,
+    UsageReservation,
+    mark_account_exhausted,
+    refund_account_units,
+    select_account_for_request,
+)
+
+
+NOW = datetime(2025, 12, 18, 12, 0, tzinfo=timezone.utc)
+WINDOW = "2025-12-18T00:00:00Z"
+
+
+class PathFirestore:
+    """Documents keyed by their slash-separated path; counts reads, batches and writes."""
+
+    def __init__(self, docs: dict[str, dict[str, Any]] | None = None) -> None:
+        self.docs = copy.deepcopy(docs or {})
+        self.reads = 0
+        self.batches = 0
+        self.writes = 0
+
+    def collection(self, name: str) -> "Ref":
+        return Ref(self, name)
+
+    def get_all(self, refs: list["Ref"]):
+        self.batches += 1
+        for ref in refs:
+            yield ref.snapshot()
+
+
+class Ref:
+    def __init__(self, store: PathFirestore, path: str) -> None:
+        self._store = store
+        self.path = path
+
+    def collection(self, name: str) -> "Ref":
+        return Ref(self._store, f"{self.path}/{name}")
+
+    def document(self, doc_id: str) -> "Ref":
+        return Ref(self._store, f"{self.path}/{doc_id}")
+
+    def snapshot(self) -> SimpleNamespace:
+        data = copy.deepcopy(self._store.docs.get(self.path))
+        return SimpleNamespace(to_dict=lambda: data)
+
+    def get(self) -> SimpleNamespace:
+        self._store.reads += 1
+        return self.snapshot()
+
+    def set(self, data: dict[str, Any], merge: bool = True) -> None:
+        self._store.writes += 1
+        doc = self._store.docs.setdefault(self.path, {}) if merge else {}
+        for key, value in data.items():
+            if isinstance(value, tuple) and value[0] == "inc":
+                doc[key] = doc.get(key, 0) + value[1]
+            else:
+                doc[key] = value
+        self._store.docs[self.path] = doc
+
+
+class Aborted(Exception):
+    pass
+
+
+def _shards(store: PathFirestore, account_id: str) -> dict[str, int]:
+    prefix = f"chart_img_accounts_usage/{account_id}/shards/"
+    return {
+        path[len(prefix) :]: doc["usageToday"]
+        for path, doc in store.docs.items()
+        if path.startswith(prefix)
+    }
+
+
+@patch.object(usage, "_increment", new=lambda amount: ("inc", amount))
+class TestShardedUsage(unittest.TestCase):
+    def setUp(self) -> None:
+        self.acc1 = ChartImgAccount(id="acc1", api_key="k1", daily_limit=10)
+        self.acc2 = ChartImgAccount(id="acc2", api_key="k2", daily_limit=10)
+        self.clock = [0.0]
+        self.sharded = ShardedUsage(shards=4, clock=lambda: self.clock[0], rng=random.Random(7))
+        patcher = patch.object(usage, "shared_sharded_usage", return_value=self.sharded)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _claim(self, store: PathFirestore):
+        return select_account_for_request(
+            client=store, accounts=[self.acc1, self.acc2], now=NOW, shards=4
+        )
+
+    def test_claims_spread_over_day_shards_and_use_the_cached_total(self) -> None:
+        store = PathFirestore()
+        for _ in range(8):
+            self.assertEqual(self._claim(store).account.id, "acc1")
+        shards = _shards(store, "acc1")
+        self.assertGreater(len(shards), 1)
+        self.assertTrue(all(name.startswith("2025-12-18-") for name in shards))
+        self.assertEqual(sum(shards.values()), 8)
+        self.assertEqual((store.batches, store.writes), (1, 8))
+
+    def test_total_is_refreshed_before_the_limit_and_others_are_counted(self) -> None:
+        store = PathFirestore()
+        self._claim(store)
+        # Another instance used up the rest of acc1's day.
+        store.docs["chart_img_accounts_usage/acc1/shards/2025-12-18-3"] = {"usageToday": 9}
+        self.clock[0] = 10.0
+        result = self._claim(store)
+        self.assertEqual(result.account.id, "acc2")
+        self.assertEqual(result.exhausted_accounts, ["acc1"])
+
+    def test_new_day_starts_from_new_shards(self) -> None:
+        store = PathFirestore(
+            {"chart_img_accounts_usage/acc1/shards/2025-12-17-0": {"usageToday": 10}}
+        )
+        self.assertEqual(self._claim(store).usage.usage_today, 1)
+
+    def test_mark_exhausted_flags_the_day_without_touching_shards(self) -> None:
+        store = PathFirestore()
+        usage_after = mark_account_exhausted(client=store, account=self.acc1, now=NOW, shards=4)
+        self.assertEqual(usage_after.usage_today, 10)
+        self.assertEqual(
+            store.docs["chart_img_accounts_usage/acc1"],
+            {"exhaustedUntil": "2025-12-19T00:00:00Z"},
+        )
+        self.assertEqual(_shards(store, "acc1"), {})
+        # Another instance (own client, no cached total) sees the flag on its refresh.
+        other_client = PathFirestore(store.docs)
+        other = ShardedUsage(shards=4)
+        with patch.object(usage, "shared_sharded_usage", return_value=other):
+            self.assertEqual(self._claim(other_client).account.id, "acc2")
+
+    def test_shards_carry_a_ttl_timestamp(self) -> None:
+        store = PathFirestore()
+        self._claim(store)
+        shard = next(
+            doc
+            for path, doc in store.docs.items()
+            if path.startswith("chart_img_accounts_usage/acc1/shards/")
+        )
+        self.assertEqual(shard["expireAt"], datetime(2025, 12, 26, tzinfo=timezone.utc))
+
+    def test_mark_exhausted_retries_aborted_writes(self) -> None:
+        store = PathFirestore()
+        aborts = [Aborted("contention"), Aborted("contention")]
+        set_doc = Ref.set
+
+        def flaky_set(ref: Ref, data: dict[str, Any], merge: bool = True) -> None:
+            if aborts:
+                raise aborts.pop()
+            set_doc(ref, data, merge)
+
+        with patch.object(Ref, "set", flaky_set), patch.object(usage.time, "sleep") as sleep:
+            mark_account_exhausted(client=store, account=self.acc1, now=NOW, shards=4)
+        self.assertEqual(sleep.call_count, 2)
+        self.assertEqual(
+            store.docs["chart_img_accounts_usage/acc1"]["exhaustedUntil"], "2025-12-19T00:00:00Z"
+        )
+
+    def test_refund_decrements_a_shard_of_the_reserved_day(self) -> None:
+        store = PathFirestore()
+        self._claim(store)
+        reservation = UsageReservation(account=self.acc1, units=1, window_start=WINDOW)
+        self.assertTrue(
+            refund_account_units(
+                client=store, reservation=reservation, units=1, now=NOW, shards=4
+            )
+        )
+        self.assertEqual(sum(_shards(store, "acc1").values()), 0)
+
+
+class TestUsageShardsConfig(unittest.TestCase):
+    def test_default_is_unsharded(self) -> None:
+        env = {
+            "CHARTS_BUCKET": "gs://bucket",
+            "CHART_IMG_ACCOUNTS_JSON": '[{"id":"acc1","apiKey":"k"}]',
+        }
+        with patch.dict(os.environ, env, clear=True):
+            self.assertEqual(WorkerConfig.from_env().chart_img_usage_shards, 0)
+        with patch.dict(os.environ, {**env, "CHART_IMG_USAGE_SHARDS": "8"}, clear=True):
+            self.assertEqual(WorkerConfig.from_env().chart_img_usage_shards, 8)
+
+
+if __name__ == "__main__":
+    unittest.main()
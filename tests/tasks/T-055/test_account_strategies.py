@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import unittest
+from collections import Counter
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from worker_chart_export import core
+from worker_chart_export.account_selection import (
+    ConsistentHashStrategy,
+    LeastUsedStrategy,
+    WeightedRoundRobinStrategy,
+    shared_account_strategy,
+)
+from worker_chart_export.chart_img import ChartApiResult
+from worker_chart_export.config import ChartImgAccount, WorkerConfig
+from worker_chart_export.errors import ConfigError
+from worker_chart_export.single_flight import SingleFlight
+from worker_chart_export.usage import AccountSelectionResult, AccountUsage
+
+
+PNG_BYTES = b"\x89PNG\r\n\x1a\nTEST"
+ACCOUNTS = [
+    ChartImgAccount(id="acc1", api_key="k1", daily_limit=100),
+    ChartImgAccount(id="acc2", api_key="k2", daily_limit=300),
+    ChartImgAccount(id="acc3", api_key="k3", daily_limit=100),
+]
+
+
+def _ids(accounts) -> list[str]:
+    return [account.id for account in accounts]
+
+
+def _today() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT00:00:00Z")
+
+
+class TestStrategies(unittest.TestCase):
+    def test_least_used_prefers_the_lowest_share_of_the_limit(self) -> None:
+        strategy = LeastUsedStrategy()
+        self.assertEqual(_ids(strategy.order(ACCOUNTS)), ["acc1", "acc2", "acc3"])
+        usage = AccountUsage(
+            account_id="acc1", usage_today=50, daily_limit=100, window_start=_today()
+        )
+        strategy.record(
+            AccountSelectionResult(account=ACCOUNTS[0], usage=usage, exhausted_accounts=[])
+        )
+        strategy.record_exhausted(ACCOUNTS[2])
+        self.assertEqual(_ids(strategy.order(ACCOUNTS)), ["acc2", "acc1", "acc3"])
+
+    def test_least_used_forgets_yesterdays_usage(self) -> None:
+        strategy = LeastUsedStrategy()
+        usage = AccountUsage(
+            account_id="acc1",
+            usage_today=100,
+            daily_limit=100,
+            window_start="2020-01-01T00:00:00Z",
+        )
+        strategy.record(
+            AccountSelectionResult(account=ACCOUNTS[0], usage=usage, exhausted_accounts=[])
+        )
+        self.assertEqual(_ids(strategy.order(ACCOUNTS))[0], "acc1")
+
+    def test_weighted_round_robin_follows_daily_limits(self) -> None:
+        strategy = WeightedRoundRobinStrategy()
+        heads = [strategy.order(ACCOUNTS)[0].id for _ in range(50)]
+        self.assertEqual(Counter(heads), {"acc1": 10, "acc2": 30, "acc3": 10})
+        # Smooth: the heavy account never takes more than two turns in a row.
+        self.assertNotIn("acc2,acc2,acc2", ",".join(heads))
+
+    def test_hash_is_stable_per_step_and_spreads_steps(self) -> None:
+        strategy = ConsistentHashStrategy()
+        first = _ids(strategy.order(ACCOUNTS, key="run1/s1"))
+        self.assertEqual(_ids(strategy.order(ACCOUNTS, key="run1/s1")), first)
+        self.assertEqual(sorted(first), ["acc1", "acc2", "acc3"])
+        heads = {strategy.order(ACCOUNTS, key=f"run{i}/s1")[0].id for i in range(30)}
+        self.assertEqual(heads, {"acc1", "acc2", "acc3"})
+        self.assertEqual(_ids(strategy.order(ACCOUNTS)), ["acc1", "acc2", "acc3"])
+
+    def test_hash_only_moves_steps_of_a_removed_account(self) -> None:
+        strategy = ConsistentHashStrategy()
+        for i in range(30):
+            key = f"run{i}/s1"
+            head = strategy.order(ACCOUNTS, key=key)[0]
+            if head.id != "acc3":
+                self.assertIs(strategy.order(ACCOUNTS[:2], key=key)[0], head)
+
+    def test_unknown_strategy_is_rejected(self) -> None:
+        with self.assertRaises(ValueError):
+            shared_account_strategy("random")
+
+
+CONFIG = WorkerConfig(
+    charts_bucket="gs://dummy",
+    charts_api_mode="mock",
+    charts_default_timezone="Etc/UTC",
+    chart_img_accounts=tuple(ACCOUNTS),
+    chart_fetch_concurrency=1,
+    chart_img_account_strategy="hash",
+    chart_img_retry_max_attempts=1,
+    chart_img_breaker_failures=0,
+)
+
+
+class TestCoreUsesTheStrategy(unittest.TestCase):
+    def test_claims_follow_the_steps_hash_order(self) -> None:
+        seen: list[list[str]] = []
+
+        def fake_select(**kwargs):
+            seen.append(_ids(kwargs["accounts"]))
+            return SimpleNamespace(account=kwargs["accounts"][0])
+
+        class FakeClient:
+            single_flight = SingleFlight()
+
+            def flight_key(self, request):
+                return request.chart_template_id
+
+            async def cached_result_async(self, request):
+                return None
+
+            async def remember_async(self, request, result):
+                pass
+
+            async def fetch_async(self, **kwargs):
+                return ChartApiResult(ok=True, png_bytes=PNG_BYTES)
+
+        async def collect(index, item, api_result):
+            self.assertTrue(api_result.ok)
+
+        item = SimpleNamespace(
+            chart_template_id="ctpl_1",
+            chart_img_symbol="BINANCE:BTCUSDT",
+            interval="1h",
+            request={},
+        )
+        with patch.object(core, "select_account_for_request", side_effect=fake_select):
+            asyncio.run(
+                core._fetch_chart_items(
+                    items=[item],
+                    chart_img_client=FakeClient(),
+                    config=CONFIG,
+                    firestore_client=object(),
+                    logger=core.logging.getLogger("test"),
+                    run_id="run1",
+                    step_id="s1",
+                    on_result=collect,
+                )
+            )
+        expected = _ids(ConsistentHashStrategy().order(ACCOUNTS, key="run1/s1"))
+        self.assertEqual(seen, [expected])
+
+
+class TestAccountStrategyConfig(unittest.TestCase):
+    def _env(self, **extra: str) -> dict[str, str]:
+        return {
+            "CHARTS_BUCKET": "gs://bucket",
+            "CHART_IMG_ACCOUNTS_JSON": '[{"id":"acc1","apiKey":"k"}]',
+            **extra,
+        }
+
+    def test_default_and_override(self) -> None:
+        with patch.dict(os.environ, self._env(), clear=True):
+            self.assertEqual(WorkerConfig.from_env().chart_img_account_strategy, "ordered")
+        with patch.dict(os.environ, self._env(CHART_IMG_ACCOUNT_STRATEGY="weighted"), clear=True):
+            self.assertEqual(WorkerConfig.from_env().chart_img_account_strategy, "weighted")
+
+    def test_unknown_strategy_is_rejected(self) -> None:
+        with patch.dict(os.environ, self._env(CHART_IMG_ACCOUNT_STRATEGY="random"), clear=True):
+            with self.assertRaises(ConfigError):
+                WorkerConfig.from_env()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import copy
+import json
+import time
+import unittest
+from datetime import datetime, timedelta, timezone
+from typing import Any, Mapping
+
+from worker_chart_export.chart_img import (
+    ChartImgClient,
+    ChartImgRequest,
+    HttpResponse,
+    fetch_with_retries,
+)
+from worker_chart_export.config import ChartImgAccount
+from worker_chart_export.usage import mark_account_exhausted, select_account_for_request
+
+
+NOW = datetime(2025, 12, 18, 12, 0, tzinfo=timezone.utc)
+WINDOW = "2025-12-18T00:00:00Z"
+
+
+class CountingFirestore:
+    """Usage collection in memory; counts document reads."""
+
+    def __init__(self, docs: dict[str, dict[str, Any]] | None = None) -> None:
+        self.docs = docs if docs is not None else {}
+        self.reads = 0
+
+    def collection(self, name: str) -> "CountingFirestore":
+        assert name == "chart_img_accounts_usage"
+        return self
+
+    def document(self, doc_id: str) -> "Doc":
+        return Doc(self, doc_id)
+
+
+class Doc:
+    def __init__(self, store: CountingFirestore, doc_id: str) -> None:
+        self._store = store
+        self._id = doc_id
+
+    def get(self) -> "Snapshot":
+        self._store.reads += 1
+        return Snapshot(self._store.docs.get(self._id))
+
+    def update(self, data: dict[str, Any]) -> None:
+        self._store.docs.setdefault(self._id, {}).update(data)
+
+    def set(self, data: dict[str, Any], merge: bool = True) -> None:
+        self._store.docs[self._id] = dict(data)
+
+
+class Snapshot:
+    def __init__(self, data: dict[str, Any] | None) -> None:
+        self._data = copy.deepcopy(data)
+
+    def to_dict(self) -> dict[str, Any] | None:
+        return copy.deepcopy(self._data)
+
+
+class Requester:
+    def __init__(self, response: HttpResponse) -> None:
+        self.response = response
+
+    def post(
+        self,
+        url: str,
+        *,
+        headers: Mapping[str, str],
+        json_body: Mapping[str, Any],
+        timeout: float,
+    ) -> HttpResponse:
+        return self.response
+
+
+def _request() -> ChartImgRequest:
+    return ChartImgRequest(
+        chart_template_id="ctpl",
+        chart_img_symbol="BINANCE:BTCUSDT",
+        timeframe="1h",
+        payload={"symbol": "BINANCE:BTCUSDT", "interval": "1h"},
+    )
+
+
+class TestExhaustionCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.acc1 = ChartImgAccount(id="acc1", api_key="k1", daily_limit=10)
+        self.acc2 = ChartImgAccount(id="acc2", api_key="k2", daily_limit=10)
+        self.store = CountingFirestore(
+            {
+                "acc1": {"windowStart": WINDOW, "usageToday": 4},
+                "acc2": {"windowStart": WINDOW, "usageToday": 0},
+            }
+        )
+
+    def _select(self, client: CountingFirestore, now: datetime = NOW):
+        return select_account_for_request(
+            client=client, accounts=[self.acc1, self.acc2], now=now
+        )
+
+    def test_exhausted_account_is_skipped_without_a_read(self) -> None:
+        mark_account_exhausted(client=self.store, account=self.acc1, now=NOW)
+        self.assertEqual(
+            self.store.docs["acc1"],
+            {"windowStart": WINDOW, "usageToday": 10, "exhaustedUntil": "2025-12-19T00:00:00Z"},
+        )
+        reads = self.store.reads
+        result = self._select(self.store)
+        self.assertEqual(result.account.id, "acc2")
+        self.assertEqual(result.exhausted_accounts, ["acc1"])
+        self.assertEqual(self.store.reads - reads, 1)  # acc2 only
+
+    def test_entry_expires_at_the_next_window(self) -> None:
+        mark_account_exhausted(client=self.store, account=self.acc1, now=NOW)
+        tomorrow = NOW + timedelta(days=1)
+        self.assertEqual(self._select(self.store, tomorrow).account.id, "acc1")
+
+    def test_earlier_provider_reset_keeps_the_counter(self) -> None:
+        reset = NOW + timedelta(hours=1)
+        mark_account_exhausted(client=self.store, account=self.acc1, now=NOW, until=reset)
+        self.assertEqual(self.store.docs["acc1"]["usageToday"], 4)
+        self.assertEqual(self.store.docs["acc1"]["exhaustedUntil"], "2025-12-18T13:00:00Z")
+        self.assertEqual(self._select(self.store, NOW + timedelta(minutes=30)).account.id, "acc2")
+        result = self._select(self.store, NOW + timedelta(hours=2))
+        self.assertEqual(result.account.id, "acc1")
+        self.assertEqual(result.usage.usage_today, 5)
+
+    def test_later_provider_reset_is_capped_at_the_window(self) -> None:
+        until = NOW + timedelta(days=3)
+        mark_account_exhausted(client=self.store, account=self.acc1, now=NOW, until=until)
+        self.assertEqual(self.store.docs["acc1"]["exhaustedUntil"], "2025-12-19T00:00:00Z")
+
+    def test_other_instances_learn_from_exhausted_until(self) -> None:
+        mark_account_exhausted(client=self.store, account=self.acc1, now=NOW)
+        other = CountingFirestore(self.store.docs)
+        self.assertEqual(self._select(other).account.id, "acc2")
+        self.assertEqual(other.reads, 2)
+        self.assertEqual(self._select(other).account.id, "acc2")
+        self.assertEqual(other.reads, 3)
+
+
+class TestLimitResetHint(unittest.TestCase):
+    def _reset(self, headers: dict[str, str], body: dict[str, Any] | None = None):
+        response = HttpResponse(429, headers, json.dumps(body or {}).encode("utf-8"))
+        client = ChartImgClient(mode="real", http=Requester(response))
+        result = client.fetch(account=ChartImgAccount(id="acc1", api_key="k"), request=_request())
+        self.assertEqual(result.error.code, "CHART_API_LIMIT_EXCEEDED")
+        return result.limit_reset_sec
+
+    def test_delta_seconds_header(self) -> None:
+        self.assertEqual(self._reset({"x-ratelimit-reset": "120"}), 120.0)
+
+    def test_unix_timestamp_header(self) -> None:
+        seconds = self._reset({"ratelimit-reset": str(int(time.time()) + 600)})
+        self.assertAlmostEqual(seconds, 600, delta=5)
+
+    def test_reset_at_in_body(self) -> None:
+        reset_at = (datetime.now(timezone.utc) + timedelta(hours=2)).isoformat()
+        seconds = self._reset({}, {"message": "Limit Exceeded", "resetAt": reset_at})
+        self.assertAlmostEqual(seconds, 7200, delta=5)
+
+    def test_retry_after_fallback_and_no_hint(self) -> None:
+        self.assertEqual(self._reset({"retry-after": "30"}), 30.0)
+        self.assertIsNone(self._reset({}))
+
+    def test_hint_is_reported_before_the_account_is_marked(self) -> None:
+        response = HttpResponse(429, {"x-ratelimit-reset": "90"}, b'{"message":"Limit Exceeded"}')
+        client = ChartImgClient(mode="real", http=Requester(response))
+        accounts = [ChartImgAccount(id="acc1", api_key="k")]
+        events: list[tuple[Any, ...]] = []
+        fetch_with_retries(
+            client=client,
+            request=_request(),
+            select_account=lambda: accounts.pop() if accounts else None,
+            mark_account_exhausted=lambda account: events.append(("exhausted", account.id)),
+            on_limit_reset=lambda account, seconds: events.append(("reset", account.id, seconds)),
+            sleep_fn=lambda _: None,
+        )
+        self.assertEqual(events, [("reset", "acc1", 90.0), ("exhausted", "acc1")])
+
+
+if __name__ == "__main__":
+    unittest.main()
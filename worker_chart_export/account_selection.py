@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+from datetime import datetime, timezone
+from typing import Protocol, Sequence
+
+from .config import ChartImgAccount, DEFAULT_CHART_IMG_DAILY_LIMIT
+from .usage import AccountSelectionResult
+
+
+class AccountSelectionStrategy(Protocol):
+    """Decides the order in which accounts are tried for a usage claim.
+
+    `select_account_for_request` claims on the first account of the order that has
+    units left, so the strategy controls which usage document takes the write.
+    """
+
+    def order(
+        self, accounts: Sequence[ChartImgAccount], *, key: str | None = None
+    ) -> list[ChartImgAccount]: ...
+
+    def record(self, result: AccountSelectionResult) -> None: ...
+
+    def record_exhausted(self, account: ChartImgAccount) -> None: ...
+
+
+class OrderedStrategy:
+    """Accounts in configured order: the first one is drained before the next."""
+
+    def order(
+        self, accounts: Sequence[ChartImgAccount], *, key: str | None = None
+    ) -> list[ChartImgAccount]:
+        return list(accounts)
+
+    def record(self, result: AccountSelectionResult) -> None:
+        pass
+
+    def record_exhausted(self, account: ChartImgAccount) -> None:
+        pass
+
+
+class LeastUsedStrategy(OrderedStrategy):
+    """Lowest used share of the daily limit first, from usage seen by this process.
+
+    Accounts without a usage figure for the current UTC day count as unused; ties keep
+    the configured order.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._used: dict[str, tuple[str, float]] = {}
+
+    def order(
+        self, accounts: Sequence[ChartImgAccount], *, key: str | None = None
+    ) -> list[ChartImgAccount]:
+        today = _utc_day(datetime.now(timezone.utc))
+        with self._lock:
+            used = dict(self._used)
+
+        def share(account: ChartImgAccount) -> float:
+            day, fraction = used.get(account.id, (today, 0.0))
+            return fraction if day == today else 0.0
+
+        return sorted(accounts, key=share)
+
+    def record(self, result: AccountSelectionResult) -> None:
+        today = _utc_day(datetime.now(timezone.utc))
+        with self._lock:
+            for account_id in result.exhausted_accounts:
+                self._used[account_id] = (today, 1.0)
+            usage = result.usage
+            if usage is not None and usage.daily_limit > 0:
+                day = usage.window_start[:10] or today
+                self._used[usage.account_id] = (day, usage.usage_today / usage.daily_limit)
+
+    def record_exhausted(self, account: ChartImgAccount) -> None:
+        with self._lock:
+            self._used[account.id] = (_utc_day(datetime.now(timezone.utc)), 1.0)
+
+
+class WeightedRoundRobinStrategy(OrderedStrategy):
+    """Smooth weighted round-robin over `daily_limit`.
+
+    Each call moves the next account (in proportion to its daily limit) to the front;
+    the others follow in the order they would come up next.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._current: dict[str, int] = {}
+
+    def order(
+        self, accounts: Sequence[ChartImgAccount], *, key: str | None = None
+    ) -> list[ChartImgAccount]:
+        if len(accounts) < 2:
+            return list(accounts)
+        weights = {account.id: _weight(account) for account in accounts}
+        total = sum(weights.values())
+        with self._lock:
+            for account in accounts:
+                self._current[account.id] = self._current.get(account.id, 0) + weights[account.id]
+            ranked = sorted(accounts, key=lambda account: -self._current[account.id])
+            self._current[ranked[0].id] -= total
+        return ranked
+
+
+class ConsistentHashStrategy(OrderedStrategy):
+    """Rendezvous hashing on the step (`runId/stepId`).
+
+    Each step gets its own stable account order, so concurrent steps start on different
+    accounts, and adding or removing an account only moves the steps that hashed to it.
+    Without a key the configured order is used.
+    """
+
+    def order(
+        self, accounts: Sequence[ChartImgAccount], *, key: str | None = None
+    ) -> list[ChartImgAccount]:
+        if key is None:
+            return list(accounts)
+        return sorted(
+            accounts, key=lambda account: _rendezvous_score(key, account.id), reverse=True
+        )
+
+
+def _weight(account: ChartImgAccount) -> int:
+    return max(1, account.daily_limit or DEFAULT_CHART_IMG_DAILY_LIMIT)
+
+
+def _rendezvous_score(key: str, account_id: str) -> int:
+    digest = hashlib.blake2b(f"{key}\x00{account_id}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+def _utc_day(now: datetime) -> str:
+    return now.strftime("%Y-%m-%d")
+
+
+_SHARED_STRATEGIES: dict[str, AccountSelectionStrategy] = {}
+_SHARED_STRATEGIES_LOCK = threading.Lock()
+
+
+def shared_account_strategy(name: str) -> AccountSelectionStrategy:
+    """Process-wide strategy, so cached usage and round-robin state span steps."""
+    with _SHARED_STRATEGIES_LOCK:
+        strategy = _SHARED_STRATEGIES.get(name)
+        if strategy is None:
+            if name == "least-used":
+                strategy = LeastUsedStrategy()
+            elif name == "weighted":
+                strategy = WeightedRoundRobinStrategy()
+            elif name == "hash":
+                strategy = ConsistentHashStrategy()
+            elif name == "ordered":
+                strategy = OrderedStrategy()
+            else:
+                raise ValueError(f"unknown account strategy: {name}")
+            _SHARED_STRATEGIES[name] = strategy
+        return strategy
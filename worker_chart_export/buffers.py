@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import tempfile
+import threading
+from typing import IO
+
+
+class MemoryBudget:
+    """Byte budget for rendered PNGs held in RAM between fetch and upload.
+
+    Shared by all steps of one invocation; reservations may come from worker threads.
+    """
+
+    def __init__(self, limit_bytes: int) -> None:
+        self.limit_bytes = limit_bytes
+        self._used = 0
+        self._lock = threading.Lock()
+
+    @property
+    def used_bytes(self) -> int:
+        return self._used
+
+    def try_reserve(self, size: int) -> bool:
+        with self._lock:
+            if self._used + size > self.limit_bytes:
+                return False
+            self._used += size
+            return True
+
+    def release(self, size: int) -> None:
+        with self._lock:
+            self._used = max(0, self._used - size)
+
+
+class PngBuffer:
+    """Rendered PNG kept in RAM while the budget allows, otherwise spilled to a temp file.
+
+    `close()` must be called once the payload has been uploaded (or dropped) to give the
+    bytes back to the budget and remove the temp file.
+    """
+
+    def __init__(
+        self,
+        *,
+        size: int,
+        data: bytes | None = None,
+        file: IO[bytes] | None = None,
+        budget: MemoryBudget | None = None,
+    ) -> None:
+        self.size = size
+        self._data = data
+        self._file = file
+        self._budget = budget
+
+    @classmethod
+    def hold(
+        cls, data: bytes, *, budget: MemoryBudget | None, spill_dir: str | None = None
+    ) -> "PngBuffer":
+        size = len(data)
+        if budget is None:
+            return cls(size=size, data=data)
+        if budget.try_reserve(size):
+            return cls(size=size, data=data, budget=budget)
+        spooled = tempfile.TemporaryFile(dir=spill_dir)
+        spooled.write(data)
+        spooled.seek(0)
+        return cls(size=size, file=spooled)
+
+    @property
+    def spilled(self) -> bool:
+        return self._file is not None
+
+    @property
+    def file(self) -> IO[bytes]:
+        if self._file is None:
+            raise ValueError("PNG buffer is held in memory")
+        self._file.seek(0)
+        return self._file
+
+    def read_bytes(self) -> bytes:
+        if self._data is not None:
+            return self._data
+        return self.file.read()
+
+    def close(self) -> None:
+        if self._data is not None and self._budget is not None:
+            self._budget.release(self.size)
+        self._data = None
+        self._budget = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
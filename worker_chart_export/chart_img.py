@@ -1,11 +1,13 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
 import time
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Callable, Mapping, Protocol
+from typing import Any, Awaitable, Callable, Literal, Mapping, Protocol
 
 try:  # pragma: no cover - optional dependency for runtime HTTP
     import httpx
@@ -13,12 +15,23 @@ except ImportError:  # pragma: no cover
     httpx = None  # type: ignore[assignment]
 
 from .config import ChartImgAccount, ChartsApiMode
+from .deadline import Deadline, deadline_allows
+from .fixtures import FixtureIndex, FixtureSource
+from .governor import AccountGovernor, shared_account_governor
+from .hedging import HedgePolicy
 from .logging import log_event
+from .render_cache import RenderCache, candle_close_timestamp, render_cache_key
+from .retry_policy import DEFAULT_RETRIABLE_STATUSES, RetryPolicy, parse_retry_after
+from .single_flight import SingleFlight, shared_single_flight
 
 
 PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
 NON_RETRIABLE_STATUSES = {400, 401, 403, 404, 409, 422}
-RETRIABLE_STATUSES = {500, 504}
+RETRIABLE_STATUSES = DEFAULT_RETRIABLE_STATUSES
+# Reset values above this are Unix timestamps rather than delta-seconds (~2001-09-09).
+_UNIX_TIMESTAMP_FLOOR = 1_000_000_000
+# Below this budget a new Chart-IMG attempt is not started: it could not finish in time.
+MIN_ATTEMPT_BUDGET_SECONDS = 1.0
 
 
 DEFAULT_FIXTURES_DIR = Path(
@@ -51,6 +64,16 @@ class ChartApiResult:
     http_status: int | None = None
     from_fixture: bool = False
     fixture_path: str | None = None
+    # Name of the render cache tier that served this result, None for a fresh render.
+    cache_hit: str | None = None
+    # True when the result was shared from an identical request already in flight.
+    coalesced: bool = False
+    # Server-requested wait before the next attempt (Retry-After), in seconds.
+    retry_after_sec: float | None = None
+    # True when the result came from a hedge request sent on a second account.
+    hedged: bool = False
+    # Seconds until the account's quota resets, when a limit response says so.
+    limit_reset_sec: float | None = None
 
 
 @dataclass(frozen=True, slots=True)
@@ -58,6 +81,8 @@ class HttpResponse:
     status_code: int
     headers: dict[str, str]
     content: bytes
+    # Set by streaming requesters that stopped reading early: `content` is only a prefix.
+    truncated: bool = False
 
 
 class HttpRequestError(Exception):
@@ -78,11 +103,33 @@ class HttpRequester(Protocol):
         raise NotImplementedError
 
 
+class AsyncHttpRequester(Protocol):
+    async def post(
+        self,
+        url: str,
+        *,
+        headers: Mapping[str, str],
+        json_body: Mapping[str, Any],
+        timeout: float,
+    ) -> HttpResponse:  # pragma: no cover - protocol
+        raise NotImplementedError
+
+
 class HttpxRequester:
-    def __init__(self, client: httpx.Client | None = None) -> None:
+    """httpx-backed requester.
+
+    With `max_body_bytes` set the body is streamed instead of buffered by httpx: reading
+    stops once it exceeds the cap, or right after the first bytes of an HTTP 200 body
+    that is not a PNG. Either way the response comes back with `truncated=True`.
+    """
+
+    def __init__(
+        self, client: httpx.Client | None = None, *, max_body_bytes: int | None = None
+    ) -> None:
         if httpx is None:
             raise RuntimeError("httpx is required for HttpxRequester")
         self._client = client or httpx.Client()
+        self._max_body_bytes = max_body_bytes
 
     def post(
         self,
@@ -93,21 +140,134 @@ class HttpxRequester:
         timeout: float,
     ) -> HttpResponse:
         try:
-            response = self._client.post(
-                url, headers=dict(headers), json=json_body, timeout=timeout
-            )
+            if self._max_body_bytes is None:
+                response = self._client.post(
+                    url, headers=dict(headers), json=json_body, timeout=timeout
+                )
+                return _to_http_response(response)
+            with self._client.stream(
+                "POST", url, headers=dict(headers), json=json_body, timeout=timeout
+            ) as response:
+                reader = _BodyReader(response, self._max_body_bytes)
+                for chunk in response.iter_bytes():
+                    if not reader.feed(chunk):
+                        break
+                return reader.response()
+        except httpx.TimeoutException as exc:
+            raise HttpRequestError("Chart-IMG request timed out", is_timeout=True) from exc
+        except httpx.HTTPError as exc:
+            raise HttpRequestError("Chart-IMG request failed") from exc
+
+
+class AsyncHttpxRequester:
+    """Async counterpart of `HttpxRequester`, with the same streaming mode."""
+
+    def __init__(
+        self, client: httpx.AsyncClient | None = None, *, max_body_bytes: int | None = None
+    ) -> None:
+        if httpx is None:
+            raise RuntimeError("httpx is required for AsyncHttpxRequester")
+        self._client = client or httpx.AsyncClient()
+        self._max_body_bytes = max_body_bytes
+
+    async def post(
+        self,
+        url: str,
+        *,
+        headers: Mapping[str, str],
+        json_body: Mapping[str, Any],
+        timeout: float,
+    ) -> HttpResponse:
+        try:
+            if self._max_body_bytes is None:
+                response = await self._client.post(
+                    url, headers=dict(headers), json=json_body, timeout=timeout
+                )
+                return _to_http_response(response)
+            async with self._client.stream(
+                "POST", url, headers=dict(headers), json=json_body, timeout=timeout
+            ) as response:
+                reader = _BodyReader(response, self._max_body_bytes)
+                async for chunk in response.aiter_bytes():
+                    if not reader.feed(chunk):
+                        break
+                return reader.response()
         except httpx.TimeoutException as exc:
             raise HttpRequestError("Chart-IMG request timed out", is_timeout=True) from exc
         except httpx.HTTPError as exc:
             raise HttpRequestError("Chart-IMG request failed") from exc
 
-        headers_out = {k.lower(): v for k, v in response.headers.items()}
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+class _BodyReader:
+    """Collects a streamed body into one buffer, sized from Content-Length when known."""
+
+    def __init__(self, response: Any, max_body_bytes: int) -> None:
+        self._status = response.status_code
+        self._headers = {k.lower(): v for k, v in response.headers.items()}
+        self._max = max_body_bytes
+        self._size = 0
+        self._truncated = False
+        # Only 200 bodies must be PNGs; error bodies are read (up to the cap) for the message.
+        self._signature_checked = self._status != 200
+        expected = _content_length(self._headers)
+        if expected is None or expected > self._max:
+            expected = 0
+        # Preallocate so the body is written in place instead of regrown chunk by chunk.
+        self._buffer = bytearray(expected)
+
+    def feed(self, chunk: bytes) -> bool:
+        """Append a chunk; False once reading should stop."""
+        end = self._size + len(chunk)
+        if end > self._max:
+            self._append(chunk[: self._max - self._size])
+            self._truncated = True
+            return False
+        self._append(chunk)
+        if not self._signature_checked and self._size >= len(PNG_SIGNATURE):
+            self._signature_checked = True
+            if not _is_png_bytes(self._buffer):
+                # A 200 that is not a PNG is rejected whatever follows; skip the rest.
+                self._truncated = True
+                return False
+        return True
+
+    def response(self) -> HttpResponse:
         return HttpResponse(
-            status_code=response.status_code,
-            headers=headers_out,
-            content=response.content,
+            status_code=self._status,
+            headers=self._headers,
+            content=bytes(memoryview(self._buffer)[: self._size]),
+            truncated=self._truncated,
         )
 
+    def _append(self, chunk: bytes) -> None:
+        end = self._size + len(chunk)
+        if end <= len(self._buffer):
+            self._buffer[self._size : end] = chunk
+        else:
+            del self._buffer[self._size :]
+            self._buffer += chunk
+        self._size = end
+
+
+def _content_length(headers: Mapping[str, str]) -> int | None:
+    try:
+        value = int(headers.get("content-length", ""))
+    except ValueError:
+        return None
+    return value if value >= 0 else None
+
+
+def _to_http_response(response: Any) -> HttpResponse:
+    headers_out = {k.lower(): v for k, v in response.headers.items()}
+    return HttpResponse(
+        status_code=response.status_code,
+        headers=headers_out,
+        content=response.content,
+    )
+
 
 class ChartImgClient:
     def __init__(
@@ -117,18 +277,94 @@ class ChartImgClient:
         base_url: str = "https://api.chart-img.com",
         fixtures_dir: Path | None = None,
         http: HttpRequester | None = None,
+        async_http: AsyncHttpRequester | None = None,
         timeout_sec: float = 30.0,
+        render_cache: RenderCache | None = None,
+        single_flight: SingleFlight | None = None,
+        governor: AccountGovernor | None = None,
+        fixtures: FixtureSource | None = None,
     ) -> None:
         self._mode = mode
         self._base_url = base_url.rstrip("/")
-        self._fixtures_dir = fixtures_dir or DEFAULT_FIXTURES_DIR
+        if fixtures is not None:
+            self._fixtures_dir = fixtures.directory
+            self._fixtures = fixtures
+        else:
+            self._fixtures_dir = fixtures_dir or DEFAULT_FIXTURES_DIR
+            self._fixtures = FixtureIndex(self._fixtures_dir)
         self._http = http
+        self._async_http = async_http
         self._timeout = timeout_sec
+        self._render_cache = render_cache
+        self._single_flight = single_flight or shared_single_flight()
+        self._governor = governor or shared_account_governor()
 
     @property
     def fixtures_dir(self) -> Path:
         return self._fixtures_dir
 
+    @property
+    def fixtures(self) -> FixtureSource:
+        return self._fixtures
+
+    def refresh_fixtures(self) -> None:
+        """Rescan the fixtures directory or remap the pack (mock/record modes index it once)."""
+        self._fixtures.refresh()
+
+    @property
+    def render_cache(self) -> RenderCache | None:
+        return self._render_cache
+
+    @property
+    def governor(self) -> AccountGovernor:
+        return self._governor
+
+    @property
+    def single_flight(self) -> SingleFlight:
+        return self._single_flight
+
+    def flight_key(self, request: ChartImgRequest) -> str:
+        # Fixture and live renders of the same payload must not be shared.
+        if self._mode == "real":
+            return f"real:{render_cache_key(request)}"
+        # Fixtures are stored per template (see `_fixture_stem`), so templates with the
+        # same payload still read or record their own file.
+        return f"{self._mode}:{request.chart_template_id}:{render_cache_key(request)}"
+
+    def cached_result(self, request: ChartImgRequest) -> ChartApiResult | None:
+        # Consulted before an account is selected, so a hit costs no quota unit.
+        if self._render_cache is None:
+            return None
+        expires_at = candle_close_timestamp(request.timeframe, self._render_cache.now())
+        if expires_at is None:
+            return None
+        hit = self._render_cache.lookup(render_cache_key(request), expires_at=expires_at)
+        if hit is None:
+            return None
+        entry, tier = hit
+        return ChartApiResult(ok=True, png_bytes=entry.png_bytes, cache_hit=tier)
+
+    async def cached_result_async(self, request: ChartImgRequest) -> ChartApiResult | None:
+        # Lower cache tiers do file I/O, keep it off the event loop.
+        if self._render_cache is None:
+            return None
+        return await asyncio.to_thread(self.cached_result, request)
+
+    def remember(self, request: ChartImgRequest, result: ChartApiResult) -> None:
+        if self._render_cache is None or not result.ok or not result.png_bytes:
+            return
+        if result.cache_hit is not None or result.from_fixture:
+            return
+        expires_at = candle_close_timestamp(request.timeframe, self._render_cache.now())
+        if expires_at is None:
+            return
+        self._render_cache.put(render_cache_key(request), result.png_bytes, expires_at=expires_at)
+
+    async def remember_async(self, request: ChartImgRequest, result: ChartApiResult) -> None:
+        if self._render_cache is None:
+            return
+        await asyncio.to_thread(self.remember, request, result)
+
     def fetch(
         self,
         *,
@@ -136,58 +372,137 @@ class ChartImgClient:
         request: ChartImgRequest,
         logger: logging.Logger | None = None,
         log_context: Mapping[str, Any] | None = None,
+        timeout_sec: float | None = None,
     ) -> ChartApiResult:
+        existing = self._fetch_fixture(request=request, logger=logger, log_context=log_context)
+        if existing is not None:
+            return existing
+
+        try:
+            waited = self._governor.acquire(account, timeout=timeout_sec)
+        except TimeoutError:
+            return ChartApiResult(ok=False, error=deadline_exceeded_error())
+        try:
+            result = self._fetch_real(
+                account=account, request=request, timeout_sec=_less(timeout_sec, waited)
+            )
+        finally:
+            self._governor.release(account)
+        if self._mode == "record":
+            self._record(request, result)
+        return result
+
+    async def fetch_async(
+        self,
+        *,
+        account: ChartImgAccount,
+        request: ChartImgRequest,
+        logger: logging.Logger | None = None,
+        log_context: Mapping[str, Any] | None = None,
+        timeout_sec: float | None = None,
+    ) -> ChartApiResult:
+        existing = self._fetch_fixture(request=request, logger=logger, log_context=log_context)
+        if existing is not None:
+            return existing
+
+        try:
+            waited = await self._governor.acquire_async(account, timeout=timeout_sec)
+        except TimeoutError:
+            return ChartApiResult(ok=False, error=deadline_exceeded_error())
+        try:
+            result = await self._fetch_real_async(
+                account=account, request=request, timeout_sec=_less(timeout_sec, waited)
+            )
+        finally:
+            self._governor.release(account)
+        if self._mode == "record":
+            self._record(request, result)
+        return result
+
+    async def aclose(self) -> None:
+        closer = getattr(self._async_http, "aclose", None)
+        if closer is not None:
+            await closer()
+
+    def _fetch_fixture(
+        self,
+        *,
+        request: ChartImgRequest,
+        logger: logging.Logger | None,
+        log_context: Mapping[str, Any] | None,
+    ) -> ChartApiResult | None:
         if self._mode == "mock":
             return _load_fixture(
                 request=request,
-                fixtures_dir=self._fixtures_dir,
+                fixtures=self._fixtures,
                 logger=logger,
                 log_context=log_context,
             )
-
         if self._mode == "record":
-            existing = _load_fixture(
+            return _load_fixture(
                 request=request,
-                fixtures_dir=self._fixtures_dir,
+                fixtures=self._fixtures,
                 logger=logger,
                 log_context=log_context,
                 allow_missing=True,
             )
-            if existing is not None:
-                return existing
+        return None
 
-        result = self._fetch_real(account=account, request=request)
-        if self._mode == "record":
-            _record_fixture(request=request, result=result, fixtures_dir=self._fixtures_dir)
-        return result
+    def _record(self, request: ChartImgRequest, result: ChartApiResult) -> None:
+        path = _record_fixture(request=request, result=result, fixtures_dir=self._fixtures_dir)
+        if path is not None:
+            self._fixtures.note(path)
 
     def _fetch_real(
         self,
         *,
         account: ChartImgAccount,
         request: ChartImgRequest,
+        timeout_sec: float | None = None,
     ) -> ChartApiResult:
         if self._http is None:
             raise RuntimeError("HttpRequester is required for real/record modes")
 
-        url = f"{self._base_url}/v2/tradingview/advanced-chart"
-        headers = {"x-api-key": account.api_key}
-
         try:
             response = self._http.post(
-                url,
-                headers=headers,
+                self._advanced_chart_url(),
+                headers={"x-api-key": account.api_key},
                 json_body=request.payload,
-                timeout=self._timeout,
+                timeout=self._attempt_timeout(timeout_sec),
             )
         except HttpRequestError as exc:
-            error = ChartApiError(
-                code="CHART_API_FAILED",
-                message=str(exc),
-                retriable=True,
-                details={"reason": "timeout"} if exc.is_timeout else {"reason": "network"},
+            return _network_error_result(exc)
+
+        return _handle_http_response(
+            response=response,
+            chart_template_id=request.chart_template_id,
+            chart_img_symbol=request.chart_img_symbol,
+        )
+
+    async def _fetch_real_async(
+        self,
+        *,
+        account: ChartImgAccount,
+        request: ChartImgRequest,
+        timeout_sec: float | None = None,
+    ) -> ChartApiResult:
+        if self._async_http is None:
+            # Sync requesters are still usable from the async engine via a worker thread.
+            if self._http is None:
+                raise RuntimeError("HttpRequester is required for real/record modes")
+            return await asyncio.to_thread(
+                self._fetch_real, account=account, request=request, timeout_sec=timeout_sec
+            )
+
+        try:
+            response = await self._async_http.post(
+                self._advanced_chart_url(),
+                headers={"x-api-key": account.api_key},
+                json_body=request.payload,
+                timeout=self._attempt_timeout(timeout_sec),
             )
-            return ChartApiResult(ok=False, error=error)
+        except HttpRequestError as exc:
+            return _network_error_result(exc)
 
         return _handle_http_response(
             response=response,
@@ -195,6 +510,31 @@ class ChartImgClient:
             chart_img_symbol=request.chart_img_symbol,
         )
 
+    def _attempt_timeout(self, timeout_sec: float | None) -> float:
+        if timeout_sec is None:
+            return self._timeout
+        return min(self._timeout, timeout_sec)
+
+    def _advanced_chart_url(self) -> str:
+        return f"{self._base_url}/v2/tradingview/advanced-chart"
+
+
+def _less(timeout_sec: float | None, waited: float) -> float | None:
+    # Time spent queued in the governor comes out of the attempt's budget.
+    if timeout_sec is None:
+        return None
+    return max(0.0, timeout_sec - waited)
+
+
+def _network_error_result(exc: HttpRequestError) -> ChartApiResult:
+    error = ChartApiError(
+        code="CHART_API_FAILED",
+        message=str(exc),
+        retriable=True,
+        details={"reason": "timeout"} if exc.is_timeout else {"reason": "network"},
+    )
+    return ChartApiResult(ok=False, error=error)
+
 
 def fetch_with_retries(
     *,
@@ -205,39 +545,364 @@ def fetch_with_retries(
     max_attempts: int = 3,
     backoff_base_seconds: float = 0.5,
     sleep_fn: Callable[[float], None] = time.sleep,
+    deadline: Deadline | None = None,
+    retry_policy: RetryPolicy | None = None,
+    on_limit_reset: Callable[[ChartImgAccount, float], None] | None = None,
+) -> ChartApiResult:
+    """Fetch a chart, retrying across accounts.
+
+    Identical requests already in flight in this process are not sent again: the caller
+    waits for the leading fetch and shares its result, so only one quota unit is used.
+    When a limit response says when the quota resets, `on_limit_reset` gets the account
+    and the seconds until then, just before `mark_account_exhausted` is called.
+    """
+
+    def lead() -> ChartApiResult:
+        nonlocal leader
+        leader = True
+        return _fetch_with_retries(
+            client=client,
+            request=request,
+            select_account=select_account,
+            mark_account_exhausted=mark_account_exhausted,
+            policy=retry_policy
+            or RetryPolicy(max_attempts=max_attempts, backoff_base_seconds=backoff_base_seconds),
+            sleep_fn=sleep_fn,
+            deadline=deadline,
+            on_limit_reset=on_limit_reset,
+        )
+
+    key = client.flight_key(request)
+    leader = False
+    try:
+        result = client.single_flight.do(
+            key, lead, timeout=deadline.remaining() if deadline is not None else None
+        )
+    except TimeoutError:
+        return _deadline_exceeded_result(None)
+    return result if leader else replace(result, coalesced=True)
+
+
+def _fetch_with_retries(
+    *,
+    client: ChartImgClient,
+    request: ChartImgRequest,
+    select_account: Callable[[], ChartImgAccount | None],
+    mark_account_exhausted: Callable[[ChartImgAccount], None] | None,
+    policy: RetryPolicy,
+    sleep_fn: Callable[[float], None],
+    deadline: Deadline | None,
+    on_limit_reset: Callable[[ChartImgAccount, float], None] | None = None,
 ) -> ChartApiResult:
+    cached = client.cached_result(request)
+    if cached is not None:
+        return cached
     last_error: ChartApiError | None = None
     attempts = 0
 
-    while attempts < max_attempts:
+    while attempts < policy.max_attempts:
+        if not deadline_allows(deadline, MIN_ATTEMPT_BUDGET_SECONDS):
+            return _deadline_exceeded_result(last_error)
         account = select_account()
         if account is None:
-            error = ChartApiError(
-                code="CHART_API_LIMIT_EXCEEDED",
-                message="No Chart-IMG accounts available",
-                retriable=False,
-            )
-            return ChartApiResult(ok=False, error=error)
+            return _no_accounts_result()
 
         attempts += 1
-        result = client.fetch(account=account, request=request)
-        if result.ok:
+        result = client.fetch(
+            account=account,
+            request=request,
+            timeout_sec=deadline.remaining() if deadline is not None else None,
+        )
+        last_error = result.error
+        outcome = _attempt_outcome(result, attempts=attempts, policy=policy)
+        if outcome == "exhausted":
+            _report_limit_reset(on_limit_reset, account, result)
+            if mark_account_exhausted is not None:
+                mark_account_exhausted(account)
+            continue
+        _record_attempt(policy, account, result)
+        if outcome == "done":
+            client.remember(request, result)
             return result
 
-        last_error = result.error
-        if last_error is None:
+        delay = policy.backoff(attempts, retry_after=result.retry_after_sec)
+        if not deadline_allows(deadline, delay + MIN_ATTEMPT_BUDGET_SECONDS):
             return result
+        sleep_fn(delay)
+
+    return _retries_exhausted_result(last_error)
+
+
+async def fetch_with_retries_async(
+    *,
+    client: ChartImgClient,
+    request: ChartImgRequest,
+    select_account: Callable[[], Awaitable[ChartImgAccount | None]],
+    mark_account_exhausted: Callable[[ChartImgAccount], Awaitable[None]] | None = None,
+    max_attempts: int = 3,
+    backoff_base_seconds: float = 0.5,
+    sleep_fn: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    deadline: Deadline | None = None,
+    retry_policy: RetryPolicy | None = None,
+    hedge_policy: HedgePolicy | None = None,
+    select_hedge_account: (
+        Callable[[ChartImgAccount], Awaitable[ChartImgAccount | None]] | None
+    ) = None,
+    on_limit_reset: Callable[[ChartImgAccount, float], None] | None = None,
+    release_hedge_account: Callable[[ChartImgAccount], Awaitable[None]] | None = None,
+) -> ChartApiResult:
+    """Async variant of `fetch_with_retries`, with the same in-flight coalescing.
+
+    With `hedge_policy` and `select_hedge_account` set, an attempt still running after
+    the policy's delay is duplicated on another account (see `HedgePolicy`); the first
+    success wins and the other request is cancelled. A hedge account claimed after the
+    first attempt already finished is handed to `release_hedge_account` unused. The
+    sync variant does not hedge: a blocking request cannot be cancelled.
+    """
+
+    async def lead() -> ChartApiResult:
+        nonlocal leader
+        leader = True
+        return await _fetch_with_retries_async(
+            client=client,
+            request=request,
+            select_account=select_account,
+            mark_account_exhausted=mark_account_exhausted,
+            policy=retry_policy
+            or RetryPolicy(max_attempts=max_attempts, backoff_base_seconds=backoff_base_seconds),
+            sleep_fn=sleep_fn,
+            deadline=deadline,
+            hedge=hedge_policy if select_hedge_account is not None else None,
+            select_hedge_account=select_hedge_account,
+            on_limit_reset=on_limit_reset,
+            release_hedge_account=release_hedge_account,
+        )
+
+    key = client.flight_key(request)
+    leader = False
+    try:
+        result = await client.single_flight.do_async(
+            key, lead, timeout=deadline.remaining() if deadline is not None else None
+        )
+    except TimeoutError:
+        return _deadline_exceeded_result(None)
+    return result if leader else replace(result, coalesced=True)
 
-        if last_error.code == "CHART_API_LIMIT_EXCEEDED":
+
+async def _fetch_with_retries_async(
+    *,
+    client: ChartImgClient,
+    request: ChartImgRequest,
+    select_account: Callable[[], Awaitable[ChartImgAccount | None]],
+    mark_account_exhausted: Callable[[ChartImgAccount], Awaitable[None]] | None,
+    policy: RetryPolicy,
+    sleep_fn: Callable[[float], Awaitable[None]],
+    deadline: Deadline | None,
+    hedge: HedgePolicy | None = None,
+    select_hedge_account: (
+        Callable[[ChartImgAccount], Awaitable[ChartImgAccount | None]] | None
+    ) = None,
+    on_limit_reset: Callable[[ChartImgAccount, float], None] | None = None,
+    release_hedge_account: Callable[[ChartImgAccount], Awaitable[None]] | None = None,
+) -> ChartApiResult:
+    cached = await client.cached_result_async(request)
+    if cached is not None:
+        return cached
+    last_error: ChartApiError | None = None
+    attempts = 0
+
+    while attempts < policy.max_attempts:
+        if not deadline_allows(deadline, MIN_ATTEMPT_BUDGET_SECONDS):
+            return _deadline_exceeded_result(last_error)
+        account = await select_account()
+        if account is None:
+            return _no_accounts_result()
+
+        attempts += 1
+        if hedge is not None and select_hedge_account is not None:
+            account, result, others = await _hedged_fetch_async(
+                client=client,
+                request=request,
+                account=account,
+                select_hedge_account=select_hedge_account,
+                hedge=hedge,
+                deadline=deadline,
+                release_hedge_account=release_hedge_account,
+            )
+            for other_account, other_result in others:
+                # The losing request still tells us about its account.
+                if _attempt_outcome(other_result, attempts=attempts, policy=policy) == "exhausted":
+                    _report_limit_reset(on_limit_reset, other_account, other_result)
+                    if mark_account_exhausted is not None:
+                        await mark_account_exhausted(other_account)
+                else:
+                    _record_attempt(policy, other_account, other_result)
+        else:
+            result = await client.fetch_async(
+                account=account,
+                request=request,
+                timeout_sec=deadline.remaining() if deadline is not None else None,
+            )
+        last_error = result.error
+        outcome = _attempt_outcome(result, attempts=attempts, policy=policy)
+        if outcome == "exhausted":
+            _report_limit_reset(on_limit_reset, account, result)
             if mark_account_exhausted is not None:
-                mark_account_exhausted(account)
+                await mark_account_exhausted(account)
             continue
+        _record_attempt(policy, account, result)
+        if outcome == "done":
+            await client.remember_async(request, result)
+            return result
 
-        if not last_error.retriable or attempts >= max_attempts:
+        delay = policy.backoff(attempts, retry_after=result.retry_after_sec)
+        if not deadline_allows(deadline, delay + MIN_ATTEMPT_BUDGET_SECONDS):
             return result
+        await sleep_fn(delay)
+
+    return _retries_exhausted_result(last_error)
 
-        sleep_fn(backoff_base_seconds * (2 ** (attempts - 1)))
 
+async def _hedged_fetch_async(
+    *,
+    client: ChartImgClient,
+    request: ChartImgRequest,
+    account: ChartImgAccount,
+    select_hedge_account: Callable[[ChartImgAccount], Awaitable[ChartImgAccount | None]],
+    hedge: HedgePolicy,
+    deadline: Deadline | None,
+    release_hedge_account: Callable[[ChartImgAccount], Awaitable[None]] | None = None,
+) -> tuple[ChartImgAccount, ChartApiResult, list[tuple[ChartImgAccount, ChartApiResult]]]:
+    """One attempt, duplicated on a second account if it outlives the hedge delay.
+
+    Returns the winning account and result plus any other finished (failed) attempts.
+    The first success wins; without one, the primary attempt's result is returned.
+    """
+    loop = asyncio.get_running_loop()
+    hedge.budget.earn()
+    tasks: dict[asyncio.Task[ChartApiResult], tuple[ChartImgAccount, float]] = {}
+
+    def launch(target: ChartImgAccount) -> None:
+        task = asyncio.create_task(
+            client.fetch_async(
+                account=target,
+                request=request,
+                timeout_sec=deadline.remaining() if deadline is not None else None,
+            )
+        )
+        tasks[task] = (target, loop.time())
+
+    launch(account)
+    primary = next(iter(tasks))
+    finished: list[tuple[asyncio.Task[ChartApiResult], ChartApiResult]] = []
+    try:
+        delay = hedge.delay()
+        if delay is not None:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if (
+                not done
+                and deadline_allows(deadline, MIN_ATTEMPT_BUDGET_SECONDS)
+                and hedge.budget.try_spend()
+            ):
+                second = await select_hedge_account(account)
+                if second is None:
+                    hedge.budget.refund()
+                elif primary.done():
+                    # The primary finished while the hedge account was being claimed.
+                    hedge.budget.refund()
+                    if release_hedge_account is not None:
+                        await release_hedge_account(second)
+                else:
+                    launch(second)
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                result = task.result()
+                finished.append((task, result))
+                if result.ok and not result.from_fixture:
+                    hedge.record_latency(loop.time() - tasks[task][1])
+            if any(result.ok for _, result in finished):
+                break
+    finally:
+        for task in tasks:
+            task.cancel()
+        # Let cancelled requests unwind (streams closed, governor slots released).
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    winner = next((item for item in finished if item[1].ok), None)
+    if winner is None:
+        winner = next(item for item in finished if item[0] is primary)
+    others = [(tasks[task][0], result) for task, result in finished if task is not winner[0]]
+    task, result = winner
+    if task is not primary:
+        result = replace(result, hedged=True)
+    return tasks[task][0], result, others
+
+
+def _attempt_outcome(
+    result: ChartApiResult, *, attempts: int, policy: RetryPolicy
+) -> Literal["done", "exhausted", "retry"]:
+    # Shared retry decision for the sync and async loops.
+    if result.ok or result.error is None:
+        return "done"
+    if result.error.code == "CHART_API_LIMIT_EXCEEDED":
+        return "exhausted"
+    retriable = policy.is_retriable(
+        http_status=result.error.http_status, retriable=result.error.retriable
+    )
+    if not retriable or attempts >= policy.max_attempts:
+        return "done"
+    return "retry"
+
+
+def _record_attempt(policy: RetryPolicy, account: ChartImgAccount, result: ChartApiResult) -> None:
+    # Fixture replays say nothing about the health of an account.
+    if result.from_fixture:
+        return
+    error = result.error
+    policy.record_attempt(
+        account.id,
+        ok=result.ok,
+        http_status=error.http_status if error is not None else result.http_status,
+        retriable=error.retriable if error is not None else False,
+    )
+
+
+def _report_limit_reset(
+    on_limit_reset: Callable[[ChartImgAccount, float], None] | None,
+    account: ChartImgAccount,
+    result: ChartApiResult,
+) -> None:
+    if on_limit_reset is not None and result.limit_reset_sec is not None:
+        on_limit_reset(account, result.limit_reset_sec)
+
+
+def _no_accounts_result() -> ChartApiResult:
+    error = ChartApiError(
+        code="CHART_API_LIMIT_EXCEEDED",
+        message="No Chart-IMG accounts available",
+        retriable=False,
+    )
+    return ChartApiResult(ok=False, error=error)
+
+
+def _deadline_exceeded_result(last_error: ChartApiError | None) -> ChartApiResult:
+    if last_error is not None:
+        return ChartApiResult(ok=False, error=last_error)
+    return ChartApiResult(ok=False, error=deadline_exceeded_error())
+
+
+def deadline_exceeded_error() -> ChartApiError:
+    return ChartApiError(
+        code="DEADLINE_EXCEEDED",
+        message="Step deadline reached before Chart-IMG request could be sent",
+        retriable=False,
+        details={"reason": "deadline"},
+    )
+
+
+def _retries_exhausted_result(last_error: ChartApiError | None) -> ChartApiResult:
     if last_error is not None:
         return ChartApiResult(ok=False, error=last_error)
 
@@ -262,16 +927,24 @@ def _handle_http_response(
     content = response.content
 
     if status == 200:
-        if _is_png_bytes(content):
+        if _is_png_bytes(content) and not response.truncated:
             return ChartApiResult(
                 ok=True, png_bytes=content, http_status=status, from_fixture=False
             )
+        details: dict[str, Any] = {"contentType": headers.get("content-type")}
+        if _is_png_bytes(content):
+            message = "Chart-IMG PNG exceeds the maximum response size"
+            details["reason"] = "body_too_large"
+        else:
+            message = "Chart-IMG returned HTTP 200 with non-PNG body"
+        if response.truncated:
+            details["bytesRead"] = len(content)
         error = ChartApiError(
             code="CHART_API_FAILED",
-            message="Chart-IMG returned HTTP 200 with non-PNG body",
+            message=message,
             http_status=status,
             retriable=False,
-            details={"contentType": headers.get("content-type")},
+            details=details,
         )
         return ChartApiResult(ok=False, error=error, http_status=status)
 
@@ -285,7 +958,13 @@ def _handle_http_response(
             retriable=True,
             details=_error_details(body, chart_template_id, chart_img_symbol),
         )
-        return ChartApiResult(ok=False, error=error, http_status=status)
+        return ChartApiResult(
+            ok=False,
+            error=error,
+            http_status=status,
+            retry_after_sec=parse_retry_after(headers),
+            limit_reset_sec=_parse_limit_reset(headers, body),
+        )
 
     retriable = status in RETRIABLE_STATUSES
     error = ChartApiError(
@@ -295,7 +974,9 @@ def _handle_http_response(
         retriable=retriable,
         details=_error_details(body, chart_template_id, chart_img_symbol),
     )
-    return ChartApiResult(ok=False, error=error, http_status=status)
+    return ChartApiResult(
+        ok=False, error=error, http_status=status, retry_after_sec=parse_retry_after(headers)
+    )
 
 
 def _error_details(
@@ -318,6 +999,45 @@ def _is_limit_exceeded(status: int, message: str | None) -> bool:
     return "limit exceeded" in message.lower()
 
 
+def _parse_limit_reset(
+    headers: Mapping[str, str], body: Any, *, now: datetime | None = None
+) -> float | None:
+    """Seconds until the quota resets, from rate-limit headers, the body or Retry-After.
+
+    `x-ratelimit-reset`/`ratelimit-reset` hold either delta-seconds or a Unix
+    timestamp; the body may carry `resetAt` (RFC 3339 or a Unix timestamp).
+    """
+    now = now or datetime.now(timezone.utc)
+    candidates: list[Any] = [headers.get("x-ratelimit-reset"), headers.get("ratelimit-reset")]
+    if isinstance(body, dict):
+        candidates.append(body.get("resetAt"))
+    for raw in candidates:
+        seconds = _reset_seconds(raw, now)
+        if seconds is not None:
+            return seconds
+    return parse_retry_after(headers, now=now)
+
+
+def _reset_seconds(raw: Any, now: datetime) -> float | None:
+    if isinstance(raw, str):
+        raw = raw.strip()
+        try:
+            raw = float(raw)
+        except ValueError:
+            try:
+                moment = datetime.fromisoformat(raw.replace("Z", "+00:00"))
+            except ValueError:
+                return None
+            if moment.tzinfo is None:
+                moment = moment.replace(tzinfo=timezone.utc)
+            return max(0.0, (moment - now).total_seconds())
+    if isinstance(raw, bool) or not isinstance(raw, (int, float)):
+        return None
+    if raw > _UNIX_TIMESTAMP_FLOOR:
+        return max(0.0, raw - now.timestamp())
+    return max(0.0, float(raw))
+
+
 def _parse_json_body(content: bytes) -> Any:
     if not content:
         return None
@@ -352,8 +1072,8 @@ def _extract_error_message(body: Any) -> str | None:
     return None
 
 
-def _is_png_bytes(content: bytes) -> bool:
-    return content.startswith(PNG_SIGNATURE)
+def _is_png_bytes(content: bytes | memoryview) -> bool:
+    return bytes(content[: len(PNG_SIGNATURE)]) == PNG_SIGNATURE
 
 
 def _fixture_stem(request: ChartImgRequest) -> str:
@@ -364,15 +1084,23 @@ def _fixture_stem(request: ChartImgRequest) -> str:
 def _load_fixture(
     *,
     request: ChartImgRequest,
-    fixtures_dir: Path,
+    fixtures: FixtureSource,
     logger: logging.Logger | None = None,
     log_context: Mapping[str, Any] | None = None,
     allow_missing: bool = False,
 ) -> ChartApiResult | None:
     stem = _fixture_stem(request)
-    png_path = fixtures_dir / f"{stem}.png"
-    if png_path.exists():
-        content = png_path.read_bytes()
+    fixtures_dir = fixtures.directory
+    entry = fixtures.lookup(stem)
+    content: bytes | memoryview | None = None
+    if entry is not None:
+        try:
+            content = entry.read()
+        except FileNotFoundError:
+            # Removed since the directory was indexed; refresh_fixtures() drops it.
+            entry = None
+    if entry is not None and entry.png_path is not None and content is not None:
+        png_path = entry.png_path
         if not _is_png_bytes(content):
             error = ChartApiError(
                 code="CHART_API_FAILED",
@@ -381,15 +1109,16 @@ def _load_fixture(
                 details={"fixturePath": str(png_path)},
             )
             return ChartApiResult(ok=False, error=error, from_fixture=True)
+        # Packed fixtures are memoryview slices of the mapping; the result (and the GCS
+        # upload and caches behind it) take bytes, so this is the one copy.
         return ChartApiResult(
             ok=True,
-            png_bytes=content,
+            png_bytes=bytes(content),
             from_fixture=True,
             fixture_path=str(png_path),
         )
 
-    error_fixture = _find_error_fixture(fixtures_dir, stem)
-    if error_fixture is None:
+    if entry is None:
         if allow_missing:
             return None
         error = ChartApiError(
@@ -410,28 +1139,22 @@ def _load_fixture(
         return ChartApiResult(ok=False, error=error, from_fixture=True)
 
     return _load_error_fixture(
-        path=error_fixture,
+        path=entry.path,
+        content=bytes(content or b""),
         chart_template_id=request.chart_template_id,
         chart_img_symbol=request.chart_img_symbol,
     )
 
 
-def _find_error_fixture(fixtures_dir: Path, stem: str) -> Path | None:
-    pattern = f"{stem}__*.json"
-    matches = sorted(fixtures_dir.glob(pattern))
-    if not matches:
-        return None
-    return matches[0]
-
-
 def _load_error_fixture(
     *,
     path: Path,
+    content: bytes,
     chart_template_id: str,
     chart_img_symbol: str,
 ) -> ChartApiResult:
     try:
-        payload = json.loads(path.read_text("utf-8"))
+        payload = json.loads(content.decode("utf-8"))
     except (ValueError, UnicodeDecodeError):
         payload = None
 
@@ -497,18 +1220,18 @@ def _record_fixture(
     request: ChartImgRequest,
     result: ChartApiResult,
     fixtures_dir: Path,
-) -> None:
+) -> Path | None:
     fixtures_dir.mkdir(parents=True, exist_ok=True)
     stem = _fixture_stem(request)
 
     if result.ok and result.png_bytes is not None:
         path = fixtures_dir / f"{stem}.png"
         path.write_bytes(result.png_bytes)
-        return
+        return path
 
     error = result.error
     if error is None:
-        return
+        return None
 
     status = error.http_status or 0
     message = error.message or "ERROR"
@@ -520,6 +1243,7 @@ def _record_fixture(
         "body": error.details.get("response") if error.details else None,
     }
     path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), "utf-8")
+    return path
 
 
 def _slugify_error(message: str) -> str:
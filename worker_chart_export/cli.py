@@ -5,11 +5,23 @@ import json
 import logging
 import os
 import sys
+import threading
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterable
 
-from .core import run_chart_export_step
-from .errors import ConfigError, NotImplementedYetError
+from .chart_img import DEFAULT_FIXTURES_DIR, ChartImgClient, HttpxRequester
+from .core import (
+    CoreResult,
+    build_fixture_index,
+    build_render_cache,
+    run_chart_export_step,
+    run_chart_export_steps,
+)
+from .errors import ConfigError, NotImplementedYetError, WorkerChartExportError
+from .fixture_pack import FixturePackError, pack_fixture_directory, unpack_fixture_archive
+from .ingest import pick_ready_chart_export_step
 from .logging import configure_logging, log_event
 from .runtime import get_config
 
@@ -26,13 +38,28 @@ def _ensure_default_api_mode(args: argparse.Namespace) -> None:
 def _add_run_local_args(parser: argparse.ArgumentParser) -> None:
     parser.add_argument("--flow-run-path", required=True)
     parser.add_argument("--step-id", default=None)
+    _add_runtime_override_args(parser)
+    parser.add_argument("--output-summary", choices=["none", "text", "json"], default="text")
+
+
+def _add_runtime_override_args(parser: argparse.ArgumentParser) -> None:
     parser.add_argument("--charts-api-mode", choices=["real", "mock", "record"], default=None)
     parser.add_argument("--charts-bucket", default=None)
     parser.add_argument("--accounts-config-path", default=None)
-    parser.add_argument("--output-summary", choices=["none", "text", "json"], default="text")
 
 
-def _run_local(args: argparse.Namespace) -> int:
+def _add_run_batch_args(parser: argparse.ArgumentParser) -> None:
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--flow-runs-dir", default=None)
+    source.add_argument(
+        "--stdin", action="store_true", help="Read flow_run documents as NDJSON from stdin"
+    )
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--executor", choices=["thread", "process"], default="thread")
+    _add_runtime_override_args(parser)
+
+
+def _apply_env_overrides(args: argparse.Namespace) -> None:
     # CLI overrides are applied by setting env vars so the core runtime stays uniform.
     if args.accounts_config_path:
         accounts_json = Path(args.accounts_config_path).read_text(encoding="utf-8")
@@ -46,6 +73,10 @@ def _run_local(args: argparse.Namespace) -> int:
 
     _ensure_default_api_mode(args)
 
+
+def _run_local(args: argparse.Namespace) -> int:
+    _apply_env_overrides(args)
+
     logger = logging.getLogger("worker-chart-export")
     log_event(
         logger,
@@ -68,6 +99,164 @@ def _run_local(args: argparse.Namespace) -> int:
     return 0 if result.status == "SUCCEEDED" else 1
 
 
+# Flow runs submitted ahead per batch worker, so workers never wait for input.
+BATCH_IN_FLIGHT_PER_WORKER = 2
+
+
+def _run_batch(args: argparse.Namespace) -> int:
+    if args.workers <= 0:
+        raise ConfigError("--workers must be a positive integer")
+    _apply_env_overrides(args)
+    # Fail fast on misconfiguration before any worker is started.
+    get_config()
+
+    logger = logging.getLogger("worker-chart-export")
+    if args.stdin:
+        entries = _iter_ndjson_entries(sys.stdin)
+    else:
+        entries = _iter_dir_entries(Path(args.flow_runs_dir))
+    log_event(
+        logger,
+        "batch_run_started",
+        mode="batch",
+        workers=args.workers,
+        executor=args.executor,
+        chartsApiMode=os.environ.get("CHARTS_API_MODE"),
+    )
+
+    executor: Executor
+    if args.executor == "process":
+        executor = ProcessPoolExecutor(
+            max_workers=args.workers, initializer=_init_batch_worker
+        )
+    else:
+        _init_batch_worker()
+        executor = ThreadPoolExecutor(max_workers=args.workers, thread_name_prefix="batch")
+
+    # Entries are read as workers free up, so a large input is never held in memory;
+    # summaries are printed in input order.
+    max_in_flight = args.workers * BATCH_IN_FLIGHT_PER_WORKER
+    pending: deque[Future[list[dict[str, Any]]]] = deque()
+    flow_runs_count = 0
+    all_ok = True
+
+    def emit(future: Future[list[dict[str, Any]]]) -> None:
+        nonlocal all_ok
+        for summary in future.result():
+            print(json.dumps(summary, ensure_ascii=False), flush=True)
+            all_ok = all_ok and summary["status"] in ("SUCCEEDED", "NOOP")
+
+    with executor:
+        for entry in entries:
+            pending.append(executor.submit(_run_batch_entry, entry))
+            flow_runs_count += 1
+            if len(pending) >= max_in_flight:
+                emit(pending.popleft())
+        while pending:
+            emit(pending.popleft())
+    log_event(logger, "batch_run_finished", flowRunsCount=flow_runs_count, ok=all_ok)
+    return 0 if all_ok else 1
+
+
+def _iter_dir_entries(directory: Path) -> Iterable[tuple[str, str]]:
+    if not directory.is_dir():
+        raise ConfigError(f"--flow-runs-dir is not a directory: {directory}")
+    for path in sorted(directory.glob("*.json")):
+        yield str(path), path.read_text(encoding="utf-8")
+
+
+def _iter_ndjson_entries(stream: Iterable[str]) -> Iterable[tuple[str, str]]:
+    for line_no, line in enumerate(stream, start=1):
+        if line.strip():
+            yield f"stdin:{line_no}", line
+
+
+_BATCH_CHART_IMG_CLIENT: ChartImgClient | None = None
+_BATCH_LOCK = threading.Lock()
+
+
+def _init_batch_worker() -> None:
+    # Warm config and clients once per worker process; threads of the same process share
+    # them. The Chart-IMG client uses the sync httpx requester because each step runs in
+    # its own event loop, and an httpx.AsyncClient cannot be shared across loops.
+    global _BATCH_CHART_IMG_CLIENT
+    configure_logging()
+    config = get_config()
+    with _BATCH_LOCK:
+        if _BATCH_CHART_IMG_CLIENT is None:
+            if config.charts_api_mode == "mock":
+                _BATCH_CHART_IMG_CLIENT = ChartImgClient(
+                    mode="mock", fixtures=build_fixture_index(config)
+                )
+            else:
+                _BATCH_CHART_IMG_CLIENT = ChartImgClient(
+                    mode=config.charts_api_mode,
+                    http=HttpxRequester(max_body_bytes=config.chart_img_max_response_bytes),
+                    fixtures=build_fixture_index(config),
+                    render_cache=build_render_cache(config),
+                )
+
+
+def _run_batch_entry(entry: tuple[str, str]) -> list[dict[str, Any]]:
+    source, raw = entry
+    logger = logging.getLogger("worker-chart-export")
+    run_id: str | None = None
+    try:
+        flow_run = json.loads(raw)
+        if not isinstance(flow_run, dict):
+            raise WorkerChartExportError("flow_run must be a JSON object")
+        raw_run_id = flow_run.get("runId")
+        run_id = raw_run_id if isinstance(raw_run_id, str) else None
+        step_ids = list(pick_ready_chart_export_step(flow_run).ready_step_ids)
+        if not step_ids:
+            return [_build_json_summary(CoreResult(status="NOOP", run_id=run_id))]
+        results = run_chart_export_steps(
+            flow_run=flow_run,
+            step_ids=step_ids,
+            config=get_config(),
+            chart_img_client=_BATCH_CHART_IMG_CLIENT,
+            # A step that raises gets its own INTERNAL_ERROR summary; its siblings keep theirs.
+            isolate_failures=True,
+        )
+    except (ValueError, WorkerChartExportError) as exc:
+        log_event(logger, "batch_item_invalid", source=source, runId=run_id, error=str(exc))
+        return [
+            _build_json_summary(
+                CoreResult(status="FAILED", run_id=run_id, error_code="VALIDATION_FAILED")
+            )
+        ]
+    except Exception as exc:
+        log_event(
+            logger, "batch_item_failed", source=source, runId=run_id, error=type(exc).__name__
+        )
+        return [
+            _build_json_summary(
+                CoreResult(status="FAILED", run_id=run_id, error_code="INTERNAL_ERROR")
+            )
+        ]
+    return [_build_json_summary(result) for result in results]
+
+
+def _fixtures_pack(args: argparse.Namespace) -> int:
+    try:
+        count = pack_fixture_directory(Path(args.fixtures_dir), Path(args.output))
+    except OSError as exc:
+        print(f"FIXTURES_PACK_FAILED: {exc}", file=sys.stderr)
+        return 1
+    print(f"FIXTURES_PACK OK: files={count}, pack={args.output}")
+    return 0
+
+
+def _fixtures_unpack(args: argparse.Namespace) -> int:
+    try:
+        count = unpack_fixture_archive(Path(args.pack), Path(args.output_dir))
+    except (OSError, FixturePackError) as exc:
+        print(f"FIXTURES_UNPACK_FAILED: {exc}", file=sys.stderr)
+        return 1
+    print(f"FIXTURES_UNPACK OK: files={count}, dir={args.output_dir}")
+    return 0
+
+
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(prog="worker-chart-export")
     sub = parser.add_subparsers(dest="cmd", required=True)
@@ -76,6 +265,27 @@ def build_parser() -> argparse.ArgumentParser:
     _add_run_local_args(run_local)
     run_local.set_defaults(_handler=_run_local)
 
+    run_batch = sub.add_parser(
+        "run-batch",
+        help="Run all READY steps of many flow_run documents (directory or NDJSON stdin)",
+    )
+    _add_run_batch_args(run_batch)
+    run_batch.set_defaults(_handler=_run_batch)
+
+    fixtures_pack = sub.add_parser(
+        "fixtures-pack", help="Pack a Chart-IMG fixtures directory into one archive file"
+    )
+    fixtures_pack.add_argument("--fixtures-dir", default=str(DEFAULT_FIXTURES_DIR))
+    fixtures_pack.add_argument("--output", required=True)
+    fixtures_pack.set_defaults(_handler=_fixtures_pack)
+
+    fixtures_unpack = sub.add_parser(
+        "fixtures-unpack", help="Restore a fixtures directory from a fixture archive"
+    )
+    fixtures_unpack.add_argument("--pack", required=True)
+    fixtures_unpack.add_argument("--output-dir", required=True)
+    fixtures_unpack.set_defaults(_handler=_fixtures_unpack)
+
     return parser
 
 
@@ -113,6 +323,8 @@ def _build_json_summary(result: Any) -> dict[str, Any]:
         "failuresCount": result.failures_count,
         "minImages": result.min_images,
         "errorCode": result.error_code,
+        "phaseTimingsMs": result.phase_timings_ms,
+        "itemTimingsMs": result.item_timings_ms,
     }
 
 
@@ -7,12 +7,39 @@ from typing import Literal
 from zoneinfo import ZoneInfo
 
 from .errors import ConfigError
+from .retry_policy import DEFAULT_RETRIABLE_STATUSES, parse_status_set
 
 
 ChartsApiMode = Literal["real", "mock", "record"]
+ChartsUploadMode = Literal["batch", "pipelined"]
+ReadyStepsMode = Literal["first", "all"]
+UsageClaimMode = Literal["request", "lease"]
+UsageWriteMode = Literal["precondition", "increment"]
+AccountStrategy = Literal["ordered", "least-used", "weighted", "hash"]
 
 
 DEFAULT_CHART_IMG_DAILY_LIMIT = 44
+DEFAULT_CHART_FETCH_CONCURRENCY = 4
+DEFAULT_CHARTS_PIPELINE_DEPTH = 4
+DEFAULT_MAX_CONCURRENT_STEPS = 4
+DEFAULT_FINALIZE_RESERVE_SEC = 10.0
+DEFAULT_PNG_MEMORY_BUDGET_MB = 64
+DEFAULT_RENDER_CACHE_MB = 0
+DEFAULT_RENDER_DISK_CACHE_MB = 256
+DEFAULT_FIXTURES_PRELOAD_KB = 0
+DEFAULT_CHART_IMG_MAX_RESPONSE_KB = 0
+DEFAULT_PNG_OPTIMIZE_LEVEL = 0
+DEFAULT_CHART_IMG_HEDGE_PERCENTILE = 0
+DEFAULT_CHART_IMG_USAGE_SHARDS = 0
+DEFAULT_CHART_IMG_HEDGE_BUDGET_PCT = 10.0
+DEFAULT_CHART_IMG_HEDGE_MIN_DELAY_SEC = 0.5
+DEFAULT_PNG_OPTIMIZE_WORKERS = 2
+DEFAULT_CHART_IMG_RETRY_MAX_ATTEMPTS = 3
+DEFAULT_CHART_IMG_RETRY_BASE_SEC = 0.5
+DEFAULT_CHART_IMG_RETRY_MAX_BACKOFF_SEC = 8.0
+DEFAULT_CHART_IMG_MAX_RETRY_AFTER_SEC = 30.0
+DEFAULT_CHART_IMG_BREAKER_FAILURES = 5
+DEFAULT_CHART_IMG_BREAKER_COOLDOWN_SEC = 60.0
 
 
 @dataclass(frozen=True, slots=True)
@@ -21,6 +48,10 @@ class ChartImgAccount:
     id: str
     api_key: str
     daily_limit: int = DEFAULT_CHART_IMG_DAILY_LIMIT
+    # Клиентские лимиты ключа: токен-бакет (запросов/сек, burst) и число запросов в полёте.
+    requests_per_second: float | None = None
+    burst: int | None = None
+    max_in_flight: int | None = None
 
 
 @dataclass(frozen=True, slots=True)
@@ -31,6 +62,38 @@ class WorkerConfig:
     charts_default_timezone: str
     chart_img_accounts: tuple[ChartImgAccount, ...]
     firestore_database: str = "(default)"
+    chart_fetch_concurrency: int = DEFAULT_CHART_FETCH_CONCURRENCY
+    charts_upload_mode: ChartsUploadMode = "batch"
+    charts_pipeline_depth: int = DEFAULT_CHARTS_PIPELINE_DEPTH
+    ready_steps_mode: ReadyStepsMode = "first"
+    max_concurrent_steps: int = DEFAULT_MAX_CONCURRENT_STEPS
+    step_deadline_sec: float | None = None
+    finalize_reserve_sec: float = DEFAULT_FINALIZE_RESERVE_SEC
+    png_memory_budget_bytes: int = DEFAULT_PNG_MEMORY_BUDGET_MB * 1024 * 1024
+    png_spill_dir: str | None = None
+    png_optimize_level: int = DEFAULT_PNG_OPTIMIZE_LEVEL
+    png_optimize_workers: int = DEFAULT_PNG_OPTIMIZE_WORKERS
+    render_cache_max_bytes: int = DEFAULT_RENDER_CACHE_MB * 1024 * 1024
+    render_disk_cache_dir: str | None = None
+    render_disk_cache_max_bytes: int = DEFAULT_RENDER_DISK_CACHE_MB * 1024 * 1024
+    render_gcs_cache_prefix: str | None = None
+    fixture_preload_max_bytes: int = DEFAULT_FIXTURES_PRELOAD_KB * 1024
+    fixtures_pack_path: str | None = None
+    chart_img_max_response_bytes: int | None = None
+    chart_img_retry_max_attempts: int = DEFAULT_CHART_IMG_RETRY_MAX_ATTEMPTS
+    chart_img_retry_base_sec: float = DEFAULT_CHART_IMG_RETRY_BASE_SEC
+    chart_img_retry_max_backoff_sec: float = DEFAULT_CHART_IMG_RETRY_MAX_BACKOFF_SEC
+    chart_img_max_retry_after_sec: float = DEFAULT_CHART_IMG_MAX_RETRY_AFTER_SEC
+    chart_img_usage_claim: UsageClaimMode = "request"
+    chart_img_usage_write: UsageWriteMode = "precondition"
+    chart_img_usage_shards: int = DEFAULT_CHART_IMG_USAGE_SHARDS
+    chart_img_account_strategy: AccountStrategy = "ordered"
+    chart_img_hedge_percentile: int = DEFAULT_CHART_IMG_HEDGE_PERCENTILE
+    chart_img_hedge_budget_pct: float = DEFAULT_CHART_IMG_HEDGE_BUDGET_PCT
+    chart_img_hedge_min_delay_sec: float = DEFAULT_CHART_IMG_HEDGE_MIN_DELAY_SEC
+    chart_img_retry_statuses: frozenset[int] = DEFAULT_RETRIABLE_STATUSES
+    chart_img_breaker_failures: int = DEFAULT_CHART_IMG_BREAKER_FAILURES
+    chart_img_breaker_cooldown_sec: float = DEFAULT_CHART_IMG_BREAKER_COOLDOWN_SEC
     service: str = "worker-chart-export"
     env: str | None = None
 
@@ -88,12 +151,178 @@ class WorkerConfig:
         if firestore_database == "":
             raise ConfigError("FIRESTORE_DB must not be empty")
 
+        chart_fetch_concurrency = _parse_positive_int_env(
+            "CHARTS_FETCH_CONCURRENCY", DEFAULT_CHART_FETCH_CONCURRENCY
+        )
+        charts_upload_mode = (os.environ.get("CHARTS_UPLOAD_MODE") or "batch").strip()
+        if charts_upload_mode not in ("batch", "pipelined"):
+            raise ConfigError("CHARTS_UPLOAD_MODE must be one of: batch|pipelined")
+        charts_pipeline_depth = _parse_positive_int_env(
+            "CHARTS_PIPELINE_DEPTH", DEFAULT_CHARTS_PIPELINE_DEPTH
+        )
+        ready_steps_mode = (os.environ.get("CHARTS_READY_STEPS_MODE") or "first").strip()
+        if ready_steps_mode not in ("first", "all"):
+            raise ConfigError("CHARTS_READY_STEPS_MODE must be one of: first|all")
+        max_concurrent_steps = _parse_positive_int_env(
+            "CHARTS_MAX_CONCURRENT_STEPS", DEFAULT_MAX_CONCURRENT_STEPS
+        )
+        # Step budget: explicit CHARTS_STEP_DEADLINE_SEC, else the function timeout if the
+        # runtime exposes it; without either the step runs without a deadline.
+        step_deadline_sec = _parse_positive_float_env("CHARTS_STEP_DEADLINE_SEC", None)
+        if step_deadline_sec is None:
+            step_deadline_sec = _parse_positive_float_env("FUNCTION_TIMEOUT_SEC", None)
+        finalize_reserve_sec = _parse_positive_float_env(
+            "CHARTS_FINALIZE_RESERVE_SEC", DEFAULT_FINALIZE_RESERVE_SEC
+        )
+        # Rendered PNGs waiting for upload stay in RAM up to this budget; the rest is
+        # spilled to temp files (CHARTS_PNG_SPILL_DIR, default: system temp dir).
+        png_memory_budget_mb = _parse_positive_int_env(
+            "CHARTS_PNG_MEMORY_BUDGET_MB", DEFAULT_PNG_MEMORY_BUDGET_MB
+        )
+        png_spill_dir = (os.environ.get("CHARTS_PNG_SPILL_DIR") or "").strip() or None
+        # Lossless PNG recompression (zlib level 1-9) before upload; 0 keeps it disabled.
+        png_optimize_level = _parse_non_negative_int_env(
+            "CHARTS_PNG_OPTIMIZE_LEVEL", DEFAULT_PNG_OPTIMIZE_LEVEL
+        )
+        if png_optimize_level > 9:
+            raise ConfigError("CHARTS_PNG_OPTIMIZE_LEVEL must be between 0 and 9")
+        png_optimize_workers = _parse_positive_int_env(
+            "CHARTS_PNG_OPTIMIZE_WORKERS", DEFAULT_PNG_OPTIMIZE_WORKERS
+        )
+        # In-process render cache size; 0 keeps it disabled.
+        render_cache_mb = _parse_non_negative_int_env(
+            "CHARTS_RENDER_CACHE_MB", DEFAULT_RENDER_CACHE_MB
+        )
+        # Disk tier under the in-process cache; enabled by setting a directory (e.g. /tmp).
+        render_disk_cache_dir = (
+            os.environ.get("CHARTS_RENDER_DISK_CACHE_DIR") or ""
+        ).strip() or None
+        render_disk_cache_mb = _parse_positive_int_env(
+            "CHARTS_RENDER_DISK_CACHE_MB", DEFAULT_RENDER_DISK_CACHE_MB
+        )
+        # Cross-instance tier in CHARTS_BUCKET; enabled by setting an object prefix.
+        render_gcs_cache_prefix = (
+            os.environ.get("CHARTS_RENDER_GCS_CACHE_PREFIX") or ""
+        ).strip().strip("/") or None
+        # mock/record fixtures up to this size are kept in memory after the first scan.
+        fixtures_preload_kb = _parse_non_negative_int_env(
+            "CHARTS_FIXTURES_PRELOAD_KB", DEFAULT_FIXTURES_PRELOAD_KB
+        )
+        # Packed fixture archive (see `fixtures-pack`) served instead of the directory.
+        fixtures_pack_path = (os.environ.get("CHARTS_FIXTURES_PACK") or "").strip() or None
+        if fixtures_pack_path is not None and charts_api_mode == "record":
+            raise ConfigError(
+                "CHARTS_FIXTURES_PACK is read-only and cannot be used with CHARTS_API_MODE=record"
+            )
+        # Streamed Chart-IMG responses with a size cap; 0 keeps fully buffered responses.
+        chart_img_max_response_kb = _parse_non_negative_int_env(
+            "CHART_IMG_MAX_RESPONSE_KB", DEFAULT_CHART_IMG_MAX_RESPONSE_KB
+        )
+        # Chart-IMG retry policy: full-jitter backoff, Retry-After, retriable HTTP statuses.
+        chart_img_retry_max_attempts = _parse_positive_int_env(
+            "CHART_IMG_RETRY_MAX_ATTEMPTS", DEFAULT_CHART_IMG_RETRY_MAX_ATTEMPTS
+        )
+        chart_img_retry_base_sec = _parse_positive_float_env(
+            "CHART_IMG_RETRY_BASE_SEC", DEFAULT_CHART_IMG_RETRY_BASE_SEC
+        )
+        chart_img_retry_max_backoff_sec = _parse_positive_float_env(
+            "CHART_IMG_RETRY_MAX_BACKOFF_SEC", DEFAULT_CHART_IMG_RETRY_MAX_BACKOFF_SEC
+        )
+        chart_img_max_retry_after_sec = _parse_positive_float_env(
+            "CHART_IMG_MAX_RETRY_AFTER_SEC", DEFAULT_CHART_IMG_MAX_RETRY_AFTER_SEC
+        )
+        # "lease" reserves a step's quota units up front and refunds the unused ones.
+        chart_img_usage_claim = (os.environ.get("CHART_IMG_USAGE_CLAIM") or "request").strip()
+        if chart_img_usage_claim not in ("request", "lease"):
+            raise ConfigError("CHART_IMG_USAGE_CLAIM must be one of: request|lease")
+        # "increment" claims with a server-side increment, so concurrent workers do not
+        # conflict on the usage document.
+        chart_img_usage_write = (os.environ.get("CHART_IMG_USAGE_WRITE") or "precondition").strip()
+        if chart_img_usage_write not in ("precondition", "increment"):
+            raise ConfigError("CHART_IMG_USAGE_WRITE must be one of: precondition|increment")
+        # Split each account's daily counter over this many shard documents (claims are
+        # then always increments); 0 keeps one usage document per account.
+        chart_img_usage_shards = _parse_non_negative_int_env(
+            "CHART_IMG_USAGE_SHARDS", DEFAULT_CHART_IMG_USAGE_SHARDS
+        )
+        # Order in which accounts are tried for a usage claim; "ordered" drains them in
+        # configured order.
+        chart_img_account_strategy = (
+            os.environ.get("CHART_IMG_ACCOUNT_STRATEGY") or "ordered"
+        ).strip()
+        if chart_img_account_strategy not in ("ordered", "least-used", "weighted", "hash"):
+            raise ConfigError(
+                "CHART_IMG_ACCOUNT_STRATEGY must be one of: ordered|least-used|weighted|hash"
+            )
+        # Hedged requests: duplicate an attempt on another account once it outlives this
+        # percentile of recent latencies; 0 keeps hedging disabled.
+        chart_img_hedge_percentile = _parse_non_negative_int_env(
+            "CHART_IMG_HEDGE_PERCENTILE", DEFAULT_CHART_IMG_HEDGE_PERCENTILE
+        )
+        if chart_img_hedge_percentile >= 100:
+            raise ConfigError("CHART_IMG_HEDGE_PERCENTILE must be between 0 and 99")
+        chart_img_hedge_budget_pct = _parse_positive_float_env(
+            "CHART_IMG_HEDGE_BUDGET_PCT", DEFAULT_CHART_IMG_HEDGE_BUDGET_PCT
+        )
+        chart_img_hedge_min_delay_sec = _parse_positive_float_env(
+            "CHART_IMG_HEDGE_MIN_DELAY_SEC", DEFAULT_CHART_IMG_HEDGE_MIN_DELAY_SEC
+        )
+        retry_statuses_raw = (os.environ.get("CHART_IMG_RETRY_STATUSES") or "").strip()
+        chart_img_retry_statuses = DEFAULT_RETRIABLE_STATUSES
+        if retry_statuses_raw:
+            try:
+                chart_img_retry_statuses = parse_status_set(retry_statuses_raw)
+            except ValueError as exc:
+                raise ConfigError(
+                    "CHART_IMG_RETRY_STATUSES must be a comma-separated list of HTTP "
+                    "statuses or ranges (e.g. 500,502-504)"
+                ) from exc
+        # Per-account circuit breaker; 0 consecutive failures disables it.
+        chart_img_breaker_failures = _parse_non_negative_int_env(
+            "CHART_IMG_BREAKER_FAILURES", DEFAULT_CHART_IMG_BREAKER_FAILURES
+        )
+        chart_img_breaker_cooldown_sec = _parse_positive_float_env(
+            "CHART_IMG_BREAKER_COOLDOWN_SEC", DEFAULT_CHART_IMG_BREAKER_COOLDOWN_SEC
+        )
+
         return cls(
             charts_bucket=charts_bucket,
             charts_api_mode=charts_api_mode,  # type: ignore[assignment]
             charts_default_timezone=charts_default_timezone,
             chart_img_accounts=tuple(chart_img_accounts),
             firestore_database=firestore_database,
+            chart_fetch_concurrency=chart_fetch_concurrency,
+            charts_upload_mode=charts_upload_mode,  # type: ignore[assignment]
+            charts_pipeline_depth=charts_pipeline_depth,
+            ready_steps_mode=ready_steps_mode,  # type: ignore[assignment]
+            max_concurrent_steps=max_concurrent_steps,
+            step_deadline_sec=step_deadline_sec,
+            finalize_reserve_sec=finalize_reserve_sec,
+            png_memory_budget_bytes=png_memory_budget_mb * 1024 * 1024,
+            png_spill_dir=png_spill_dir,
+            png_optimize_level=png_optimize_level,
+            png_optimize_workers=png_optimize_workers,
+            render_cache_max_bytes=render_cache_mb * 1024 * 1024,
+            render_disk_cache_dir=render_disk_cache_dir,
+            render_disk_cache_max_bytes=render_disk_cache_mb * 1024 * 1024,
+            render_gcs_cache_prefix=render_gcs_cache_prefix,
+            fixture_preload_max_bytes=fixtures_preload_kb * 1024,
+            fixtures_pack_path=fixtures_pack_path,
+            chart_img_max_response_bytes=chart_img_max_response_kb * 1024 or None,
+            chart_img_retry_max_attempts=chart_img_retry_max_attempts,
+            chart_img_retry_base_sec=chart_img_retry_base_sec,
+            chart_img_retry_max_backoff_sec=chart_img_retry_max_backoff_sec,
+            chart_img_max_retry_after_sec=chart_img_max_retry_after_sec,
+            chart_img_usage_claim=chart_img_usage_claim,  # type: ignore[assignment]
+            chart_img_usage_write=chart_img_usage_write,  # type: ignore[assignment]
+            chart_img_usage_shards=chart_img_usage_shards,
+            chart_img_account_strategy=chart_img_account_strategy,  # type: ignore[assignment]
+            chart_img_hedge_percentile=chart_img_hedge_percentile,
+            chart_img_hedge_budget_pct=chart_img_hedge_budget_pct,
+            chart_img_hedge_min_delay_sec=chart_img_hedge_min_delay_sec,
+            chart_img_retry_statuses=chart_img_retry_statuses,
+            chart_img_breaker_failures=chart_img_breaker_failures,
+            chart_img_breaker_cooldown_sec=chart_img_breaker_cooldown_sec,
             env=env,
         )
 
@@ -131,8 +360,40 @@ class WorkerConfig:
                 raise ConfigError(
                     f"CHART_IMG_ACCOUNTS_JSON[{i}].dailyLimit must be a positive integer"
                 )
+            requests_per_second = item.get("requestsPerSecond")
+            if requests_per_second is not None and (
+                isinstance(requests_per_second, bool)
+                or not isinstance(requests_per_second, (int, float))
+                or requests_per_second <= 0
+            ):
+                raise ConfigError(
+                    f"CHART_IMG_ACCOUNTS_JSON[{i}].requestsPerSecond must be a positive number"
+                )
+            burst = item.get("burst")
+            if burst is not None and (
+                isinstance(burst, bool) or not isinstance(burst, int) or burst <= 0
+            ):
+                raise ConfigError(f"CHART_IMG_ACCOUNTS_JSON[{i}].burst must be a positive integer")
+            max_in_flight = item.get("maxInFlight")
+            if max_in_flight is not None and (
+                isinstance(max_in_flight, bool)
+                or not isinstance(max_in_flight, int)
+                or max_in_flight <= 0
+            ):
+                raise ConfigError(
+                    f"CHART_IMG_ACCOUNTS_JSON[{i}].maxInFlight must be a positive integer"
+                )
             accounts.append(
-                ChartImgAccount(id=account_id, api_key=api_key, daily_limit=daily_limit)
+                ChartImgAccount(
+                    id=account_id,
+                    api_key=api_key,
+                    daily_limit=daily_limit,
+                    requests_per_second=(
+                        float(requests_per_second) if requests_per_second is not None else None
+                    ),
+                    burst=burst,
+                    max_in_flight=max_in_flight,
+                )
             )
 
         if not accounts:
@@ -141,6 +402,45 @@ class WorkerConfig:
         return accounts
 
 
+def _parse_positive_int_env(name: str, default: int) -> int:
+    raw = (os.environ.get(name) or "").strip()
+    if raw == "":
+        return default
+    try:
+        value = int(raw)
+    except ValueError as exc:
+        raise ConfigError(f"{name} must be a positive integer") from exc
+    if value <= 0:
+        raise ConfigError(f"{name} must be a positive integer")
+    return value
+
+
+def _parse_non_negative_int_env(name: str, default: int) -> int:
+    raw = (os.environ.get(name) or "").strip()
+    if raw == "":
+        return default
+    try:
+        value = int(raw)
+    except ValueError as exc:
+        raise ConfigError(f"{name} must be a non-negative integer") from exc
+    if value < 0:
+        raise ConfigError(f"{name} must be a non-negative integer")
+    return value
+
+
+def _parse_positive_float_env(name: str, default: float | None) -> float | None:
+    raw = (os.environ.get(name) or "").strip()
+    if raw == "":
+        return default
+    try:
+        value = float(raw)
+    except ValueError as exc:
+        raise ConfigError(f"{name} must be a positive number") from exc
+    if value <= 0:
+        raise ConfigError(f"{name} must be a positive number")
+    return value
+
+
 def _is_prod_env(env: str | None) -> bool:
     if env is None:
         return False
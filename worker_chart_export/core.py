@@ -1,37 +1,68 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import asyncio
+from dataclasses import dataclass, field, replace
+from functools import partial
 import logging
-from typing import Any, Mapping, Sequence
-from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Literal, Mapping, Sequence
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
 
 from .chart_img import (
+    ChartApiError,
     ChartApiResult,
     ChartImgClient,
     ChartImgRequest,
+    DEFAULT_FIXTURES_DIR,
+    AsyncHttpxRequester,
     HttpxRequester,
-    fetch_with_retries,
+    fetch_with_retries_async,
 )
-from .config import WorkerConfig
+from .account_selection import shared_account_strategy
+from .buffers import MemoryBudget, PngBuffer
+from .config import ChartImgAccount, WorkerConfig
+from .deadline import Deadline
 from .errors import WorkerChartExportError
 from .gcs_artifacts import (
     GcsUploader,
+    GeneratedAt,
+    PngUploadInput,
     build_manifest,
     format_generated_at,
+    upload_png,
     upload_pngs,
     validate_manifest,
     write_manifest,
 )
+from .hedging import HedgePolicy, shared_hedge_policy
 from .ingest import pick_ready_chart_export_step
 from .logging import log_event
 from .orchestration import StepError, claim_step_transaction, finalize_step
+from .png_optimize import OptimizedPng, optimize_png, shared_png_optimizer
+from .fixture_pack import shared_packed_fixtures
+from .fixtures import FixtureSource, shared_fixture_index
+from .render_cache import RenderCache, shared_render_cache
+from .retry_policy import RetryPolicy, shared_circuit_breaker
+from .timings import StepTimings
 from .templates import (
     BuiltChartRequest,
     FirestoreChartTemplateStore,
     RequestFailure,
     build_chart_requests,
 )
-from .usage import select_account_for_request, mark_account_exhausted
+from .usage import (
+    AccountSelectionResult,
+    UsageLease,
+    UsageReservation,
+    mark_account_exhausted,
+    refund_account_units,
+    select_account_for_request,
+    usage_claim_stats,
+)
+
+
+ExecutionPolicy = Literal["all", "quorum", "fail-fast"]
+EXECUTION_POLICIES: tuple[str, ...] = ("all", "quorum", "fail-fast")
 
 
 @dataclass(frozen=True, slots=True)
@@ -44,6 +75,10 @@ class CoreResult:
     failures_count: int | None = None
     min_images: int | None = None
     error_code: str | None = None
+    # Monotonic durations in ms per step phase (claim, templates, chartImg, gcsUpload,
+    # schemaValidation, manifestWrite, finalize, total) and per request item.
+    phase_timings_ms: dict[str, float] = field(default_factory=dict)
+    item_timings_ms: list[dict[str, Any]] = field(default_factory=list)
 
 
 def run_chart_export_step(
@@ -55,12 +90,190 @@ def run_chart_export_step(
     storage_client: Any | None = None,
     chart_img_client: ChartImgClient | None = None,
     now: datetime | None = None,
+    deadline: Deadline | None = None,
+) -> CoreResult:
+    # Thin sync adapter for the CLI and CloudEvent entrypoints.
+    return asyncio.run(
+        run_chart_export_step_async(
+            flow_run=flow_run,
+            step_id=step_id,
+            config=config,
+            firestore_client=firestore_client,
+            storage_client=storage_client,
+            chart_img_client=chart_img_client,
+            now=now,
+            deadline=deadline,
+        )
+    )
+
+
+async def run_chart_export_step_async(
+    *,
+    flow_run: dict[str, Any],
+    step_id: str | None,
+    config: WorkerConfig,
+    firestore_client: Any | None = None,
+    storage_client: Any | None = None,
+    chart_img_client: ChartImgClient | None = None,
+    now: datetime | None = None,
+    flow_run_lock: asyncio.Lock | None = None,
+    deadline: Deadline | None = None,
+    memory_budget: MemoryBudget | None = None,
 ) -> CoreResult:
+    firestore_client = firestore_client or _firestore_client(config.firestore_database)
+    storage_client = storage_client or _storage_client()
+    owns_chart_img_client = chart_img_client is None
+    chart_img_client = chart_img_client or _build_chart_img_client(config)
+    timings = StepTimings()
+    try:
+        result = await _run_step(
+            flow_run=flow_run,
+            step_id=step_id,
+            config=config,
+            firestore_client=firestore_client,
+            storage_client=storage_client,
+            chart_img_client=chart_img_client,
+            now=now or datetime.now(timezone.utc),
+            flow_run_lock=flow_run_lock,
+            deadline=deadline or _deadline_from_config(config),
+            timings=timings,
+            memory_budget=memory_budget or MemoryBudget(config.png_memory_budget_bytes),
+        )
+        return replace(
+            result,
+            phase_timings_ms=timings.phases_ms(),
+            item_timings_ms=timings.items_ms(),
+        )
+    finally:
+        if owns_chart_img_client and chart_img_client is not None:
+            await chart_img_client.aclose()
+
+
+def run_chart_export_steps(
+    *,
+    flow_run: dict[str, Any],
+    step_ids: Sequence[str],
+    config: WorkerConfig,
+    firestore_client: Any | None = None,
+    storage_client: Any | None = None,
+    chart_img_client: ChartImgClient | None = None,
+    now: datetime | None = None,
+    deadline: Deadline | None = None,
+    isolate_failures: bool = False,
+) -> list[CoreResult]:
+    return asyncio.run(
+        run_chart_export_steps_async(
+            flow_run=flow_run,
+            step_ids=step_ids,
+            config=config,
+            firestore_client=firestore_client,
+            storage_client=storage_client,
+            chart_img_client=chart_img_client,
+            now=now,
+            deadline=deadline,
+            isolate_failures=isolate_failures,
+        )
+    )
+
+
+async def run_chart_export_steps_async(
+    *,
+    flow_run: dict[str, Any],
+    step_ids: Sequence[str],
+    config: WorkerConfig,
+    firestore_client: Any | None = None,
+    storage_client: Any | None = None,
+    chart_img_client: ChartImgClient | None = None,
+    now: datetime | None = None,
+    deadline: Deadline | None = None,
+    isolate_failures: bool = False,
+) -> list[CoreResult]:
+    # Runs several READY steps of one flow run concurrently (bounded by
+    # max_concurrent_steps). Results follow step_ids order; a step that raises does not
+    # cancel its siblings, and the first error is re-raised once all of them are done
+    # (or, with isolate_failures, reported as that step's INTERNAL_ERROR result).
     logger = logging.getLogger("worker-chart-export")
     firestore_client = firestore_client or _firestore_client(config.firestore_database)
     storage_client = storage_client or _storage_client()
+    owns_chart_img_client = chart_img_client is None
     chart_img_client = chart_img_client or _build_chart_img_client(config)
-    now = now or datetime.now(timezone.utc)
+    semaphore = asyncio.Semaphore(config.max_concurrent_steps)
+    flow_run_lock = asyncio.Lock()
+    deadline = deadline or _deadline_from_config(config)
+    # One PNG memory budget for the whole invocation, however many steps run at once.
+    memory_budget = MemoryBudget(config.png_memory_budget_bytes)
+
+    async def run_one(step_id: str) -> CoreResult:
+        async with semaphore:
+            return await run_chart_export_step_async(
+                flow_run=flow_run,
+                step_id=step_id,
+                config=config,
+                firestore_client=firestore_client,
+                storage_client=storage_client,
+                chart_img_client=chart_img_client,
+                now=now,
+                flow_run_lock=flow_run_lock,
+                deadline=deadline,
+                memory_budget=memory_budget,
+            )
+
+    try:
+        outcomes = await asyncio.gather(
+            *(run_one(step_id) for step_id in step_ids), return_exceptions=True
+        )
+    finally:
+        if owns_chart_img_client and chart_img_client is not None:
+            await chart_img_client.aclose()
+
+    results: list[CoreResult] = []
+    first_error: BaseException | None = None
+    for step_id, outcome in zip(step_ids, outcomes):
+        if isinstance(outcome, BaseException):
+            log_event(
+                logger,
+                "step_failed_unhandled",
+                runId=flow_run.get("runId"),
+                stepId=step_id,
+                error=type(outcome).__name__,
+            )
+            if isolate_failures:
+                results.append(
+                    CoreResult(
+                        status="FAILED",
+                        run_id=flow_run.get("runId"),
+                        step_id=step_id,
+                        error_code="INTERNAL_ERROR",
+                    )
+                )
+                continue
+            first_error = first_error or outcome
+            continue
+        results.append(outcome)
+    if first_error is not None:
+        raise first_error
+    return results
+
+
+async def _run_step(
+    *,
+    flow_run: dict[str, Any],
+    step_id: str | None,
+    config: WorkerConfig,
+    firestore_client: Any,
+    storage_client: Any,
+    chart_img_client: ChartImgClient,
+    now: datetime,
+    flow_run_lock: asyncio.Lock | None = None,
+    deadline: Deadline | None = None,
+    timings: StepTimings | None = None,
+    memory_budget: MemoryBudget | None = None,
+) -> CoreResult:
+    logger = logging.getLogger("worker-chart-export")
+    timings = timings or StepTimings()
+    # Renders and uploads must stop early enough to leave time for manifest + finalize,
+    # otherwise the instance is killed mid-flight and the step stays RUNNING.
+    work_deadline = deadline.reserve(config.finalize_reserve_sec) if deadline is not None else None
 
     run_id = _require_run_id(flow_run)
     if step_id is None:
@@ -99,7 +312,15 @@ def run_chart_export_step(
         )
         return CoreResult(status="FAILED", run_id=run_id, step_id=step_id, error_code="VALIDATION_FAILED")
 
-    claim = claim_step_transaction(client=firestore_client, run_id=run_id, step_id=step_id)
+    with timings.phase("claim"):
+        claim = await _flow_run_write(
+            flow_run_lock,
+            claim_step_transaction,
+            client=firestore_client,
+            run_id=run_id,
+            step_id=step_id,
+            deadline=work_deadline,
+        )
     log_event(logger, "claim_attempt", runId=run_id, stepId=step_id, claimed=claim.claimed, status=claim.status)
     if not claim.claimed:
         return CoreResult(
@@ -110,106 +331,113 @@ def run_chart_export_step(
         )
 
     min_images, min_error = _get_min_images(step)
+    execution_policy, policy_error = _get_execution_policy(step)
+    min_error = min_error or policy_error
     if min_error:
-        return _finalize_failure(
+        return await _finalize_failure_async(
             firestore_client,
             run_id,
             step_id,
             min_error,
             logger,
+            flow_run_lock=flow_run_lock,
+            deadline=deadline,
+            timings=timings,
         )
 
     template_store = FirestoreChartTemplateStore(firestore_client)
-    build_result = build_chart_requests(
-        requests=_get_requests(step),
-        scope_symbol=_get_scope_symbol(flow_run),
-        timeframe=_get_timeframe(step),
-        default_timezone=config.charts_default_timezone,
-        template_store=template_store,
-        min_images=min_images,
-    )
+    with timings.phase("templates"):
+        build_result = await asyncio.to_thread(
+            build_chart_requests,
+            requests=_get_requests(step),
+            scope_symbol=_get_scope_symbol(flow_run),
+            timeframe=_get_timeframe(step),
+            default_timezone=config.charts_default_timezone,
+            template_store=template_store,
+            min_images=min_images,
+        )
     if build_result.validation_error:
-        return _finalize_failure(
-            firestore_client, run_id, step_id, build_result.validation_error, logger
+        return await _finalize_failure_async(
+            firestore_client,
+            run_id,
+            step_id,
+            build_result.validation_error,
+            logger,
+            flow_run_lock=flow_run_lock,
+            deadline=deadline,
+            timings=timings,
         )
 
     if not build_result.items and not build_result.failures:
-        return _finalize_failure(
+        return await _finalize_failure_async(
             firestore_client,
             run_id,
             step_id,
             StepError(code="VALIDATION_FAILED", message="requests must not be empty"),
             logger,
+            flow_run_lock=flow_run_lock,
+            deadline=deadline,
+            timings=timings,
         )
 
-    successes: list[tuple[BuiltChartRequest, bytes]] = []
     failures: list[dict[str, Any]] = [_failure_from_request(f) for f in build_result.failures]
-
-    for item in build_result.items:
+    generated_at = format_generated_at(now)
+    uploader = GcsUploader(client=storage_client, bucket_gs=config.charts_bucket)
+    render = _render_pipelined if config.charts_upload_mode == "pipelined" else _render_batch
+    claims_before = usage_claim_stats().stats()
+    rendered = await render(
+        items=build_result.items,
+        chart_img_client=chart_img_client,
+        config=config,
+        firestore_client=firestore_client,
+        uploader=uploader,
+        logger=logger,
+        run_id=run_id,
+        step_id=step_id,
+        generated_at=generated_at,
+        symbol_slug=_get_scope_symbol(flow_run),
+        gate=_ExecutionGate(
+            policy=execution_policy, min_images=min_images, total=len(build_result.items)
+        ),
+        deadline=work_deadline,
+        timings=timings,
+        memory_budget=memory_budget,
+    )
+    failures.extend(rendered.failures)
+    render_cache = getattr(chart_img_client, "render_cache", None)
+    if render_cache is not None:
         log_event(
-            logger,
-            "chart_api_call_start",
-            runId=run_id,
-            stepId=step_id,
-            chartTemplateId=item.chart_template_id,
-            chartImgSymbol=item.chart_img_symbol,
-        )
-        api_result = _execute_chart_request(
-            chart_img_client=chart_img_client,
-            request=item,
-            config=config,
-            firestore_client=firestore_client,
-            logger=logger,
+            logger, "render_cache_stats", runId=run_id, stepId=step_id, tiers=render_cache.stats()
         )
-        if api_result.ok and api_result.png_bytes:
-            successes.append((item, api_result.png_bytes))
-        else:
-            failures.append(_chart_failure(item, api_result))
+    log_event(
+        logger,
+        "chart_api_usage_claim_stats",
+        runId=run_id,
+        stepId=step_id,
+        usageWrite=config.chart_img_usage_write,
+        usageShards=config.chart_img_usage_shards,
+        claims=usage_claim_stats().since(claims_before),
+    )
+    governor = getattr(chart_img_client, "governor", None)
+    governor_stats = governor.stats() if governor is not None else None
+    if governor_stats:
         log_event(
-            logger,
-            "chart_api_call_finished",
-            runId=run_id,
-            stepId=step_id,
-            chartTemplateId=item.chart_template_id,
-            chartImgSymbol=item.chart_img_symbol,
-            ok=api_result.ok,
-            errorCode=getattr(api_result.error, "code", None) if api_result.error else None,
+            logger, "chart_img_governor_stats", runId=run_id, stepId=step_id, accounts=governor_stats
         )
 
-    if _all_accounts_exhausted(failures, successes, build_result.items):
-        return _finalize_failure(
+    if _all_accounts_exhausted(failures, rendered.fetched_count, build_result.items):
+        return await _finalize_failure_async(
             firestore_client,
             run_id,
             step_id,
             StepError(code="CHART_API_LIMIT_EXCEEDED", message="No Chart-IMG accounts available"),
             logger,
+            flow_run_lock=flow_run_lock,
+            deadline=deadline,
+            timings=timings,
         )
 
-    generated_at = format_generated_at(now)
-    uploader = GcsUploader(client=storage_client, bucket_gs=config.charts_bucket)
-
-    from .gcs_artifacts import PngUploadInput
-
-    symbol_slug = _get_scope_symbol(flow_run)
-    png_inputs = [
-        PngUploadInput(
-            chart_template_id=req.chart_template_id,
-            kind=req.kind,
-            png_bytes=png,
-            generated_at=generated_at,
-            symbol_slug=symbol_slug,
-            timeframe=req.interval,
-        )
-        for req, png in successes
-    ]
-    upload_result = upload_pngs(
-        uploader=uploader,
-        run_id=run_id,
-        step_id=step_id,
-        inputs=png_inputs,
-    )
-    failures.extend(upload_result.failures)
-    manifest_items = upload_result.items
+    manifest_items = rendered.items
 
     manifest = build_manifest(
         run_id=run_id,
@@ -223,16 +451,39 @@ def run_chart_export_step(
         failures=failures,
     )
 
-    schema_error = validate_manifest(manifest=manifest)
+    with timings.phase("schemaValidation"):
+        schema_error = await asyncio.to_thread(validate_manifest, manifest=manifest)
     if schema_error:
-        return _finalize_failure(firestore_client, run_id, step_id, schema_error, logger)
+        return await _finalize_failure_async(
+            firestore_client,
+            run_id,
+            step_id,
+            schema_error,
+            logger,
+            flow_run_lock=flow_run_lock,
+            deadline=deadline,
+            timings=timings,
+        )
 
-    manifest_uri, manifest_write_error = write_manifest(
-        uploader=uploader, run_id=run_id, step_id=step_id, manifest=manifest
-    )
+    with timings.phase("manifestWrite"):
+        manifest_uri, manifest_write_error = await asyncio.to_thread(
+            write_manifest,
+            uploader=uploader,
+            run_id=run_id,
+            step_id=step_id,
+            manifest=manifest,
+            timeout=deadline.clamp(config.finalize_reserve_sec / 2) if deadline is not None else None,
+        )
     if manifest_write_error:
-        return _finalize_failure(
-            firestore_client, run_id, step_id, manifest_write_error, logger
+        return await _finalize_failure_async(
+            firestore_client,
+            run_id,
+            step_id,
+            manifest_write_error,
+            logger,
+            flow_run_lock=flow_run_lock,
+            deadline=deadline,
+            timings=timings,
         )
 
     success = len(manifest_items) >= min_images
@@ -240,7 +491,7 @@ def run_chart_export_step(
         first_error = failures[0]["error"] if failures else {"code": "VALIDATION_FAILED", "message": "minImages not satisfied"}
         code = first_error.get("code", "VALIDATION_FAILED")
         message = first_error.get("message", "minImages not satisfied")
-        return _finalize_failure(
+        return await _finalize_failure_async(
             firestore_client,
             run_id,
             step_id,
@@ -250,16 +501,23 @@ def run_chart_export_step(
             items_count=len(manifest_items),
             failures_count=len(failures),
             min_images=min_images,
+            flow_run_lock=flow_run_lock,
+            deadline=deadline,
+            timings=timings,
         )
 
-    finalize_step(
-        client=firestore_client,
-        run_id=run_id,
-        step_id=step_id,
-        status="SUCCEEDED",
-        finished_at=generated_at.rfc3339,
-        outputs_manifest_gcs_uri=manifest_uri,
-    )
+    with timings.phase("finalize"):
+        await _flow_run_write(
+            flow_run_lock,
+            finalize_step,
+            client=firestore_client,
+            run_id=run_id,
+            step_id=step_id,
+            status="SUCCEEDED",
+            finished_at=generated_at.rfc3339,
+            outputs_manifest_gcs_uri=manifest_uri,
+            deadline=deadline,
+        )
     log_event(
         logger,
         "step_completed",
@@ -270,6 +528,8 @@ def run_chart_export_step(
         failuresCount=len(failures),
         minImages=min_images,
         outputsManifestGcsUri=manifest_uri,
+        phaseTimingsMs=timings.phases_ms(),
+        itemTimingsMs=timings.items_ms(),
     )
 
     return CoreResult(
@@ -283,25 +543,514 @@ def run_chart_export_step(
     )
 
 
-def _execute_chart_request(
+@dataclass(slots=True)
+class _ExecutionGate:
+    # Decides, right before each Chart-IMG call, whether the step outcome is already
+    # settled by the execution policy: "quorum" stops once minImages renders succeeded,
+    # "fail-fast" stops once the remaining requests can no longer reach minImages.
+    policy: ExecutionPolicy
+    min_images: int
+    total: int
+    succeeded: int = 0
+    failed: int = 0
+
+    def skip_reason(self) -> str | None:
+        if self.policy == "quorum" and self.succeeded >= self.min_images:
+            return "min_images_reached"
+        if self.policy == "fail-fast" and self.total - self.failed < self.min_images:
+            return "min_images_unreachable"
+        return None
+
+    def record(self, api_result: ChartApiResult) -> None:
+        if api_result.ok and api_result.png_bytes:
+            self.succeeded += 1
+        else:
+            self.failed += 1
+
+    def skipped_result(self, reason: str) -> ChartApiResult:
+        return ChartApiResult(
+            ok=False,
+            error=ChartApiError(
+                code="CHART_REQUEST_SKIPPED",
+                message=f"Request skipped by executionPolicy={self.policy}",
+                details={"executionPolicy": self.policy, "reason": reason},
+            ),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class _RenderOutcome:
+    items: list[dict[str, Any]]
+    failures: list[dict[str, Any]]
+    fetched_count: int
+
+
+async def _render_batch(
+    *,
+    items: Sequence[BuiltChartRequest],
+    chart_img_client: ChartImgClient,
+    config: WorkerConfig,
+    firestore_client: Any,
+    uploader: GcsUploader,
+    logger: logging.Logger,
+    run_id: str,
+    step_id: str,
+    generated_at: GeneratedAt,
+    symbol_slug: str,
+    gate: _ExecutionGate | None = None,
+    deadline: Deadline | None = None,
+    timings: StepTimings | None = None,
+    memory_budget: MemoryBudget | None = None,
+) -> _RenderOutcome:
+    # Buffer every PNG, then upload them in one pass once all renders are done. PNGs
+    # beyond the memory budget are spilled to temp files as they arrive.
+    timings = timings or StepTimings()
+    successes: list[tuple[int, BuiltChartRequest, PngBuffer]] = []
+    failures: list[dict[str, Any]] = []
+    results: list[ChartApiResult | None] = [None] * len(items)
+    buffers: list[PngBuffer | None] = [None] * len(items)
+    cache_hits: list[str | None] = [None] * len(items)
+    optimized: list[OptimizedPng | None] = [None] * len(items)
+
+    async def collect(index: int, item: BuiltChartRequest, api_result: ChartApiResult) -> None:
+        if api_result.ok and api_result.png_bytes:
+            png, optimized[index] = await _optimize_png(
+                api_result.png_bytes, config, timings, index, item.chart_template_id
+            )
+            buffers[index] = await _hold_png(png, config, memory_budget)
+            cache_hits[index] = api_result.cache_hit
+        else:
+            results[index] = api_result
+
+    try:
+        with timings.phase("chartImg"):
+            await _fetch_chart_items(
+                items=items,
+                chart_img_client=chart_img_client,
+                config=config,
+                firestore_client=firestore_client,
+                logger=logger,
+                run_id=run_id,
+                step_id=step_id,
+                on_result=collect,
+                gate=gate,
+                deadline=deadline,
+                timings=timings,
+            )
+        for index, (item, buffer) in enumerate(zip(items, buffers)):
+            if buffer is not None:
+                successes.append((index, item, buffer))
+            else:
+                failures.append(_chart_failure(item, results[index]))
+        if not successes:
+            return _RenderOutcome(items=[], failures=failures, fetched_count=0)
+
+        png_inputs = [
+            _png_upload_input(
+                req,
+                buffer,
+                generated_at=generated_at,
+                symbol_slug=symbol_slug,
+                cache_hit=cache_hits[index],
+                optimized=optimized[index],
+            )
+            for index, req, buffer in successes
+        ]
+
+        def record_upload(position: int, seconds: float) -> None:
+            index, req, _ = successes[position]
+            timings.record_item(index, req.chart_template_id, "uploadMs", seconds)
+
+        with timings.phase("gcsUpload"):
+            upload_result = await asyncio.to_thread(
+                upload_pngs,
+                uploader=uploader,
+                run_id=run_id,
+                step_id=step_id,
+                inputs=png_inputs,
+                deadline=deadline,
+                on_uploaded=record_upload,
+            )
+    finally:
+        for buffer in buffers:
+            if buffer is not None:
+                buffer.close()
+    failures.extend(upload_result.failures)
+    return _RenderOutcome(
+        items=list(upload_result.items), failures=failures, fetched_count=len(successes)
+    )
+
+
+async def _render_pipelined(
+    *,
+    items: Sequence[BuiltChartRequest],
+    chart_img_client: ChartImgClient,
+    config: WorkerConfig,
+    firestore_client: Any,
+    uploader: GcsUploader,
+    logger: logging.Logger,
+    run_id: str,
+    step_id: str,
+    generated_at: GeneratedAt,
+    symbol_slug: str,
+    gate: _ExecutionGate | None = None,
+    deadline: Deadline | None = None,
+    timings: StepTimings | None = None,
+    memory_budget: MemoryBudget | None = None,
+) -> _RenderOutcome:
+    # Each PNG goes to a bounded upload queue as soon as it is rendered and is dropped
+    # once uploaded, so uploads overlap the remaining renders and memory stays bounded by
+    # the pipeline depth. Stage results land in per-request slots to keep manifest order.
+    # Since uploads overlap renders, the gcsUpload phase only covers the drain after the
+    # last render; per-item uploadMs carries the full upload cost.
+    timings = timings or StepTimings()
+    depth = config.charts_pipeline_depth
+    queue: asyncio.Queue[tuple[int, PngUploadInput] | None] = asyncio.Queue(maxsize=depth)
+    item_slots: list[dict[str, Any] | None] = [None] * len(items)
+    failure_slots: list[dict[str, Any] | None] = [None] * len(items)
+    fetched_count = 0
+
+    async def upload_worker() -> None:
+        while True:
+            entry = await queue.get()
+            if entry is None:
+                return
+            index, upload_input = entry
+            try:
+                with timings.item(index, upload_input.chart_template_id, "uploadMs"):
+                    result = await asyncio.to_thread(
+                        upload_png,
+                        uploader=uploader,
+                        run_id=run_id,
+                        step_id=step_id,
+                        entry=upload_input,
+                        deadline=deadline,
+                    )
+            finally:
+                if isinstance(upload_input.png_bytes, PngBuffer):
+                    upload_input.png_bytes.close()
+            if result.items:
+                item_slots[index] = result.items[0]
+            if result.failures:
+                failure_slots[index] = result.failures[0]
+
+    async def enqueue(index: int, item: BuiltChartRequest, api_result: ChartApiResult) -> None:
+        nonlocal fetched_count
+        if api_result.ok and api_result.png_bytes:
+            fetched_count += 1
+            png, optimized = await _optimize_png(
+                api_result.png_bytes, config, timings, index, item.chart_template_id
+            )
+            await queue.put(
+                (
+                    index,
+                    _png_upload_input(
+                        item,
+                        await _hold_png(png, config, memory_budget),
+                        generated_at=generated_at,
+                        symbol_slug=symbol_slug,
+                        cache_hit=api_result.cache_hit,
+                        optimized=optimized,
+                    ),
+                )
+            )
+        else:
+            failure_slots[index] = _chart_failure(item, api_result)
+
+    workers = [asyncio.create_task(upload_worker()) for _ in range(min(depth, len(items)))]
+    try:
+        with timings.phase("chartImg"):
+            await _fetch_chart_items(
+                items=items,
+                chart_img_client=chart_img_client,
+                config=config,
+                firestore_client=firestore_client,
+                logger=logger,
+                run_id=run_id,
+                step_id=step_id,
+                on_result=enqueue,
+                gate=gate,
+                deadline=deadline,
+                timings=timings,
+            )
+        with timings.phase("gcsUpload"):
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+    finally:
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        # After a failed render, PNGs still queued release their budget and spill files.
+        while not queue.empty():
+            entry = queue.get_nowait()
+            if entry is not None and isinstance(entry[1].png_bytes, PngBuffer):
+                entry[1].png_bytes.close()
+
+    return _RenderOutcome(
+        items=[item for item in item_slots if item is not None],
+        failures=[failure for failure in failure_slots if failure is not None],
+        fetched_count=fetched_count,
+    )
+
+
+async def _hold_png(
+    png: bytes, config: WorkerConfig, memory_budget: MemoryBudget | None
+) -> PngBuffer:
+    # Spilling writes a temp file, so keep it off the event loop.
+    return await asyncio.to_thread(
+        PngBuffer.hold, png, budget=memory_budget, spill_dir=config.png_spill_dir
+    )
+
+
+async def _optimize_png(
+    png: bytes,
+    config: WorkerConfig,
+    timings: StepTimings,
+    index: int,
+    chart_template_id: str,
+) -> tuple[bytes, OptimizedPng | None]:
+    # Optional lossless recompression before upload, in a shared worker pool so zlib
+    # runs off the event loop. A PNG the optimizer cannot parse is uploaded as received.
+    if not config.png_optimize_level:
+        return png, None
+    pool = shared_png_optimizer(config.png_optimize_workers)
+    with timings.item(index, chart_template_id, "optimizeMs"):
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(
+                pool, partial(optimize_png, png, level=config.png_optimize_level)
+            )
+        except ValueError:
+            return png, None
+    return result.png_bytes, result
+
+
+def _png_upload_input(
+    req: BuiltChartRequest,
+    png: bytes | PngBuffer,
+    *,
+    generated_at: GeneratedAt,
+    symbol_slug: str,
+    cache_hit: str | None = None,
+    optimized: OptimizedPng | None = None,
+) -> PngUploadInput:
+    meta: dict[str, Any] = {}
+    if cache_hit:
+        meta["cacheHit"] = cache_hit
+    if optimized is not None:
+        meta["originalBytes"] = optimized.original_bytes
+        meta["optimizedBytes"] = optimized.optimized_bytes
+    return PngUploadInput(
+        chart_template_id=req.chart_template_id,
+        kind=req.kind,
+        png_bytes=png,
+        generated_at=generated_at,
+        symbol_slug=symbol_slug,
+        timeframe=req.interval,
+        meta=meta or None,
+    )
+
+
+async def _fetch_chart_items(
+    *,
+    items: Sequence[BuiltChartRequest],
+    chart_img_client: ChartImgClient,
+    config: WorkerConfig,
+    firestore_client: Any,
+    logger: logging.Logger,
+    run_id: str,
+    step_id: str,
+    on_result: Callable[[int, BuiltChartRequest, ChartApiResult], Awaitable[None]],
+    gate: _ExecutionGate | None = None,
+    deadline: Deadline | None = None,
+    timings: StepTimings | None = None,
+) -> None:
+    # Requests are fanned out under a bounded semaphore. Each result is handed to
+    # on_result together with its request index while the slot is still held, so a slow
+    # consumer applies backpressure to new renders.
+    semaphore = asyncio.Semaphore(config.chart_fetch_concurrency)
+    account_lock = asyncio.Lock()
+    timings = timings or StepTimings()
+    lease = None
+    if config.chart_img_usage_claim == "lease":
+        # One reservation for the whole step; unused units are refunded once it is done.
+        lease = UsageLease(
+            client=firestore_client,
+            units=len(items),
+            logger=logger,
+            log_context={"runId": run_id, "stepId": step_id},
+            deadline=deadline,
+            write=config.chart_img_usage_write,
+            shards=config.chart_img_usage_shards,
+        )
+
+    async def fetch_one(index: int, item: BuiltChartRequest) -> None:
+        async with semaphore:
+            skip_reason = gate.skip_reason() if gate is not None else None
+            if gate is not None and skip_reason is not None:
+                log_event(
+                    logger,
+                    "chart_api_call_skipped",
+                    runId=run_id,
+                    stepId=step_id,
+                    chartTemplateId=item.chart_template_id,
+                    executionPolicy=gate.policy,
+                    reason=skip_reason,
+                )
+                await on_result(index, item, gate.skipped_result(skip_reason))
+                return
+            log_event(
+                logger,
+                "chart_api_call_start",
+                runId=run_id,
+                stepId=step_id,
+                chartTemplateId=item.chart_template_id,
+                chartImgSymbol=item.chart_img_symbol,
+            )
+            with timings.item(index, item.chart_template_id, "fetchMs"):
+                api_result = await _execute_chart_request(
+                    chart_img_client=chart_img_client,
+                    request=item,
+                    config=config,
+                    firestore_client=firestore_client,
+                    logger=logger,
+                    account_lock=account_lock,
+                    deadline=deadline,
+                    lease=lease,
+                    selection_key=f"{run_id}/{step_id}",
+                )
+            log_event(
+                logger,
+                "chart_api_call_finished",
+                runId=run_id,
+                stepId=step_id,
+                chartTemplateId=item.chart_template_id,
+                chartImgSymbol=item.chart_img_symbol,
+                ok=api_result.ok,
+                errorCode=getattr(api_result.error, "code", None) if api_result.error else None,
+                cacheHit=api_result.cache_hit,
+                coalesced=api_result.coalesced,
+                hedged=api_result.hedged,
+            )
+            if gate is not None:
+                gate.record(api_result)
+            await on_result(index, item, api_result)
+
+    try:
+        await asyncio.gather(*(fetch_one(index, item) for index, item in enumerate(items)))
+    finally:
+        if lease is not None:
+            await asyncio.to_thread(lease.release)
+
+
+async def _execute_chart_request(
     *,
     chart_img_client: ChartImgClient,
     request: BuiltChartRequest,
     config: WorkerConfig,
     firestore_client: Any,
     logger: logging.Logger,
+    account_lock: asyncio.Lock | None = None,
+    deadline: Deadline | None = None,
+    lease: UsageLease | None = None,
+    selection_key: str | None = None,
 ) -> ChartApiResult:
-    def select_next_account():
-        result = select_account_for_request(
+    # Conditional usage claims are serialized per step: concurrent optimistic updates on
+    # the same usage document would only conflict with each other and skip healthy
+    # accounts. Increment and sharded claims do not conflict and skip the lock.
+    lock = account_lock or asyncio.Lock()
+    retry_policy = _retry_policy(config)
+    breaker = retry_policy.circuit_breaker
+    strategy = shared_account_strategy(config.chart_img_account_strategy)
+    # Latest per-request claim of each account, for refunding an unsent hedge claim.
+    claims: dict[str, AccountSelectionResult] = {}
+
+    async def select_next_account(exclude: ChartImgAccount | None = None):
+        accounts = config.chart_img_accounts
+        if exclude is not None:
+            # Hedges go to a different account than the attempt they duplicate.
+            accounts = tuple(account for account in accounts if account.id != exclude.id)
+            if not accounts:
+                return None
+        if breaker is not None:
+            # Accounts whose breaker is open are skipped before any usage unit is claimed.
+            candidates = accounts
+            accounts = breaker.available(candidates, key=lambda account: account.id)
+            if len(accounts) < len(candidates):
+                log_event(
+                    logger,
+                    "chart_img_accounts_cooling_down",
+                    chartTemplateId=request.chart_template_id,
+                    accountIds=breaker.open_accounts(),
+                )
+        accounts = strategy.order(accounts, key=selection_key)
+        claim = partial(
+            select_account_for_request,
             client=firestore_client,
-            accounts=config.chart_img_accounts,
+            accounts=accounts,
             logger=logger,
             log_context={"chartTemplateId": request.chart_template_id},
+            deadline=deadline,
+            write=config.chart_img_usage_write,
+            shards=config.chart_img_usage_shards,
         )
+        if lease is None and (
+            config.chart_img_usage_write == "increment" or config.chart_img_usage_shards > 0
+        ):
+            # Increments do not conflict with each other, so claims run concurrently.
+            result = await asyncio.to_thread(claim)
+        else:
+            async with lock:
+                if lease is not None:
+                    result = await asyncio.to_thread(lease.claim, accounts)
+                else:
+                    result = await asyncio.to_thread(claim)
+        strategy.record(result)
+        if result.account is not None:
+            claims[result.account.id] = result
         return result.account
 
-    def mark_exhausted(account):
-        mark_account_exhausted(client=firestore_client, account=account)
+    async def release_hedge_account(account: ChartImgAccount) -> None:
+        # The hedge was claimed but not sent: give its usage unit back.
+        if lease is not None and lease.put_back(account):
+            return
+        claim = claims.get(account.id)
+        if claim is None or claim.usage is None:
+            return
+        await asyncio.to_thread(
+            refund_account_units,
+            client=firestore_client,
+            reservation=UsageReservation(
+                account=account, units=1, window_start=claim.usage.window_start
+            ),
+            units=1,
+            logger=logger,
+            deadline=deadline,
+            write=config.chart_img_usage_write,
+            shards=config.chart_img_usage_shards,
+        )
+
+    # Reset times Chart-IMG announced in limit responses, consumed by mark_exhausted.
+    limit_resets: dict[str, datetime] = {}
+
+    def note_limit_reset(account: ChartImgAccount, seconds: float) -> None:
+        # The quota may come back before the UTC window ends.
+        limit_resets[account.id] = datetime.now(timezone.utc) + timedelta(seconds=seconds)
+
+    async def mark_exhausted(account):
+        strategy.record_exhausted(account)
+        if lease is not None:
+            lease.drop(account)
+        until = limit_resets.pop(account.id, None)
+        async with lock:
+            await asyncio.to_thread(
+                mark_account_exhausted,
+                client=firestore_client,
+                account=account,
+                deadline=deadline,
+                shards=config.chart_img_usage_shards,
+                until=until,
+            )
 
     chart_request = ChartImgRequest(
         chart_template_id=request.chart_template_id,
@@ -310,17 +1059,25 @@ def _execute_chart_request(
         payload=request.request,
     )
 
-    result = fetch_with_retries(
+    result = await fetch_with_retries_async(
         client=chart_img_client,
         request=chart_request,
         select_account=select_next_account,
         mark_account_exhausted=mark_exhausted,
+        deadline=deadline,
+        retry_policy=retry_policy,
+        hedge_policy=_hedge_policy(config),
+        select_hedge_account=lambda account: select_next_account(exclude=account),
+        on_limit_reset=note_limit_reset,
+        release_hedge_account=release_hedge_account,
     )
     return result
 
 
-def _chart_failure(req: BuiltChartRequest, api_result: ChartApiResult) -> dict[str, Any]:
-    error = api_result.error or StepError(code="CHART_API_FAILED", message="Chart API failed")
+def _chart_failure(
+    req: BuiltChartRequest, api_result: ChartApiResult | None
+) -> dict[str, Any]:
+    error = (api_result.error if api_result is not None else None) or StepError(code="CHART_API_FAILED", message="Chart API failed")
     return {
         "request": {"chartTemplateId": req.chart_template_id},
         "error": {
@@ -344,11 +1101,11 @@ def _failure_from_request(failure: RequestFailure) -> dict[str, Any]:
 
 def _all_accounts_exhausted(
     failures: Sequence[Mapping[str, Any]],
-    successes: Sequence[tuple[BuiltChartRequest, bytes]],
+    fetched_count: int,
     items: Sequence[BuiltChartRequest],
 ) -> bool:
     return (
-        len(successes) == 0
+        fetched_count == 0
         and len(items) > 0
         and any(f.get("error", {}).get("code") == "CHART_API_LIMIT_EXCEEDED" for f in failures)
     )
@@ -384,6 +1141,23 @@ def _get_min_images(step: Mapping[str, Any]) -> tuple[int, StepError | None]:
     )
 
 
+def _get_execution_policy(step: Mapping[str, Any]) -> tuple[ExecutionPolicy, StepError | None]:
+    inputs = step.get("inputs") if isinstance(step, Mapping) else {}
+    value = inputs.get("executionPolicy") if isinstance(inputs, Mapping) else None
+    if value is None:
+        return ("all", None)
+    if value in EXECUTION_POLICIES:
+        return (value, None)
+    return (
+        "all",
+        StepError(
+            code="VALIDATION_FAILED",
+            message="executionPolicy must be one of: all|quorum|fail-fast",
+            details={"executionPolicy": value},
+        ),
+    )
+
+
 def _get_requests(step: Mapping[str, Any]) -> list[Mapping[str, Any]]:
     inputs = step.get("inputs") if isinstance(step, Mapping) else {}
     reqs = inputs.get("requests") if isinstance(inputs, Mapping) else None
@@ -499,10 +1273,94 @@ def _storage_client():
     return _STORAGE_CLIENT
 
 
+def build_render_cache(config: WorkerConfig) -> RenderCache | None:
+    gcs_uploader = None
+    if config.render_gcs_cache_prefix:
+        gcs_uploader = GcsUploader(client=_storage_client(), bucket_gs=config.charts_bucket)
+    return shared_render_cache(
+        memory_max_bytes=config.render_cache_max_bytes,
+        disk_dir=config.render_disk_cache_dir,
+        disk_max_bytes=config.render_disk_cache_max_bytes,
+        gcs_uploader=gcs_uploader,
+        gcs_prefix=config.render_gcs_cache_prefix,
+    )
+
+
+def build_fixture_index(config: WorkerConfig) -> FixtureSource:
+    # The pack only serves mock lookups; real mode never maps it.
+    if config.fixtures_pack_path and config.charts_api_mode == "mock":
+        return shared_packed_fixtures(Path(config.fixtures_pack_path))
+    return shared_fixture_index(
+        DEFAULT_FIXTURES_DIR, preload_max_bytes=config.fixture_preload_max_bytes
+    )
+
+
+def _retry_policy(config: WorkerConfig) -> RetryPolicy:
+    return RetryPolicy(
+        max_attempts=config.chart_img_retry_max_attempts,
+        backoff_base_seconds=config.chart_img_retry_base_sec,
+        backoff_max_seconds=config.chart_img_retry_max_backoff_sec,
+        max_retry_after_seconds=config.chart_img_max_retry_after_sec,
+        retriable_statuses=config.chart_img_retry_statuses,
+        circuit_breaker=shared_circuit_breaker(
+            failure_threshold=config.chart_img_breaker_failures,
+            cooldown_seconds=config.chart_img_breaker_cooldown_sec,
+        ),
+    )
+
+
+def _hedge_policy(config: WorkerConfig) -> HedgePolicy | None:
+    return shared_hedge_policy(
+        percentile=config.chart_img_hedge_percentile,
+        budget_ratio=config.chart_img_hedge_budget_pct / 100.0,
+        min_delay_seconds=config.chart_img_hedge_min_delay_sec,
+    )
+
+
+def _deadline_from_config(config: WorkerConfig) -> Deadline | None:
+    if config.step_deadline_sec is None:
+        return None
+    return Deadline.after(config.step_deadline_sec)
+
+
 def _build_chart_img_client(config: WorkerConfig) -> ChartImgClient:
     if config.charts_api_mode == "mock":
-        return ChartImgClient(mode="mock")
-    return ChartImgClient(mode=config.charts_api_mode, http=HttpxRequester())
+        return ChartImgClient(mode="mock", fixtures=build_fixture_index(config))
+    return ChartImgClient(
+        mode=config.charts_api_mode,
+        fixtures=build_fixture_index(config),
+        http=HttpxRequester(max_body_bytes=config.chart_img_max_response_bytes),
+        async_http=AsyncHttpxRequester(max_body_bytes=config.chart_img_max_response_bytes),
+        render_cache=build_render_cache(config),
+    )
+
+
+async def _finalize_failure_async(
+    client: Any,
+    run_id: str,
+    step_id: str,
+    error: StepError,
+    logger: logging.Logger,
+    *,
+    flow_run_lock: asyncio.Lock | None = None,
+    timings: StepTimings | None = None,
+    **kwargs: Any,
+) -> CoreResult:
+    with (timings or StepTimings()).phase("finalize"):
+        return await _flow_run_write(
+            flow_run_lock, _finalize_failure, client, run_id, step_id, error, logger, **kwargs
+        )
+
+
+async def _flow_run_write(
+    lock: asyncio.Lock | None, func: Callable[..., Any], *args: Any, **kwargs: Any
+) -> Any:
+    # Steps of one run share the flow_runs/{runId} document; serializing their claim and
+    # finalize writes in-process avoids optimistic-update conflicts between them.
+    if lock is None:
+        return await asyncio.to_thread(func, *args, **kwargs)
+    async with lock:
+        return await asyncio.to_thread(func, *args, **kwargs)
 
 
 def _finalize_failure(
@@ -516,6 +1374,7 @@ def _finalize_failure(
     items_count: int | None = None,
     failures_count: int | None = None,
     min_images: int | None = None,
+    deadline: Deadline | None = None,
 ) -> CoreResult:
     try:
         finalize_step(
@@ -525,6 +1384,7 @@ def _finalize_failure(
             status="FAILED",
             finished_at=datetime.now(timezone.utc).isoformat(),
             error=error,
+            deadline=deadline,
         )
     except Exception:
         log_event(logger, "finalize_failed", runId=run_id, stepId=step_id, error=error.code)
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+
+@dataclass(frozen=True, slots=True)
+class Deadline:
+    # Absolute point on the monotonic clock by which a step must be finished.
+    expires_at: float
+    clock: Callable[[], float] = time.monotonic
+
+    @classmethod
+    def after(cls, seconds: float, *, clock: Callable[[], float] = time.monotonic) -> "Deadline":
+        return cls(expires_at=clock() + seconds, clock=clock)
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - self.clock())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0.0
+
+    def reserve(self, seconds: float) -> "Deadline":
+        # Earlier deadline that keeps `seconds` aside, e.g. for manifest write + finalize.
+        return Deadline(expires_at=self.expires_at - seconds, clock=self.clock)
+
+    def clamp(self, seconds: float) -> float:
+        return min(seconds, self.remaining())
+
+
+def deadline_allows(deadline: Deadline | None, seconds: float) -> bool:
+    """True if there is still more than `seconds` left (always True without a deadline)."""
+    return deadline is None or deadline.remaining() > seconds
+
+
+# Shortest timeout handed to a single client call, so a nearly spent deadline still
+# gives one request a chance to complete instead of timing out at once.
+MIN_CALL_TIMEOUT_SECONDS = 1.0
+
+
+def timeout_kwargs(deadline: Deadline | None) -> dict[str, float]:
+    """`timeout=` for one client call bounded by `deadline`; empty without a deadline."""
+    if deadline is None:
+        return {}
+    return {"timeout": max(MIN_CALL_TIMEOUT_SECONDS, deadline.remaining())}
@@ -3,7 +3,8 @@ from __future__ import annotations
 import logging
 from typing import Any
 
-from worker_chart_export.core import run_chart_export_step
+from worker_chart_export.core import CoreResult, run_chart_export_step, run_chart_export_steps
+from worker_chart_export.deadline import Deadline
 from worker_chart_export.errors import ConfigError
 from worker_chart_export.ingest import (
     is_firestore_update_event,
@@ -44,6 +45,11 @@ def _handle_cloud_event(cloud_event: Any) -> None:
         )
         raise
 
+    # The budget starts at event receipt: Firestore reads and ingest count against it too.
+    deadline = (
+        Deadline.after(config.step_deadline_sec) if config.step_deadline_sec is not None else None
+    )
+
     base_fields = {
         "service": config.service,
         "env": config.env,
@@ -129,8 +135,29 @@ def _handle_cloud_event(cloud_event: Any) -> None:
         log_event(logger, "cloud_event_noop", **base_fields, reason="no_ready_step")
         return
 
+    if config.ready_steps_mode == "all" and len(pick.ready_step_ids) > 1:
+        step_ids = list(pick.ready_step_ids)
+        log_event(logger, "ready_steps_selected", **base_fields, stepIds=step_ids)
+        results = run_chart_export_steps(
+            flow_run=flow_run, step_ids=step_ids, config=config, deadline=deadline
+        )
+        for result in results:
+            _log_step_finished(logger, base_fields, result.step_id, result)
+        return
+
     log_event(logger, "ready_step_selected", **base_fields, stepId=step_id)
-    result = run_chart_export_step(flow_run=flow_run, step_id=step_id, config=config)
+    result = run_chart_export_step(
+        flow_run=flow_run, step_id=step_id, config=config, deadline=deadline
+    )
+    _log_step_finished(logger, base_fields, step_id, result)
+
+
+def _log_step_finished(
+    logger: logging.Logger,
+    base_fields: dict[str, Any],
+    step_id: str | None,
+    result: CoreResult,
+) -> None:
     log_event(
         logger,
         "cloud_event_finished",
@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any
+
+from .fixtures import FixtureEntry, index_fixture_file
+
+
+# Layout: header (magic, version, index length), JSON index, then file bodies back to
+# back. The index lists `{"name", "offset", "size"}` per file; offsets are relative to
+# the end of the index.
+PACK_MAGIC = b"CIMGFXPK"
+PACK_VERSION = 1
+_HEADER = struct.Struct("<8sIQ")
+
+
+class FixturePackError(ValueError):
+    """The file is not a valid fixture pack."""
+
+
+class PackedFixtures:
+    """Read-only fixture source backed by a single memory-mapped pack file.
+
+    Drop-in replacement for `FixtureIndex` in mock mode: lookups return entries whose
+    `content` is a zero-copy `memoryview` slice of the mapping. The file is mapped once;
+    `refresh()` remaps it after the pack is replaced.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._mmap: mmap.mmap | None = None
+        self._entries: dict[str, FixtureEntry] = {}
+        self._files = 0
+        self.refresh()
+
+    @property
+    def directory(self) -> Path:
+        # Shown as `fixturesDir` in mock-missing errors.
+        return self.path
+
+    def lookup(self, stem: str) -> FixtureEntry | None:
+        return self._entries.get(stem)
+
+    def refresh(self) -> None:
+        mapped = _map(self.path)
+        try:
+            files = _read_index(mapped, self.path)
+        except FixturePackError:
+            mapped.close()
+            raise
+        data_start = _HEADER.size + _index_size(mapped)
+        view = memoryview(mapped)
+        entries: dict[str, FixtureEntry] = {}
+        for item in files:
+            indexed = index_fixture_file(entries, self.path / item["name"])
+            if indexed is None:
+                continue
+            start = data_start + item["offset"]
+            content = view[start : start + item["size"]]
+            entries[indexed.stem] = FixtureEntry(
+                stem=indexed.stem,
+                png_path=indexed.png_path,
+                error_path=indexed.error_path,
+                content=content,
+            )
+        with self._lock:
+            # The previous mapping is left to the GC: results may still reference slices.
+            self._mmap = mapped
+            self._entries = entries
+            self._files = len(files)
+
+    def note(self, path: Path) -> None:
+        # Packs are read-only; record mode writes to a directory instead.
+        return None
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "stems": len(self._entries),
+            "png": sum(1 for entry in self._entries.values() if entry.png_path is not None),
+            "files": self._files,
+            "packBytes": len(self._mmap) if self._mmap is not None else 0,
+        }
+
+
+def pack_fixture_directory(directory: Path, output: Path) -> int:
+    """Write every `.png`/`.json` fixture of `directory` into one pack. Returns file count."""
+    directory = Path(directory)
+    output = Path(output)
+    names = sorted(
+        entry.name
+        for entry in os.scandir(directory)
+        if entry.is_file() and entry.name.endswith((".png", ".json"))
+    )
+    sizes = [(directory / name).stat().st_size for name in names]
+
+    files, offset = [], 0
+    for name, size in zip(names, sizes):
+        files.append({"name": name, "offset": offset, "size": size})
+        offset += size
+    index = json.dumps({"files": files}, ensure_ascii=False).encode("utf-8")
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=output.parent, prefix=".tmp-", suffix=".pack")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            out.write(_HEADER.pack(PACK_MAGIC, PACK_VERSION, len(index)))
+            out.write(index)
+            for name in names:
+                with (directory / name).open("rb") as src:
+                    while chunk := src.read(1024 * 1024):
+                        out.write(chunk)
+        os.replace(tmp_name, output)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+    return len(names)
+
+
+def unpack_fixture_archive(pack: Path, directory: Path) -> int:
+    """Restore the original fixture files of `pack` into `directory`. Returns file count."""
+    pack = Path(pack)
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    with _map(pack) as mapped:
+        files = _read_index(mapped, pack)
+        data_start = _HEADER.size + _index_size(mapped)
+        for item in files:
+            name = item["name"]
+            if Path(name).name != name:
+                raise FixturePackError(f"{pack}: invalid file name in index: {name!r}")
+            with (directory / name).open("wb") as out:
+                start = data_start + item["offset"]
+                out.write(mapped[start : start + item["size"]])
+    return len(files)
+
+
+def _map(path: Path) -> mmap.mmap:
+    with path.open("rb") as fh:
+        try:
+            return mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError as exc:  # empty file
+            raise FixturePackError(f"{path}: file is too small to be a fixture pack") from exc
+
+
+def _index_size(mapped: mmap.mmap) -> int:
+    return _HEADER.unpack_from(mapped, 0)[2]
+
+
+def _read_index(mapped: mmap.mmap, path: Path) -> list[dict[str, Any]]:
+    if len(mapped) < _HEADER.size:
+        raise FixturePackError(f"{path}: file is too small to be a fixture pack")
+    magic, version, index_size = _HEADER.unpack_from(mapped, 0)
+    if magic != PACK_MAGIC:
+        raise FixturePackError(f"{path}: not a fixture pack")
+    if version != PACK_VERSION:
+        raise FixturePackError(f"{path}: unsupported fixture pack version {version}")
+    index_end = _HEADER.size + index_size
+    if index_end > len(mapped):
+        raise FixturePackError(f"{path}: truncated index")
+    try:
+        files = json.loads(mapped[_HEADER.size : index_end].decode("utf-8"))["files"]
+    except (ValueError, KeyError, TypeError) as exc:
+        raise FixturePackError(f"{path}: corrupt index") from exc
+    if not isinstance(files, list):
+        raise FixturePackError(f"{path}: corrupt index")
+    for item in files:
+        try:
+            name, offset, size = item["name"], item["offset"], item["size"]
+        except (KeyError, TypeError) as exc:
+            raise FixturePackError(f"{path}: malformed index entry {item!r}") from exc
+        if not isinstance(name, str) or not isinstance(offset, int) or not isinstance(size, int):
+            raise FixturePackError(f"{path}: malformed index entry {item!r}")
+        if offset < 0 or size < 0 or index_end + offset + size > len(mapped):
+            raise FixturePackError(f"{path}: entry {name!r} is out of bounds")
+    return files
+
+
+_SHARED_PACKS: dict[str, PackedFixtures] = {}
+_SHARED_PACKS_LOCK = threading.Lock()
+
+
+def shared_packed_fixtures(path: Path) -> PackedFixtures:
+    """Process-wide pack mapping, opened once per path like `shared_fixture_index`."""
+    pack_id = str(path)
+    with _SHARED_PACKS_LOCK:
+        pack = _SHARED_PACKS.get(pack_id)
+        if pack is None:
+            pack = PackedFixtures(path)
+            _SHARED_PACKS[pack_id] = pack
+        return pack
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Protocol
+
+
+@dataclass(frozen=True, slots=True)
+class FixtureEntry:
+    # One fixture stem: a PNG render or the first (sorted) error fixture for it.
+    stem: str
+    png_path: Path | None = None
+    error_path: Path | None = None
+    # File contents when preloaded, or a zero-copy slice of a fixture pack.
+    content: bytes | memoryview | None = None
+
+    @property
+    def path(self) -> Path:
+        if self.png_path is not None:
+            return self.png_path
+        if self.error_path is None:
+            raise ValueError(f"Fixture entry {self.stem} has no file")
+        return self.error_path
+
+    def read(self) -> bytes | memoryview:
+        if self.content is not None:
+            return self.content
+        return self.path.read_bytes()
+
+
+class FixtureSource(Protocol):
+    """What `ChartImgClient` needs from a fixture backend (directory index or pack)."""
+
+    @property
+    def directory(self) -> Path: ...
+
+    def lookup(self, stem: str) -> FixtureEntry | None: ...
+
+    def refresh(self) -> None: ...
+
+    def note(self, path: Path) -> None: ...
+
+    def stats(self) -> dict[str, Any]: ...
+
+
+class FixtureIndex:
+    """In-memory index of a Chart-IMG fixtures directory.
+
+    The directory is scanned once (lazily, on first lookup) into a
+    stem → PNG | error-fixture map, so mock-mode lookups make no filesystem metadata
+    calls. Files up to `preload_max_bytes` are also read into memory. Call `refresh()`
+    after fixtures change on disk; files written through `note()` are picked up
+    immediately.
+    """
+
+    def __init__(self, directory: Path, *, preload_max_bytes: int = 0) -> None:
+        self.directory = Path(directory)
+        self._preload_max_bytes = preload_max_bytes
+        self._lock = threading.Lock()
+        self._entries: dict[str, FixtureEntry] | None = None
+        self.preloaded_bytes = 0
+
+    def lookup(self, stem: str) -> FixtureEntry | None:
+        entries = self._entries
+        if entries is None:
+            entries = self._load()
+        return entries.get(stem)
+
+    def refresh(self) -> None:
+        """Rescan the directory."""
+        entries, preloaded = self._scan()
+        with self._lock:
+            self._entries = entries
+            self.preloaded_bytes = preloaded
+
+    def note(self, path: Path) -> None:
+        """Register a fixture file that was just written (record mode)."""
+        with self._lock:
+            if self._entries is None:
+                return
+            indexed = index_fixture_file(self._entries, path)
+            if indexed is not None:
+                self._entries[indexed.stem] = indexed
+
+    def stats(self) -> dict[str, Any]:
+        entries = self._entries or {}
+        return {
+            "stems": len(entries),
+            "png": sum(1 for entry in entries.values() if entry.png_path is not None),
+            "preloadedBytes": self.preloaded_bytes,
+        }
+
+    def _load(self) -> dict[str, FixtureEntry]:
+        with self._lock:
+            if self._entries is None:
+                self._entries, self.preloaded_bytes = self._scan()
+            return self._entries
+
+    def _scan(self) -> tuple[dict[str, FixtureEntry], int]:
+        entries: dict[str, FixtureEntry] = {}
+        try:
+            with os.scandir(self.directory) as it:
+                names = sorted(item.name for item in it if item.is_file())
+        except FileNotFoundError:
+            return entries, 0
+        for name in names:
+            indexed = index_fixture_file(entries, self.directory / name)
+            if indexed is not None:
+                entries[indexed.stem] = indexed
+
+        preloaded = 0
+        if self._preload_max_bytes > 0:
+            for stem, entry in entries.items():
+                path = entry.path
+                try:
+                    if path.stat().st_size > self._preload_max_bytes:
+                        continue
+                    content = path.read_bytes()
+                except OSError:
+                    continue
+                entries[stem] = FixtureEntry(
+                    stem=stem,
+                    png_path=entry.png_path,
+                    error_path=entry.error_path,
+                    content=content,
+                )
+                preloaded += len(content)
+        return entries, preloaded
+
+
+def index_fixture_file(entries: dict[str, FixtureEntry], path: Path) -> FixtureEntry | None:
+    """Entry `path` contributes to `entries`, or None if it is not used for lookups."""
+    # `<stem>.png` wins over `<stem>__<status>_<slug>.json`; among error fixtures the
+    # first in sorted order is kept, matching the previous glob-based lookup.
+    name = path.name
+    if name.endswith(".png"):
+        return FixtureEntry(stem=name[: -len(".png")], png_path=path)
+    if not name.endswith(".json") or "__" not in name:
+        return None
+    stem = name.rsplit("__", 1)[0]
+    current = entries.get(stem)
+    if current is not None and (
+        current.png_path is not None
+        or (current.error_path is not None and current.error_path.name <= name)
+    ):
+        return None
+    return FixtureEntry(stem=stem, error_path=path)
+
+
+_SHARED_INDEXES: dict[tuple[str, int], FixtureIndex] = {}
+_SHARED_INDEXES_LOCK = threading.Lock()
+
+
+def shared_fixture_index(directory: Path, *, preload_max_bytes: int = 0) -> FixtureIndex:
+    """Process-wide index so warm instances do not rescan fixtures on every invocation."""
+    index_id = (str(directory), preload_max_bytes)
+    with _SHARED_INDEXES_LOCK:
+        index = _SHARED_INDEXES.get(index_id)
+        if index is None:
+            index = FixtureIndex(directory, preload_max_bytes=preload_max_bytes)
+            _SHARED_INDEXES[index_id] = index
+        return index
@@ -1,14 +1,17 @@
 from __future__ import annotations
 
 import json
+import time
 from importlib import resources
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Mapping, Sequence
+from typing import IO, Any, Callable, Mapping, Sequence
 
 from jsonschema import Draft202012Validator, FormatChecker
 
+from .buffers import PngBuffer
+from .deadline import Deadline
 from .orchestration import StepError
 
 
@@ -28,10 +31,12 @@ class GeneratedAt:
 class PngUploadInput:
     chart_template_id: str
     kind: str
-    png_bytes: bytes
+    png_bytes: bytes | PngBuffer
     generated_at: GeneratedAt
     symbol_slug: str
     timeframe: str
+    # Copied into the manifest item's free-form `meta` (e.g. {"cacheHit": "gcs"}).
+    meta: Mapping[str, Any] | None = None
 
 
 @dataclass(frozen=True, slots=True)
@@ -49,10 +54,60 @@ class GcsUploader:
     def bucket_gs(self) -> str:
         return f"gs://{self._bucket_name}"
 
-    def upload_bytes(self, *, object_path: str, data: bytes, content_type: str) -> None:
+    def upload_bytes(
+        self,
+        *,
+        object_path: str,
+        data: bytes,
+        content_type: str,
+        timeout: float | None = None,
+    ) -> None:
         bucket = self._client.bucket(self._bucket_name)
         blob = bucket.blob(object_path)
-        blob.upload_from_string(data, content_type=content_type)
+        if timeout is None:
+            blob.upload_from_string(data, content_type=content_type)
+        else:
+            blob.upload_from_string(data, content_type=content_type, timeout=timeout)
+
+    def download_bytes(self, *, object_path: str) -> bytes | None:
+        """Object contents, or None if it does not exist."""
+        bucket = self._client.bucket(self._bucket_name)
+        blob = bucket.blob(object_path)
+        try:
+            return blob.download_as_bytes()
+        except Exception as exc:
+            if exc.__class__.__name__ == "NotFound":
+                return None
+            raise
+
+    def upload_bytes_if_absent(self, *, object_path: str, data: bytes, content_type: str) -> bool:
+        """Create-only upload (ifGenerationMatch=0). False if the object already exists."""
+        bucket = self._client.bucket(self._bucket_name)
+        blob = bucket.blob(object_path)
+        try:
+            blob.upload_from_string(data, content_type=content_type, if_generation_match=0)
+        except Exception as exc:
+            if exc.__class__.__name__ == "PreconditionFailed":
+                return False
+            raise
+        return True
+
+    def upload_file(
+        self,
+        *,
+        object_path: str,
+        file_obj: IO[bytes],
+        size: int,
+        content_type: str,
+        timeout: float | None = None,
+    ) -> None:
+        # Streams from the file object instead of materialising the payload in memory.
+        bucket = self._client.bucket(self._bucket_name)
+        blob = bucket.blob(object_path)
+        kwargs: dict[str, Any] = {"size": size, "content_type": content_type, "rewind": True}
+        if timeout is not None:
+            kwargs["timeout"] = timeout
+        blob.upload_from_file(file_obj, **kwargs)
 
 
 def build_png_object_path(
@@ -94,27 +149,79 @@ def upload_pngs(
     run_id: str,
     step_id: str,
     inputs: Sequence[PngUploadInput],
+    deadline: Deadline | None = None,
+    on_uploaded: Callable[[int, float], None] | None = None,
 ) -> PngUploadResult:
+    # on_uploaded(position, seconds) reports how long each input took to upload.
     items: list[dict[str, Any]] = []
     failures: list[dict[str, Any]] = []
 
-    for entry in inputs:
-        object_path = build_png_object_path(
-            run_id=run_id,
-            step_id=step_id,
-            timeframe=entry.timeframe,
-            chart_template_id=entry.chart_template_id,
-            generated_at_filename=entry.generated_at.filename_stamp,
-            symbol_slug=entry.symbol_slug,
+    for position, entry in enumerate(inputs):
+        started_at = time.monotonic()
+        result = upload_png(
+            uploader=uploader, run_id=run_id, step_id=step_id, entry=entry, deadline=deadline
         )
-        try:
-            uploader.upload_bytes(
+        if on_uploaded is not None:
+            on_uploaded(position, time.monotonic() - started_at)
+        items.extend(result.items)
+        failures.extend(result.failures)
+
+    return PngUploadResult(items=items, failures=failures)
+
+
+def upload_png(
+    *,
+    uploader: GcsUploader,
+    run_id: str,
+    step_id: str,
+    entry: PngUploadInput,
+    deadline: Deadline | None = None,
+) -> PngUploadResult:
+    object_path = build_png_object_path(
+        run_id=run_id,
+        step_id=step_id,
+        timeframe=entry.timeframe,
+        chart_template_id=entry.chart_template_id,
+        generated_at_filename=entry.generated_at.filename_stamp,
+        symbol_slug=entry.symbol_slug,
+    )
+    if deadline is not None and deadline.expired():
+        return PngUploadResult(
+            items=[],
+            failures=[
+                {
+                    "request": {"chartTemplateId": entry.chart_template_id},
+                    "error": {
+                        "code": "DEADLINE_EXCEEDED",
+                        "message": "Step deadline reached before PNG upload",
+                        "details": {"objectPath": object_path},
+                    },
+                }
+            ],
+        )
+    timeout = deadline.remaining() if deadline is not None else None
+    try:
+        payload = entry.png_bytes
+        if isinstance(payload, PngBuffer) and payload.spilled:
+            uploader.upload_file(
                 object_path=object_path,
-                data=entry.png_bytes,
+                file_obj=payload.file,
+                size=payload.size,
                 content_type="image/png",
+                timeout=timeout,
             )
-        except Exception as exc:
-            failures.append(
+        else:
+            _upload_bytes(
+                uploader,
+                object_path=object_path,
+                data=payload.read_bytes() if isinstance(payload, PngBuffer) else payload,
+                content_type="image/png",
+                timeout=timeout,
+            )
+    except Exception as exc:
+        return PngUploadResult(
+            items=[],
+            failures=[
                 {
                     "request": {"chartTemplateId": entry.chart_template_id},
                     "error": {
@@ -126,19 +233,18 @@ def upload_pngs(
                         },
                     },
                 }
-            )
-            continue
-
-        items.append(
-            {
-                "chartTemplateId": entry.chart_template_id,
-                "kind": entry.kind,
-                "generatedAt": entry.generated_at.rfc3339,
-                "png_gcs_uri": gs_uri(bucket_gs=uploader.bucket_gs, object_path=object_path),
-            }
+            ],
         )
 
-    return PngUploadResult(items=items, failures=failures)
+    item: dict[str, Any] = {
+        "chartTemplateId": entry.chart_template_id,
+        "kind": entry.kind,
+        "generatedAt": entry.generated_at.rfc3339,
+        "png_gcs_uri": gs_uri(bucket_gs=uploader.bucket_gs, object_path=object_path),
+    }
+    if entry.meta:
+        item["meta"] = dict(entry.meta)
+    return PngUploadResult(items=[item], failures=[])
 
 
 def build_manifest(
@@ -185,20 +291,41 @@ def validate_manifest(
     )
 
 
+def _upload_bytes(
+    uploader: GcsUploader,
+    *,
+    object_path: str,
+    data: bytes,
+    content_type: str,
+    timeout: float | None,
+) -> None:
+    # Only forward the timeout when a deadline is active so minimal uploader
+    # implementations (tests, local tooling) keep working without the kwarg.
+    if timeout is None:
+        uploader.upload_bytes(object_path=object_path, data=data, content_type=content_type)
+    else:
+        uploader.upload_bytes(
+            object_path=object_path, data=data, content_type=content_type, timeout=timeout
+        )
+
+
 def write_manifest(
     *,
     uploader: GcsUploader,
     run_id: str,
     step_id: str,
     manifest: Mapping[str, Any],
+    timeout: float | None = None,
 ) -> tuple[str | None, StepError | None]:
     object_path = build_manifest_object_path(run_id=run_id, step_id=step_id)
     try:
         payload = json.dumps(manifest, ensure_ascii=False).encode("utf-8")
-        uploader.upload_bytes(
+        _upload_bytes(
+            uploader,
             object_path=object_path,
             data=payload,
             content_type="application/json",
+            timeout=timeout,
         )
     except Exception as exc:
         return None, StepError(
@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable
+
+from .config import ChartImgAccount
+
+
+class _AccountLimiter:
+    """Token bucket plus in-flight cap for one Chart-IMG key.
+
+    Tokens may go negative: each caller reserves its token up front and sleeps until it
+    is due, so callers are served in arrival order without polling.
+    """
+
+    def __init__(
+        self,
+        *,
+        requests_per_second: float | None,
+        burst: int,
+        max_in_flight: int | None,
+        clock: Callable[[], float],
+    ) -> None:
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self.max_in_flight = max_in_flight
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._updated = clock()
+        self._in_flight = 0
+        self._waiters: deque[Future[None]] = deque()
+        self.waits = 0
+        self.wait_seconds = 0.0
+
+    def try_slot(self) -> Future[None] | None:
+        """Take an in-flight slot, or return a future that resolves once one is handed over."""
+        with self._lock:
+            if self.max_in_flight is None or self._in_flight < self.max_in_flight:
+                self._in_flight += 1
+                return None
+            waiter: Future[None] = Future()
+            self._waiters.append(waiter)
+            return waiter
+
+    def release_slot(self) -> None:
+        with self._lock:
+            while self._waiters:
+                waiter = self._waiters.popleft()
+                # Cancelled waiters gave up (timeout); hand the slot to the next one.
+                if waiter.set_running_or_notify_cancel():
+                    waiter.set_result(None)
+                    return
+            self._in_flight -= 1
+
+    def abandon(self, waiter: Future[None]) -> None:
+        # If the slot was handed over just before the caller gave up, pass it on.
+        if not waiter.cancel():
+            self.release_slot()
+
+    def reserve_token(self, timeout: float | None) -> float:
+        """Reserve the next token; returns how long to wait for it. TimeoutError if too late."""
+        if self.requests_per_second is None:
+            return 0.0
+        with self._lock:
+            now = self._clock()
+            elapsed = max(0.0, now - self._updated)
+            self._tokens = min(
+                float(self.burst), self._tokens + elapsed * self.requests_per_second
+            )
+            self._updated = now
+            wait = max(0.0, (1.0 - self._tokens) / self.requests_per_second)
+            if timeout is not None and wait > timeout:
+                raise TimeoutError("Chart-IMG rate limit wait exceeds the remaining budget")
+            self._tokens -= 1.0
+            return wait
+
+    def refund_token(self) -> None:
+        """Give back a reserved token that was never used."""
+        with self._lock:
+            self._tokens = min(float(self.burst), self._tokens + 1.0)
+
+    def record_wait(self, seconds: float) -> None:
+        if seconds <= 0:
+            return
+        with self._lock:
+            self.waits += 1
+            self.wait_seconds += seconds
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "inFlight": self._in_flight,
+                "queued": len(self._waiters),
+                "waits": self.waits,
+                "waitMs": round(self.wait_seconds * 1000, 3),
+            }
+
+
+class AccountGovernor:
+    """Client-side rate and concurrency limits per Chart-IMG account.
+
+    Limits come from `requestsPerSecond`/`burst`/`maxInFlight` in CHART_IMG_ACCOUNTS_JSON.
+    Requests over the limit wait locally instead of tripping a 429 at Chart-IMG, which
+    would mark the account exhausted for the rest of the day. Waiting works from any
+    thread or event loop, so one governor can serve every step in the process.
+    """
+
+    def __init__(
+        self,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+        sleep_fn: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self._clock = clock
+        self._sleep = sleep_fn
+        self._lock = threading.Lock()
+        self._limiters: dict[tuple[str, float | None, int, int | None], _AccountLimiter] = {}
+
+    def acquire(self, account: ChartImgAccount, *, timeout: float | None = None) -> float:
+        """Block until `account` may send; returns seconds waited. Pair with `release`."""
+        limiter = self._limiter(account)
+        if limiter is None:
+            return 0.0
+        started = self._clock()
+        waiter = limiter.try_slot()
+        if waiter is not None:
+            try:
+                waiter.result(timeout=timeout)
+            except FutureTimeoutError:
+                limiter.abandon(waiter)
+                raise TimeoutError("Chart-IMG in-flight limit wait timed out") from None
+        try:
+            delay = limiter.reserve_token(_remaining(timeout, started, self._clock))
+        except TimeoutError:
+            limiter.release_slot()
+            raise
+        if delay > 0:
+            self._sleep(delay)
+        waited = self._clock() - started
+        limiter.record_wait(waited)
+        return waited
+
+    async def acquire_async(
+        self,
+        account: ChartImgAccount,
+        *,
+        timeout: float | None = None,
+        sleep_fn: Callable[[float], Any] = asyncio.sleep,
+    ) -> float:
+        """Async variant of `acquire`; waiting does not block the event loop."""
+        limiter = self._limiter(account)
+        if limiter is None:
+            return 0.0
+        started = self._clock()
+        waiter = limiter.try_slot()
+        if waiter is not None:
+            try:
+                # shield: timing out must not cancel the future through wrap_future.
+                await asyncio.wait_for(
+                    asyncio.shield(asyncio.wrap_future(waiter)), timeout=timeout
+                )
+            except (asyncio.TimeoutError, asyncio.CancelledError) as exc:
+                limiter.abandon(waiter)
+                if isinstance(exc, asyncio.CancelledError):
+                    raise
+                raise TimeoutError("Chart-IMG in-flight limit wait timed out") from None
+        try:
+            delay = limiter.reserve_token(_remaining(timeout, started, self._clock))
+        except BaseException:
+            limiter.release_slot()
+            raise
+        if delay > 0:
+            try:
+                await sleep_fn(delay)
+            except BaseException:
+                # Cancelled while waiting for the token: later callers may use it.
+                limiter.refund_token()
+                limiter.release_slot()
+                raise
+        waited = self._clock() - started
+        limiter.record_wait(waited)
+        return waited
+
+    def release(self, account: ChartImgAccount) -> None:
+        limiter = self._limiter(account)
+        if limiter is not None:
+            limiter.release_slot()
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        with self._lock:
+            limiters = dict(self._limiters)
+        return {limiter_id[0]: limiter.stats() for limiter_id, limiter in limiters.items()}
+
+    def _limiter(self, account: ChartImgAccount) -> _AccountLimiter | None:
+        if account.requests_per_second is None and account.max_in_flight is None:
+            return None
+        burst = account.burst or 1
+        # Keyed by the limits too, so a changed account config never shares state.
+        limiter_id = (account.id, account.requests_per_second, burst, account.max_in_flight)
+        with self._lock:
+            limiter = self._limiters.get(limiter_id)
+            if limiter is None:
+                limiter = _AccountLimiter(
+                    requests_per_second=account.requests_per_second,
+                    burst=burst,
+                    max_in_flight=account.max_in_flight,
+                    clock=self._clock,
+                )
+                self._limiters[limiter_id] = limiter
+            return limiter
+
+
+def _remaining(timeout: float | None, started: float, clock: Callable[[], float]) -> float | None:
+    if timeout is None:
+        return None
+    return timeout - (clock() - started)
+
+
+_SHARED_GOVERNOR = AccountGovernor()
+
+
+def shared_account_governor() -> AccountGovernor:
+    """Process-wide governor: limits hold across concurrent steps and events."""
+    return _SHARED_GOVERNOR
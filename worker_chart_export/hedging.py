@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import math
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+
+
+# Too few samples make the percentile meaningless; no hedges are sent until then.
+DEFAULT_HEDGE_MIN_SAMPLES = 20
+DEFAULT_LATENCY_WINDOW = 500
+# Unused hedge allowance carried over from quiet periods is capped at this many hedges.
+DEFAULT_HEDGE_MAX_BURST = 10.0
+
+
+class LatencyTracker:
+    """Sliding window of recent Chart-IMG render latencies, in seconds."""
+
+    def __init__(self, *, window: int = DEFAULT_LATENCY_WINDOW) -> None:
+        self._samples: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct: float, *, min_samples: int = 1) -> float | None:
+        """Nearest-rank percentile, or None with fewer than `min_samples` samples."""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples or len(samples) < min_samples:
+            return None
+        rank = max(1, math.ceil(pct / 100.0 * len(samples)))
+        return samples[min(rank, len(samples)) - 1]
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+
+class HedgeBudget:
+    """Caps hedges at a fraction of requests.
+
+    Every request earns `ratio` of a hedge (up to `max_burst` saved), and every hedge
+    spends one, so hedging adds at most about `ratio` extra quota units per request.
+    """
+
+    def __init__(self, *, ratio: float, max_burst: float = DEFAULT_HEDGE_MAX_BURST) -> None:
+        self._ratio = ratio
+        self._max_burst = max_burst
+        self._tokens = 0.0
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.hedges = 0
+
+    def earn(self) -> None:
+        with self._lock:
+            self.requests += 1
+            self._tokens = min(self._max_burst, self._tokens + self._ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self._tokens < 1.0 - 1e-9:  # tolerate float drift from fractional ratios
+                return False
+            self._tokens -= 1.0
+            self.hedges += 1
+            return True
+
+    def refund(self) -> None:
+        # The hedge could not be sent (no other account), so give its allowance back.
+        with self._lock:
+            self._tokens = min(self._max_burst, self._tokens + 1.0)
+            self.hedges -= 1
+
+
+@dataclass(frozen=True)
+class HedgePolicy:
+    """When `fetch_with_retries_async` sends a second copy of a slow Chart-IMG request.
+
+    The hedge goes out once the first attempt has run longer than the `percentile` of
+    recent render latencies (never sooner than `min_delay_seconds`), on another account,
+    and only while the budget allows it.
+    """
+
+    percentile: float
+    budget: HedgeBudget
+    min_delay_seconds: float = 0.0
+    min_samples: int = DEFAULT_HEDGE_MIN_SAMPLES
+    latencies: LatencyTracker = field(default_factory=LatencyTracker)
+
+    def delay(self) -> float | None:
+        """Seconds to wait before hedging, or None if there is no latency data yet."""
+        observed = self.latencies.percentile(self.percentile, min_samples=self.min_samples)
+        if observed is None:
+            return None
+        return max(self.min_delay_seconds, observed)
+
+    def record_latency(self, seconds: float) -> None:
+        self.latencies.record(seconds)
+
+
+_SHARED_POLICIES: dict[tuple[float, float, float], HedgePolicy] = {}
+_SHARED_POLICIES_LOCK = threading.Lock()
+
+
+def shared_hedge_policy(
+    *, percentile: float, budget_ratio: float, min_delay_seconds: float
+) -> HedgePolicy | None:
+    """Process-wide hedge policy: latencies and budget are pooled across steps.
+
+    A percentile of 0 disables hedging.
+    """
+    if percentile <= 0:
+        return None
+    policy_id = (percentile, budget_ratio, min_delay_seconds)
+    with _SHARED_POLICIES_LOCK:
+        policy = _SHARED_POLICIES.get(policy_id)
+        if policy is None:
+            policy = HedgePolicy(
+                percentile=percentile,
+                budget=HedgeBudget(ratio=budget_ratio),
+                min_delay_seconds=min_delay_seconds,
+            )
+            _SHARED_POLICIES[policy_id] = policy
+        return policy
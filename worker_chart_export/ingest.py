@@ -30,6 +30,7 @@ class BlockedStep:
 class ReadyStepPick:
     step_id: str | None
     blocked: tuple[BlockedStep, ...]
+    ready_step_ids: tuple[str, ...] = ()
 
 
 def get_cloud_event_attr(cloud_event: Any, key: str, default: Any = None) -> Any:
@@ -126,7 +127,8 @@ def pick_ready_chart_export_step(flow_run: Mapping[str, Any]) -> ReadyStepPick:
     if not ready_steps:
         return ReadyStepPick(step_id=None, blocked=tuple(blocked_steps))
 
-    return ReadyStepPick(step_id=sorted(ready_steps)[0], blocked=tuple(blocked_steps))
+    ordered = tuple(sorted(ready_steps))
+    return ReadyStepPick(step_id=ordered[0], blocked=tuple(blocked_steps), ready_step_ids=ordered)
 
 
 def _get_depends_on(step: Mapping[str, Any]) -> Sequence[str]:
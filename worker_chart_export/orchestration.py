@@ -5,6 +5,8 @@ import logging
 import time
 from typing import Any, Mapping, Literal
 
+from .deadline import Deadline, deadline_allows, timeout_kwargs
+
 
 @dataclass(frozen=True, slots=True)
 class ClaimResult:
@@ -97,14 +99,16 @@ def _is_precondition_error(exc: Exception) -> bool:
     return exc.__class__.__name__ in ("FailedPrecondition", "PreconditionFailed", "Conflict")
 
 
-def claim_step_transaction(*, client: Any, run_id: str, step_id: str) -> ClaimResult:
+def claim_step_transaction(
+    *, client: Any, run_id: str, step_id: str, deadline: Deadline | None = None
+) -> ClaimResult:
     doc_ref = client.collection("flow_runs").document(run_id)
     logger = logging.getLogger("worker-chart-export")
     max_attempts = 3
     base_backoff = 0.2
     last_status: str | None = None
     for attempt in range(max_attempts):
-        snapshot = doc_ref.get()
+        snapshot = doc_ref.get(**timeout_kwargs(deadline))
         flow_run = snapshot.to_dict() if snapshot is not None else None
         flow_run = flow_run if isinstance(flow_run, dict) else {}
         status = _get_step_status(flow_run, step_id)
@@ -116,14 +120,15 @@ def claim_step_transaction(*, client: Any, run_id: str, step_id: str) -> ClaimRe
             update_time = getattr(snapshot, "update_time", None)
             if update_time is not None and hasattr(client, "write_option"):
                 option = client.write_option(last_update_time=update_time)
-                doc_ref.update(update, option=option)
+                doc_ref.update(update, option=option, **timeout_kwargs(deadline))
             else:
-                doc_ref.update(update)
+                doc_ref.update(update, **timeout_kwargs(deadline))
             return ClaimResult(claimed=True, status=status)
         except Exception as exc:
             if _is_precondition_error(exc) or _is_aborted_error(exc):
-                if attempt < max_attempts - 1:
-                    time.sleep(base_backoff * (2**attempt))
+                delay = base_backoff * (2**attempt)
+                if attempt < max_attempts - 1 and deadline_allows(deadline, delay):
+                    time.sleep(delay)
                     continue
                 logger.info(
                     {
@@ -159,6 +164,7 @@ def finalize_step(
     finished_at: str,
     outputs_manifest_gcs_uri: str | None = None,
     error: StepError | None = None,
+    deadline: Deadline | None = None,
 ) -> FinalizeResult:
     doc_ref = client.collection("flow_runs").document(run_id)
     logger = logging.getLogger("worker-chart-export")
@@ -166,7 +172,7 @@ def finalize_step(
     base_backoff = 0.2
     last_status: str | None = None
     for attempt in range(max_attempts):
-        snapshot = doc_ref.get()
+        snapshot = doc_ref.get(**timeout_kwargs(deadline))
         flow_run = snapshot.to_dict() if snapshot is not None else None
         flow_run = flow_run if isinstance(flow_run, dict) else {}
         current_status = _get_step_status(flow_run, step_id)
@@ -197,14 +203,15 @@ def finalize_step(
             update_time = getattr(snapshot, "update_time", None)
             if update_time is not None and hasattr(client, "write_option"):
                 option = client.write_option(last_update_time=update_time)
-                doc_ref.update(update, option=option)
+                doc_ref.update(update, option=option, **timeout_kwargs(deadline))
             else:
-                doc_ref.update(update)
+                doc_ref.update(update, **timeout_kwargs(deadline))
             return FinalizeResult(updated=True, status=current_status)
         except Exception as exc:
             if _is_precondition_error(exc) or _is_aborted_error(exc):
-                if attempt < max_attempts - 1:
-                    time.sleep(base_backoff * (2**attempt))
+                delay = base_backoff * (2**attempt)
+                if attempt < max_attempts - 1 and deadline_allows(deadline, delay):
+                    time.sleep(delay)
                     continue
                 logger.info(
                     {
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import struct
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# Ancillary chunks that change how pixels are displayed; everything else ancillary
+# (text, timestamps, physical size, ...) is dropped.
+KEPT_ANCILLARY_CHUNKS = frozenset({b"tRNS", b"gAMA", b"cHRM", b"sRGB", b"iCCP", b"sBIT"})
+# IDAT payloads are re-split at this size, like common encoders do.
+_IDAT_CHUNK_BYTES = 64 * 1024
+
+
+@dataclass(frozen=True, slots=True)
+class OptimizedPng:
+    png_bytes: bytes
+    original_bytes: int
+    optimized_bytes: int
+
+
+def optimize_png(data: bytes, *, level: int = 9) -> OptimizedPng:
+    """Losslessly shrink a PNG: drop ancillary chunks and re-deflate the image data.
+
+    The decompressed scanlines (filter bytes included) are kept as they are, so the
+    decoded image is identical. The original is returned when the result is not smaller.
+    Raises ValueError for data that is not a well-formed PNG.
+    """
+    chunks = _read_chunks(data)
+    kept: list[tuple[bytes, bytes]] = []
+    idat: list[bytes] = []
+    idat_at: int | None = None
+    for chunk_type, body in chunks:
+        if chunk_type == b"IDAT":
+            if idat_at is None:
+                idat_at = len(kept)
+            idat.append(body)
+        elif _is_critical(chunk_type) or chunk_type in KEPT_ANCILLARY_CHUNKS:
+            kept.append((chunk_type, body))
+    if idat_at is None:
+        raise ValueError("PNG has no IDAT chunk")
+
+    try:
+        raw = zlib.decompress(b"".join(idat))
+    except zlib.error as exc:
+        raise ValueError("PNG image data is not valid zlib") from exc
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 15, 9)
+    deflated = compressor.compress(raw) + compressor.flush()
+    idat_chunks = [
+        (b"IDAT", deflated[start : start + _IDAT_CHUNK_BYTES])
+        for start in range(0, len(deflated), _IDAT_CHUNK_BYTES)
+    ]
+    kept[idat_at:idat_at] = idat_chunks
+
+    out = bytearray(PNG_SIGNATURE)
+    for chunk_type, body in kept:
+        out += struct.pack(">I", len(body))
+        out += chunk_type
+        out += body
+        out += struct.pack(">I", zlib.crc32(body, zlib.crc32(chunk_type)))
+    if len(out) >= len(data):
+        return OptimizedPng(png_bytes=data, original_bytes=len(data), optimized_bytes=len(data))
+    return OptimizedPng(
+        png_bytes=bytes(out), original_bytes=len(data), optimized_bytes=len(out)
+    )
+
+
+def _is_critical(chunk_type: bytes) -> bool:
+    # Bit 5 of the first byte (lowercase letter) marks ancillary chunks.
+    return not chunk_type[0] & 0x20
+
+
+def _read_chunks(data: bytes) -> list[tuple[bytes, bytes]]:
+    if not data.startswith(PNG_SIGNATURE):
+        raise ValueError("not a PNG")
+    chunks: list[tuple[bytes, bytes]] = []
+    offset = len(PNG_SIGNATURE)
+    while offset < len(data):
+        if offset + 8 > len(data):
+            raise ValueError("truncated PNG chunk header")
+        length, chunk_type = struct.unpack_from(">I4s", data, offset)
+        body_start = offset + 8
+        body_end = body_start + length
+        if body_end + 4 > len(data):
+            raise ValueError("truncated PNG chunk")
+        body = data[body_start:body_end]
+        (crc,) = struct.unpack_from(">I", data, body_end)
+        if crc != zlib.crc32(body, zlib.crc32(chunk_type)):
+            raise ValueError(f"bad CRC in PNG chunk {chunk_type!r}")
+        chunks.append((chunk_type, body))
+        offset = body_end + 4
+        if chunk_type == b"IEND":
+            return chunks
+    raise ValueError("PNG has no IEND chunk")
+
+
+_SHARED_POOLS: dict[int, ThreadPoolExecutor] = {}
+_SHARED_POOLS_LOCK = threading.Lock()
+
+
+def shared_png_optimizer(workers: int) -> ThreadPoolExecutor:
+    """Process-wide pool for `optimize_png`; zlib releases the GIL while it compresses."""
+    with _SHARED_POOLS_LOCK:
+        pool = _SHARED_POOLS.get(workers)
+        if pool is None:
+            pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="png-optimize")
+            _SHARED_POOLS[workers] = pool
+        return pool
@@ -0,0 +1,453 @@
+from __future__ import annotations
+
+import calendar
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Protocol, Sequence
+
+if TYPE_CHECKING:
+    from .chart_img import ChartImgRequest
+    from .gcs_artifacts import GcsUploader
+
+
+_TIMEFRAME_RE = re.compile(r"^\s*(\d+)\s*([mhHdDwWM])\s*$")
+_CACHE_KEY_RE = re.compile(r"^[0-9a-f]{64}$")
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_FIRST_MONDAY = datetime(1970, 1, 5, tzinfo=timezone.utc)
+
+
+def render_cache_key(request: "ChartImgRequest") -> str:
+    """Stable hash of everything that shapes the rendered chart.
+
+    The payload already carries symbol/interval/timezone; they are repeated so that two
+    requests that differ only outside the payload can never collide.
+    """
+    canonical = json.dumps(
+        {
+            "symbol": request.chart_img_symbol,
+            "interval": request.timeframe,
+            "payload": request.payload,
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def candle_close(timeframe: str, now: datetime) -> datetime | None:
+    """UTC close of the candle of `timeframe` that contains `now`.
+
+    Supports Chart-IMG style intervals (`15m`, `4h`, `1D`, `1W`, `1M`). Returns None for
+    anything else, which callers treat as "do not cache".
+    """
+    match = _TIMEFRAME_RE.match(timeframe)
+    if match is None:
+        return None
+    count = int(match.group(1))
+    unit = match.group(2)
+    if count <= 0:
+        return None
+    now = now.astimezone(timezone.utc)
+
+    if unit == "M":
+        month_index = now.year * 12 + (now.month - 1)
+        start_index = month_index - month_index % count
+        close_index = start_index + count
+        return datetime(close_index // 12, close_index % 12 + 1, 1, tzinfo=timezone.utc)
+
+    if unit == "m":
+        step = timedelta(minutes=count)
+    elif unit in ("h", "H"):
+        step = timedelta(hours=count)
+    elif unit in ("d", "D"):
+        step = timedelta(days=count)
+    else:
+        step = timedelta(weeks=count)
+
+    # Candles are aligned to the Unix epoch; weekly candles open on Monday.
+    anchor = _FIRST_MONDAY if unit in ("w", "W") else _EPOCH
+    elapsed = now - anchor
+    start = anchor + step * (elapsed // step)
+    return start + step
+
+
+def candle_close_timestamp(timeframe: str, now: float) -> float | None:
+    close = candle_close(timeframe, datetime.fromtimestamp(now, tz=timezone.utc))
+    if close is None:
+        return None
+    return float(calendar.timegm(close.utctimetuple()))
+
+
+@dataclass(frozen=True, slots=True)
+class CachedRender:
+    png_bytes: bytes
+    expires_at: float  # unix seconds (candle close)
+
+
+class RenderCacheTier(Protocol):
+    # `expires_at` is the candle close of the current request; tiers that store their
+    # own expiry may ignore it, name-addressed tiers use it as the candle bucket.
+    name: str
+
+    def lookup(self, key: str, *, expires_at: float) -> CachedRender | None: ...
+
+    def put(self, key: str, png_bytes: bytes, *, expires_at: float) -> None: ...
+
+    def stats(self) -> dict[str, Any]: ...
+
+
+class MemoryRenderCache:
+    """Byte-capped LRU of rendered PNGs; entries expire at their candle close."""
+
+    name = "memory"
+
+    def __init__(self, *, max_bytes: int, clock: Callable[[], float] = time.time) -> None:
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._entries: OrderedDict[str, CachedRender] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def now(self) -> float:
+        return self._clock()
+
+    def get(self, key: str) -> bytes | None:
+        entry = self.lookup(key)
+        return entry.png_bytes if entry is not None else None
+
+    def lookup(self, key: str, *, expires_at: float | None = None) -> CachedRender | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= self._clock():
+                self._drop(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: str, png_bytes: bytes, *, expires_at: float) -> None:
+        size = len(png_bytes)
+        if size > self.max_bytes or expires_at <= self._clock():
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = CachedRender(png_bytes=png_bytes, expires_at=expires_at)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.evictions += 1
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= len(entry.png_bytes)
+
+
+class DiskRenderCache:
+    """Size-bounded LRU directory of rendered PNGs that survives across invocations.
+
+    Layout: `<directory>/<key>.png` plus `index.json` ({key: {size, expiresAt,
+    lastUsedAt}}), so startup costs one small JSON read instead of a directory scan.
+    PNGs and the index are written to a temp file and renamed into place.
+    """
+
+    name = "disk"
+    INDEX_FILE = "index.json"
+
+    def __init__(
+        self, *, directory: str | Path, max_bytes: int, clock: Callable[[], float] = time.time
+    ) -> None:
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, dict[str, float]] = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._load_index()
+
+    def lookup(self, key: str, *, expires_at: float | None = None) -> CachedRender | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry["expiresAt"] <= self._clock():
+                self._remove(key)
+                self._write_index()
+                entry = None
+            png_bytes = self._read(key) if entry is not None else None
+            if entry is None or png_bytes is None:
+                self.misses += 1
+                return None
+            entry["lastUsedAt"] = self._clock()
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return CachedRender(png_bytes=png_bytes, expires_at=entry["expiresAt"])
+
+    def put(self, key: str, png_bytes: bytes, *, expires_at: float) -> None:
+        size = len(png_bytes)
+        if size > self.max_bytes or expires_at <= self._clock():
+            return
+        with self._lock:
+            try:
+                _atomic_write(self._path(key), png_bytes)
+            except OSError:
+                return
+            if key in self._entries:
+                self._bytes -= int(self._entries.pop(key)["size"])
+            self._entries[key] = {
+                "size": size,
+                "expiresAt": expires_at,
+                "lastUsedAt": self._clock(),
+            }
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+            self._write_index()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.png"
+
+    def _read(self, key: str) -> bytes | None:
+        try:
+            return self._path(key).read_bytes()
+        except OSError:
+            # File vanished (e.g. /tmp cleanup); forget the entry.
+            self._remove(key)
+            return None
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= int(entry["size"])
+        try:
+            self._path(key).unlink()
+        except OSError:
+            pass
+
+    def _load_index(self) -> None:
+        try:
+            raw = json.loads((self.directory / self.INDEX_FILE).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            raw = {}
+        if not isinstance(raw, dict):
+            raw = {}
+        now = self._clock()
+        valid: list[tuple[str, dict[str, float]]] = []
+        for key, entry in raw.items():
+            if not isinstance(key, str) or _CACHE_KEY_RE.match(key) is None:
+                continue
+            try:
+                normalized = {
+                    "size": int(entry["size"]),
+                    "expiresAt": float(entry["expiresAt"]),
+                    "lastUsedAt": float(entry.get("lastUsedAt", 0.0)),
+                }
+            except (KeyError, TypeError, ValueError):
+                continue
+            if normalized["expiresAt"] <= now or not self._path(key).exists():
+                self._path(key).unlink(missing_ok=True)
+                continue
+            valid.append((key, normalized))
+        for key, entry in sorted(valid, key=lambda item: item[1]["lastUsedAt"]):
+            self._entries[key] = entry
+            self._bytes += int(entry["size"])
+        while self._bytes > self.max_bytes and self._entries:
+            self._remove(next(iter(self._entries)))
+        self._write_index()
+
+    def _write_index(self) -> None:
+        payload = json.dumps(self._entries, separators=(",", ":")).encode("utf-8")
+        try:
+            _atomic_write(self.directory / self.INDEX_FILE, payload)
+        except OSError:
+            pass
+
+
+class GcsRenderCache:
+    """Render cache shared by all instances, stored in the charts bucket.
+
+    Objects live at `<prefix>/<candleClose>/<hash>.png`, so a new candle simply maps to a
+    new name; old candle folders should be removed by a bucket lifecycle rule. Writes use
+    a create-only precondition: the first instance to publish a render wins.
+    """
+
+    name = "gcs"
+
+    def __init__(self, *, uploader: "GcsUploader", prefix: str = "render-cache") -> None:
+        self._uploader = uploader
+        self._prefix = prefix.strip("/")
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.published = 0
+        self.errors = 0
+
+    def object_path(self, key: str, *, expires_at: float) -> str:
+        candle = datetime.fromtimestamp(expires_at, tz=timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        return f"{self._prefix}/{candle}/{key}.png"
+
+    def lookup(self, key: str, *, expires_at: float) -> CachedRender | None:
+        try:
+            png_bytes = self._uploader.download_bytes(
+                object_path=self.object_path(key, expires_at=expires_at)
+            )
+        except Exception:
+            # The shared tier is best effort: a GCS hiccup must not fail the render.
+            png_bytes = None
+            self._count("errors")
+        if png_bytes is None:
+            self._count("misses")
+            return None
+        self._count("hits")
+        return CachedRender(png_bytes=png_bytes, expires_at=expires_at)
+
+    def put(self, key: str, png_bytes: bytes, *, expires_at: float) -> None:
+        try:
+            created = self._uploader.upload_bytes_if_absent(
+                object_path=self.object_path(key, expires_at=expires_at),
+                data=png_bytes,
+                content_type="image/png",
+            )
+        except Exception:
+            self._count("errors")
+            return
+        if created:
+            self._count("published")
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "published": self.published,
+                "errors": self.errors,
+            }
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+
+class RenderCache:
+    """Ordered cache tiers (fastest first). A hit in a lower tier is copied upwards."""
+
+    def __init__(
+        self, tiers: Sequence[RenderCacheTier], *, clock: Callable[[], float] = time.time
+    ) -> None:
+        self.tiers = tuple(tiers)
+        self._clock = clock
+
+    def now(self) -> float:
+        return self._clock()
+
+    def lookup(self, key: str, *, expires_at: float) -> tuple[CachedRender, str] | None:
+        for index, tier in enumerate(self.tiers):
+            entry = tier.lookup(key, expires_at=expires_at)
+            if entry is None:
+                continue
+            for upper in self.tiers[:index]:
+                upper.put(key, entry.png_bytes, expires_at=entry.expires_at)
+            return entry, tier.name
+        return None
+
+    def put(self, key: str, png_bytes: bytes, *, expires_at: float) -> None:
+        for tier in self.tiers:
+            tier.put(key, png_bytes, expires_at=expires_at)
+
+    def stats(self) -> dict[str, Any]:
+        return {tier.name: tier.stats() for tier in self.tiers}
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+
+
+_SHARED_CACHES: dict[tuple[int, str | None, int, str | None, str | None], RenderCache] = {}
+_SHARED_CACHES_LOCK = threading.Lock()
+
+
+def shared_render_cache(
+    *,
+    memory_max_bytes: int,
+    disk_dir: str | None = None,
+    disk_max_bytes: int = 0,
+    gcs_uploader: "GcsUploader | None" = None,
+    gcs_prefix: str | None = None,
+) -> RenderCache | None:
+    """Process-wide cache so warm instances keep renders across invocations.
+
+    A tier is enabled only when its size (and directory, for disk) is set; the GCS tier
+    needs both an uploader and a prefix.
+    """
+    gcs_enabled = gcs_uploader is not None and bool(gcs_prefix)
+    cache_id = (
+        memory_max_bytes,
+        disk_dir,
+        disk_max_bytes,
+        gcs_uploader.bucket_gs if gcs_enabled else None,
+        gcs_prefix if gcs_enabled else None,
+    )
+    with _SHARED_CACHES_LOCK:
+        cache = _SHARED_CACHES.get(cache_id)
+        if cache is not None:
+            return cache
+        tiers: list[RenderCacheTier] = []
+        if memory_max_bytes > 0:
+            tiers.append(MemoryRenderCache(max_bytes=memory_max_bytes))
+        if disk_dir and disk_max_bytes > 0:
+            tiers.append(DiskRenderCache(directory=disk_dir, max_bytes=disk_max_bytes))
+        if gcs_enabled:
+            tiers.append(GcsRenderCache(uploader=gcs_uploader, prefix=gcs_prefix))
+        if not tiers:
+            return None
+        cache = RenderCache(tiers)
+        _SHARED_CACHES[cache_id] = cache
+        return cache
@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, Iterable, Mapping, Sequence, TypeVar
+
+
+DEFAULT_RETRIABLE_STATUSES = frozenset({500, 502, 503, 504})
+# 401/403 mean the key itself is broken: they count against the account's breaker even
+# though the request is not retried.
+ACCOUNT_FAILURE_STATUSES = frozenset({401, 403})
+
+A = TypeVar("A")
+
+
+class AccountCircuitBreaker:
+    """Stops sending to an account after N consecutive failures, for a cooldown period.
+
+    After the cooldown the account is allowed again; one more failure re-opens the
+    breaker straight away, a success closes it.
+    """
+
+    def __init__(
+        self,
+        *,
+        failure_threshold: int,
+        cooldown_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._threshold = failure_threshold
+        self._cooldown = cooldown_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures: dict[str, int] = {}
+        self._open_until: dict[str, float] = {}
+        self.opened = 0
+
+    def allow(self, account_id: str) -> bool:
+        with self._lock:
+            open_until = self._open_until.get(account_id)
+            return open_until is None or self._clock() >= open_until
+
+    def available(self, accounts: Sequence[A], *, key: Callable[[A], str]) -> list[A]:
+        return [account for account in accounts if self.allow(key(account))]
+
+    def record_success(self, account_id: str) -> None:
+        with self._lock:
+            self._failures.pop(account_id, None)
+            self._open_until.pop(account_id, None)
+
+    def record_failure(self, account_id: str) -> bool:
+        """Count a failure; True if this failure opened the breaker."""
+        with self._lock:
+            failures = self._failures.get(account_id, 0) + 1
+            self._failures[account_id] = failures
+            if failures < self._threshold:
+                return False
+            self._open_until[account_id] = self._clock() + self._cooldown
+            self.opened += 1
+            return True
+
+    def open_accounts(self) -> list[str]:
+        with self._lock:
+            now = self._clock()
+            return sorted(key for key, until in self._open_until.items() if now < until)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """How `fetch_with_retries` retries a Chart-IMG request.
+
+    Backoff is "full jitter": a uniform delay in `[0, min(cap, base * 2**n)]`, so
+    instances that failed together do not retry together. A `Retry-After` from the
+    server replaces the computed delay (bounded by `max_retry_after_seconds`).
+    """
+
+    max_attempts: int = 3
+    backoff_base_seconds: float = 0.5
+    backoff_max_seconds: float = 8.0
+    max_retry_after_seconds: float = 30.0
+    retriable_statuses: frozenset[int] = DEFAULT_RETRIABLE_STATUSES
+    circuit_breaker: AccountCircuitBreaker | None = None
+    random_fn: Callable[[], float] = field(default=random.random, compare=False)
+
+    def is_retriable(self, *, http_status: int | None, retriable: bool) -> bool:
+        # Network errors and timeouts carry no status; keep the client's verdict for them.
+        if http_status is None:
+            return retriable
+        return http_status in self.retriable_statuses
+
+    def backoff(self, attempt: int, *, retry_after: float | None = None) -> float:
+        if retry_after is not None:
+            return max(0.0, min(retry_after, self.max_retry_after_seconds))
+        cap = min(self.backoff_max_seconds, self.backoff_base_seconds * (2 ** (attempt - 1)))
+        return self.random_fn() * cap
+
+    def record_attempt(
+        self, account_id: str, *, ok: bool, http_status: int | None, retriable: bool
+    ) -> bool:
+        """Feed the breaker; True if the account was just taken out of rotation."""
+        if self.circuit_breaker is None:
+            return False
+        if ok:
+            self.circuit_breaker.record_success(account_id)
+            return False
+        if http_status in ACCOUNT_FAILURE_STATUSES or self.is_retriable(
+            http_status=http_status, retriable=retriable
+        ):
+            return self.circuit_breaker.record_failure(account_id)
+        return False
+
+
+def parse_retry_after(
+    headers: Mapping[str, str], *, now: datetime | None = None
+) -> float | None:
+    """Seconds to wait from a `Retry-After` header (delta-seconds or HTTP-date)."""
+    raw = headers.get("retry-after")
+    if raw is None:
+        return None
+    raw = raw.strip()
+    try:
+        return max(0.0, float(raw))
+    except ValueError:
+        pass
+    try:
+        moment = parsedate_to_datetime(raw)
+    except (TypeError, ValueError):
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    now = now or datetime.now(timezone.utc)
+    return max(0.0, (moment - now).total_seconds())
+
+
+def parse_status_set(raw: str) -> frozenset[int]:
+    """Parse "500,502-504" style status lists. Raises ValueError on bad input."""
+    statuses: set[int] = set()
+    for part in _split(raw):
+        if "-" in part:
+            low, high = (int(value) for value in part.split("-", 1))
+            if low > high:
+                raise ValueError(f"invalid status range: {part}")
+            statuses.update(range(low, high + 1))
+        else:
+            statuses.add(int(part))
+    if any(status < 100 or status > 599 for status in statuses):
+        raise ValueError("HTTP statuses must be between 100 and 599")
+    return frozenset(statuses)
+
+
+def _split(raw: str) -> Iterable[str]:
+    return (part.strip() for part in raw.split(",") if part.strip())
+
+
+_SHARED_BREAKERS: dict[tuple[int, float], AccountCircuitBreaker] = {}
+_SHARED_BREAKERS_LOCK = threading.Lock()
+
+
+def shared_circuit_breaker(
+    *, failure_threshold: int, cooldown_seconds: float
+) -> AccountCircuitBreaker | None:
+    """Process-wide breaker so every step in the instance sees an account's failures.
+
+    A threshold of 0 disables the breaker.
+    """
+    if failure_threshold <= 0:
+        return None
+    breaker_id = (failure_threshold, cooldown_seconds)
+    with _SHARED_BREAKERS_LOCK:
+        breaker = _SHARED_BREAKERS.get(breaker_id)
+        if breaker is None:
+            breaker = AccountCircuitBreaker(
+                failure_threshold=failure_threshold, cooldown_seconds=cooldown_seconds
+            )
+            _SHARED_BREAKERS[breaker_id] = breaker
+        return breaker
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Awaitable, Callable, TypeVar
+
+
+T = TypeVar("T")
+
+
+class _LeaderCancelled(Exception):
+    """The leading call was cancelled; a waiting caller takes over."""
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into a single execution.
+
+    The first caller for a key runs the work; callers arriving while it is in flight wait
+    on the same `concurrent.futures.Future` and get its result. Because the future is not
+    bound to an event loop, callers from other threads and loops share it too.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: dict[str, Future[Any]] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    def do(self, key: str, fn: Callable[[], T], *, timeout: float | None = None) -> T:
+        """Run `fn` or wait for the in-flight call. Raises TimeoutError after `timeout`."""
+        while True:
+            future, leader = self._join(key)
+            if leader:
+                return self._lead(key, future, fn)
+            try:
+                return future.result(timeout=timeout)
+            except FutureTimeoutError:
+                raise TimeoutError(f"single-flight wait for {key} timed out") from None
+            except _LeaderCancelled:
+                continue
+
+    async def do_async(
+        self, key: str, fn: Callable[[], Awaitable[T]], *, timeout: float | None = None
+    ) -> T:
+        """Async variant of `do`; waiting does not block the event loop."""
+        while True:
+            future, leader = self._join(key)
+            if leader:
+                return await self._lead_async(key, future, fn)
+            try:
+                # shield: a cancelled follower must not cancel the shared future.
+                return await asyncio.wait_for(
+                    asyncio.shield(asyncio.wrap_future(future)), timeout=timeout
+                )
+            except asyncio.TimeoutError:
+                raise TimeoutError(f"single-flight wait for {key} timed out") from None
+            except _LeaderCancelled:
+                continue
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "inFlight": len(self._calls),
+                "leaders": self.leaders,
+                "coalesced": self.coalesced,
+            }
+
+    def _join(self, key: str) -> tuple[Future[Any], bool]:
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future, False
+            future = Future()
+            self._calls[key] = future
+            self.leaders += 1
+            return future, True
+
+    def _lead(self, key: str, future: Future[Any], fn: Callable[[], T]) -> T:
+        try:
+            result = fn()
+        except BaseException as exc:
+            self._settle(key, future, exc=exc)
+            raise
+        self._settle(key, future, result=result)
+        return result
+
+    async def _lead_async(
+        self, key: str, future: Future[Any], fn: Callable[[], Awaitable[T]]
+    ) -> T:
+        try:
+            result = await fn()
+        except BaseException as exc:
+            self._settle(key, future, exc=exc)
+            raise
+        self._settle(key, future, result=result)
+        return result
+
+    def _settle(
+        self,
+        key: str,
+        future: Future[Any],
+        *,
+        result: Any = None,
+        exc: BaseException | None = None,
+    ) -> None:
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+        if exc is None:
+            future.set_result(result)
+        elif isinstance(exc, (asyncio.CancelledError, KeyboardInterrupt, SystemExit)):
+            future.set_exception(_LeaderCancelled())
+        else:
+            future.set_exception(exc)
+
+
+_SHARED_SINGLE_FLIGHT = SingleFlight()
+
+
+def shared_single_flight() -> SingleFlight:
+    """Process-wide instance, so concurrent steps and events in one instance coalesce."""
+    return _SHARED_SINGLE_FLIGHT
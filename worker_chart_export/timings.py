@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+
+
+class StepTimings:
+    """Monotonic-clock durations of one step run, in milliseconds.
+
+    Phases accumulate (a phase entered twice adds up). Per-item durations are kept in
+    request order so they line up with the step's `requests`.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic) -> None:
+        self._clock = clock
+        self._started_at = clock()
+        self._phases: dict[str, float] = {}
+        self._items: dict[int, dict[str, Any]] = {}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started_at = self._clock()
+        try:
+            yield
+        finally:
+            self._phases[name] = self._phases.get(name, 0.0) + _ms(self._clock() - started_at)
+
+    @contextmanager
+    def item(self, index: int, chart_template_id: str, name: str) -> Iterator[None]:
+        started_at = self._clock()
+        try:
+            yield
+        finally:
+            self.record_item(index, chart_template_id, name, self._clock() - started_at)
+
+    def record_item(self, index: int, chart_template_id: str, name: str, seconds: float) -> None:
+        entry = self._items.setdefault(index, {"chartTemplateId": chart_template_id})
+        entry[name] = _ms(seconds)
+
+    def phases_ms(self) -> dict[str, float]:
+        phases = dict(self._phases)
+        phases["total"] = _ms(self._clock() - self._started_at)
+        return phases
+
+    def items_ms(self) -> list[dict[str, Any]]:
+        return [self._items[index] for index in sorted(self._items)]
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000.0, 3)
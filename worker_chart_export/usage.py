@@ -1,12 +1,16 @@
 from __future__ import annotations
 
 import logging
+import random
+import threading
 import time
+import weakref
 from dataclasses import dataclass
-from datetime import datetime, timezone
-from typing import Any, Mapping, Sequence
+from datetime import datetime, timedelta, timezone
+from typing import Any, Literal, Mapping, Sequence
 
 from .config import ChartImgAccount, DEFAULT_CHART_IMG_DAILY_LIMIT
+from .deadline import Deadline, deadline_allows, timeout_kwargs
 from .logging import log_event
 
 
@@ -25,10 +29,108 @@ class AccountSelectionResult:
     exhausted_accounts: list[str]
 
 
+@dataclass(frozen=True, slots=True)
+class UsageReservation:
+    account: ChartImgAccount
+    units: int
+    window_start: str
+    # Counter state right after the reservation was written.
+    usage: AccountUsage | None = None
+
+
 class ClaimContentionError(Exception):
     pass
 
 
+UsageWrite = Literal["precondition", "increment"]
+
+
+class UsageClaimStats:
+    """Process-wide counters for usage claims, to see how often workers collide.
+
+    `conflicts` counts writes rejected by Firestore (precondition failed or aborted),
+    `contended` claims that gave up on an account after the bounded retries, and
+    `overshoots` increments that went past the daily limit and were rolled back.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counts = {"claims": 0, "conflicts": 0, "contended": 0, "overshoots": 0}
+
+    def record(self, counter: str, count: int = 1) -> None:
+        with self._lock:
+            self._counts[counter] += count
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
+
+    def since(self, before: Mapping[str, int]) -> dict[str, int]:
+        """Counts recorded after the `stats()` snapshot `before`."""
+        current = self.stats()
+        return {name: count - before.get(name, 0) for name, count in current.items()}
+
+
+_CLAIM_STATS = UsageClaimStats()
+
+
+def usage_claim_stats() -> UsageClaimStats:
+    return _CLAIM_STATS
+
+
+class ExhaustionCache:
+    """Accounts this process knows to be out of quota, each until its quota resets.
+
+    Entries expire at the next UTC window start, or earlier when Chart-IMG said when the
+    quota resets. Selection skips these accounts without reading their usage document.
+    One cache is kept per Firestore client, since each database has its own counters.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._until: dict[str, datetime] = {}
+
+    def mark(self, account_id: str, until: datetime) -> None:
+        with self._lock:
+            self._until[account_id] = until
+
+    def until(self, account_id: str, now: datetime) -> datetime | None:
+        with self._lock:
+            until = self._until.get(account_id)
+            if until is not None and until <= now:
+                del self._until[account_id]
+                return None
+            return until
+
+
+_EXHAUSTION: weakref.WeakKeyDictionary[Any, ExhaustionCache] = weakref.WeakKeyDictionary()
+_EXHAUSTION_LOCK = threading.Lock()
+
+
+def exhaustion_cache(client: Any) -> ExhaustionCache | None:
+    """The client's exhaustion cache; None for clients that cannot be weakly referenced."""
+    with _EXHAUSTION_LOCK:
+        try:
+            cache = _EXHAUSTION.get(client)
+            if cache is None:
+                cache = ExhaustionCache()
+                _EXHAUSTION[client] = cache
+        except TypeError:
+            return None
+        return cache
+
+
+def _exhausted_locally(client: Any, account: ChartImgAccount, now: datetime) -> bool:
+    cache = exhaustion_cache(client)
+    return cache is not None and cache.until(account.id, now) is not None
+
+
+def _remember_exhausted(client: Any, account: ChartImgAccount, until: datetime) -> None:
+    cache = exhaustion_cache(client)
+    if cache is not None:
+        cache.mark(account.id, until)
+
+
 def select_account_for_request(
     *,
     client: Any,
@@ -36,14 +138,28 @@ def select_account_for_request(
     now: datetime | None = None,
     logger: logging.Logger | None = None,
     log_context: Mapping[str, Any] | None = None,
+    deadline: Deadline | None = None,
+    write: UsageWrite = "precondition",
+    shards: int = 0,
 ) -> AccountSelectionResult:
     now = now or datetime.now(timezone.utc)
     exhausted: list[str] = []
 
     for account in accounts:
+        if _exhausted_locally(client, account, now):
+            exhausted.append(account.id)
+            continue
         try:
-            result = _try_claim_account(client=client, account=account, now=now)
+            result = _try_claim_account(
+                client=client,
+                account=account,
+                now=now,
+                deadline=deadline,
+                write=write,
+                shards=shards,
+            )
         except ClaimContentionError:
+            _CLAIM_STATS.record("contended")
             if logger is not None:
                 payload = {"accountId": account.id}
                 if log_context:
@@ -53,6 +169,7 @@ def select_account_for_request(
         if result is None:
             exhausted.append(account.id)
             continue
+        _CLAIM_STATS.record("claims")
         return AccountSelectionResult(account=account, usage=result, exhausted_accounts=exhausted)
 
     if exhausted and logger is not None:
@@ -71,21 +188,42 @@ def mark_account_exhausted(
     client: Any,
     account: ChartImgAccount,
     now: datetime | None = None,
+    deadline: Deadline | None = None,
+    shards: int = 0,
+    until: datetime | None = None,
 ) -> AccountUsage:
+    """Record that `account` is out of quota until `until` or the next UTC window start.
+
+    The expiry is kept in this process and persisted as `exhaustedUntil`, so other
+    instances skip the account as well. When Chart-IMG said the quota resets before the
+    window ends, the counter is left alone so claims resume at that time.
+    """
     now = now or datetime.now(timezone.utc)
+    expires = _exhaustion_expiry(now, until)
+    _remember_exhausted(client, account, expires)
+    sharded = shared_sharded_usage(shards)
+    if sharded is not None:
+        return sharded.mark_exhausted(
+            client=client, account=account, now=now, until=expires, deadline=deadline
+        )
     doc_ref = client.collection("chart_img_accounts_usage").document(account.id)
     logger = logging.getLogger("worker-chart-export")
     max_attempts = 3
     base_backoff = 0.2
     for attempt in range(max_attempts):
-        snapshot = doc_ref.get()
+        snapshot = doc_ref.get(**timeout_kwargs(deadline))
         raw = snapshot.to_dict() if snapshot is not None else None
         data = raw if isinstance(raw, Mapping) else {}
         exists = isinstance(raw, Mapping)
 
         usage_today, window_start = _reset_window_if_needed(data, now)
         daily_limit = _resolve_daily_limit(account, data)
-        update = {"windowStart": window_start, "usageToday": daily_limit}
+        update: dict[str, Any] = {
+            "windowStart": window_start,
+            "exhaustedUntil": _format_rfc3339(expires),
+        }
+        # The write is conditional, so the counter can be written back as read.
+        update["usageToday"] = daily_limit if expires >= _next_window_start(now) else usage_today
         try:
             _write_usage_update(
                 client=client,
@@ -93,6 +231,7 @@ def mark_account_exhausted(
                 snapshot=snapshot,
                 update=update,
                 create_if_missing=not exists,
+                deadline=deadline,
             )
             return AccountUsage(
                 account_id=account.id,
@@ -102,8 +241,9 @@ def mark_account_exhausted(
             )
         except Exception as exc:
             if _is_precondition_error(exc) or _is_aborted_error(exc):
-                if attempt < max_attempts - 1:
-                    time.sleep(base_backoff * (2**attempt))
+                delay = base_backoff * (2**attempt)
+                if attempt < max_attempts - 1 and deadline_allows(deadline, delay):
+                    time.sleep(delay)
                     continue
                 log_event(
                     logger,
@@ -125,17 +265,358 @@ def mark_account_exhausted(
     )
 
 
+class UsageLease:
+    """Quota units reserved for one step, handed out locally instead of per attempt.
+
+    The first `take()` reserves `units` in one conditional write per account (usually
+    a single account), walking accounts in order like `select_account_for_request`.
+    Later attempts consume the reservation without touching Firestore; once it runs
+    out they fall back to per-request claims. `release()` refunds what was not used.
+    """
+
+    def __init__(
+        self,
+        *,
+        client: Any,
+        units: int,
+        logger: logging.Logger | None = None,
+        log_context: Mapping[str, Any] | None = None,
+        deadline: Deadline | None = None,
+        write: UsageWrite = "precondition",
+        shards: int = 0,
+    ) -> None:
+        self._client = client
+        self._units = units
+        self._write = write
+        self._shards = shards
+        self._logger = logger
+        self._log_context = dict(log_context or {})
+        self._deadline = deadline
+        self._lock = threading.Lock()
+        self._reservations: dict[str, UsageReservation] | None = None
+        self._remaining: dict[str, int] = {}
+
+    def take(self, accounts: Sequence[ChartImgAccount]) -> ChartImgAccount | None:
+        """Account for the next attempt, limited to `accounts`; None if all are exhausted."""
+        return self.claim(accounts).account
+
+    def claim(self, accounts: Sequence[ChartImgAccount]) -> AccountSelectionResult:
+        """Like `take()`, with the usage behind the claim for account strategies."""
+        with self._lock:
+            if self._reservations is None:
+                reservations = reserve_account_units(
+                    client=self._client,
+                    accounts=accounts,
+                    units=self._units,
+                    logger=self._logger,
+                    log_context=self._log_context,
+                    deadline=self._deadline,
+                    write=self._write,
+                    shards=self._shards,
+                )
+                self._reservations = {item.account.id: item for item in reservations}
+                self._remaining = {item.account.id: item.units for item in reservations}
+            for account in accounts:
+                if self._remaining.get(account.id, 0) > 0:
+                    self._remaining[account.id] -= 1
+                    return AccountSelectionResult(
+                        account=account,
+                        usage=self._reservations[account.id].usage,
+                        exhausted_accounts=[],
+                    )
+        # Retries (or accounts added by the breaker cooling down) outgrew the lease.
+        result = select_account_for_request(
+            client=self._client,
+            accounts=accounts,
+            logger=self._logger,
+            log_context=self._log_context,
+            deadline=self._deadline,
+            write=self._write,
+            shards=self._shards,
+        )
+        if result.account is not None and result.usage is not None:
+            with self._lock:
+                # Tracked without units, so a unit put back later is refunded on release.
+                self._reservations.setdefault(
+                    result.account.id,
+                    UsageReservation(
+                        account=result.account, units=0, window_start=result.usage.window_start
+                    ),
+                )
+        return result
+
+    def put_back(self, account: ChartImgAccount) -> bool:
+        """Return an unused unit of `account` to the lease. False if it is not tracked."""
+        with self._lock:
+            if self._reservations is None or account.id not in self._reservations:
+                return False
+            self._remaining[account.id] = self._remaining.get(account.id, 0) + 1
+            return True
+
+    def drop(self, account: ChartImgAccount) -> None:
+        """Forget the units left on an exhausted account; they must not be refunded."""
+        with self._lock:
+            self._remaining.pop(account.id, None)
+
+    def release(self) -> int:
+        """Refund unused units, one write per account. Returns the number refunded."""
+        with self._lock:
+            reservations = self._reservations or {}
+            leftovers = [
+                (reservations[account_id], units)
+                for account_id, units in self._remaining.items()
+                if units > 0
+            ]
+            self._remaining = {}
+        refunded = 0
+        for reservation, units in leftovers:
+            if refund_account_units(
+                client=self._client,
+                reservation=reservation,
+                units=units,
+                logger=self._logger,
+                deadline=self._deadline,
+                write=self._write,
+                shards=self._shards,
+            ):
+                refunded += units
+        return refunded
+
+
+def reserve_account_units(
+    *,
+    client: Any,
+    accounts: Sequence[ChartImgAccount],
+    units: int,
+    now: datetime | None = None,
+    logger: logging.Logger | None = None,
+    log_context: Mapping[str, Any] | None = None,
+    deadline: Deadline | None = None,
+    write: UsageWrite = "precondition",
+    shards: int = 0,
+) -> list[UsageReservation]:
+    """Reserve up to `units` across `accounts`, filling each account before the next."""
+    now = now or datetime.now(timezone.utc)
+    reservations: list[UsageReservation] = []
+    needed = units
+    for account in accounts:
+        if needed <= 0:
+            break
+        if _exhausted_locally(client, account, now):
+            continue
+        try:
+            reservation = _try_reserve_units(
+                client=client,
+                account=account,
+                units=needed,
+                now=now,
+                deadline=deadline,
+                write=write,
+                shards=shards,
+            )
+        except ClaimContentionError:
+            _CLAIM_STATS.record("contended")
+            if logger is not None:
+                payload = {"accountId": account.id}
+                if log_context:
+                    payload.update(log_context)
+                log_event(logger, "chart_api_usage_claim_conflict", **payload)
+            continue
+        if reservation is None:
+            continue
+        reservations.append(reservation)
+        _CLAIM_STATS.record("claims")
+        needed -= reservation.units
+        if logger is not None:
+            payload = {"accountId": account.id, "units": reservation.units}
+            if log_context:
+                payload.update(log_context)
+            log_event(logger, "chart_api_usage_reserved", **payload)
+    return reservations
+
+
+def refund_account_units(
+    *,
+    client: Any,
+    reservation: UsageReservation,
+    units: int,
+    now: datetime | None = None,
+    logger: logging.Logger | None = None,
+    deadline: Deadline | None = None,
+    write: UsageWrite = "precondition",
+    shards: int = 0,
+) -> bool:
+    """Give `units` back to the account's counter. False if nothing could be refunded."""
+    now = now or datetime.now(timezone.utc)
+    account = reservation.account
+    sharded = shared_sharded_usage(shards)
+    if sharded is not None:
+        if reservation.window_start != _utc_day_start(now):
+            return False
+        try:
+            sharded.refund(
+                client=client,
+                account=account,
+                units=units,
+                window_start=reservation.window_start,
+                deadline=deadline,
+            )
+        except Exception as exc:
+            if not _is_aborted_error(exc):
+                raise
+            if logger is not None:
+                log_event(
+                    logger, "chart_api_usage_refund_failed", accountId=account.id, units=units
+                )
+            return False
+        if logger is not None:
+            log_event(logger, "chart_api_usage_refunded", accountId=account.id, units=units)
+        return True
+    doc_ref = client.collection("chart_img_accounts_usage").document(account.id)
+    max_attempts = 3
+    base_backoff = 0.2
+    for attempt in range(max_attempts):
+        snapshot = doc_ref.get(**timeout_kwargs(deadline))
+        raw = snapshot.to_dict() if snapshot is not None else None
+        if not isinstance(raw, Mapping):
+            return False
+        usage_today, window_start = _reset_window_if_needed(raw, now)
+        if window_start != reservation.window_start:
+            # The daily window rolled over: the reserved units are gone with it.
+            return False
+        try:
+            if write == "increment":
+                doc_ref.update(
+                    {"usageToday": _increment(-min(units, usage_today))},
+                    **timeout_kwargs(deadline),
+                )
+            else:
+                update = {"windowStart": window_start, "usageToday": max(0, usage_today - units)}
+                _write_usage_update(
+                    client=client,
+                    doc_ref=doc_ref,
+                    snapshot=snapshot,
+                    update=update,
+                    create_if_missing=False,
+                    deadline=deadline,
+                )
+        except Exception as exc:
+            if _is_precondition_error(exc) or _is_aborted_error(exc):
+                _CLAIM_STATS.record("conflicts")
+                delay = base_backoff * (2**attempt)
+                if attempt < max_attempts - 1 and deadline_allows(deadline, delay):
+                    time.sleep(delay)
+                    continue
+                break
+            raise
+        if logger is not None:
+            log_event(logger, "chart_api_usage_refunded", accountId=account.id, units=units)
+        return True
+    if logger is not None:
+        log_event(logger, "chart_api_usage_refund_failed", accountId=account.id, units=units)
+    return False
+
+
+def _try_reserve_units(
+    *,
+    client: Any,
+    account: ChartImgAccount,
+    units: int,
+    now: datetime,
+    deadline: Deadline | None = None,
+    write: UsageWrite = "precondition",
+    shards: int = 0,
+) -> UsageReservation | None:
+    sharded = shared_sharded_usage(shards)
+    if sharded is not None or write == "increment":
+        claimed = _claim_units(
+            client=client,
+            account=account,
+            units=units,
+            now=now,
+            deadline=deadline,
+            sharded=sharded,
+        )
+        if claimed is None:
+            return None
+        return UsageReservation(
+            account=account,
+            units=claimed.granted,
+            window_start=claimed.usage.window_start,
+            usage=claimed.usage,
+        )
+    doc_ref = client.collection("chart_img_accounts_usage").document(account.id)
+    max_attempts = 3
+    base_backoff = 0.2
+    for attempt in range(max_attempts):
+        snapshot = doc_ref.get(**timeout_kwargs(deadline))
+        raw = snapshot.to_dict() if snapshot is not None else None
+        data = raw if isinstance(raw, Mapping) else {}
+        exists = isinstance(raw, Mapping)
+
+        usage_today, window_start = _reset_window_if_needed(data, now)
+        daily_limit = _resolve_daily_limit(account, data)
+        granted = min(units, daily_limit - usage_today)
+        if _known_exhausted(client, account, data, now):
+            return None
+        if granted <= 0:
+            _note_exhausted(client, account, now)
+            return None
+
+        update = {"windowStart": window_start, "usageToday": usage_today + granted}
+        try:
+            _write_usage_update(
+                client=client,
+                doc_ref=doc_ref,
+                snapshot=snapshot,
+                update=update,
+                create_if_missing=not exists,
+                deadline=deadline,
+            )
+            return UsageReservation(
+                account=account,
+                units=granted,
+                window_start=window_start,
+                usage=AccountUsage(
+                    account_id=account.id,
+                    usage_today=usage_today + granted,
+                    daily_limit=daily_limit,
+                    window_start=window_start,
+                ),
+            )
+        except Exception as exc:
+            if _is_precondition_error(exc) or _is_aborted_error(exc):
+                _CLAIM_STATS.record("conflicts")
+                delay = base_backoff * (2**attempt)
+                if attempt < max_attempts - 1 and deadline_allows(deadline, delay):
+                    time.sleep(delay)
+                    continue
+                raise ClaimContentionError("usage reservation precondition failed") from exc
+            raise
+
+    raise ClaimContentionError("usage reservation precondition failed")
+
+
 def _try_claim_account(
     *,
     client: Any,
     account: ChartImgAccount,
     now: datetime,
+    deadline: Deadline | None = None,
+    write: UsageWrite = "precondition",
+    shards: int = 0,
 ) -> AccountUsage | None:
+    sharded = shared_sharded_usage(shards)
+    if sharded is not None or write == "increment":
+        claimed = _claim_units(
+            client=client, account=account, units=1, now=now, deadline=deadline, sharded=sharded
+        )
+        return claimed.usage if claimed is not None else None
     doc_ref = client.collection("chart_img_accounts_usage").document(account.id)
     max_attempts = 3
     base_backoff = 0.2
     for attempt in range(max_attempts):
-        snapshot = doc_ref.get()
+        snapshot = doc_ref.get(**timeout_kwargs(deadline))
         raw = snapshot.to_dict() if snapshot is not None else None
         data = raw if isinstance(raw, Mapping) else {}
         exists = isinstance(raw, Mapping)
@@ -143,7 +624,10 @@ def _try_claim_account(
         usage_today, window_start = _reset_window_if_needed(data, now)
         daily_limit = _resolve_daily_limit(account, data)
 
+        if _known_exhausted(client, account, data, now):
+            return None
         if usage_today >= daily_limit:
+            _note_exhausted(client, account, now)
             if data.get("windowStart") != window_start or data.get("usageToday") != usage_today:
                 update = {"windowStart": window_start, "usageToday": usage_today}
                 try:
@@ -153,11 +637,13 @@ def _try_claim_account(
                         snapshot=snapshot,
                         update=update,
                         create_if_missing=not exists,
+                        deadline=deadline,
                     )
                 except Exception as exc:
                     if _is_precondition_error(exc) or _is_aborted_error(exc):
-                        if attempt < max_attempts - 1:
-                            time.sleep(base_backoff * (2**attempt))
+                        delay = base_backoff * (2**attempt)
+                        if attempt < max_attempts - 1 and deadline_allows(deadline, delay):
+                            time.sleep(delay)
                             continue
                     # Best-effort update for exhausted path.
             return None
@@ -171,6 +657,7 @@ def _try_claim_account(
                 snapshot=snapshot,
                 update=update,
                 create_if_missing=not exists,
+                deadline=deadline,
             )
             return AccountUsage(
                 account_id=account.id,
@@ -180,8 +667,10 @@ def _try_claim_account(
             )
         except Exception as exc:
             if _is_precondition_error(exc) or _is_aborted_error(exc):
-                if attempt < max_attempts - 1:
-                    time.sleep(base_backoff * (2**attempt))
+                _CLAIM_STATS.record("conflicts")
+                delay = base_backoff * (2**attempt)
+                if attempt < max_attempts - 1 and deadline_allows(deadline, delay):
+                    time.sleep(delay)
                     continue
                 raise ClaimContentionError("usage claim precondition failed") from exc
             raise
@@ -189,6 +678,417 @@ def _try_claim_account(
     raise ClaimContentionError("usage claim precondition failed")
 
 
+def _claim_units(
+    *,
+    client: Any,
+    account: ChartImgAccount,
+    units: int,
+    now: datetime,
+    deadline: Deadline | None,
+    sharded: ShardedUsage | None,
+) -> _IncrementClaim | None:
+    if sharded is not None:
+        return sharded.claim(
+            client=client, account=account, units=units, now=now, deadline=deadline
+        )
+    return _try_increment_units(
+        client=client, account=account, units=units, now=now, deadline=deadline
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class _IncrementClaim:
+    granted: int
+    usage: AccountUsage
+
+
+def _try_increment_units(
+    *,
+    client: Any,
+    account: ChartImgAccount,
+    units: int,
+    now: datetime,
+    deadline: Deadline | None = None,
+) -> _IncrementClaim | None:
+    """Claim up to `units` with a server-side increment instead of a conditional write.
+
+    Concurrent increments on the same document all succeed, so workers do not have to
+    re-read and retry each other's claims. Only the first claim of a UTC day (or of a
+    new document) still goes through `_write_usage_update`, so two workers resetting
+    the window cannot both start from zero. An increment that lands past the daily
+    limit (several workers claiming the last units at once) is rolled back.
+    """
+    doc_ref = client.collection("chart_img_accounts_usage").document(account.id)
+    max_attempts = 3
+    base_backoff = 0.05
+    for attempt in range(max_attempts):
+        snapshot = doc_ref.get(**timeout_kwargs(deadline))
+        raw = snapshot.to_dict() if snapshot is not None else None
+        data = raw if isinstance(raw, Mapping) else {}
+        exists = isinstance(raw, Mapping)
+
+        usage_today, window_start = _reset_window_if_needed(data, now)
+        daily_limit = _resolve_daily_limit(account, data)
+        granted = min(units, daily_limit - usage_today)
+        if _known_exhausted(client, account, data, now):
+            return None
+        if granted <= 0:
+            _note_exhausted(client, account, now)
+            return None
+
+        try:
+            if data.get("windowStart") != window_start or data.get("usageToday") != usage_today:
+                update = {"windowStart": window_start, "usageToday": usage_today + granted}
+                _write_usage_update(
+                    client=client,
+                    doc_ref=doc_ref,
+                    snapshot=snapshot,
+                    update=update,
+                    create_if_missing=not exists,
+                    deadline=deadline,
+                )
+                usage_after: int | None = usage_today + granted
+            else:
+                write_result = doc_ref.update(
+                    {"usageToday": _increment(granted)}, **timeout_kwargs(deadline)
+                )
+                usage_after = _incremented_value(write_result)
+        except Exception as exc:
+            if _is_precondition_error(exc) or _is_aborted_error(exc):
+                _CLAIM_STATS.record("conflicts")
+                delay = base_backoff * (2**attempt)
+                if attempt < max_attempts - 1 and deadline_allows(deadline, delay):
+                    time.sleep(delay)
+                    continue
+                raise ClaimContentionError("usage increment failed") from exc
+            raise
+
+        if usage_after is None:
+            # Without the transform result the read value is the best estimate.
+            usage_after = usage_today + granted
+        elif usage_after > daily_limit:
+            over = min(granted, usage_after - daily_limit)
+            doc_ref.update({"usageToday": _increment(-over)}, **timeout_kwargs(deadline))
+            _CLAIM_STATS.record("overshoots")
+            granted -= over
+            usage_after -= over
+            if granted <= 0:
+                return None
+        usage = AccountUsage(
+            account_id=account.id,
+            usage_today=usage_after,
+            daily_limit=daily_limit,
+            window_start=window_start,
+        )
+        return _IncrementClaim(granted=granted, usage=usage)
+
+    raise ClaimContentionError("usage increment failed")
+
+
+# Sharded totals are re-read at least this often, and whenever the cached total says
+# the account may not have enough units left.
+DEFAULT_USAGE_SHARD_CACHE_SEC = 2.0
+# Shard documents carry `expireAt` this long after their UTC day ends, for a Firestore
+# TTL policy to delete them.
+DEFAULT_USAGE_SHARD_RETENTION = timedelta(days=7)
+
+
+@dataclass(frozen=True, slots=True)
+class _ShardTotal:
+    used: int
+    daily_limit: int
+    window_start: str
+    fetched_at: float
+
+
+class ShardedUsage:
+    """Usage counters split over `shards` documents per account and UTC day.
+
+    Shards live in `chart_img_accounts_usage/{accountId}/shards/{YYYY-MM-DD}-{n}`. A claim
+    increments one random shard, so claim throughput is not capped by the write rate
+    of a single document. A new day starts with new shard documents, which replaces
+    the window reset of the single-document layout. The total is the sum of the day's
+    shards; it is cached for `cache_seconds` and bumped by this process's own claims,
+    so most claims cost one write and no read. Other instances' claims are seen on the
+    next refresh, so the daily limit may be overshot by what they claim in between;
+    Chart-IMG's own 429 then marks the account exhausted. Each shard is written with an
+    `expireAt` timestamp `retention` after its day, for a Firestore TTL policy.
+    """
+
+    def __init__(
+        self,
+        *,
+        shards: int,
+        cache_seconds: float = DEFAULT_USAGE_SHARD_CACHE_SEC,
+        clock: Any = time.monotonic,
+        rng: random.Random | None = None,
+        retention: timedelta = DEFAULT_USAGE_SHARD_RETENTION,
+    ) -> None:
+        self.shards = shards
+        self.retention = retention
+        self._cache_seconds = cache_seconds
+        self._clock = clock
+        self._rng = rng or random.Random()
+        self._lock = threading.Lock()
+        self._totals: dict[str, _ShardTotal] = {}
+
+    def claim(
+        self,
+        *,
+        client: Any,
+        account: ChartImgAccount,
+        units: int,
+        now: datetime,
+        deadline: Deadline | None = None,
+    ) -> _IncrementClaim | None:
+        window_start = _utc_day_start(now)
+        total = self._cached_total(account, window_start)
+        if total is None or total.daily_limit - total.used < units:
+            total = self.refresh(client=client, account=account, now=now, deadline=deadline)
+        if _exhausted_locally(client, account, now):
+            # The refresh found `exhaustedUntil` from another instance.
+            return None
+        granted = min(units, total.daily_limit - total.used)
+        if granted <= 0:
+            _note_exhausted(client, account, now)
+            return None
+        max_attempts = 3
+        base_backoff = 0.05
+        for attempt in range(max_attempts):
+            try:
+                self._increment_shard(client, account, window_start, granted, deadline=deadline)
+                break
+            except Exception as exc:
+                if _is_aborted_error(exc):
+                    # Another random shard is tried next; they rarely all contend.
+                    _CLAIM_STATS.record("conflicts")
+                    delay = base_backoff * (2**attempt)
+                    if attempt < max_attempts - 1 and deadline_allows(deadline, delay):
+                        time.sleep(delay)
+                        continue
+                    raise ClaimContentionError("usage shard increment failed") from exc
+                raise
+        used = self._add(account, window_start, granted)
+        usage = AccountUsage(
+            account_id=account.id,
+            usage_today=used,
+            daily_limit=total.daily_limit,
+            window_start=window_start,
+        )
+        return _IncrementClaim(granted=granted, usage=usage)
+
+    def refund(
+        self,
+        *,
+        client: Any,
+        account: ChartImgAccount,
+        units: int,
+        window_start: str,
+        deadline: Deadline | None = None,
+    ) -> None:
+        self._increment_shard(client, account, window_start, -units, deadline=deadline)
+        self._add(account, window_start, -units)
+
+    def mark_exhausted(
+        self,
+        *,
+        client: Any,
+        account: ChartImgAccount,
+        now: datetime,
+        until: datetime,
+        deadline: Deadline | None = None,
+    ) -> AccountUsage:
+        """Persist `exhaustedUntil` on the account document; no shard is touched."""
+        window_start = _utc_day_start(now)
+        doc_ref = client.collection("chart_img_accounts_usage").document(account.id)
+        max_attempts = 3
+        base_backoff = 0.2
+        for attempt in range(max_attempts):
+            try:
+                doc_ref.set(
+                    {"exhaustedUntil": _format_rfc3339(until)},
+                    merge=True,
+                    **timeout_kwargs(deadline),
+                )
+                break
+            except Exception as exc:
+                if not _is_aborted_error(exc):
+                    raise
+                delay = base_backoff * (2**attempt)
+                if attempt < max_attempts - 1 and deadline_allows(deadline, delay):
+                    time.sleep(delay)
+                    continue
+                # This process still skips the account; other instances find out later.
+                log_event(
+                    logging.getLogger("worker-chart-export"),
+                    "usage_mark_exhausted_failed",
+                    accountId=account.id,
+                )
+                break
+        total = self._cached_total(account, window_start, any_age=True)
+        daily_limit = (
+            total.daily_limit
+            if total is not None
+            else account.daily_limit or DEFAULT_CHART_IMG_DAILY_LIMIT
+        )
+        return AccountUsage(
+            account_id=account.id,
+            usage_today=daily_limit,
+            daily_limit=daily_limit,
+            window_start=window_start,
+        )
+
+    def refresh(
+        self,
+        *,
+        client: Any,
+        account: ChartImgAccount,
+        now: datetime,
+        deadline: Deadline | None = None,
+    ) -> _ShardTotal:
+        """Read the account document and the day's shards in one batch and cache the sum."""
+        window_start = _utc_day_start(now)
+        doc_ref = client.collection("chart_img_accounts_usage").document(account.id)
+        refs = [doc_ref] + [
+            self._shard_ref(client, account, window_start, shard) for shard in range(self.shards)
+        ]
+        if hasattr(client, "get_all"):
+            snapshots = list(client.get_all(refs, **timeout_kwargs(deadline)))
+        else:
+            snapshots = [ref.get(**timeout_kwargs(deadline)) for ref in refs]
+        data: Mapping[str, Any] = {}
+        used = 0
+        for ref, snapshot in zip(refs, snapshots):
+            raw = snapshot.to_dict() if snapshot is not None else None
+            if not isinstance(raw, Mapping):
+                continue
+            if ref is doc_ref:
+                data = raw
+            elif isinstance(raw.get("usageToday"), int):
+                used += raw["usageToday"]
+        daily_limit = _resolve_daily_limit(account, data)
+        _known_exhausted(client, account, data, now)
+        total = _ShardTotal(
+            used=max(0, used),
+            daily_limit=daily_limit,
+            window_start=window_start,
+            fetched_at=self._clock(),
+        )
+        with self._lock:
+            self._totals[account.id] = total
+        return total
+
+    def _cached_total(
+        self, account: ChartImgAccount, window_start: str, *, any_age: bool = False
+    ) -> _ShardTotal | None:
+        with self._lock:
+            total = self._totals.get(account.id)
+        if total is None or total.window_start != window_start:
+            return None
+        if not any_age and self._clock() - total.fetched_at > self._cache_seconds:
+            return None
+        return total
+
+    def _add(self, account: ChartImgAccount, window_start: str, units: int) -> int:
+        with self._lock:
+            total = self._totals.get(account.id)
+            if total is None or total.window_start != window_start:
+                return max(0, units)
+            total = _ShardTotal(
+                used=max(0, total.used + units),
+                daily_limit=total.daily_limit,
+                window_start=window_start,
+                fetched_at=total.fetched_at,
+            )
+            self._totals[account.id] = total
+            return total.used
+
+    def _increment_shard(
+        self,
+        client: Any,
+        account: ChartImgAccount,
+        window_start: str,
+        units: int,
+        *,
+        deadline: Deadline | None = None,
+    ) -> None:
+        shard = self._rng.randrange(self.shards)
+        shard_ref = self._shard_ref(client, account, window_start, shard)
+        # A merge-set creates the shard on its first increment of the day.
+        day = datetime.strptime(window_start[:10], "%Y-%m-%d").replace(tzinfo=timezone.utc)
+        expire_at = day + timedelta(days=1) + self.retention
+        shard_ref.set(
+            {"windowStart": window_start, "usageToday": _increment(units), "expireAt": expire_at},
+            merge=True,
+            **timeout_kwargs(deadline),
+        )
+
+    @staticmethod
+    def _shard_ref(client: Any, account: ChartImgAccount, window_start: str, shard: int) -> Any:
+        return (
+            client.collection("chart_img_accounts_usage")
+            .document(account.id)
+            .collection("shards")
+            .document(f"{window_start[:10]}-{shard}")
+        )
+
+
+_SHARDED_USAGE: dict[int, ShardedUsage] = {}
+_SHARDED_USAGE_LOCK = threading.Lock()
+
+
+def shared_sharded_usage(shards: int) -> ShardedUsage | None:
+    """Process-wide sharded counters, so cached totals are shared across steps.
+
+    0 shards keeps the single usage document per account.
+    """
+    if shards <= 0:
+        return None
+    with _SHARDED_USAGE_LOCK:
+        usage = _SHARDED_USAGE.get(shards)
+        if usage is None:
+            usage = ShardedUsage(shards=shards)
+            _SHARDED_USAGE[shards] = usage
+        return usage
+
+
+def _increment(amount: int) -> Any:
+    from google.cloud.firestore import Increment  # type: ignore
+
+    return Increment(amount)
+
+
+def _incremented_value(write_result: Any) -> int | None:
+    # Firestore returns the value a transform produced alongside the write.
+    transform_results = getattr(write_result, "transform_results", None)
+    if not transform_results:
+        return None
+    value = getattr(transform_results[0], "integer_value", None)
+    return value if isinstance(value, int) else None
+
+
+def _known_exhausted(
+    client: Any, account: ChartImgAccount, data: Mapping[str, Any], now: datetime
+) -> bool:
+    # Another instance marked the account exhausted; remember it here too.
+    until = _parse_rfc3339(data.get("exhaustedUntil"))
+    if until is None or until <= now:
+        return False
+    _remember_exhausted(client, account, until)
+    return True
+
+
+def _note_exhausted(client: Any, account: ChartImgAccount, now: datetime) -> None:
+    _remember_exhausted(client, account, _next_window_start(now))
+
+
+def _exhaustion_expiry(now: datetime, until: datetime | None) -> datetime:
+    window_end = _next_window_start(now)
+    if until is None or until >= window_end:
+        return window_end
+    return max(now, until)
+
+
 def _resolve_daily_limit(account: ChartImgAccount, data: Mapping[str, Any]) -> int:
     doc_limit = data.get("dailyLimit")
     if isinstance(doc_limit, int) and doc_limit > 0:
@@ -221,6 +1121,16 @@ def _parse_rfc3339(value: Any) -> datetime | None:
         return None
 
 
+def _next_window_start(now: datetime) -> datetime:
+    return datetime(now.year, now.month, now.day, tzinfo=timezone.utc) + timedelta(days=1)
+
+
+def _format_rfc3339(moment: datetime) -> str:
+    return moment.astimezone(timezone.utc).replace(microsecond=0).isoformat().replace(
+        "+00:00", "Z"
+    )
+
+
 def _utc_day_start(now: datetime) -> str:
     start = datetime(now.year, now.month, now.day, tzinfo=timezone.utc)
     return start.replace(microsecond=0).isoformat().replace("+00:00", "Z")
@@ -255,18 +1165,20 @@ def _write_usage_update(
     snapshot: Any,
     update: dict[str, Any],
     create_if_missing: bool,
+    deadline: Deadline | None = None,
 ) -> None:
+    timeout = timeout_kwargs(deadline)
     if create_if_missing:
         if hasattr(client, "write_option"):
             option = client.write_option(exists=False)
-            doc_ref.set(update, merge=False, option=option)
+            doc_ref.set(update, merge=False, option=option, **timeout)
         else:
-            doc_ref.set(update, merge=False)
+            doc_ref.set(update, merge=False, **timeout)
         return
 
     update_time = getattr(snapshot, "update_time", None)
     if update_time is not None and hasattr(client, "write_option"):
         option = client.write_option(last_update_time=update_time)
-        doc_ref.update(update, option=option)
+        doc_ref.update(update, option=option, **timeout)
     else:
-        doc_ref.update(update)
+        doc_ref.update(update, **timeout)